@@ -31,6 +31,7 @@ from flask import Flask
 from flask_cors import CORS
 from models import db
 from config import Config, DEFAULT_BACKEND_PORT, DEFAULT_FRONTEND_PORT
+from utils.database import build_engine_options, display_database_url, normalize_database_url
 from controllers.material_controller import material_bp, material_global_bp
 from controllers.reference_file_controller import reference_file_bp
 from controllers.settings_controller import settings_bp
@@ -94,6 +95,11 @@ def create_app():
     if db_path_env:
         os.makedirs(os.path.dirname(db_path_env), exist_ok=True)
         app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{Path(db_path_env).as_posix()}'
+    app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'],
+        app.config['MAX_IMAGE_WORKERS'] + app.config['MAX_DESCRIPTION_WORKERS'],
+    )
     if upload_folder_env:
         os.makedirs(upload_folder_env, exist_ok=True)
         app.config['UPLOAD_FOLDER'] = upload_folder_env
@@ -433,6 +439,17 @@ if __name__ == '__main__':
         port = _compute_worktree_port(DEFAULT_BACKEND_PORT)
     debug = os.getenv('FLASK_ENV', 'development') == 'development'
 
+    # With the debug reloader the parent process only watches files; resume
+    # interrupted tasks in the process that actually serves requests.
+    if app.config.get('RESUME_INTERRUPTED_TASKS') and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        from services.task_manager import recover_interrupted_tasks
+        try:
+            # In worker mode queued tasks belong to the worker pool, which recovers them itself.
+            queued_scope = False if app.config.get('TASK_EXECUTION_MODE') == 'worker' else None
+            recover_interrupted_tasks(app, queued=queued_scope)
+        except Exception as e:
+            logging.warning(f"Failed to recover interrupted tasks: {e}")
+
     if port == 0:
         from werkzeug.serving import make_server
 
@@ -450,7 +467,7 @@ if __name__ == '__main__':
             f"Environment: {os.getenv('FLASK_ENV', 'development')}\n"
             "Debug mode: False\n"
             f"API Base URL: http://localhost:{port}/api\n"
-            f"Database: {app.config['SQLALCHEMY_DATABASE_URI']}\n"
+            f"Database: {display_database_url(app.config['SQLALCHEMY_DATABASE_URI'])}\n"
             f"Uploads: {app.config['UPLOAD_FOLDER']}"
         )
 
@@ -472,7 +489,7 @@ if __name__ == '__main__':
         f"Environment: {os.getenv('FLASK_ENV', 'development')}\n"
         f"Debug mode: {debug}\n"
         f"API Base URL: http://localhost:{port}/api\n"
-        f"Database: {app.config['SQLALCHEMY_DATABASE_URI']}\n"
+        f"Database: {display_database_url(app.config['SQLALCHEMY_DATABASE_URI'])}\n"
         f"Uploads: {app.config['UPLOAD_FOLDER']}"
     )
 
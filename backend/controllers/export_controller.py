@@ -11,7 +11,7 @@ import zipfile
 from datetime import datetime
 from pathlib import Path
 
-from flask import Blueprint, request, current_app
+from flask import Blueprint, request, current_app, send_file
 from werkzeug.utils import secure_filename
 from models import db, Project, Page, Task
 from utils import (
@@ -53,6 +53,26 @@ def _resolve_exports_root(project_id):
     return exports_root
 
 
+def _export_file_response(project_id, filename, output_path, message):
+    """Return download links for an export on disk, or the file itself with ?download=1.
+
+    The file is streamed from disk by send_file (conditional, so Range/If-None-Match
+    requests are honoured and large exports can be resumed).
+    """
+    if request.args.get('download', '').lower() in ('1', 'true'):
+        return send_file(output_path, as_attachment=True, download_name=filename, conditional=True)
+
+    download_path = f"/files/{project_id}/exports/{filename}"
+    base_url = request.url_root.rstrip("/")
+    return success_response(
+        data={
+            "download_url": download_path,
+            "download_url_absolute": f"{base_url}{download_path}",
+        },
+        message=message
+    )
+
+
 @export_bp.route('/<project_id>/exports', methods=['GET'])
 def list_exports(project_id):
     """
@@ -147,6 +167,7 @@ def export_pptx(project_id):
     Query params:
         - filename: optional custom filename
         - page_ids: optional comma-separated page IDs to export (if not provided, exports all pages)
+        - download: optional, "1" returns the file itself (supports Range) instead of JSON
     
     Returns:
         JSON with download URL, e.g.
@@ -208,18 +229,7 @@ def export_pptx(project_id):
             transition_effects=transition_effects,
         )
 
-        # Build download URLs
-        download_path = f"/files/{project_id}/exports/{filename}"
-        base_url = request.url_root.rstrip("/")
-        download_url_absolute = f"{base_url}{download_path}"
-
-        return success_response(
-            data={
-                "download_url": download_path,
-                "download_url_absolute": download_url_absolute,
-            },
-            message="Export PPTX task created"
-        )
+        return _export_file_response(project_id, filename, output_path, "Export PPTX task created")
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -233,6 +243,7 @@ def export_pdf(project_id):
     Query params:
         - filename: optional custom filename
         - page_ids: optional comma-separated page IDs to export (if not provided, exports all pages)
+        - download: optional, "1" returns the file itself (supports Range) instead of JSON
     
     Returns:
         JSON with download URL, e.g.
@@ -282,18 +293,7 @@ def export_pdf(project_id):
         # Generate PDF file on disk
         ExportService.create_pdf_from_images(image_paths, output_file=output_path, aspect_ratio=project.image_aspect_ratio)
 
-        # Build download URLs
-        download_path = f"/files/{project_id}/exports/{filename}"
-        base_url = request.url_root.rstrip("/")
-        download_url_absolute = f"{base_url}{download_path}"
-
-        return success_response(
-            data={
-                "download_url": download_path,
-                "download_url_absolute": download_url_absolute,
-            },
-            message="Export PDF task created"
-        )
+        return _export_file_response(project_id, filename, output_path, "Export PDF task created")
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -306,6 +306,7 @@ def export_images(project_id):
 
     Single image: copies to exports dir and returns download URL.
     Multiple images: creates a ZIP archive and returns download URL.
+    With download=1 the file itself is returned instead (supports Range).
     """
     try:
         if '..' in project_id or '/' in project_id or '\\' in project_id:
@@ -352,16 +353,7 @@ def export_images(project_id):
                     ext = os.path.splitext(path)[1] or '.png'
                     zf.write(path, f'slide_{page.order_index + 1:03d}{ext}')
 
-        download_path = f"/files/{s_project_id}/exports/{filename}"
-        base_url = request.url_root.rstrip("/")
-
-        return success_response(
-            data={
-                "download_url": download_path,
-                "download_url_absolute": f"{base_url}{download_path}",
-            },
-            message="Export images completed"
-        )
+        return _export_file_response(s_project_id, filename, output_path, "Export images completed")
 
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -480,7 +472,31 @@ def export_editable_pptx(project_id):
         }
         if client_task_id:
             task_kwargs['id'] = client_task_id
+
+        # 读取项目的导出设置
+        export_extractor_method = project.export_extractor_method or 'hybrid'
+        export_inpaint_method = project.export_inpaint_method or 'hybrid'
+        enable_icon_subject_extraction = (
+            True if project.enable_icon_subject_extraction is None
+            else bool(project.enable_icon_subject_extraction)
+        )
+        logger.info(
+            f"Export settings: extractor={export_extractor_method}, "
+            f"inpaint={export_inpaint_method}, "
+            f"icon_subject_extraction={enable_icon_subject_extraction}"
+        )
+
         task = Task(**task_kwargs)
+        # 持久化参数，TASK_EXECUTION_MODE=worker 时由 services.worker 进程执行
+        task.set_params({
+            'filename': filename,
+            'page_ids': selected_page_ids if selected_page_ids else None,
+            'max_depth': max_depth,
+            'max_workers': max_workers,
+            'export_extractor_method': export_extractor_method,
+            'export_inpaint_method': export_inpaint_method,
+            'enable_icon_subject_extraction': enable_icon_subject_extraction,
+        })
         db.session.add(task)
         db.session.commit()
         
@@ -496,19 +512,6 @@ def export_editable_pptx(project_id):
             # Get Flask app instance for background task
             app = current_app._get_current_object()
 
-            # 读取项目的导出设置
-            export_extractor_method = project.export_extractor_method or 'hybrid'
-            export_inpaint_method = project.export_inpaint_method or 'hybrid'
-            enable_icon_subject_extraction = (
-                True if project.enable_icon_subject_extraction is None
-                else bool(project.enable_icon_subject_extraction)
-            )
-            logger.info(
-                f"Export settings: extractor={export_extractor_method}, "
-                f"inpaint={export_inpaint_method}, "
-                f"icon_subject_extraction={enable_icon_subject_extraction}"
-            )
-
             # 使用递归分析任务（不需要 ai_service，使用 ImageEditabilityService）
             task_manager.submit_task(
                 task.id,
@@ -643,6 +646,18 @@ def export_video(project_id):
             task_type='EXPORT_VIDEO',
             status='PENDING',
         )
+        task.set_params({
+            'filename': filename,
+            'voice': voice,
+            'rate': rate,
+            'speed': speed,
+            'generate_narration': generate_narration,
+            'enable_ken_burns': enable_ken_burns,
+            'include_no_image_pages': include_no_image_pages,
+            'page_ids': selected_page_ids if selected_page_ids else None,
+            'language': language,
+            'narration_config': narration_config,
+        })
         db.session.add(task)
         db.session.commit()
 
@@ -1,9 +1,17 @@
 """
 File Controller - handles static file serving
 """
-from flask import Blueprint, send_from_directory, current_app
+from flask import Blueprint, send_from_directory, current_app, request
 from utils import error_response, not_found
 from utils.path_utils import find_file_with_prefix
+from services.thumbnail_service import (
+    cache_control_for,
+    get_variant,
+    is_image_file,
+    negotiate_format,
+    snap_width,
+    strong_etag,
+)
 import os
 from pathlib import Path
 from werkzeug.utils import secure_filename
@@ -11,10 +19,43 @@ from werkzeug.utils import secure_filename
 file_bp = Blueprint('files', __name__, url_prefix='/files')
 
 
+def _send_cacheable_file(file_dir, filename, as_attachment=False):
+    """
+    Send a file with a strong ETag and Cache-Control; images honour ?w= and ?format= variants.
+
+    ?w=<px> snaps up to a thumbnail pyramid width, ?format=webp|avif|jpeg|auto picks the
+    encoding ('auto' negotiates from the Accept header). Variants are generated lazily.
+    """
+    file_dir = str(file_dir)
+    served_dir, served_name = file_dir, filename
+    negotiated = request.args.get('format', '').lower() == 'auto'
+
+    if is_image_file(filename) and ('w' in request.args or 'format' in request.args):
+        width = request.args.get('w', type=int)
+        if 'w' in request.args and (width is None or width <= 0):
+            return error_response('INVALID_REQUEST', 'w must be a positive integer', 400)
+        fmt = negotiate_format(request.args.get('format'), request.headers.get('Accept', ''))
+        variant = get_variant(Path(file_dir) / filename, snap_width(width) if width else None, fmt)
+        served_dir, served_name = str(variant.parent), variant.name
+
+    response = send_from_directory(
+        served_dir, served_name,
+        as_attachment=as_attachment,
+        download_name=filename if as_attachment else None,
+        etag=strong_etag(Path(served_dir) / served_name),
+    )
+    response.headers['Cache-Control'] = cache_control_for(filename, versioned_url='v' in request.args)
+    if negotiated:
+        response.vary.add('Accept')
+    return response
+
+
 @file_bp.route('/<project_id>/<file_type>/<filename>', methods=['GET'])
 def serve_file(project_id, file_type, filename):
     """
     GET /files/{project_id}/{type}/{filename} - Serve static files
+
+    Images accept ?w=<px> (thumbnail pyramid) and ?format=webp|avif|jpeg|auto.
     
     Args:
         project_id: Project UUID
@@ -44,7 +85,7 @@ def serve_file(project_id, file_type, filename):
         # Exports should be downloaded rather than opened in browser for better UX and
         # to keep E2E download assertions stable.
         as_attachment = file_type == 'exports'
-        return send_from_directory(file_dir, filename, as_attachment=as_attachment)
+        return _send_cacheable_file(file_dir, filename, as_attachment=as_attachment)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -80,7 +121,7 @@ def serve_template_asset(project_id, asset_id, filename):
         if not file_path.exists() or not file_path.is_file():
             return not_found('File')
 
-        return send_from_directory(str(file_dir), safe_filename)
+        return _send_cacheable_file(file_dir, safe_filename)
 
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -113,7 +154,7 @@ def serve_user_template(template_id, filename):
             return not_found('File')
         
         # Serve file
-        return send_from_directory(file_dir, filename)
+        return _send_cacheable_file(file_dir, filename)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -145,7 +186,7 @@ def serve_global_material(filename):
             return not_found('File')
         
         # Serve file
-        return send_from_directory(file_dir, safe_filename)
+        return _send_cacheable_file(file_dir, safe_filename)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -548,6 +548,7 @@ def generate_page_image(project_id, page_id):
             combined_requirements = combined_requirements + style_requirement
         
         # Create async task for image generation
+        image_prompt_field_names = get_image_prompt_field_names()
         task = Task(
             project_id=project_id,
             task_type='GENERATE_PAGE_IMAGE',
@@ -558,12 +559,21 @@ def generate_page_image(project_id, page_id):
             'completed': 0,
             'failed': 0
         })
+        task.set_params({
+            'page_id': page_id,
+            'outline': outline,
+            'use_template': use_template,
+            'aspect_ratio': project.image_aspect_ratio,
+            'resolution': current_app.config['DEFAULT_RESOLUTION'],
+            'extra_requirements': combined_requirements if combined_requirements.strip() else None,
+            'language': language,
+            'image_prompt_field_names': image_prompt_field_names,
+        })
         db.session.add(task)
         db.session.commit()
         
         # Get app instance for background task
         app = current_app._get_current_object()
-        image_prompt_field_names = get_image_prompt_field_names()
         
         # Submit background task
         task_manager.submit_task(
@@ -733,6 +743,15 @@ def edit_page_image(project_id, page_id):
             'completed': 0,
             'failed': 0
         })
+        task.set_params({
+            'page_id': page_id,
+            'edit_instruction': data['edit_instruction'],
+            'aspect_ratio': project.image_aspect_ratio,
+            'resolution': current_app.config['DEFAULT_RESOLUTION'],
+            'original_description': original_description,
+            'additional_ref_images': additional_ref_images if additional_ref_images else None,
+            'temp_dir': str(temp_dir) if temp_dir else None,
+        })
         db.session.add(task)
         db.session.commit()
         
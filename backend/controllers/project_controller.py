@@ -19,6 +19,8 @@ from werkzeug.utils import secure_filename
 from models import db, Project, Page, Task, ReferenceFile
 from services import ProjectContext, FileService
 from services.ai_service_manager import get_ai_service
+from services.progress_bus import progress_bus, progress_delta, TERMINAL_STATUSES
+from services.reference_index import index_path_for
 from services.task_manager import (
     task_manager,
     generate_descriptions_task,
@@ -68,19 +70,22 @@ def _get_project_reference_files_content(project_id: str) -> list:
         project_id: Project ID
         
     Returns:
-        List of dicts with 'filename' and 'content' keys
+        List of dicts with 'filename' and 'content' keys, plus 'index_path'
+        (the chunk index sidecar used for per-page retrieval)
     """
     reference_files = ReferenceFile.query.filter_by(
         project_id=project_id,
         parse_status='completed'
     ).all()
     
+    upload_folder = Path(current_app.config['UPLOAD_FOLDER'])
     files_content = []
     for ref_file in reference_files:
         if ref_file.markdown_content:
             files_content.append({
                 'filename': ref_file.filename,
-                'content': ref_file.markdown_content
+                'content': ref_file.markdown_content,
+                'index_path': str(index_path_for(upload_folder / ref_file.file_path)) if ref_file.file_path else None,
             })
     
     return files_content
@@ -837,6 +842,13 @@ def generate_descriptions(project_id):
             'completed': 0,
             'failed': 0
         })
+        # Persist arguments so the task can be resumed after a backend restart
+        task.set_params({
+            'outline': outline,
+            'max_workers': max_workers,
+            'language': language,
+            'detail_level': detail_level,
+        })
         
         db.session.add(task)
         db.session.commit()
@@ -1107,6 +1119,20 @@ def generate_images(project_id):
         if project.template_style:
             style_requirement = f"\n\nppt页面风格描述：\n\n{project.template_style}"
             combined_requirements = combined_requirements + style_requirement
+        image_prompt_field_names = get_image_prompt_field_names()
+
+        # Persist arguments so the task can be resumed after a backend restart
+        task.set_params({
+            'outline': outline,
+            'use_template': use_template,
+            'max_workers': max_workers,
+            'aspect_ratio': project.image_aspect_ratio,
+            'resolution': current_app.config['DEFAULT_RESOLUTION'],
+            'extra_requirements': combined_requirements if combined_requirements.strip() else None,
+            'language': language,
+            'page_ids': selected_page_ids if selected_page_ids else None,
+            'image_prompt_field_names': image_prompt_field_names,
+        })
         
         # Set all target pages to QUEUED before submitting background task
         # This ensures the status is visible to frontend immediately after API returns
@@ -1116,7 +1142,6 @@ def generate_images(project_id):
 
         # Get app instance for background task
         app = current_app._get_current_object()
-        image_prompt_field_names = get_image_prompt_field_names()
 
         # Submit background task
         task_manager.submit_task(
@@ -1171,6 +1196,82 @@ def get_task_status(project_id, task_id):
         return error_response('SERVER_ERROR', str(e), 500)
 
 
+# Seconds without a bus update before the stream re-reads the database
+# (covers tasks running in worker processes) and sends a keep-alive
+TASK_STREAM_IDLE_SECONDS = 2.0
+
+
+@project_bp.route('/<project_id>/tasks/<task_id>/stream', methods=['GET'])
+def stream_task_status(project_id, task_id):
+    """
+    GET /api/projects/{project_id}/tasks/{task_id}/stream - Push task progress via SSE
+
+    Events:
+    - snapshot: full task dict (same shape as GET .../tasks/{task_id})
+    - progress: only the fields that changed, e.g. {"progress": {"completed": 3}}
+    - done: full task dict once the task is COMPLETED or FAILED; the stream then ends
+    """
+    task = Task.query.get(task_id)
+    if not task or task.project_id != project_id:
+        return not_found('Task')
+    app = current_app._get_current_object()
+
+    def read_db_state():
+        db.session.expire_all()
+        row = Task.query.get(task_id)
+        return row.to_dict() if row else None
+
+    def sse_generate():
+        with app.app_context():
+            state = read_db_state()
+            seq, bus_state = progress_bus.get(task_id)
+            if bus_state and state['status'] not in TERMINAL_STATUSES:
+                state.update(bus_state)
+            yield _sse_event('snapshot', state)
+
+            while state['status'] not in TERMINAL_STATUSES:
+                new_seq, bus_state = progress_bus.wait(task_id, seq, TASK_STREAM_IDLE_SECONDS)
+                if new_seq > seq:
+                    seq = new_seq
+                    current = {**state, **bus_state}
+                else:
+                    # Nothing published in this process: the task may run in a
+                    # worker process, or finished through a path that only
+                    # writes the database.
+                    db_state = read_db_state()
+                    if db_state is None:
+                        yield _sse_event('error', {'message': 'Task not found'})
+                        return
+                    if bus_state and db_state['status'] not in TERMINAL_STATUSES:
+                        db_state.update(bus_state)
+                    current = db_state
+
+                delta = progress_delta(state, current)
+                state = current
+                if state['status'] in TERMINAL_STATUSES:
+                    break
+                if delta:
+                    yield _sse_event('progress', delta)
+                else:
+                    yield ": keep-alive\n\n"
+
+            final_state = read_db_state() or state
+            if final_state['status'] not in TERMINAL_STATUSES:
+                # Bus saw the terminal state before the commit became visible here
+                final_state.update({k: v for k, v in state.items() if k != 'task_id'})
+            yield _sse_event('done', final_state)
+
+    return Response(
+        stream_with_context(sse_generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache, no-transform',
+            'X-Accel-Buffering': 'no',
+            'Connection': 'keep-alive',
+        },
+    )
+
+
 @project_bp.route('/<project_id>/refine/outline', methods=['POST'])
 def refine_outline(project_id):
     """
@@ -17,6 +17,7 @@ from models import db, ReferenceFile, Project
 from utils.response import success_response, error_response, bad_request, not_found
 from services.file_parser_service import FileParserService
 from services.material_import_service import import_reference_markdown_images_to_materials
+from services.reference_index import build_and_save_index, index_path_for
 
 logger = logging.getLogger(__name__)
 
@@ -108,6 +109,11 @@ def _parse_file_async(file_id: str, file_path: str, filename: str, app):
                         except Exception as img_err:
                             logger.error("Failed to import images to materials: %s", img_err, exc_info=True)
                             db.session.rollback()
+                # 为逐页检索建立分块索引；失败时生成描述会在内存中重建
+                try:
+                    build_and_save_index(markdown_content or '', file_path)
+                except Exception as index_err:
+                    logger.warning(f"Failed to index reference file {filename}: {index_err}")
                 if failed_image_count > 0:
                     logger.warning(f"File parsing completed: {filename}, but {failed_image_count} images failed to generate captions")
                 else:
@@ -280,6 +286,7 @@ def delete_reference_file(file_id):
             if file_path.exists():
                 file_path.unlink()
                 logger.info(f"Deleted file from disk: {file_path}")
+            index_path_for(file_path).unlink(missing_ok=True)
         except Exception as e:
             logger.warning(f"Failed to delete file from disk: {str(e)}")
         
@@ -21,6 +21,8 @@ from services.ai_providers.ocr.baidu_accurate_ocr_provider import create_baidu_a
 from services.ai_providers.image.baidu_inpainting_provider import create_baidu_inpainting_provider
 from services.ai_providers import LAZYLLM_VENDORS
 from services.task_manager import task_manager
+from services.rate_limiter import rate_limit_snapshot
+from services.http_client import pool_stats
 from services.update_check_service import check_for_update
 
 logger = logging.getLogger(__name__)
@@ -565,6 +567,24 @@ def get_active_config():
     })
 
 
+@settings_bp.route("/rate-limits", methods=["GET"], strict_slashes=False)
+def get_rate_limits():
+    """
+    GET /api/settings/rate-limits - Current adaptive concurrency and backoff state
+    of the AI call limiters, per provider and model (this process only).
+    """
+    return success_response({"limiters": rate_limit_snapshot()})
+
+
+@settings_bp.route("/http-pools", methods=["GET"], strict_slashes=False)
+def get_http_pools():
+    """
+    GET /api/settings/http-pools - Requests, connections opened and reused per
+    host in the shared HTTP connection pools (this process only).
+    """
+    return success_response({"pools": pool_stats()})
+
+
 @settings_bp.route("/verify", methods=["POST"], strict_slashes=False)
 def verify_api_key():
     """
@@ -84,6 +84,9 @@ def repair_desktop_settings_schema(db):
         },
         'tasks': {
             'completed_at': 'DATETIME',
+            'params': 'TEXT',
+            'resume_count': 'INTEGER NOT NULL DEFAULT 0',
+            'worker_id': 'VARCHAR(100)',
         },
         'user_style_templates': {
             'color': 'VARCHAR(20)',
@@ -0,0 +1,41 @@
+"""add resumable params and resume counter to tasks
+
+Revision ID: 020_task_recovery
+Revises: 78475bbce762
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision = '020_task_recovery'
+down_revision = '78475bbce762'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        if not _column_exists('tasks', 'params'):
+            batch_op.add_column(sa.Column('params', sa.Text(), nullable=True))
+        if not _column_exists('tasks', 'resume_count'):
+            batch_op.add_column(
+                sa.Column('resume_count', sa.Integer(), nullable=False, server_default='0')
+            )
+
+
+def downgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        if _column_exists('tasks', 'resume_count'):
+            batch_op.drop_column('resume_count')
+        if _column_exists('tasks', 'params'):
+            batch_op.drop_column('params')
@@ -0,0 +1,35 @@
+"""add worker_id to tasks for the multi-process worker pool
+
+Revision ID: 021_task_worker_id
+Revises: 020_task_recovery
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision = '021_task_worker_id'
+down_revision = '020_task_recovery'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        if not _column_exists('tasks', 'worker_id'):
+            batch_op.add_column(sa.Column('worker_id', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        if _column_exists('tasks', 'worker_id'):
+            batch_op.drop_column('worker_id')
@@ -0,0 +1,51 @@
+"""store JSON document columns as JSONB/JSON on server databases
+
+Revision ID: 022_json_columns
+Revises: 021_task_worker_id
+Create Date: 2026-10-18
+
+The models expose these columns as JSON strings (models.types.JSONText). On
+PostgreSQL they become JSONB and on MySQL JSON; SQLite keeps TEXT, so this
+migration does nothing there.
+"""
+
+from alembic import op
+
+
+revision = '022_json_columns'
+down_revision = '021_task_worker_id'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = (
+    ('pages', 'outline_content'),
+    ('pages', 'description_content'),
+    ('tasks', 'progress'),
+    ('tasks', 'params'),
+    ('project_template_assets', 'analysis_json'),
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table_name, column_name in JSON_COLUMNS:
+        if dialect == 'postgresql':
+            op.execute(
+                f'ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE JSONB '
+                f"USING NULLIF({column_name}, '')::jsonb"
+            )
+        elif dialect in ('mysql', 'mariadb'):
+            op.execute(f"UPDATE {table_name} SET {column_name} = NULL WHERE {column_name} = ''")
+            op.execute(f'ALTER TABLE {table_name} MODIFY {column_name} JSON NULL')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table_name, column_name in JSON_COLUMNS:
+        if dialect == 'postgresql':
+            op.execute(
+                f'ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE TEXT '
+                f'USING {column_name}::text'
+            )
+        elif dialect in ('mysql', 'mariadb'):
+            op.execute(f'ALTER TABLE {table_name} MODIFY {column_name} LONGTEXT NULL')
@@ -6,6 +6,7 @@ import json
 from pathlib import Path
 from datetime import datetime
 from . import db
+from .types import JSONText
 
 
 class Page(db.Model):
@@ -18,8 +19,8 @@ class Page(db.Model):
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
     order_index = db.Column(db.Integer, nullable=False)
     part = db.Column(db.String(200), nullable=True)  # Optional section name
-    outline_content = db.Column(db.Text, nullable=True)  # JSON string
-    description_content = db.Column(db.Text, nullable=True)  # JSON string
+    outline_content = db.Column(JSONText, nullable=True)  # JSON string
+    description_content = db.Column(JSONText, nullable=True)  # JSON string
     generated_image_path = db.Column(db.String(500), nullable=True)  # Original PNG image path
     cached_image_path = db.Column(db.String(500), nullable=True)  # Compressed JPG thumbnail path
     narration_text = db.Column(db.Text, nullable=True)  # Plain text narration for TTS video export
@@ -5,6 +5,7 @@ import uuid
 from datetime import datetime
 from pathlib import Path
 from . import db
+from .types import JSONText
 
 
 class ProjectTemplateAsset(db.Model):
@@ -27,7 +28,7 @@ class ProjectTemplateAsset(db.Model):
     source_page_index = db.Column(db.Integer, nullable=True)
 
     analysis_status = db.Column(db.String(20), nullable=False, default='pending')
-    analysis_json = db.Column(db.Text, nullable=True)
+    analysis_json = db.Column(JSONText, nullable=True)
     analysis_notes = db.Column(db.Text, nullable=True)
     analysis_error = db.Column(db.Text, nullable=True)
     user_label = db.Column(db.String(200), nullable=True)
@@ -5,6 +5,7 @@ import uuid
 import json
 from datetime import datetime
 from . import db
+from .types import JSONText
 
 
 class Task(db.Model):
@@ -17,8 +18,11 @@ class Task(db.Model):
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
     task_type = db.Column(db.String(50), nullable=False)  # GENERATE_DESCRIPTIONS|GENERATE_IMAGES
     status = db.Column(db.String(50), nullable=False, default='PENDING')
-    progress = db.Column(db.Text, nullable=True)  # JSON string: {"total": 10, "completed": 5, "failed": 0}
+    progress = db.Column(JSONText, nullable=True)  # JSON string: {"total": 10, "completed": 5, "failed": 0}
     error_message = db.Column(db.Text, nullable=True)
+    params = db.Column(JSONText, nullable=True)  # JSON string: task arguments needed to resume after a restart
+    resume_count = db.Column(db.Integer, nullable=False, default=0)  # How many times the task was resumed on startup
+    worker_id = db.Column(db.String(100), nullable=True)  # Worker process that claimed the task (TASK_EXECUTION_MODE=worker)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
     
@@ -41,6 +45,26 @@ class Task(db.Model):
         else:
             self.progress = None
     
+    def get_params(self):
+        """Parse resumable task arguments from JSON string"""
+        if self.params:
+            try:
+                return json.loads(self.params)
+            except json.JSONDecodeError:
+                return None
+        return None
+
+    def set_params(self, data):
+        """Set resumable task arguments as JSON string (sets are stored as sorted lists)"""
+        if data is None:
+            self.params = None
+            return
+        self.params = json.dumps(
+            data,
+            ensure_ascii=False,
+            default=lambda value: sorted(value) if isinstance(value, (set, frozenset)) else str(value),
+        )
+
     def update_progress(self, completed=None, failed=None):
         """Update progress incrementally"""
         prog = self.get_progress()
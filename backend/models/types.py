@@ -0,0 +1,41 @@
+"""Custom column types"""
+import json
+
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import JSON, Text, TypeDecorator
+
+
+class JSONText(TypeDecorator):
+    """
+    JSON document exposed to the models as a JSON string
+
+    The models keep reading and writing JSON strings (``get_progress()``,
+    ``set_description_content()`` ...). On PostgreSQL the column is JSONB and on
+    MySQL it is JSON, so the database validates and can query the documents; on
+    SQLite it stays TEXT, which keeps existing databases and the desktop app
+    unchanged.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB())
+        if dialect.name in ('mysql', 'mariadb'):
+            return dialect.type_descriptor(JSON())
+        return dialect.type_descriptor(Text())
+
+    def _is_native_json(self, dialect) -> bool:
+        return dialect.name in ('postgresql', 'mysql', 'mariadb')
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not self._is_native_json(dialect):
+            return value
+        # JSON types serialize the bound value themselves
+        return json.loads(value) if isinstance(value, str) else value
+
+    def process_result_value(self, value, dialect):
+        if value is None or not self._is_native_json(dialect):
+            return value
+        return json.dumps(value, ensure_ascii=False)
@@ -13,10 +13,14 @@ from io import BytesIO
 from typing import Optional, List
 from PIL import Image
 from .base import ImageProvider
+from .reference_cache import cached_reference, fit_within, to_jpeg
 from config import get_config
 
 logger = logging.getLogger(__name__)
 
+# Claude vision downsamples anything whose longer side exceeds this
+_REFERENCE_MAX_SIDE = 1568
+
 try:
     from anthropic import Anthropic
     ANTHROPIC_AVAILABLE = True
@@ -49,12 +53,14 @@ class AnthropicImageProvider(ImageProvider):
         self.max_retries = get_config().OPENAI_MAX_RETRIES
 
     def _encode_image_to_base64(self, image: Image.Image) -> str:
-        """Encode PIL Image to base64 string"""
-        buffered = BytesIO()
-        if image.mode in ('RGBA', 'LA', 'P'):
-            image = image.convert('RGB')
-        image.save(buffered, format="JPEG", quality=95)
-        return base64.b64encode(buffered.getvalue()).decode('utf-8')
+        """Encode PIL Image to base64 string (downscaled JPEG, cached per reference)"""
+        def encode(img: Image.Image) -> bytes:
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img = img.convert('RGB')
+            return to_jpeg(fit_within(img, _REFERENCE_MAX_SIDE), quality=95)
+
+        data = cached_reference(image, 'anthropic-jpeg', _REFERENCE_MAX_SIDE, encode)
+        return base64.b64encode(data).decode('utf-8')
 
     def generate_image(
         self,
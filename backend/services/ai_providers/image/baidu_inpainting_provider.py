@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional, Tuple
 from PIL import Image
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from services import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -142,7 +143,7 @@ class BaiduInpaintingProvider:
             }
             
             logger.info("🌐 发送请求到百度图像修复API...")
-            response = requests.post(
+            response = http_client.post(
                 url, 
                 headers=headers, 
                 json=request_body, 
@@ -1,6 +1,7 @@
 """
 Abstract base class for image generation providers
 """
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Optional, List
 from PIL import Image
@@ -34,3 +35,22 @@ class ImageProvider(ABC):
             Generated PIL Image object, or None if failed
         """
         pass
+
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K",
+        enable_thinking: bool = False,
+        thinking_budget: int = 0
+    ) -> Optional[Image.Image]:
+        """
+        Async ``generate_image`` for coroutines on the shared event loop (services.async_runner)
+
+        Providers with an async SDK client override this. The default runs the
+        sync call in the loop's bounded fallback thread pool.
+        """
+        return await asyncio.to_thread(
+            self.generate_image, prompt, ref_images, aspect_ratio, resolution, enable_thinking, thinking_budget
+        )
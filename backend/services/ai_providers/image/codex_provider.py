@@ -9,7 +9,6 @@ tools=[{"type": "image_generation", ...}] and tool_choice={"type": "image_genera
 The result contains a base64-encoded image in the output.
 """
 import base64
-import io
 import json
 import logging
 from io import BytesIO
@@ -21,6 +20,7 @@ from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_excep
 
 from .base import ImageProvider
 from .openai_provider import _compute_gpt_image_size
+from .reference_cache import cached_reference, fit_within, flatten_alpha, to_png
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +28,7 @@ _CODEX_BASE_URL = "https://chatgpt.com/backend-api/codex"
 _RESPONSES_ENDPOINT = f"{_CODEX_BASE_URL}/responses"
 
 _DEFAULT_TIMEOUT = 180  # image generation can be slow
+_REFERENCE_MAX_SIDE = 2048  # references are downscaled to this longer side before upload
 
 
 def _is_retryable_http_error(exc: BaseException) -> bool:
@@ -86,13 +87,11 @@ class CodexImageProvider(ImageProvider):
         content = []
         if ref_images:
             for img in ref_images:
-                buffered = io.BytesIO()
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    bg = Image.new('RGB', img.size, (255, 255, 255))
-                    bg.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                    img = bg
-                img.save(buffered, format="PNG")
-                b64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
+                data = cached_reference(
+                    img, 'codex-png', _REFERENCE_MAX_SIDE,
+                    lambda image: to_png(fit_within(flatten_alpha(image), _REFERENCE_MAX_SIDE)),
+                )
+                b64 = base64.b64encode(data).decode('utf-8')
                 content.append({"type": "input_image", "image_url": f"data:image/png;base64,{b64}"})
         content.append({"type": "input_text", "text": prompt})
 
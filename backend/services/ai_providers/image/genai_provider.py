@@ -5,6 +5,7 @@ Operates in two authentication modes selected at construction time:
   * API-key mode  (Google AI Studio or compatible proxy)
   * Vertex AI mode (GCP service-account credentials via GOOGLE_APPLICATION_CREDENTIALS)
 """
+import asyncio
 import logging
 from typing import Optional, List
 from google import genai
@@ -13,11 +14,46 @@ from PIL import Image
 from io import BytesIO
 from tenacity import retry, stop_after_attempt, wait_exponential
 from .base import ImageProvider
+from .reference_cache import cached_reference, fit_within, to_png
 from config import get_config
+from services.rate_limiter import report_throttle
 from ..genai_client import make_genai_client
 
 logger = logging.getLogger(__name__)
 
+# Longer side references are downscaled to before upload
+_REFERENCE_MAX_SIDE = 3072
+# Formats the API accepts as-is: a reference file in one of these that is
+# already small enough is sent without decoding or re-encoding it
+_PASSTHROUGH_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+
+
+def _encode_reference(image: Image.Image) -> bytes:
+    path = getattr(image, 'filename', None)
+    if (path and image.format in _PASSTHROUGH_FORMATS
+            and max(image.size) <= _REFERENCE_MAX_SIDE):
+        with open(path, 'rb') as f:
+            return f.read()
+    return to_png(fit_within(image, _REFERENCE_MAX_SIDE))
+
+
+def _reference_part(image: Image.Image) -> types.Part:
+    """Cached, downscaled reference image as an inline ``Part``."""
+    data = cached_reference(image, 'genai', _REFERENCE_MAX_SIDE, _encode_reference)
+    if data[:3] == b'\xff\xd8\xff':
+        mime_type = 'image/jpeg'
+    elif data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        mime_type = 'image/webp'
+    else:
+        mime_type = 'image/png'
+    return types.Part.from_bytes(data=data, mime_type=mime_type)
+
+
+def _report_retry(retry_state):
+    """重试前把限流错误反馈给当前调用的限流器"""
+    if retry_state.outcome:
+        report_throttle(retry_state.outcome.exception())
+
 
 class GenAIImageProvider(ImageProvider):
     """Image generation via Google GenAI SDK (AI Studio / Vertex AI)"""
@@ -43,7 +79,8 @@ class GenAIImageProvider(ImageProvider):
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
         wait=wait_exponential(multiplier=1, min=2, max=10),
-        reraise=True
+        reraise=True,
+        before_sleep=_report_retry
     )
     def generate_image(
         self,
@@ -69,87 +106,121 @@ class GenAIImageProvider(ImageProvider):
             Generated PIL Image object, or None if failed
         """
         try:
-            # Build contents list with prompt and reference images
-            contents = []
-            
-            # Add reference images first (if any)
-            if ref_images:
-                for ref_img in ref_images:
-                    contents.append(ref_img)
-            
-            # Add text prompt
-            contents.append(prompt)
-            
-            logger.debug(f"Calling GenAI API for image generation with {len(ref_images) if ref_images else 0} reference images...")
-            logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}, enable_thinking: {enable_thinking}")
-            
-            # Build config
-            config_params = {
-                'response_modalities': ['TEXT', 'IMAGE'],
-                'image_config': types.ImageConfig(
-                    aspect_ratio=aspect_ratio,
-                    image_size=resolution
-                )
-            }
-            
-            # Add thinking config if enabled
-            if enable_thinking:
-                # In Vertex AI (Gemini) Thinking mode, enabling include_thoughts=True requires explicitly setting thinking_budget
-                config_params['thinking_config'] = types.ThinkingConfig(  
-                    thinking_budget=thinking_budget, 
-                    include_thoughts=True  
-                )
-            
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=contents,
-                config=types.GenerateContentConfig(**config_params)
+            contents, config = self._build_request(
+                prompt, ref_images, aspect_ratio, resolution, enable_thinking, thinking_budget
             )
-            
+            response = self.client.models.generate_content(model=self.model, contents=contents, config=config)
             logger.debug("GenAI API call completed")
-            
-            # Extract the final image from the response.
-            # Earlier images are usually low resolution drafts 
-            # Therefore, always use the last image found.
-            last_image = None
-            
-            for i, part in enumerate(response.parts):
-                if part.text is not None:
-                    logger.debug(f"Part {i}: TEXT - {part.text[:100] if len(part.text) > 100 else part.text}")
-                else:
-                    try:
-                        logger.debug(f"Part {i}: Attempting to extract image...")
-                        image = part.as_image()
-                        if image:
-                            # as_image() should return PIL Image directly (official SDK)
-                            # But proxy may return custom Image object, so we need fallbacks
-                            if isinstance(image, Image.Image):
-                                last_image = image
-                            elif hasattr(image, 'image_bytes') and image.image_bytes:
-                                last_image = Image.open(BytesIO(image.image_bytes))
-                            elif hasattr(image, '_pil_image') and image._pil_image:
-                                last_image = image._pil_image
-                            else:
-                                logger.warning(f"Part {i}: Image object type {type(image)} has no usable conversion method")
-                                continue
-                            logger.debug(f"Successfully extracted image from part {i}")
-                    except Exception as e:
-                        logger.warning(f"Part {i}: Failed to extract image - {type(e).__name__}: {str(e)}")
-            
-            # Return the last image found (highest quality in thinking chain scenarios)
-            if last_image:
-                return last_image
-            
-            # No image found in response
-            error_msg = "No image found in API response. "
-            if response.parts:
-                error_msg += f"Response had {len(response.parts)} parts but none contained valid images."
-            else:
-                error_msg += "Response had no parts."
-            
-            raise ValueError(error_msg)
-            
+            return self._extract_image(response)
         except Exception as e:
-            error_detail = f"Error generating image with GenAI: {type(e).__name__}: {str(e)}"
-            logger.error(error_detail, exc_info=True)
-            raise Exception(error_detail) from e
+            raise self._generation_error(e) from e
+
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        reraise=True,
+        before_sleep=_report_retry
+    )
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K",
+        enable_thinking: bool = True,
+        thinking_budget: int = 1024
+    ) -> Optional[Image.Image]:
+        """Native async ``generate_image`` on the SDK's ``client.aio``."""
+        try:
+            # 参考图缩放编码与结果解码是 CPU 工作，放到线程池，不阻塞事件循环
+            contents, config = await asyncio.to_thread(
+                self._build_request, prompt, ref_images, aspect_ratio, resolution, enable_thinking, thinking_budget
+            )
+            response = await self.client.aio.models.generate_content(model=self.model, contents=contents, config=config)
+            logger.debug("GenAI API call completed")
+            return await asyncio.to_thread(self._extract_image, response)
+        except Exception as e:
+            raise self._generation_error(e) from e
+
+    def _build_request(self, prompt, ref_images, aspect_ratio, resolution, enable_thinking, thinking_budget):
+        """(contents, config) for generate_content."""
+        # Build contents list with prompt and reference images
+        contents = []
+
+        # Add reference images first (if any)
+        if ref_images:
+            for ref_img in ref_images:
+                contents.append(_reference_part(ref_img))
+
+        # Add text prompt
+        contents.append(prompt)
+
+        logger.debug(f"Calling GenAI API for image generation with {len(ref_images) if ref_images else 0} reference images...")
+        logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}, enable_thinking: {enable_thinking}")
+
+        # Build config
+        config_params = {
+            'response_modalities': ['TEXT', 'IMAGE'],
+            'image_config': types.ImageConfig(
+                aspect_ratio=aspect_ratio,
+                image_size=resolution
+            )
+        }
+
+        # Add thinking config if enabled
+        if enable_thinking:
+            # In Vertex AI (Gemini) Thinking mode, enabling include_thoughts=True requires explicitly setting thinking_budget
+            config_params['thinking_config'] = types.ThinkingConfig(  
+                thinking_budget=thinking_budget, 
+                include_thoughts=True  
+            )
+        return contents, types.GenerateContentConfig(**config_params)
+
+    def _extract_image(self, response) -> Image.Image:
+        """Last image in the response; raises ValueError when there is none."""
+        # Extract the final image from the response.
+        # Earlier images are usually low resolution drafts 
+        # Therefore, always use the last image found.
+        last_image = None
+
+        for i, part in enumerate(response.parts):
+            if part.text is not None:
+                logger.debug(f"Part {i}: TEXT - {part.text[:100] if len(part.text) > 100 else part.text}")
+            else:
+                try:
+                    logger.debug(f"Part {i}: Attempting to extract image...")
+                    image = part.as_image()
+                    if image:
+                        # as_image() should return PIL Image directly (official SDK)
+                        # But proxy may return custom Image object, so we need fallbacks
+                        if isinstance(image, Image.Image):
+                            last_image = image
+                        elif hasattr(image, 'image_bytes') and image.image_bytes:
+                            last_image = Image.open(BytesIO(image.image_bytes))
+                        elif hasattr(image, '_pil_image') and image._pil_image:
+                            last_image = image._pil_image
+                        else:
+                            logger.warning(f"Part {i}: Image object type {type(image)} has no usable conversion method")
+                            continue
+                        logger.debug(f"Successfully extracted image from part {i}")
+                except Exception as e:
+                    logger.warning(f"Part {i}: Failed to extract image - {type(e).__name__}: {str(e)}")
+
+        # Return the last image found (highest quality in thinking chain scenarios)
+        if last_image:
+            return last_image
+
+        # No image found in response
+        error_msg = "No image found in API response. "
+        if response.parts:
+            error_msg += f"Response had {len(response.parts)} parts but none contained valid images."
+        else:
+            error_msg += "Response had no parts."
+
+        raise ValueError(error_msg)
+
+    @staticmethod
+    def _generation_error(e: Exception) -> Exception:
+        error_detail = f"Error generating image with GenAI: {type(e).__name__}: {str(e)}"
+        logger.error(error_detail, exc_info=True)
+        return Exception(error_detail)
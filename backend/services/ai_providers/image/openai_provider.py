@@ -9,6 +9,7 @@ Two code paths:
 
 Resolution validation is handled at the task_manager level for all providers.
 """
+import asyncio
 import logging
 import base64
 import math
@@ -16,9 +17,10 @@ import re
 import requests
 from io import BytesIO
 from typing import Optional, List
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from PIL import Image
 from .base import ImageProvider
+from .reference_cache import cached_reference, fit_within, to_jpeg
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -30,6 +32,9 @@ _GPT_IMAGE_MODELS = {'gpt-image-1', 'gpt-image-1.5', 'gpt-image-2'}
 _DALLE_MODELS = {'dall-e-2', 'dall-e-3'}
 _NATIVE_IMAGES_API_MODELS = _GPT_IMAGE_MODELS | _DALLE_MODELS
 _MAX_GPT_IMAGE_INPUTS = 16
+# Chat-path references are downscaled to this longer side before encoding;
+# multimodal models resample inputs well below it.
+_CHAT_REFERENCE_MAX_SIDE = 2048
 
 # Volcengine Seedream models only accept the native images API (images/generations).
 # The Agent Plan endpoint does not expose a chat-completions image modality, so an
@@ -184,16 +189,25 @@ class OpenAIImageProvider(ImageProvider):
             model: Model name to use
             image_api_protocol: 'auto' (detect by model name), 'images' (force images.generate), 'chat' (force chat.completions)
         """
-        self.client = OpenAI(
+        self._client_kwargs = dict(
             api_key=api_key,
             base_url=api_base,
             timeout=get_config().OPENAI_TIMEOUT,  # set timeout from config
             max_retries=get_config().OPENAI_MAX_RETRIES  # set max retries from config
         )
+        self.client = OpenAI(**self._client_kwargs)
+        self._async_client = None
         self.api_base = api_base or ""
         self.model = model
         self.image_api_protocol = image_api_protocol or 'auto'
     
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Created on first use, on the event loop that awaits it (services.async_runner)."""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(**self._client_kwargs)
+        return self._async_client
+
     def _encode_image_to_base64(self, image: Image.Image) -> str:
         """
         Encode PIL Image to base64 string
@@ -204,12 +218,14 @@ class OpenAIImageProvider(ImageProvider):
         Returns:
             Base64 encoded string
         """
-        buffered = BytesIO()
-        # Convert to RGB if necessary (e.g., RGBA images)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            image = image.convert('RGB')
-        image.save(buffered, format="JPEG", quality=95)
-        return base64.b64encode(buffered.getvalue()).decode('utf-8')
+        def encode(img: Image.Image) -> bytes:
+            # Convert to RGB if necessary (e.g., RGBA images)
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img = img.convert('RGB')
+            return to_jpeg(fit_within(img, _CHAT_REFERENCE_MAX_SIDE), quality=95)
+
+        data = cached_reference(image, 'openai-chat-jpeg', _CHAT_REFERENCE_MAX_SIDE, encode)
+        return base64.b64encode(data).decode('utf-8')
     
     def _build_extra_body(self, aspect_ratio: str, resolution: str) -> dict:
         """
@@ -263,6 +279,17 @@ class OpenAIImageProvider(ImageProvider):
         buf.seek(0)
         return buf.read()
 
+    def _edit_reference_png(self, image: Image.Image, width: int, height: int) -> bytes:
+        """RGBA PNG of ``image`` resized to the edit size (cached per reference and size)."""
+        def encode(img: Image.Image) -> bytes:
+            if img.mode != 'RGBA':
+                img = img.convert('RGBA')
+            if img.size != (width, height):
+                img = img.resize((width, height), Image.LANCZOS)
+            return self._pil_to_png_bytes(img)
+
+        return cached_reference(image, 'openai-edit-png', (width, height), encode)
+
     def _resolve_size(self, aspect_ratio: str, resolution: str = '2K') -> str:
         """Map aspect_ratio to a size string appropriate for the current model."""
         model = self.model.lower()
@@ -378,14 +405,14 @@ class OpenAIImageProvider(ImageProvider):
 
         raise ValueError(f"Unexpected images API response type: {type(result)}")
 
-    def _generate_with_images_api(
+    def _images_api_request(
         self,
         prompt: str,
         ref_images: Optional[List[Image.Image]],
         aspect_ratio: str,
         resolution: str = '2K',
-    ) -> Optional[Image.Image]:
-        """Use the native OpenAI images API (gpt-image-* / dall-e-*)."""
+    ):
+        """``('edit' | 'generate', kwargs)`` for the native images API call."""
         size = self._resolve_size(aspect_ratio, resolution)
         quality = self._resolve_quality()
         # GPT image models always return b64_json; DALL-E models default to url
@@ -431,12 +458,7 @@ class OpenAIImageProvider(ImageProvider):
                 w, h = 1024, 1024
             image_files = []
             for index, ref_img in enumerate(selected_ref_images, start=1):
-                prepared_image = ref_img
-                if prepared_image.mode != 'RGBA':
-                    prepared_image = prepared_image.convert('RGBA')
-                if prepared_image.size != (w, h):
-                    prepared_image = prepared_image.resize((w, h), Image.LANCZOS)
-                image_file = BytesIO(self._pil_to_png_bytes(prepared_image))
+                image_file = BytesIO(self._edit_reference_png(ref_img, w, h))
                 image_file.name = (
                     'image.png'
                     if len(selected_ref_images) == 1
@@ -456,7 +478,7 @@ class OpenAIImageProvider(ImageProvider):
                 kwargs['quality'] = quality
             if response_format:
                 kwargs['response_format'] = response_format
-            result = self.client.images.edit(**kwargs)
+            return 'edit', kwargs
         else:
             if ref_images:
                 logger.warning("dall-e-3 does not support images.edit; ignoring ref_images")
@@ -466,10 +488,220 @@ class OpenAIImageProvider(ImageProvider):
                 kwargs['quality'] = quality
             if response_format:
                 kwargs['response_format'] = response_format
-            result = self.client.images.generate(**kwargs)
+            return 'generate', kwargs
 
+    def _generate_with_images_api(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]],
+        aspect_ratio: str,
+        resolution: str = '2K',
+    ) -> Optional[Image.Image]:
+        """Use the native OpenAI images API (gpt-image-* / dall-e-*)."""
+        method, kwargs = self._images_api_request(prompt, ref_images, aspect_ratio, resolution)
+        result = getattr(self.client.images, method)(**kwargs)
         return self._extract_from_images_result(result)
 
+    def _use_images_api(self, ref_images: Optional[List[Image.Image]]) -> bool:
+        """Whether this call goes to images.generate / images.edit instead of chat completions."""
+        # Route based on image_api_protocol setting
+        # Doubao Seedream keeps the chat-completions path when reference images are
+        # present: the images.edit endpoint is only for SeedEdit models, while the
+        # legacy chat path still accepts inline base64 references. This exemption
+        # overrides even a forced 'images' protocol: applying the Agent Plans
+        # recommended models sets openai_image_api_protocol=images, and Seedream
+        # with references must still avoid images.edit.
+        is_seedream_with_references = (
+            bool(ref_images)
+            and self.model.lower().startswith(_DOUBAO_SEEDREAM_PREFIX)
+        )
+        return (
+            not is_seedream_with_references
+            and (
+                self.image_api_protocol == 'images'
+                or (
+                    self.image_api_protocol == 'auto'
+                    and self._is_native_images_api_model()
+                )
+            )
+        )
+
+    def _chat_request(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]],
+        aspect_ratio: str,
+        resolution: str,
+    ) -> dict:
+        """kwargs for the multimodal chat.completions.create call."""
+        # Build message content
+        content = []
+
+        # Add reference images first (if any)
+        if ref_images:
+            for ref_img in ref_images:
+                base64_image = self._encode_image_to_base64(ref_img)
+                content.append({
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{base64_image}"
+                    }
+                })
+
+        # Add text prompt
+        content.append({"type": "text", "text": prompt})
+
+        logger.debug(f"Calling OpenAI API for image generation with {len(ref_images) if ref_images else 0} reference images...")
+        logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
+
+        # Build extra_body with resolution parameters for compatible providers
+        extra_body = self._build_extra_body(aspect_ratio, resolution)
+        extra_body["modalities"] = ["text", "image"]
+        logger.debug(f"Using extra_body: {extra_body}")
+
+        # Use both system message (for basic providers) and extra_body (for advanced providers)
+        return dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": f"aspect_ratio={aspect_ratio}, resolution={resolution}"},
+                {"role": "user", "content": content},
+            ],
+            modalities=["text", "image"],
+            extra_body=extra_body,
+        )
+
+    def _extract_chat_image(self, response) -> Image.Image:
+        """Image from a chat completion; the format varies across proxies."""
+
+        # Extract image from response - handle different response formats
+        message = response.choices[0].message
+
+        # Debug: log available attributes
+        logger.debug(f"Response message attributes: {dir(message)}")
+
+        # Try message.images first (OpenRouter format)
+        images_attr = getattr(message, 'images', None)
+        if images_attr:
+            for img_item in images_attr:
+                url = None
+                if isinstance(img_item, dict):
+                    url = img_item.get('image_url', {}).get('url', '')
+                elif hasattr(img_item, 'image_url'):
+                    iu = img_item.image_url
+                    url = iu.get('url', '') if isinstance(iu, dict) else getattr(iu, 'url', '')
+                if url and url.startswith('data:image'):
+                    base64_data = url.split(',', 1)[1]
+                    image = Image.open(BytesIO(base64.b64decode(base64_data)))
+                    logger.debug(f"Extracted image from message.images: {image.size}")
+                    return image
+
+        # Try multi_mod_content (custom format from some proxies)
+        if hasattr(message, 'multi_mod_content') and message.multi_mod_content:
+            parts = message.multi_mod_content
+            for part in parts:
+                if "text" in part:
+                    logger.debug(f"Response text: {part['text'][:100] if len(part['text']) > 100 else part['text']}")
+                if "inline_data" in part:
+                    image_data = base64.b64decode(part["inline_data"]["data"])
+                    image = Image.open(BytesIO(image_data))
+                    logger.debug(f"Successfully extracted image: {image.size}, {image.mode}")
+                    return image
+
+        # Try standard OpenAI content format (list of content parts)
+        if hasattr(message, 'content') and message.content:
+            # If content is a list (multimodal response)
+            if isinstance(message.content, list):
+                for part in message.content:
+                    if isinstance(part, dict):
+                        # Handle image_url type
+                        if part.get('type') == 'image_url':
+                            image_url = part.get('image_url', {}).get('url', '')
+                            if image_url.startswith('data:image'):
+                                # Extract base64 data from data URL
+                                base64_data = image_url.split(',', 1)[1]
+                                image_data = base64.b64decode(base64_data)
+                                image = Image.open(BytesIO(image_data))
+                                logger.debug(f"Successfully extracted image from content: {image.size}, {image.mode}")
+                                return image
+                        # Handle text type
+                        elif part.get('type') == 'text':
+                            text = part.get('text', '')
+                            if text:
+                                logger.debug(f"Response text: {text[:100] if len(text) > 100 else text}")
+                    elif hasattr(part, 'type'):
+                        # Handle as object with attributes
+                        if part.type == 'image_url':
+                            image_url = getattr(part, 'image_url', {})
+                            if isinstance(image_url, dict):
+                                url = image_url.get('url', '')
+                            else:
+                                url = getattr(image_url, 'url', '')
+                            if url.startswith('data:image'):
+                                base64_data = url.split(',', 1)[1]
+                                image_data = base64.b64decode(base64_data)
+                                image = Image.open(BytesIO(image_data))
+                                logger.debug(f"Successfully extracted image from content object: {image.size}, {image.mode}")
+                                return image
+            # If content is a string, try to extract image from it
+            elif isinstance(message.content, str):
+                content_str = message.content
+                logger.debug(f"Response content (string): {content_str[:200] if len(content_str) > 200 else content_str}")
+
+                # Try to extract Markdown image URL: ![...](url)
+                markdown_pattern = r'!\[.*?\]\((https?://[^\s\)]+)\)'
+                markdown_matches = re.findall(markdown_pattern, content_str)
+                if markdown_matches:
+                    image_url = markdown_matches[0]  # Use the first image URL found
+                    logger.debug(f"Found Markdown image URL: {image_url}")
+                    try:
+                        response = requests.get(image_url, timeout=30, stream=True)
+                        response.raise_for_status()
+                        image = Image.open(BytesIO(response.content))
+                        image.load()  # Ensure image is fully loaded
+                        logger.debug(f"Successfully downloaded image from Markdown URL: {image.size}, {image.mode}")
+                        return image
+                    except Exception as download_error:
+                        logger.warning(f"Failed to download image from Markdown URL: {download_error}")
+
+                # Try to extract plain URL (not in Markdown format)
+                url_pattern = r'(https?://[^\s\)\]]+\.(?:png|jpg|jpeg|gif|webp|bmp)(?:\?[^\s\)\]]*)?)'
+                url_matches = re.findall(url_pattern, content_str, re.IGNORECASE)
+                if url_matches:
+                    image_url = url_matches[0]
+                    logger.debug(f"Found plain image URL: {image_url}")
+                    try:
+                        response = requests.get(image_url, timeout=30, stream=True)
+                        response.raise_for_status()
+                        image = Image.open(BytesIO(response.content))
+                        image.load()
+                        logger.debug(f"Successfully downloaded image from plain URL: {image.size}, {image.mode}")
+                        return image
+                    except Exception as download_error:
+                        logger.warning(f"Failed to download image from plain URL: {download_error}")
+
+                # Try to extract base64 data URL from string
+                base64_pattern = r'data:image/[^;]+;base64,([A-Za-z0-9+/=]+)'
+                base64_matches = re.findall(base64_pattern, content_str)
+                if base64_matches:
+                    base64_data = base64_matches[0]
+                    logger.debug(f"Found base64 image data in string")
+                    try:
+                        image_data = base64.b64decode(base64_data)
+                        image = Image.open(BytesIO(image_data))
+                        logger.debug(f"Successfully extracted base64 image from string: {image.size}, {image.mode}")
+                        return image
+                    except Exception as decode_error:
+                        logger.warning(f"Failed to decode base64 image from string: {decode_error}")
+
+        # Log raw response for debugging
+        logger.warning(f"Unable to extract image. Raw message type: {type(message)}")
+        logger.warning(f"Message content type: {type(getattr(message, 'content', None))}")
+        raw = str(getattr(message, 'content', 'N/A'))
+        logger.warning(f"Message content: {raw[:300]}{'...(truncated)' if len(raw) > 300 else ''}")
+        logger.warning(f"Message all attrs: {vars(message) if hasattr(message, '__dict__') else dir(message)}"[:500])
+
+        raise ValueError("No valid multimodal response received from OpenAI API")
+
     def generate_image(
         self,
         prompt: str,
@@ -502,198 +734,46 @@ class OpenAIImageProvider(ImageProvider):
             Generated PIL Image object, or None if failed
         """
         try:
-            # Route based on image_api_protocol setting
-            # Doubao Seedream keeps the chat-completions path when reference images are
-            # present: the images.edit endpoint is only for SeedEdit models, while the
-            # legacy chat path still accepts inline base64 references. This exemption
-            # overrides even a forced 'images' protocol: applying the Agent Plans
-            # recommended models sets openai_image_api_protocol=images, and Seedream
-            # with references must still avoid images.edit.
-            is_seedream_with_references = (
-                bool(ref_images)
-                and self.model.lower().startswith(_DOUBAO_SEEDREAM_PREFIX)
-            )
-            use_images_api = (
-                not is_seedream_with_references
-                and (
-                    self.image_api_protocol == 'images'
-                    or (
-                        self.image_api_protocol == 'auto'
-                        and self._is_native_images_api_model()
-                    )
-                )
-            )
-            if use_images_api:
+            if self._use_images_api(ref_images):
                 return self._generate_with_images_api(prompt, ref_images, aspect_ratio, resolution)
 
-            # Build message content
-            content = []
-            
-            # Add reference images first (if any)
-            if ref_images:
-                for ref_img in ref_images:
-                    base64_image = self._encode_image_to_base64(ref_img)
-                    content.append({
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}"
-                        }
-                    })
-            
-            # Add text prompt
-            content.append({"type": "text", "text": prompt})
-            
-            logger.debug(f"Calling OpenAI API for image generation with {len(ref_images) if ref_images else 0} reference images...")
-            logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
-            
-            # Build extra_body with resolution parameters for compatible providers
-            extra_body = self._build_extra_body(aspect_ratio, resolution)
-            extra_body["modalities"] = ["text", "image"]
-            logger.debug(f"Using extra_body: {extra_body}")
-
-            # Use both system message (for basic providers) and extra_body (for advanced providers)
             response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"aspect_ratio={aspect_ratio}, resolution={resolution}"},
-                    {"role": "user", "content": content},
-                ],
-                modalities=["text", "image"],
-                extra_body=extra_body
+                **self._chat_request(prompt, ref_images, aspect_ratio, resolution)
             )
-            
             logger.debug("OpenAI API call completed")
-            
-            # Extract image from response - handle different response formats
-            message = response.choices[0].message
-
-            # Debug: log available attributes
-            logger.debug(f"Response message attributes: {dir(message)}")
-
-            # Try message.images first (OpenRouter format)
-            images_attr = getattr(message, 'images', None)
-            if images_attr:
-                for img_item in images_attr:
-                    url = None
-                    if isinstance(img_item, dict):
-                        url = img_item.get('image_url', {}).get('url', '')
-                    elif hasattr(img_item, 'image_url'):
-                        iu = img_item.image_url
-                        url = iu.get('url', '') if isinstance(iu, dict) else getattr(iu, 'url', '')
-                    if url and url.startswith('data:image'):
-                        base64_data = url.split(',', 1)[1]
-                        image = Image.open(BytesIO(base64.b64decode(base64_data)))
-                        logger.debug(f"Extracted image from message.images: {image.size}")
-                        return image
+            return self._extract_chat_image(response)
 
-            # Try multi_mod_content (custom format from some proxies)
-            if hasattr(message, 'multi_mod_content') and message.multi_mod_content:
-                parts = message.multi_mod_content
-                for part in parts:
-                    if "text" in part:
-                        logger.debug(f"Response text: {part['text'][:100] if len(part['text']) > 100 else part['text']}")
-                    if "inline_data" in part:
-                        image_data = base64.b64decode(part["inline_data"]["data"])
-                        image = Image.open(BytesIO(image_data))
-                        logger.debug(f"Successfully extracted image: {image.size}, {image.mode}")
-                        return image
-            
-            # Try standard OpenAI content format (list of content parts)
-            if hasattr(message, 'content') and message.content:
-                # If content is a list (multimodal response)
-                if isinstance(message.content, list):
-                    for part in message.content:
-                        if isinstance(part, dict):
-                            # Handle image_url type
-                            if part.get('type') == 'image_url':
-                                image_url = part.get('image_url', {}).get('url', '')
-                                if image_url.startswith('data:image'):
-                                    # Extract base64 data from data URL
-                                    base64_data = image_url.split(',', 1)[1]
-                                    image_data = base64.b64decode(base64_data)
-                                    image = Image.open(BytesIO(image_data))
-                                    logger.debug(f"Successfully extracted image from content: {image.size}, {image.mode}")
-                                    return image
-                            # Handle text type
-                            elif part.get('type') == 'text':
-                                text = part.get('text', '')
-                                if text:
-                                    logger.debug(f"Response text: {text[:100] if len(text) > 100 else text}")
-                        elif hasattr(part, 'type'):
-                            # Handle as object with attributes
-                            if part.type == 'image_url':
-                                image_url = getattr(part, 'image_url', {})
-                                if isinstance(image_url, dict):
-                                    url = image_url.get('url', '')
-                                else:
-                                    url = getattr(image_url, 'url', '')
-                                if url.startswith('data:image'):
-                                    base64_data = url.split(',', 1)[1]
-                                    image_data = base64.b64decode(base64_data)
-                                    image = Image.open(BytesIO(image_data))
-                                    logger.debug(f"Successfully extracted image from content object: {image.size}, {image.mode}")
-                                    return image
-                # If content is a string, try to extract image from it
-                elif isinstance(message.content, str):
-                    content_str = message.content
-                    logger.debug(f"Response content (string): {content_str[:200] if len(content_str) > 200 else content_str}")
-                    
-                    # Try to extract Markdown image URL: ![...](url)
-                    markdown_pattern = r'!\[.*?\]\((https?://[^\s\)]+)\)'
-                    markdown_matches = re.findall(markdown_pattern, content_str)
-                    if markdown_matches:
-                        image_url = markdown_matches[0]  # Use the first image URL found
-                        logger.debug(f"Found Markdown image URL: {image_url}")
-                        try:
-                            response = requests.get(image_url, timeout=30, stream=True)
-                            response.raise_for_status()
-                            image = Image.open(BytesIO(response.content))
-                            image.load()  # Ensure image is fully loaded
-                            logger.debug(f"Successfully downloaded image from Markdown URL: {image.size}, {image.mode}")
-                            return image
-                        except Exception as download_error:
-                            logger.warning(f"Failed to download image from Markdown URL: {download_error}")
-                    
-                    # Try to extract plain URL (not in Markdown format)
-                    url_pattern = r'(https?://[^\s\)\]]+\.(?:png|jpg|jpeg|gif|webp|bmp)(?:\?[^\s\)\]]*)?)'
-                    url_matches = re.findall(url_pattern, content_str, re.IGNORECASE)
-                    if url_matches:
-                        image_url = url_matches[0]
-                        logger.debug(f"Found plain image URL: {image_url}")
-                        try:
-                            response = requests.get(image_url, timeout=30, stream=True)
-                            response.raise_for_status()
-                            image = Image.open(BytesIO(response.content))
-                            image.load()
-                            logger.debug(f"Successfully downloaded image from plain URL: {image.size}, {image.mode}")
-                            return image
-                        except Exception as download_error:
-                            logger.warning(f"Failed to download image from plain URL: {download_error}")
-                    
-                    # Try to extract base64 data URL from string
-                    base64_pattern = r'data:image/[^;]+;base64,([A-Za-z0-9+/=]+)'
-                    base64_matches = re.findall(base64_pattern, content_str)
-                    if base64_matches:
-                        base64_data = base64_matches[0]
-                        logger.debug(f"Found base64 image data in string")
-                        try:
-                            image_data = base64.b64decode(base64_data)
-                            image = Image.open(BytesIO(image_data))
-                            logger.debug(f"Successfully extracted base64 image from string: {image.size}, {image.mode}")
-                            return image
-                        except Exception as decode_error:
-                            logger.warning(f"Failed to decode base64 image from string: {decode_error}")
-            
-            # Log raw response for debugging
-            logger.warning(f"Unable to extract image. Raw message type: {type(message)}")
-            logger.warning(f"Message content type: {type(getattr(message, 'content', None))}")
-            raw = str(getattr(message, 'content', 'N/A'))
-            logger.warning(f"Message content: {raw[:300]}{'...(truncated)' if len(raw) > 300 else ''}")
-            logger.warning(f"Message all attrs: {vars(message) if hasattr(message, '__dict__') else dir(message)}"[:500])
-            
-            raise ValueError("No valid multimodal response received from OpenAI API")
-            
         except Exception as e:
-            error_detail = f"Error generating image with OpenAI (model={self.model}): {type(e).__name__}: {str(e)}"
-            logger.error(error_detail, exc_info=True)
-            raise Exception(error_detail) from e
+            raise self._generation_error(e) from e
+
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K",
+        enable_thinking: bool = False,
+        thinking_budget: int = 0
+    ) -> Optional[Image.Image]:
+        """Native async ``generate_image`` on ``AsyncOpenAI`` (same routing as the sync path)."""
+        try:
+            # 参考图编码与结果解码是 CPU 工作，放到线程池，不阻塞事件循环
+            if self._use_images_api(ref_images):
+                method, kwargs = await asyncio.to_thread(
+                    self._images_api_request, prompt, ref_images, aspect_ratio, resolution
+                )
+                result = await getattr(self.async_client.images, method)(**kwargs)
+                return await asyncio.to_thread(self._extract_from_images_result, result)
+
+            kwargs = await asyncio.to_thread(self._chat_request, prompt, ref_images, aspect_ratio, resolution)
+            response = await self.async_client.chat.completions.create(**kwargs)
+            logger.debug("OpenAI API call completed")
+            return await asyncio.to_thread(self._extract_chat_image, response)
+
+        except Exception as e:
+            raise self._generation_error(e) from e
+
+    def _generation_error(self, e: Exception) -> Exception:
+        error_detail = f"Error generating image with OpenAI (model={self.model}): {type(e).__name__}: {str(e)}"
+        logger.error(error_detail, exc_info=True)
+        return Exception(error_detail)
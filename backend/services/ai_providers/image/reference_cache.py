@@ -0,0 +1,221 @@
+"""
+Reference image cache - provider-ready reference payloads shared across pages
+
+Every page of a batch sends the same template (and usually the same material
+images) as references, and each provider used to decode, convert and
+re-encode them on every call - a multi-MB PNG template turned into JPEG q95
+base64 fifty times for a fifty-page deck. Providers now ask this module for
+the encoded bytes instead:
+
+* Key: (content digest, provider/format, target size). Images opened from a
+  file hash the file bytes once per (path, mtime, size); in-memory images
+  hash their pixels.
+* Images are downscaled to the provider's useful maximum before encoding
+  (models resample larger inputs anyway), never upscaled.
+* One process-wide LRU bounded by REFERENCE_IMAGE_CACHE_MB, shared by the
+  image worker threads; concurrent misses on the same key encode once.
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MB = 256
+_FILE_DIGEST_CACHE_SIZE = 256
+
+
+class ReferenceImageCache:
+    """Thread-safe LRU of encoded payloads, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_create(self, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            data = self._lookup(key)
+            if data is not None:
+                return data
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # 同一参考图只编码一次：并发的页面等待第一个线程编码完成
+        with key_lock:
+            with self._lock:
+                data = self._lookup(key)
+                if data is not None:
+                    return data
+                self.misses += 1
+            try:
+                data = build()
+                with self._lock:
+                    self._store(key, data)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+            return data
+
+    def _lookup(self, key: Hashable) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return data
+
+    def _store(self, key: Hashable, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._entries[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = 0
+
+
+_cache: Optional[ReferenceImageCache] = None
+_cache_lock = threading.Lock()
+_file_digests: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+_file_digests_lock = threading.Lock()
+
+
+def get_cache() -> ReferenceImageCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from config import get_config
+            megabytes = getattr(get_config(), 'REFERENCE_IMAGE_CACHE_MB', DEFAULT_CACHE_MB)
+            _cache = ReferenceImageCache(max(0, int(megabytes)) * 1024 * 1024)
+        return _cache
+
+
+def reset() -> None:
+    """Drop the cache (settings reloaded on next use)."""
+    global _cache
+    with _cache_lock:
+        _cache = None
+    with _file_digests_lock:
+        _file_digests.clear()
+
+
+def _file_digest(path: str) -> Optional[str]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _file_digests_lock:
+        digest = _file_digests.get(stamp)
+        if digest is not None:
+            _file_digests.move_to_end(stamp)
+            return digest
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(block)
+    digest = hasher.hexdigest()
+    with _file_digests_lock:
+        _file_digests[stamp] = digest
+        while len(_file_digests) > _FILE_DIGEST_CACHE_SIZE:
+            _file_digests.popitem(last=False)
+    return digest
+
+
+def image_digest(image: Image.Image) -> str:
+    """
+    Content digest of ``image``
+
+    Images still backed by their file (``Image.open(path)``) hash the file
+    without decoding it; anything else (converted, downloaded, generated)
+    hashes mode, size and pixels.
+    """
+    path = getattr(image, 'filename', None)
+    if path and isinstance(path, str):
+        digest = _file_digest(path)
+        if digest is not None:
+            return f"file:{digest}:{image.mode}:{image.size[0]}x{image.size[1]}"
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(f"{image.mode}:{image.size[0]}x{image.size[1]}".encode())
+    hasher.update(image.tobytes())
+    return f"pixels:{hasher.hexdigest()}"
+
+
+def fit_within(image: Image.Image, max_side: int) -> Image.Image:
+    """``image`` scaled down (LANCZOS, aspect kept) so its longer side is at most ``max_side``."""
+    width, height = image.size
+    if not max_side or max(width, height) <= max_side:
+        return image
+    scale = max_side / max(width, height)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return image.resize(size, Image.LANCZOS)
+
+
+def flatten_alpha(image: Image.Image, background=(255, 255, 255)) -> Image.Image:
+    """RGB copy of ``image`` with transparency composited onto ``background``."""
+    if image.mode == 'P' and 'transparency' in image.info:
+        image = image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA'):
+        flattened = Image.new('RGB', image.size, background)
+        flattened.paste(image, mask=image.split()[-1])
+        return flattened
+    return image.convert('RGB') if image.mode != 'RGB' else image
+
+
+def to_jpeg(image: Image.Image, quality: int = 95) -> bytes:
+    buffered = BytesIO()
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(buffered, format='JPEG', quality=quality)
+    return buffered.getvalue()
+
+
+def to_png(image: Image.Image) -> bytes:
+    buffered = BytesIO()
+    image.save(buffered, format='PNG')
+    return buffered.getvalue()
+
+
+def cached_reference(image: Image.Image, variant: str, target: Hashable,
+                     encode: Callable[[Image.Image], bytes]) -> bytes:
+    """
+    Encoded bytes of ``image`` for one provider format, from the shared cache
+
+    ``variant`` names the provider/format (e.g. ``'openai-chat-jpeg'``) and
+    ``target`` the size the encoder produces (max side or exact WxH); both are
+    part of the key, so the same template prepared for two providers or sizes
+    is cached twice. ``encode`` receives the original image and is only
+    called on a miss.
+    """
+    cache = get_cache()
+    if cache.max_bytes <= 0:
+        return encode(image)
+    key = (image_digest(image), variant, target)
+    return cache.get_or_create(key, lambda: encode(image))
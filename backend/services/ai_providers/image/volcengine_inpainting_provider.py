@@ -11,6 +11,7 @@ from io import BytesIO
 from typing import Optional
 from PIL import Image
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from services import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +35,21 @@ class VolcengineInpaintingProvider:
         self.access_key = access_key
         self.secret_key = secret_key
         self.timeout = timeout
+        self._service = None
         logger.info("火山引擎 Inpainting Provider 初始化（直接HTTP模式）")
+
+    def _get_service(self):
+        """VisualService 复用同一实例，其 requests 会话挂到共享连接池上保持长连接"""
+        if self._service is None:
+            from volcengine.visual.VisualService import VisualService
+            service = VisualService()
+            service.set_ak(self.access_key)
+            service.set_sk(self.secret_key)
+            session = getattr(service, 'session', None)
+            if isinstance(session, requests.Session):
+                http_client.mount_shared_adapter(session)
+            self._service = service
+        return self._service
         
     def _encode_image_to_base64(self, image: Image.Image, is_mask: bool = False) -> str:
         """
@@ -135,10 +150,7 @@ class VolcengineInpaintingProvider:
             logger.debug(f"请求体大小: {len(json.dumps(request_body))} bytes")
             
             # 6. 使用SDK（它会处理签名）
-            from volcengine.visual.VisualService import VisualService
-            service = VisualService()
-            service.set_ak(self.access_key)
-            service.set_sk(self.secret_key)
+            service = self._get_service()
             
             # 使用SDK的json_handler方法（这个方法会处理签名）
             logger.info("使用SDK发送请求（带正确签名）")
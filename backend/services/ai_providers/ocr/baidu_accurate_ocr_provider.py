@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional, Literal
 from PIL import Image
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from services import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -198,7 +199,7 @@ class BaiduAccurateOCRProvider:
             data = '&'.join([f"{k}={v}" for k, v in form_data.items()])
             
             logger.info("🌐 发送请求到百度高精度OCR API...")
-            response = requests.post(url, headers=headers, data=data, timeout=60)
+            response = http_client.post(url, headers=headers, data=data, timeout=60)
             response.raise_for_status()
             
             result = response.json()
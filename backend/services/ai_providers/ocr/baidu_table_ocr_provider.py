@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional
 from PIL import Image
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from services import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -121,7 +122,7 @@ class BaiduTableOCRProvider:
             data = f"image={image_encoded}&cell_contents={'true' if cell_contents else 'false'}&return_excel={'true' if return_excel else 'false'}"
             
             logger.info(f"🌐 发送请求到百度表格OCR API...")
-            response = requests.post(url, headers=headers, data=data, timeout=60)
+            response = http_client.post(url, headers=headers, data=data, timeout=60)
             response.raise_for_status()
             
             result = response.json()
@@ -1,16 +1,27 @@
 """
 Anthropic (Claude) SDK implementation for text generation
 """
+import asyncio
 import base64
 import logging
 from typing import Generator, Optional
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
 from .base import TextProvider, strip_think_tags
 from config import get_config
+from services.prompt_cache import report_prompt_cache
 
 logger = logging.getLogger(__name__)
 
 
+def _report_cached_tokens(usage) -> None:
+    """input_tokens excludes cache reads/writes; the prompt size is the sum of all three."""
+    if usage is None:
+        return
+    cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+    cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    report_prompt_cache((getattr(usage, 'input_tokens', 0) or 0) + cache_read + cache_write, cache_read)
+
+
 class AnthropicTextProvider(TextProvider):
     """Text generation using Anthropic Claude SDK"""
 
@@ -24,17 +35,26 @@ class AnthropicTextProvider(TextProvider):
             model: Model name to use
         """
         config = get_config()
-        self.client = Anthropic(
+        self._client_kwargs = dict(
             api_key=api_key,
             base_url=api_base,
             timeout=config.OPENAI_TIMEOUT,
             max_retries=config.OPENAI_MAX_RETRIES
         )
+        self.client = Anthropic(**self._client_kwargs)
+        self._async_client = None
         self.model = model
         self.max_tokens = config.ANTHROPIC_MAX_TOKENS
         self.request_timeout_seconds = config.OPENAI_TIMEOUT
         self.max_attempts = config.OPENAI_MAX_RETRIES + 1
 
+    @property
+    def async_client(self) -> AsyncAnthropic:
+        """Created on first use, on the event loop that awaits it (services.async_runner)."""
+        if self._async_client is None:
+            self._async_client = AsyncAnthropic(**self._client_kwargs)
+        return self._async_client
+
     def generate_text(self, prompt: str, thinking_budget: int = 0) -> str:
         """
         Generate text using Anthropic Claude SDK
@@ -46,13 +66,46 @@ class AnthropicTextProvider(TextProvider):
         Returns:
             Generated text
         """
+        return self._create([{"role": "user", "content": prompt}])
+
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 0) -> str:
+        """Native async ``generate_text`` on ``AsyncAnthropic``."""
+        return await self._acreate([{"role": "user", "content": prompt}])
+
+    def generate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 0) -> str:
+        """Mark the shared prefix as a prompt-cache breakpoint (ephemeral, 5 min TTL)."""
+        return self._create(self._prefix_messages(prefix, suffix))
+
+    async def agenerate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 0) -> str:
+        """Native async ``generate_text_with_prefix`` on ``AsyncAnthropic``."""
+        return await self._acreate(self._prefix_messages(prefix, suffix))
+
+    @staticmethod
+    def _prefix_messages(prefix: str, suffix: str) -> list:
+        content = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+        if suffix:
+            content.append({"type": "text", "text": suffix})
+        return [{"role": "user", "content": content}]
+
+    def _create(self, messages) -> str:
         response = self.client.messages.create(
             model=self.model,
             max_tokens=self.max_tokens,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
+            messages=messages,
+        )
+        return self._text_response(response)
+
+    async def _acreate(self, messages) -> str:
+        response = await self.async_client.messages.create(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            messages=messages,
         )
+        return self._text_response(response)
+
+    @staticmethod
+    def _text_response(response) -> str:
+        _report_cached_tokens(getattr(response, 'usage', None))
         text = response.content[0].text if response.content else ""
         return strip_think_tags(text)
 
@@ -68,6 +121,16 @@ class AnthropicTextProvider(TextProvider):
 
     def generate_with_image(self, prompt: str, image_path: str, thinking_budget: int = 0) -> str:
         """Generate text with image input using Anthropic Claude API."""
+        return self._create(self._image_messages(prompt, image_path))
+
+    async def agenerate_with_image(self, prompt: str, image_path: str, thinking_budget: int = 0) -> str:
+        """Native async ``generate_with_image`` on ``AsyncAnthropic``."""
+        # 读文件与 base64 编码放到线程池，不阻塞共享事件循环
+        messages = await asyncio.to_thread(self._image_messages, prompt, image_path)
+        return await self._acreate(messages)
+
+    @staticmethod
+    def _image_messages(prompt: str, image_path: str) -> list:
         with open(image_path, "rb") as image_file:
             encoded = base64.b64encode(image_file.read()).decode("ascii")
 
@@ -81,26 +144,19 @@ class AnthropicTextProvider(TextProvider):
         else:
             media_type = "image/jpeg"
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=self.max_tokens,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": media_type,
-                                "data": encoded,
-                            },
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": media_type,
+                            "data": encoded,
                         },
-                        {"type": "text", "text": prompt},
-                    ],
-                }
-            ],
-        )
-
-        text = response.content[0].text if response.content else ""
-        return strip_think_tags(text)
+                    },
+                    {"type": "text", "text": prompt},
+                ],
+            }
+        ]
@@ -1,6 +1,7 @@
 """
 Abstract base class for text generation providers
 """
+import asyncio
 import re
 from abc import ABC, abstractmethod
 from typing import Generator
@@ -30,6 +31,34 @@ class TextProvider(ABC):
         """
         pass
 
+    def generate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        """
+        Generate text for ``prefix + suffix`` where ``prefix`` is shared by many calls
+
+        Providers with native context caching override this to cache the
+        prefix. The default sends the concatenation unchanged, so providers
+        with automatic prefix caching (e.g. OpenAI) still hit on the
+        byte-identical prefix.
+        """
+        return self.generate_text(prefix + suffix, thinking_budget=thinking_budget)
+
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        """
+        Async ``generate_text`` for coroutines on the shared event loop (services.async_runner)
+
+        Providers with an async SDK client override this. The default runs the
+        sync call in the loop's bounded fallback thread pool.
+        """
+        return await asyncio.to_thread(self.generate_text, prompt, thinking_budget=thinking_budget)
+
+    async def agenerate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        """Async ``generate_text_with_prefix``; providers with native context caching override both."""
+        return await self.agenerate_text(prefix + suffix, thinking_budget=thinking_budget)
+
+    async def agenerate_with_image(self, prompt: str, image_path: str, thinking_budget: int = 0) -> str:
+        """Async ``generate_with_image``; the default runs the sync call in the fallback pool."""
+        return await asyncio.to_thread(self.generate_with_image, prompt, image_path, thinking_budget=thinking_budget)
+
     def generate_text_stream(self, prompt: str, thinking_budget: int = 0) -> Generator[str, None, None]:
         """
         Stream text content from prompt, yielding chunks as they arrive.
@@ -5,28 +5,66 @@ Operates in two authentication modes selected at construction time:
   * API-key mode  (Google AI Studio or compatible proxy)
   * Vertex AI mode (GCP service-account credentials via GOOGLE_APPLICATION_CREDENTIALS)
 """
+import asyncio
+import hashlib
 import logging
-from typing import Generator
+import threading
+import time
+from typing import Dict, Generator, Optional, Tuple
 from google import genai
 from google.genai import types
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 from .base import TextProvider, strip_think_tags
 from config import get_config
+from services.prompt_cache import report_prompt_cache
+from services.rate_limiter import report_throttle, report_usage
+from services.reference_index import estimate_tokens
 from ..genai_client import make_genai_client
 
 logger = logging.getLogger(__name__)
 
+# 显式缓存的最小前缀长度（低于模型下限时 caches.create 会失败，直接走隐式前缀缓存）
+_MIN_CACHED_PREFIX_TOKENS = 2048
+# 缓存剩余有效期不足该秒数时不再使用，改为新建
+_CACHE_EXPIRY_MARGIN = 30
+
 
 def _log_retry(retry_state):
-    """记录重试信息"""
+    """记录重试信息，并把限流错误反馈给当前调用的限流器"""
+    if retry_state.outcome:
+        report_throttle(retry_state.outcome.exception())
     logger.warning(
         f"GenAI 请求失败，正在重试 ({retry_state.attempt_number}/{get_config().GENAI_MAX_RETRIES + 1})，"
         f"错误: {retry_state.outcome.exception() if retry_state.outcome else 'unknown'}"
     )
 
 
+def _image_file_part(image_path: str) -> types.Part:
+    """The image file as an inline ``Part``, its bytes sent unchanged."""
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        mime_type = Image.MIME.get(img.format, 'image/png')
+    with open(image_path, 'rb') as f:
+        return types.Part.from_bytes(data=f.read(), mime_type=mime_type)
+
+
+def _is_cache_error(exc: BaseException) -> bool:
+    """The error concerns the cached content itself (expired/deleted or rejected), not the request."""
+    code = getattr(exc, 'code', None) or getattr(exc, 'status_code', None)
+    if code == 404:
+        return True
+    message = str(exc).lower()
+    return code == 400 and ('cached_content' in message or 'cachedcontent' in message)
+
+
 def _validate_response(response):
     """验证响应是否有效，无效则抛出异常触发重试"""
+    usage = getattr(response, 'usage_metadata', None)
+    report_usage(getattr(usage, 'total_token_count', None) or 0)
+    if usage is not None:
+        report_prompt_cache(getattr(usage, 'prompt_token_count', None),
+                            getattr(usage, 'cached_content_token_count', None))
     if response.text is None:
         if hasattr(response, 'candidates') and response.candidates:
             candidate = response.candidates[0]
@@ -61,6 +99,11 @@ class GenAITextProvider(TextProvider):
         config = get_config()
         self.request_timeout_seconds = config.GENAI_TIMEOUT
         self.max_attempts = config.GENAI_MAX_RETRIES + 1
+        self.prompt_cache_ttl = getattr(config, 'PROMPT_CACHE_TTL_SECONDS', 600)
+        # prefix digest -> (cached content name or None if creation failed, expires at)
+        self._prefix_caches: Dict[str, Tuple[Optional[str], float]] = {}
+        self._prefix_locks: Dict[str, threading.Lock] = {}
+        self._prefix_lock = threading.Lock()
     
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
@@ -79,18 +122,153 @@ class GenAITextProvider(TextProvider):
         Returns:
             Generated text
         """
-        # 构建配置，只有在 thinking_budget > 0 时才启用推理模式
-        config_params = {}
-        if thinking_budget > 0:
-            config_params['thinking_config'] = types.ThinkingConfig(thinking_budget=thinking_budget)
-        
         response = self.client.models.generate_content(
             model=self.model,
             contents=prompt,
-            config=types.GenerateContentConfig(**config_params) if config_params else None,
+            config=self._generate_config(thinking_budget),
+        )
+        return _validate_response(response)
+
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        reraise=True,
+        before_sleep=_log_retry
+    )
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 0) -> str:
+        """Native async ``generate_text`` on the SDK's ``client.aio``."""
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=self._generate_config(thinking_budget),
         )
         return _validate_response(response)
+
+    @staticmethod
+    def _generate_config(thinking_budget: int) -> Optional[types.GenerateContentConfig]:
+        # 只有在 thinking_budget > 0 时才启用推理模式
+        if thinking_budget > 0:
+            return types.GenerateContentConfig(thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget))
+        return None
     
+    def generate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 0) -> str:
+        """
+        Generate with ``prefix`` held in a GenAI cached content, created once per prefix
+
+        Falls back to sending ``prefix + suffix`` (still eligible for implicit
+        caching) when the prefix is too short, caching is disabled
+        (PROMPT_CACHE_TTL_SECONDS=0) or the cache cannot be created or used.
+        """
+        cache_name = self._cached_prefix(prefix)
+        if cache_name:
+            try:
+                return self._generate_with_cache(cache_name, suffix, thinking_budget)
+            except Exception as e:
+                # 限流、5xx、空响应等与缓存无关的错误照常抛出，不改为发送整段前缀
+                if not _is_cache_error(e):
+                    raise
+                logger.warning(f"GenAI cached content {cache_name} unusable, sending full prompt: {e}")
+                self._forget_prefix(prefix)
+        return self.generate_text(prefix + suffix, thinking_budget=thinking_budget)
+
+    async def agenerate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 0) -> str:
+        """Async ``generate_text_with_prefix``; cache lookup/creation runs in the fallback pool."""
+        cache_name = await asyncio.to_thread(self._cached_prefix, prefix)
+        if cache_name:
+            try:
+                return await self._agenerate_with_cache(cache_name, suffix, thinking_budget)
+            except Exception as e:
+                if not _is_cache_error(e):
+                    raise
+                logger.warning(f"GenAI cached content {cache_name} unusable, sending full prompt: {e}")
+                await asyncio.to_thread(self._forget_prefix, prefix)
+        return await self.agenerate_text(prefix + suffix, thinking_budget=thinking_budget)
+
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception(lambda e: not _is_cache_error(e)),
+        reraise=True,
+        before_sleep=_log_retry
+    )
+    def _generate_with_cache(self, cache_name: str, suffix: str, thinking_budget: int) -> str:
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=suffix,
+            config=self._cached_config(cache_name, thinking_budget),
+        )
+        return _validate_response(response)
+
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception(lambda e: not _is_cache_error(e)),
+        reraise=True,
+        before_sleep=_log_retry
+    )
+    async def _agenerate_with_cache(self, cache_name: str, suffix: str, thinking_budget: int) -> str:
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=suffix,
+            config=self._cached_config(cache_name, thinking_budget),
+        )
+        return _validate_response(response)
+
+    @staticmethod
+    def _cached_config(cache_name: str, thinking_budget: int) -> types.GenerateContentConfig:
+        config_params = {'cached_content': cache_name}
+        if thinking_budget > 0:
+            config_params['thinking_config'] = types.ThinkingConfig(thinking_budget=thinking_budget)
+        return types.GenerateContentConfig(**config_params)
+
+    def _prefix_key(self, prefix: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{prefix}".encode('utf-8')).hexdigest()
+
+    def _cached_prefix(self, prefix: str) -> Optional[str]:
+        if self.prompt_cache_ttl <= 0 or estimate_tokens(prefix) < _MIN_CACHED_PREFIX_TOKENS:
+            return None
+        key = self._prefix_key(prefix)
+        with self._prefix_lock:
+            key_lock = self._prefix_locks.setdefault(key, threading.Lock())
+        # 同一前缀只创建一次：并发的页面等待第一个请求建好缓存
+        with key_lock:
+            now = time.time()
+            with self._prefix_lock:
+                entry = self._prefix_caches.get(key)
+                if entry and entry[1] > now + _CACHE_EXPIRY_MARGIN:
+                    return entry[0]
+                self._prune_prefix_caches(now, keep=key)
+            try:
+                cache = self.client.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(contents=[prefix], ttl=f"{self.prompt_cache_ttl}s"),
+                )
+                name = cache.name
+                logger.info(f"Created GenAI cached content {name} for a ~{estimate_tokens(prefix)} token prefix")
+            except Exception as e:
+                # 不支持显式缓存的模型/代理：在 TTL 内不再尝试
+                logger.info(f"GenAI context caching unavailable for {self.model}, using implicit prefix caching: {e}")
+                name = None
+            with self._prefix_lock:
+                self._prefix_caches[key] = (name, now + self.prompt_cache_ttl)
+            return name
+
+    def _forget_prefix(self, prefix: str) -> None:
+        """Drop the prefix's cached content (also on the server) so the next call recreates it."""
+        with self._prefix_lock:
+            entry = self._prefix_caches.pop(self._prefix_key(prefix), None)
+        if entry and entry[0]:
+            try:
+                self.client.caches.delete(name=entry[0])
+            except Exception as e:
+                logger.debug(f"Failed to delete GenAI cached content {entry[0]}: {e}")
+
+    def _prune_prefix_caches(self, now: float, keep: str) -> None:
+        expired = [k for k, (_, expires_at) in self._prefix_caches.items() if expires_at <= now and k != keep]
+        for key in expired:
+            del self._prefix_caches[key]
+            self._prefix_locks.pop(key, None)
+
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
         wait=wait_exponential(multiplier=1, min=2, max=10),
@@ -117,15 +295,27 @@ class GenAITextProvider(TextProvider):
         # 构建多模态内容
         contents = [img, prompt]
         
-        # 构建配置，只有在 thinking_budget > 0 时才启用推理模式
-        config_params = {}
-        if thinking_budget > 0:
-            config_params['thinking_config'] = types.ThinkingConfig(thinking_budget=thinking_budget)
-        
         response = self.client.models.generate_content(
             model=self.model,
             contents=contents,
-            config=types.GenerateContentConfig(**config_params) if config_params else None,
+            config=self._generate_config(thinking_budget),
+        )
+        return _validate_response(response)
+
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        reraise=True,
+        before_sleep=_log_retry
+    )
+    async def agenerate_with_image(self, prompt: str, image_path: str, thinking_budget: int = 0) -> str:
+        """Native async ``generate_with_image`` on the SDK's ``client.aio``."""
+        # 读文件放到线程池，原始字节直接上传，不在共享事件循环上解码/重新编码
+        image_part = await asyncio.to_thread(_image_file_part, image_path)
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=[image_part, prompt],
+            config=self._generate_config(thinking_budget),
         )
         return _validate_response(response)
 
@@ -1,16 +1,27 @@
 """
 OpenAI SDK implementation for text generation
 """
+import asyncio
 import base64
 import logging
 from typing import Generator
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from .base import TextProvider, strip_think_tags
 from config import get_config
+from services.rate_limiter import report_usage
+from services.prompt_cache import report_prompt_cache
 
 logger = logging.getLogger(__name__)
 
 
+def _report_cached_tokens(usage) -> None:
+    """OpenAI caches prompt prefixes of 1024+ tokens automatically; report the hit size."""
+    if usage is None:
+        return
+    details = getattr(usage, 'prompt_tokens_details', None)
+    report_prompt_cache(getattr(usage, 'prompt_tokens', 0), getattr(details, 'cached_tokens', 0) if details else 0)
+
+
 class OpenAITextProvider(TextProvider):
     """Text generation using OpenAI SDK (compatible with Gemini via proxy)"""
     
@@ -24,16 +35,25 @@ class OpenAITextProvider(TextProvider):
             model: Model name to use
         """
         config = get_config()
-        self.client = OpenAI(
+        self._client_kwargs = dict(
             api_key=api_key,
             base_url=api_base,
             timeout=config.OPENAI_TIMEOUT,  # set timeout from config
             max_retries=config.OPENAI_MAX_RETRIES  # set max retries from config
         )
+        self.client = OpenAI(**self._client_kwargs)
+        self._async_client = None
         self.model = model
         self.request_timeout_seconds = config.OPENAI_TIMEOUT
         self.max_attempts = config.OPENAI_MAX_RETRIES + 1
     
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Created on first use, on the event loop that awaits it (services.async_runner)."""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(**self._client_kwargs)
+        return self._async_client
+
     def generate_text(self, prompt: str, thinking_budget: int = 0) -> str:
         """
         Generate text using OpenAI SDK
@@ -51,6 +71,19 @@ class OpenAITextProvider(TextProvider):
                 {"role": "user", "content": prompt}
             ]
         )
+        return self._text_response(response)
+
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 0) -> str:
+        """Native async ``generate_text`` on ``AsyncOpenAI``."""
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return self._text_response(response)
+
+    def _text_response(self, response) -> str:
+        report_usage(getattr(response.usage, 'total_tokens', 0) if response.usage else 0)
+        _report_cached_tokens(response.usage)
         return strip_think_tags(response.choices[0].message.content)
 
     def generate_text_stream(self, prompt: str, thinking_budget: int = 0) -> Generator[str, None, None]:
@@ -67,25 +100,42 @@ class OpenAITextProvider(TextProvider):
 
     def generate_with_image(self, prompt: str, image_path: str, thinking_budget: int = 0) -> str:
         """Generate text with image input using OpenAI-compatible chat completions."""
-        with open(image_path, "rb") as image_file:
-            encoded = base64.b64encode(image_file.read()).decode("ascii")
-
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {"url": f"data:image/png;base64,{encoded}"},
-                        },
-                    ],
-                }
-            ],
+            messages=self._image_messages(prompt, image_path),
         )
+        return self._multimodal_response(response)
+
+    async def agenerate_with_image(self, prompt: str, image_path: str, thinking_budget: int = 0) -> str:
+        """Native async ``generate_with_image`` on ``AsyncOpenAI``."""
+        # 读文件与 base64 编码放到线程池，不阻塞共享事件循环
+        messages = await asyncio.to_thread(self._image_messages, prompt, image_path)
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+        )
+        return self._multimodal_response(response)
+
+    @staticmethod
+    def _image_messages(prompt: str, image_path: str) -> list:
+        with open(image_path, "rb") as image_file:
+            encoded = base64.b64encode(image_file.read()).decode("ascii")
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": f"data:image/png;base64,{encoded}"},
+                    },
+                ],
+            }
+        ]
 
+    @staticmethod
+    def _multimodal_response(response) -> str:
+        report_usage(getattr(response.usage, 'total_tokens', 0) if response.usage else 0)
         message_content = response.choices[0].message.content
         if isinstance(message_content, str):
             return strip_think_tags(message_content)
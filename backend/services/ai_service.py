@@ -3,11 +3,11 @@ AI Service - handles all AI model interactions
 Based on demo.py and gemini_genai.py
 TODO: use structured output API
 """
+import asyncio
 import os
 import json
 import re
 import logging
-import requests
 from typing import List, Dict, Optional, Union, Any
 from textwrap import dedent
 from PIL import Image
@@ -15,7 +15,8 @@ from tenacity import retry, stop_after_attempt, retry_if_exception_type
 from .prompts import (
     get_outline_generation_prompt,
     get_outline_parsing_prompt,
-    get_page_description_prompt,
+    get_page_description_prefix,
+    get_page_description_suffix,
     get_all_descriptions_stream_prompt,
     get_image_generation_prompt,
     get_image_edit_prompt,
@@ -33,6 +34,7 @@ from .prompts import (
     get_template_auto_match_prompt,
 )
 from .ai_providers import get_text_provider, get_image_provider, get_caption_provider, TextProvider, ImageProvider
+from . import http_client
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -354,13 +356,14 @@ class AIService:
         """
         try:
             logger.debug(f"Downloading image from URL: {url}")
-            response = requests.get(url, timeout=30, stream=True)
-            response.raise_for_status()
-            
-            # 从响应内容创建 PIL Image
-            image = Image.open(response.raw)
-            # 确保图片被加载
-            image.load()
+            # 读完后关闭响应，连接才会归还到连接池复用
+            with http_client.get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+
+                # 从响应内容创建 PIL Image
+                image = Image.open(response.raw)
+                # 确保图片被加载
+                image.load()
             logger.debug(f"Successfully downloaded image: {image.size}, {image.mode}")
             return image
         except Exception as e:
@@ -785,9 +788,26 @@ class AIService:
             [*cls._get_extra_field_names(), *Settings.LEGACY_FIELD_EQUIV.keys()]
         ))
 
+    def build_page_description_prefix(self, project_context: ProjectContext, outline: List[Dict],
+                                      language='zh', detail_level: str = 'default') -> str:
+        """
+        Prompt prefix shared by every page of a description run
+
+        Build it once per task and pass it to generate_page_description so the
+        provider sees a byte-identical prefix it can cache.
+        """
+        return get_page_description_prefix(
+            project_context=project_context,
+            outline=outline,
+            language=language,
+            detail_level=detail_level,
+            extra_fields=self._get_extra_field_names(),
+        )
+
     def generate_page_description(self, project_context: ProjectContext, outline: List[Dict],
                                  page_outline: Dict, page_index: int, language='zh',
-                                 detail_level: str = 'default') -> Dict:
+                                 detail_level: str = 'default',
+                                 prompt_prefix: Optional[str] = None) -> Dict:
         """
         Generate description for a single page
         Based on demo.py gen_desc() logic
@@ -798,28 +818,56 @@ class AIService:
             page_outline: Outline for this specific page
             page_index: Page number (1-indexed)
             detail_level: Description detail level (concise/default/detailed)
+            prompt_prefix: Shared prefix from build_page_description_prefix (built here if omitted)
 
         Returns:
             Dict with 'text' and optional 'extra_fields'
         """
-        extra_field_names = self._get_extra_field_names()
-        part_info = f"\nThis page belongs to: {page_outline['part']}" if 'part' in page_outline else ""
+        prompt_prefix, page_suffix = self._page_description_prompt(
+            project_context, outline, page_outline, page_index, language, detail_level, prompt_prefix
+        )
+        # 共享前缀走提供商的上下文缓存（GenAI cached contents / Anthropic prompt caching），
+        # 其余提供商收到逐字节相同的前缀，可命中自动前缀缓存
+        response_text = self.text_provider.generate_text_with_prefix(
+            prompt_prefix, page_suffix, thinking_budget=self._get_text_thinking_budget()
+        )
+        return self._parse_page_description(response_text)
+
+    async def agenerate_page_description(self, project_context: ProjectContext, outline: List[Dict],
+                                         page_outline: Dict, page_index: int, language='zh',
+                                         detail_level: str = 'default',
+                                         prompt_prefix: Optional[str] = None) -> Dict:
+        """
+        Async generate_page_description for coroutines on the shared event loop
+
+        Prompt building and parsing read Settings, so they run in the loop's
+        fallback pool; only the model call is awaited on the loop.
+        """
+        prompt_prefix, page_suffix = await asyncio.to_thread(
+            self._page_description_prompt,
+            project_context, outline, page_outline, page_index, language, detail_level, prompt_prefix,
+        )
+        response_text = await self.text_provider.agenerate_text_with_prefix(
+            prompt_prefix, page_suffix, thinking_budget=self._get_text_thinking_budget()
+        )
+        return await asyncio.to_thread(self._parse_page_description, response_text)
 
-        desc_prompt = get_page_description_prompt(
+    def _page_description_prompt(self, project_context: ProjectContext, outline: List[Dict],
+                                 page_outline: Dict, page_index: int, language, detail_level: str,
+                                 prompt_prefix: Optional[str]) -> tuple[str, str]:
+        if prompt_prefix is None:
+            prompt_prefix = self.build_page_description_prefix(project_context, outline, language, detail_level)
+        part_info = f"\nThis page belongs to: {page_outline['part']}" if 'part' in page_outline else ""
+        page_suffix = get_page_description_suffix(
             project_context=project_context,
-            outline=outline,
             page_outline=page_outline,
             page_index=page_index,
             part_info=part_info,
-            language=language,
-            detail_level=detail_level,
-            extra_fields=extra_field_names,
         )
+        logger.debug(f"[get_page_description_prompt] Page suffix:\n{page_suffix}")
+        return prompt_prefix, page_suffix
 
-        # 根据 enable_text_reasoning 配置调整 thinking_budget
-        actual_budget = self._get_text_thinking_budget()
-        response_text = self.text_provider.generate_text(desc_prompt, thinking_budget=actual_budget)
-
+    def _parse_page_description(self, response_text: str) -> Dict:
         text = dedent(response_text)
         description_text, extra_fields = self._parse_extra_fields(text, self._get_parseable_field_names())
 
@@ -1096,73 +1144,7 @@ class AIService:
                 logger.debug(f"Additional reference images: {len(additional_ref_images)}")
             logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
 
-            # 构建参考图片列表
-            ref_images = []
-            # 只关闭此方法打开的图片，不关闭调用方传入的 PIL Image 对象
-            owned_images = []
-
-            # 添加主参考图片（如果提供了路径）
-            if ref_image_path:
-                if not os.path.exists(ref_image_path):
-                    raise FileNotFoundError(f"Reference image not found: {ref_image_path}")
-                main_ref_image = Image.open(ref_image_path)
-                ref_images.append(main_ref_image)
-                owned_images.append(main_ref_image)
-
-            # 添加额外的参考图片
-            if additional_ref_images:
-                for ref_img in additional_ref_images:
-                    if isinstance(ref_img, Image.Image):
-                        # 已经是 PIL Image 对象，由调用方负责关闭
-                        ref_images.append(ref_img)
-                    elif isinstance(ref_img, str):
-                        # 可能是本地路径或 URL
-                        if os.path.exists(ref_img):
-                            # 本地路径
-                            opened = Image.open(ref_img)
-                            ref_images.append(opened)
-                            owned_images.append(opened)
-                        elif ref_img.startswith('http://') or ref_img.startswith('https://'):
-                            # URL，需要下载
-                            downloaded_img = self.download_image_from_url(ref_img)
-                            if downloaded_img:
-                                ref_images.append(downloaded_img)
-                                owned_images.append(downloaded_img)
-                            else:
-                                logger.warning(f"Failed to download image from URL: {ref_img}, skipping...")
-                        elif ref_img.startswith('/files/mineru/'):
-                            # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
-                            local_path = self._convert_mineru_path_to_local(ref_img)
-                            if local_path and os.path.exists(local_path):
-                                opened = Image.open(local_path)
-                                ref_images.append(opened)
-                                owned_images.append(opened)
-                                logger.debug(f"Loaded MinerU image from local path: {local_path}")
-                            else:
-                                logger.warning(f"MinerU image file not found (with prefix matching): {ref_img}, skipping...")
-                        elif ref_img.startswith('/files/'):
-                            # 通用 /files/ 路径（materials、项目文件等），转换为文件系统路径
-                            upload_folder = get_config().UPLOAD_FOLDER
-                            upload_folder_real = os.path.realpath(upload_folder)
-                            relative_path = ref_img[len('/files/'):].lstrip('/\\')
-                            local_path = os.path.realpath(os.path.join(upload_folder, relative_path))
-                            try:
-                                is_inside_upload_folder = (
-                                    os.path.commonpath([local_path, upload_folder_real]) == upload_folder_real
-                                )
-                            except ValueError:
-                                is_inside_upload_folder = False
-                            if not is_inside_upload_folder:
-                                logger.warning(f"Path traversal attempt blocked: {ref_img}, skipping...")
-                            elif os.path.isfile(local_path):
-                                opened = Image.open(local_path)
-                                ref_images.append(opened)
-                                owned_images.append(opened)
-                                logger.debug(f"Loaded image from local path: {local_path}")
-                            else:
-                                logger.warning(f"Local file not found or not a file: {local_path} (from {ref_img}), skipping...")
-                        else:
-                            logger.warning(f"Invalid image reference: {ref_img}, skipping...")
+            ref_images, owned_images = self._load_reference_images(ref_image_path, additional_ref_images)
 
             logger.debug(f"Calling image provider for generation with {len(ref_images)} reference images...")
             logger.debug(f"Enable image reasoning/thinking: {self.enable_image_reasoning}, budget: {self._get_image_thinking_budget()}")
@@ -1189,6 +1171,113 @@ class AIService:
             error_detail = f"Error generating image: {type(e).__name__}: {str(e)}"
             logger.error(error_detail, exc_info=True)
             raise Exception(error_detail) from e
+
+    async def agenerate_image(self, prompt: str, ref_image_path: Optional[str] = None,
+                              aspect_ratio: str = "16:9", resolution: str = "2K",
+                              additional_ref_images: Optional[List[Union[str, Image.Image]]] = None) -> Optional[Image.Image]:
+        """
+        Async generate_image for coroutines on the shared event loop (services.async_runner)
+
+        Reference images are opened/downloaded in the loop's fallback pool; the
+        provider call is awaited on the loop.
+        """
+        try:
+            ref_images, owned_images = await asyncio.to_thread(
+                self._load_reference_images, ref_image_path, additional_ref_images
+            )
+            try:
+                return await self.image_provider.agenerate_image(
+                    prompt=prompt,
+                    ref_images=ref_images if ref_images else None,
+                    aspect_ratio=aspect_ratio,
+                    resolution=resolution,
+                    enable_thinking=self.enable_image_reasoning,
+                    thinking_budget=self._get_image_thinking_budget()
+                )
+            finally:
+                for img in owned_images:
+                    try:
+                        img.close()
+                    except Exception:
+                        pass
+
+        except Exception as e:
+            error_detail = f"Error generating image: {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
+
+    def _load_reference_images(self, ref_image_path: Optional[str],
+                               additional_ref_images: Optional[List[Union[str, Image.Image]]]) -> tuple[list, list]:
+        """Reference images for generate_image and the subset opened here (the caller closes those)."""
+        # 构建参考图片列表
+        ref_images = []
+        # 只关闭此方法打开的图片，不关闭调用方传入的 PIL Image 对象
+        owned_images = []
+
+        # 添加主参考图片（如果提供了路径）
+        if ref_image_path:
+            if not os.path.exists(ref_image_path):
+                raise FileNotFoundError(f"Reference image not found: {ref_image_path}")
+            main_ref_image = Image.open(ref_image_path)
+            ref_images.append(main_ref_image)
+            owned_images.append(main_ref_image)
+
+        # 添加额外的参考图片
+        if additional_ref_images:
+            for ref_img in additional_ref_images:
+                if isinstance(ref_img, Image.Image):
+                    # 已经是 PIL Image 对象，由调用方负责关闭
+                    ref_images.append(ref_img)
+                elif isinstance(ref_img, str):
+                    # 可能是本地路径或 URL
+                    if os.path.exists(ref_img):
+                        # 本地路径
+                        opened = Image.open(ref_img)
+                        ref_images.append(opened)
+                        owned_images.append(opened)
+                    elif ref_img.startswith('http://') or ref_img.startswith('https://'):
+                        # URL，需要下载
+                        downloaded_img = self.download_image_from_url(ref_img)
+                        if downloaded_img:
+                            ref_images.append(downloaded_img)
+                            owned_images.append(downloaded_img)
+                        else:
+                            logger.warning(f"Failed to download image from URL: {ref_img}, skipping...")
+                    elif ref_img.startswith('/files/mineru/'):
+                        # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
+                        local_path = self._convert_mineru_path_to_local(ref_img)
+                        if local_path and os.path.exists(local_path):
+                            opened = Image.open(local_path)
+                            ref_images.append(opened)
+                            owned_images.append(opened)
+                            logger.debug(f"Loaded MinerU image from local path: {local_path}")
+                        else:
+                            logger.warning(f"MinerU image file not found (with prefix matching): {ref_img}, skipping...")
+                    elif ref_img.startswith('/files/'):
+                        # 通用 /files/ 路径（materials、项目文件等），转换为文件系统路径
+                        upload_folder = get_config().UPLOAD_FOLDER
+                        upload_folder_real = os.path.realpath(upload_folder)
+                        relative_path = ref_img[len('/files/'):].lstrip('/\\')
+                        local_path = os.path.realpath(os.path.join(upload_folder, relative_path))
+                        try:
+                            is_inside_upload_folder = (
+                                os.path.commonpath([local_path, upload_folder_real]) == upload_folder_real
+                            )
+                        except ValueError:
+                            is_inside_upload_folder = False
+                        if not is_inside_upload_folder:
+                            logger.warning(f"Path traversal attempt blocked: {ref_img}, skipping...")
+                        elif os.path.isfile(local_path):
+                            opened = Image.open(local_path)
+                            ref_images.append(opened)
+                            owned_images.append(opened)
+                            logger.debug(f"Loaded image from local path: {local_path}")
+                        else:
+                            logger.warning(f"Local file not found or not a file: {local_path} (from {ref_img}), skipping...")
+                    else:
+                        logger.warning(f"Invalid image reference: {ref_img}, skipping...")
+
+        return ref_images, owned_images
     
     def edit_image(self, prompt: str, current_image_path: str,
                   aspect_ratio: str = "16:9", resolution: str = "2K",
@@ -0,0 +1,146 @@
+"""
+Async runner - one shared event loop for AI provider calls
+
+Providers were synchronous, so concurrency came from stacked thread pools and
+every in-flight LLM call pinned an OS thread for up to OPENAI_TIMEOUT. Text and
+image providers now also expose ``agenerate_text`` / ``agenerate_with_image`` /
+``agenerate_image`` (native on the OpenAI, Anthropic and GenAI SDKs), and this
+module runs them on a single background event loop:
+
+* ``submit(coro)`` schedules a coroutine from any thread and returns a
+  ``concurrent.futures.Future``; thousands of calls can be awaiting the
+  network on the one loop thread.
+* ``run(coro)`` / ``gather(coros)`` block the calling (task) thread until done.
+* The caller's context variables (Flask app context, rate-limit slot, prompt
+  cache collector) are copied into the task, as a thread pool would not do.
+* Providers without an async client fall back to ``asyncio.to_thread``; that
+  pool is capped at ASYNC_FALLBACK_THREADS.
+* The loop lives for the whole process: cached providers keep lazily built
+  async clients whose connection pools are bound to it, so it is never
+  stopped and replaced.
+
+Concurrency against a provider is still governed by the rate limiters
+(``async with <limiter>.aslot(...)``), not by the number of threads.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Coroutine, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FALLBACK_THREADS = 32
+
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_fallback_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_fallback_size = 0
+_tasks: set = set()
+
+
+def _fallback_threads() -> int:
+    value = None
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            value = current_app.config.get('ASYNC_FALLBACK_THREADS')
+    except ImportError:
+        pass
+    try:
+        return max(1, int(value or os.getenv('ASYNC_FALLBACK_THREADS') or DEFAULT_FALLBACK_THREADS))
+    except ValueError:
+        return DEFAULT_FALLBACK_THREADS
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop, ready: threading.Event) -> None:
+    asyncio.set_event_loop(loop)
+    loop.call_soon(ready.set)
+    loop.run_forever()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """The shared loop, started on first use in a daemon thread."""
+    global _loop, _thread, _fallback_executor, _fallback_size
+    with _lock:
+        if _loop is None or _thread is None or not _thread.is_alive():
+            loop = asyncio.new_event_loop()
+            _fallback_size = _fallback_threads()
+            _fallback_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_fallback_size, thread_name_prefix='ai-async-fallback'
+            )
+            loop.set_default_executor(_fallback_executor)
+            ready = threading.Event()
+            thread = threading.Thread(target=_run_loop, args=(loop, ready), name='ai-event-loop', daemon=True)
+            thread.start()
+            ready.wait()
+            _loop, _thread = loop, thread
+            logger.info("Started shared AI event loop")
+        return _loop
+
+
+def in_loop_thread() -> bool:
+    return _thread is not None and threading.current_thread() is _thread
+
+
+def submit(coro: Coroutine) -> concurrent.futures.Future:
+    """Schedule ``coro`` on the shared loop with a copy of the caller's context."""
+    if in_loop_thread():
+        coro.close()
+        raise RuntimeError("submit() called from the event loop thread; await the coroutine instead")
+    loop = get_loop()
+    context = contextvars.copy_context()
+    future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def start():
+        if future.cancelled():
+            coro.close()
+            return
+        # Task 创建时复制当前上下文，在 context.run 内创建即继承调用方的上下文变量
+        task = context.run(loop.create_task, coro)
+        _tasks.add(task)
+        task.add_done_callback(lambda t: _finish(t, future))
+        future.add_done_callback(lambda f: f.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+    loop.call_soon_threadsafe(start)
+    return future
+
+
+def _finish(task: asyncio.Task, future: concurrent.futures.Future) -> None:
+    _tasks.discard(task)
+    if future.cancelled():
+        return
+    if task.cancelled():
+        future.cancel()
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
+
+
+def run(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run ``coro`` on the shared loop and wait for its result in the calling thread."""
+    return submit(coro).result(timeout)
+
+
+def gather(aws: Iterable[Awaitable], return_exceptions: bool = False,
+           timeout: Optional[float] = None) -> List[Any]:
+    """Run awaitables concurrently on the shared loop; results in input order."""
+    aws = list(aws)
+
+    async def _gather():
+        return await asyncio.gather(*aws, return_exceptions=return_exceptions)
+
+    return run(_gather(), timeout)
+
+
+def stats() -> dict:
+    return {
+        'running': _thread is not None and _thread.is_alive(),
+        'in_flight': len(_tasks),
+        'fallback_threads': _fallback_size if _fallback_executor else 0,
+    }
+
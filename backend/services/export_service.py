@@ -15,7 +15,6 @@ import hashlib
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
-from textwrap import dedent
 from dataclasses import dataclass, field
 from pptx import Presentation
 from pptx.util import Inches
@@ -24,8 +23,9 @@ from pptx.oxml.ns import qn
 from PIL import Image
 import io
 import tempfile
-import img2pdf
 import fitz  # PyMuPDF
+from utils.pdf_writer import StreamingPDFWriter, build_xmp_metadata
+from services.rate_limiter import caption_resource_limiter
 from utils.pptx_math import latex_to_display_text, looks_like_latex_math
 logger = logging.getLogger(__name__)
 
@@ -587,6 +587,12 @@ class ExportService:
         ]
         transition_effect_queue: List[str] = []
 
+        # Slides first reference tiny placeholder images; the real files are
+        # streamed into the package on save, so python-pptx never holds every
+        # image blob in memory at once.
+        media_sources: Dict[str, str] = {}  # package media path -> source image
+        placeholders: Dict[str, bytes] = {}  # source image -> placeholder (same image, same part)
+
         # Add each image as a slide
         for image_path in image_paths:
             if not os.path.exists(image_path):
@@ -597,14 +603,21 @@ class ExportService:
             blank_slide_layout = prs.slide_layouts[6]
             slide = prs.slides.add_slide(blank_slide_layout)
             
+            if image_path not in placeholders:
+                placeholders[image_path] = ExportService._media_placeholder(image_path, len(placeholders))
+            placeholder = placeholders[image_path]
+
             # Add image to fill entire slide
-            slide.shapes.add_picture(
-                image_path,
+            picture = slide.shapes.add_picture(
+                io.BytesIO(placeholder) if placeholder else image_path,
                 left=0,
                 top=0,
                 width=prs.slide_width,
                 height=prs.slide_height
             )
+            if placeholder:
+                media_part = slide.part.related_part(picture._element.blip_rId)
+                media_sources[media_part.partname.lstrip('/')] = image_path
 
             if valid_transition_effects:
                 if not transition_effect_queue:
@@ -617,19 +630,80 @@ class ExportService:
         
         # Save or return bytes
         if output_file:
-            prs.save(output_file)
+            tmp_output = f"{output_file}.part"
+            try:
+                ExportService._save_pptx_with_media(prs, media_sources, tmp_output)
+                os.replace(tmp_output, output_file)
+            finally:
+                if os.path.exists(tmp_output):
+                    os.remove(tmp_output)
             return None
         else:
             # Save to bytes
             pptx_bytes = io.BytesIO()
-            prs.save(pptx_bytes)
-            pptx_bytes.seek(0)
+            ExportService._save_pptx_with_media(prs, media_sources, pptx_bytes)
             return pptx_bytes.getvalue()
+
+    # Placeholder formats python-pptx accepts and that can carry a unique marker,
+    # so every source image gets its own media part instead of being deduplicated.
+    _PLACEHOLDER_FORMATS = {'PNG', 'JPEG'}
+
+    @staticmethod
+    def _media_placeholder(image_path: str, index: int) -> Optional[bytes]:
+        """1x1 image in the same format as ``image_path``, unique per ``index``.
+
+        Returns None when the format can't be swapped in later; the image is
+        then embedded directly.
+        """
+        try:
+            with Image.open(image_path) as img:
+                image_format = img.format
+        except Exception:
+            return None
+        if image_format not in ExportService._PLACEHOLDER_FORMATS:
+            return None
+
+        marker = f"banana-slides-media-{index}"
+        buffer = io.BytesIO()
+        placeholder = Image.new('RGB', (1, 1), 'white')
+        if image_format == 'PNG':
+            from PIL.PngImagePlugin import PngInfo
+            info = PngInfo()
+            info.add_text('banana-slides', marker)
+            placeholder.save(buffer, format='PNG', pnginfo=info)
+        else:
+            placeholder.save(buffer, format='JPEG', comment=marker.encode('ascii'))
+        return buffer.getvalue()
+
+    @staticmethod
+    def _save_pptx_with_media(prs, media_sources: Dict[str, str], output) -> None:
+        """Save ``prs`` to ``output`` (path or binary file), streaming source images over placeholders."""
+        if not media_sources:
+            prs.save(output)
+            return
+
+        import zipfile
+        with tempfile.TemporaryFile() as skeleton:
+            prs.save(skeleton)
+            skeleton.seek(0)
+            with zipfile.ZipFile(skeleton) as zin, \
+                    zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zout:
+                for item in zin.infolist():
+                    source = media_sources.get(item.filename)
+                    if source:
+                        # Images are already compressed; store them as-is (chunked copy)
+                        zout.write(source, item.filename, compress_type=zipfile.ZIP_STORED)
+                    else:
+                        zout.writestr(item, zin.read(item.filename))
     
     @staticmethod
     def create_pdf_from_images(image_paths: List[str], output_file: str = None, aspect_ratio: str = '16:9') -> Optional[bytes]:
         """
-        Create PDF file from image paths using img2pdf (low memory usage)
+        Create PDF file from image paths, streaming one page at a time
+
+        Pages are appended to the output file by StreamingPDFWriter, so memory
+        use stays at roughly one image regardless of page count. Metadata is
+        written in the same pass (no re-serialisation of the finished PDF).
 
         Args:
             image_paths: List of absolute paths to images
@@ -650,28 +724,34 @@ class ExportService:
             raise ValueError("No valid images found for PDF export")
 
         try:
-            logger.info(f"Using img2pdf for PDF export ({len(valid_paths)} pages, low memory mode)")
+            logger.info(f"Streaming PDF export ({len(valid_paths)} pages)")
 
             page_w, page_h = _get_page_size_inches(aspect_ratio)
-            layout_fun = img2pdf.get_layout_fun(
-                pagesize=(img2pdf.in_to_pt(page_w), img2pdf.in_to_pt(page_h)),
-                fit=img2pdf.FitMode.fill,
-            )
-
-            # Convert images to PDF
-            pdf_bytes = img2pdf.convert(valid_paths, layout_fun=layout_fun)
+            page_size = (page_w * 72, page_h * 72)
 
-            # Add metadata
-            pdf_bytes = ExportService._add_pdf_metadata(pdf_bytes)
+            def write_pdf(stream):
+                writer = StreamingPDFWriter(stream, page_size=page_size)
+                for path in valid_paths:
+                    writer.add_image_page(path)
+                writer.close()
 
             if output_file:
-                with open(output_file, "wb") as f:
-                    f.write(pdf_bytes)
+                # Write next to the target and rename, so readers never see a half-written file
+                tmp_output = f"{output_file}.part"
+                try:
+                    with open(tmp_output, "wb") as f:
+                        write_pdf(f)
+                    os.replace(tmp_output, output_file)
+                finally:
+                    if os.path.exists(tmp_output):
+                        os.remove(tmp_output)
                 return None
             else:
-                return pdf_bytes
-        except (img2pdf.ImageOpenError, ValueError, IOError) as e:
-            logger.warning(f"img2pdf conversion failed: {e}. Falling back to Pillow (high memory usage).")
+                buffer = io.BytesIO()
+                write_pdf(buffer)
+                return buffer.getvalue()
+        except (OSError, ValueError, SyntaxError) as e:
+            logger.warning(f"Streaming PDF export failed: {e}. Falling back to Pillow (high memory usage).")
             return ExportService.create_pdf_from_images_pillow(valid_paths, output_file, aspect_ratio)
 
     @staticmethod
@@ -686,32 +766,8 @@ class ExportService:
                 "creator": "banana-slides"
             })
 
-            now = datetime.now(timezone.utc)
-            iso_time = now.isoformat()
-
             content_hash = hashlib.md5(pdf_bytes[:1024]).hexdigest()
-
-            xmp = dedent(f'''\
-                <?xpacket begin="" id="W5M0MpCehiHzreSzNTczkc9d"?>
-                <x:xmpmeta xmlns:x="adobe:ns:meta/">
-                  <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
-                    <rdf:Description rdf:about="" xmlns:dc="http://purl.org/dc/elements/1.1/">
-                      <dc:creator><rdf:Seq><rdf:li>banana-slides</rdf:li></rdf:Seq></dc:creator>
-                    </rdf:Description>
-                    <rdf:Description rdf:about="" xmlns:pdf="http://ns.adobe.com/pdf/1.3/">
-                      <pdf:Producer>banana-slides</pdf:Producer>
-                    </rdf:Description>
-                    <rdf:Description rdf:about="" xmlns:xmp="http://ns.adobe.com/xap/1.0/">
-                      <xmp:CreatorTool>banana-slides</xmp:CreatorTool>
-                      <xmp:CreateDate>{iso_time}</xmp:CreateDate>
-                      <xmp:MetadataDate>{iso_time}</xmp:MetadataDate>
-                    </rdf:Description>
-                    <rdf:Description rdf:about="" xmlns:xmpMM="http://ns.adobe.com/xap/1.0/mm/">
-                      <xmpMM:DocumentID>uuid:{content_hash}</xmpMM:DocumentID>
-                    </rdf:Description>
-                  </rdf:RDF>
-                </x:xmpmeta>
-                <?xpacket end="w"?>''')
+            xmp = build_xmp_metadata("banana-slides", datetime.now(timezone.utc), content_hash)
             doc.set_xml_metadata(xmp)
 
             return doc.tobytes()
@@ -1082,14 +1138,17 @@ class ExportService:
         logger.info(f"并行提取 {len(text_items)} 个文本元素的样式（并发数: {max_workers}）...")
         
         results = {}
+        # 在调用线程解析一次限流 key，线程池中的子线程没有应用上下文
+        caption_key = caption_resource_limiter.resolve_key()
         
         def extract_single(item):
             element_id, image_path, text_content = item
             try:
-                style = text_attribute_extractor.extract(
-                    image=image_path,
-                    text_content=text_content
-                )
+                with caption_resource_limiter.slot(f"text_style element={element_id}", key=caption_key):
+                    style = text_attribute_extractor.extract(
+                        image=image_path,
+                        text_content=text_content
+                    )
                 return element_id, style
             except Exception as e:
                 logger.warning(f"提取文字样式失败 [{element_id}]: {e}")
@@ -1193,6 +1252,8 @@ class ExportService:
         logger.info(f"【新逻辑】使用全图批量分析 {len(editable_images)} 页的文本样式...")
         
         all_results = {}
+        # 在调用线程解析一次限流 key，线程池中的子线程没有应用上下文
+        caption_key = caption_resource_limiter.resolve_key()
         
         def process_single_page(editable_img, page_idx):
             """处理单个页面的文本样式提取"""
@@ -1212,10 +1273,11 @@ class ExportService:
                 full_image_path = editable_img.image_path
                 
                 # 调用批量提取方法
-                page_results = text_attribute_extractor.extract_batch_with_full_image(
-                    full_image=full_image_path,
-                    text_elements=text_elements
-                )
+                with caption_resource_limiter.slot(f"text_style page={page_idx + 1}", key=caption_key):
+                    page_results = text_attribute_extractor.extract_batch_with_full_image(
+                        full_image=full_image_path,
+                        text_elements=text_elements
+                    )
                 
                 logger.info(f"  页面 {page_idx + 1}: 成功提取 {len(page_results)} 个元素的样式")
                 return page_results
@@ -1320,6 +1382,8 @@ class ExportService:
         # Step 2: 并行执行两种识别
         global_results = {}  # 全局识别结果
         local_results = {}   # 单个裁剪识别结果
+        # 在调用线程解析一次限流 key，线程池中的子线程没有应用上下文
+        caption_key = caption_resource_limiter.resolve_key()
         
         def extract_global_for_page(page_idx, page_data):
             """全局识别单页，并对异常或缺失结果做页级重试。"""
@@ -1335,10 +1399,11 @@ class ExportService:
                 if attempt > 1:
                     time.sleep(1)
                 try:
-                    raw_results = text_attribute_extractor.extract_batch_with_full_image(
-                        full_image=page_data['image_path'],
-                        text_elements=page_data['elements']
-                    )
+                    with caption_resource_limiter.slot(f"text_style global page={page_idx + 1}", key=caption_key):
+                        raw_results = text_attribute_extractor.extract_batch_with_full_image(
+                            full_image=page_data['image_path'],
+                            text_elements=page_data['elements']
+                        )
                     if raw_results is not None and not isinstance(raw_results, dict):
                         raise ValueError("Expected dict or None from style extractor")
                     results = {
@@ -1398,10 +1463,11 @@ class ExportService:
             """单个裁剪识别"""
             element_id, image_path, text_content = item
             try:
-                style = text_attribute_extractor.extract(
-                    image=image_path,
-                    text_content=text_content
-                )
+                with caption_resource_limiter.slot(f"text_style local element={element_id}", key=caption_key):
+                    style = text_attribute_extractor.extract(
+                        image=image_path,
+                        text_content=text_content
+                    )
                 # Check for real success: style must exist and not be an error result
                 # (CaptionModelTextAttributeExtractor returns TextStyleResult(confidence=0.0, metadata={'error':...}) on failure)
                 is_error = style and style.confidence == 0.0 and style.metadata.get('error')
@@ -1565,7 +1631,8 @@ class ExportService:
         export_extractor_method: str = 'hybrid',  # 组件提取方法: mineru, hybrid
         export_inpaint_method: str = 'hybrid',  # 背景修复方法: generative, baidu, hybrid
         enable_icon_subject_extraction: bool = False,  # 是否对小尺寸图标走百度智能抠图
-        fail_fast: bool = True  # 是否在遇到错误时立即停止（False则收集警告继续）
+        fail_fast: bool = True,  # 是否在遇到错误时立即停止（False则收集警告继续）
+        analysis_store = None  # 可选：EditableAnalysisStore，按图片版本复用/保存分析结果
     ) -> Tuple[Optional[bytes], ExportWarnings]:
         """
         使用递归图片可编辑化服务创建可编辑PPTX
@@ -1591,6 +1658,8 @@ class ExportService:
             export_extractor_method: 组件提取方法 ('mineru' 或 'hybrid'，默认 'hybrid')
             export_inpaint_method: 背景修复方法 ('generative', 'baidu', 'hybrid'，默认 'hybrid')
             fail_fast: 是否在遇到错误时立即停止（默认 True）。设为 False 则收集警告继续导出。
+            analysis_store: 已存分析结果（可选）。图片未变化的页面直接复用版面分析和文字样式，
+                只分析新图片，并把新结果存回去
 
         Returns:
             (pptx_bytes, warnings): 元组，包含 PPTX 字节流和警告信息
@@ -1613,9 +1682,12 @@ class ExportService:
                     logger.warning(f"进度回调失败: {e}")
         
         # 如果已提供分析结果，直接使用；否则需要分析
+        cached_text_styles = {}
         if editable_images is not None:
             logger.info(f"使用已提供的 {len(editable_images)} 个分析结果创建PPTX")
             report_progress("准备", f"使用已有分析结果（{len(editable_images)} 页）", 10)
+            analyzed_indices = list(range(len(editable_images)))
+            analysis_store = None  # 调用方已提供分析结果，不读写已存结果
         else:
             if not image_paths:
                 raise ValueError("必须提供 image_paths 或 editable_images 之一")
@@ -1624,80 +1696,105 @@ class ExportService:
             logger.info(f"开始使用递归分析方法创建可编辑PPTX，共 {total_pages} 页")
             report_progress("开始", f"准备分析 {total_pages} 页幻灯片...", 0)
             
-            # 1. 创建ImageEditabilityService（配置自动从 Flask config 获取，使用项目导出设置）
-            logger.info(
-                f"使用导出设置: extractor={export_extractor_method}, "
-                f"inpaint={export_inpaint_method}, "
-                f"icon_subject_extraction={enable_icon_subject_extraction}"
-            )
-            config = ServiceConfig.from_defaults(
-                max_depth=max_depth,
-                extractor_method=export_extractor_method,
-                inpaint_method=export_inpaint_method,
-                enable_icon_subject_extraction=enable_icon_subject_extraction,
-            )
-            editability_service = ImageEditabilityService(config)
+            # 1. 复用已存的分析结果（图片未变化的页面），只分析剩余页面
+            editable_images = [None] * total_pages
+            if analysis_store is not None:
+                for idx, img_path in enumerate(image_paths):
+                    stored = analysis_store.load(img_path)
+                    if stored:
+                        editable_images[idx], page_text_styles = stored
+                        cached_text_styles.update(page_text_styles)
+            analyzed_indices = [idx for idx, img in enumerate(editable_images) if img is None]
+            reused_count = total_pages - len(analyzed_indices)
+            if reused_count:
+                logger.info(f"复用 {reused_count}/{total_pages} 页的已存分析结果")
+                report_progress("版面分析", f"复用 {reused_count} 页未变化幻灯片的分析结果", 5)
             
-            # 2. 并发处理所有页面，生成EditableImage结构
-            report_progress("版面分析", f"开始分析 {total_pages} 张图片（并发数: {max_workers}）...", 5)
-            from concurrent.futures import ThreadPoolExecutor, as_completed
-            
-            editable_images = []
-            completed_count = 0
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = {
-                    executor.submit(editability_service.make_image_editable, img_path): idx
-                    for idx, img_path in enumerate(image_paths)
-                }
+            if analyzed_indices:
+                # 2. 创建ImageEditabilityService（配置自动从 Flask config 获取，使用项目导出设置）
+                logger.info(
+                    f"使用导出设置: extractor={export_extractor_method}, "
+                    f"inpaint={export_inpaint_method}, "
+                    f"icon_subject_extraction={enable_icon_subject_extraction}"
+                )
+                config = ServiceConfig.from_defaults(
+                    max_depth=max_depth,
+                    extractor_method=export_extractor_method,
+                    inpaint_method=export_inpaint_method,
+                    enable_icon_subject_extraction=enable_icon_subject_extraction,
+                )
+                editability_service = ImageEditabilityService(config)
                 
-                results = [None] * len(image_paths)
-                for future in as_completed(futures):
-                    idx = futures[future]
-                    try:
-                        results[idx] = future.result()
-                        completed_count += 1
-                        # 版面分析占 5% - 40% 的进度
-                        percent = 5 + int(35 * completed_count / total_pages)
-                        report_progress("版面分析", f"已完成第 {completed_count}/{total_pages} 页的版面分析", percent)
-                    except Exception as e:
-                        logger.error(f"处理图片 {image_paths[idx]} 失败: {e}")
-                        raise
+                # 3. 并发处理需要分析的页面，生成EditableImage结构
+                pending_pages = len(analyzed_indices)
+                report_progress("版面分析", f"开始分析 {pending_pages} 张图片（并发数: {max_workers}）...", 5)
+                from concurrent.futures import ThreadPoolExecutor, as_completed
                 
-                editable_images = results
+                completed_count = 0
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {
+                        executor.submit(editability_service.make_image_editable, image_paths[idx]): idx
+                        for idx in analyzed_indices
+                    }
+                    
+                    for future in as_completed(futures):
+                        idx = futures[future]
+                        try:
+                            editable_images[idx] = future.result()
+                            completed_count += 1
+                            # 版面分析占 5% - 40% 的进度
+                            percent = 5 + int(35 * completed_count / pending_pages)
+                            report_progress("版面分析", f"已完成第 {completed_count}/{pending_pages} 页的版面分析", percent)
+                        except Exception as e:
+                            logger.error(f"处理图片 {image_paths[idx]} 失败: {e}")
+                            raise
         
         # 2.5. 使用混合策略提取所有文本元素的样式（如果提供了提取器）
         # 混合策略：全局识别（粗体/斜体/下划线/对齐）+ 单个裁剪识别（颜色）
-        text_styles_cache = {}
-        if text_attribute_extractor:
+        # 复用的页面已带有样式，只提取新分析页面的文本样式
+        text_styles_cache = dict(cached_text_styles)
+        failed_element_ids = set()
+        analyzed_images = [editable_images[idx] for idx in analyzed_indices]
+        if text_attribute_extractor and analyzed_images:
             report_progress("样式提取", "开始提取文本样式（混合策略）...", 45)
             
             # 统计文本元素数量
             total_text_count = sum(
                 len(ExportService._collect_text_elements_for_extraction(img.elements))
-                for img in editable_images
+                for img in analyzed_images
             )
             
             if total_text_count > 0:
                 report_progress("样式提取", f"混合策略分析 {total_text_count} 个文本元素...", 50)
-                text_styles_cache, failed_extractions = ExportService._batch_extract_text_styles_hybrid(
-                    editable_images=editable_images,
+                extracted_styles, failed_extractions = ExportService._batch_extract_text_styles_hybrid(
+                    editable_images=analyzed_images,
                     text_attribute_extractor=text_attribute_extractor,
                     max_workers=max_workers * 2,
                     fail_fast=fail_fast
                 )
+                text_styles_cache.update(extracted_styles)
                 
                 # 记录样式提取失败的元素（详细）
                 for element_id, reason in failed_extractions:
                     warnings.add_style_extraction_failed(element_id, reason)
+                    failed_element_ids.add(element_id)
                 
                 # 记录汇总信息
-                extracted_count = len(text_styles_cache)
+                extracted_count = len(extracted_styles)
                 failed_count = len(failed_extractions)
                 if failed_count > 0:
                     logger.warning(f"样式提取: {failed_count}/{total_text_count} 个元素失败")
                 
                 report_progress("样式提取", f"完成 {extracted_count}/{total_text_count} 个文本样式提取（{failed_count} 个失败）", 70)
         
+        # 2.6. 保存新分析的页面（样式提取有失败的页面不保存，下次导出重试）
+        if analysis_store is not None:
+            from services.image_editability.analysis_store import element_ids
+            for idx in analyzed_indices:
+                if failed_element_ids & element_ids(editable_images[idx]):
+                    continue
+                analysis_store.save(image_paths[idx], editable_images[idx], text_styles_cache)
+        
         report_progress("构建PPTX", "开始构建可编辑PPTX文件...", 75)
         
         # 4. 创建PPTX构建器
@@ -1,6 +1,7 @@
 """
 File Parser Service - handles file parsing using MinerU service and image captioning
 """
+import asyncio
 import os
 import re
 import time
@@ -11,10 +12,12 @@ import requests
 import tempfile
 from typing import Optional, List, Union
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 from markitdown import MarkItDown
+from services import async_runner, http_client
 from services.ai_providers.text import strip_think_tags
+from services.mineru_cache import compute_cache_key, get_mineru_cache
+from services.rate_limiter import caption_resource_limiter, report_throttle
 
 logger = logging.getLogger(__name__)
 
@@ -152,13 +155,15 @@ class FileParserService:
         except (ValueError, ImportError):
             return False
     
-    def parse_file(self, file_path: str, filename: str) -> tuple[Optional[str], Optional[str], Optional[str], Optional[str], int]:
+    def parse_file(self, file_path: str, filename: str,
+                   use_cache: bool = True) -> tuple[Optional[str], Optional[str], Optional[str], Optional[str], int]:
         """
         Parse a file using MinerU service and enhance with image captions
         
         Args:
             file_path: Path to the file to parse
             filename: Original filename
+            use_cache: Reuse the MinerU result of a previous parse of identical bytes
             
         Returns:
             Tuple of (batch_id, markdown_content, extract_id, error_message, failed_image_count)
@@ -184,29 +189,40 @@ class FileParserService:
             # For other file types, use MinerU service
             logger.info(f"File {filename} requires MinerU parsing...")
             
-            # Step 1: Get upload URL
-            logger.info(f"Step 1/4: Requesting upload URL for {filename}...")
-            batch_id, upload_url, error = self._get_upload_url(filename)
-            if error:
-                return None, None, None, error, 0
-            
-            logger.info(f"Got upload URL. Batch ID: {batch_id}")
-            
-            # Step 2: Upload file
-            logger.info(f"Step 2/4: Uploading file {filename}...")
-            error = self._upload_file(file_path, upload_url)
-            if error:
-                return batch_id, None, None, error, 0
-            
-            logger.info("File uploaded successfully.")
-            
-            # Step 3: Poll for parsing result
-            logger.info("Step 3/4: Waiting for parsing to complete...")
-            markdown_content, extract_id, error = self._poll_result(batch_id)
-            if error:
-                return batch_id, None, None, error, 0
-            
-            logger.info("File parsed successfully.")
+            cache = get_mineru_cache(self.upload_folder) if use_cache else None
+            cache_key = self.mineru_cache_key(file_path) if cache and cache.enabled else None
+            cached = self._load_cached_result(cache, cache_key) if cache_key else None
+            if cached:
+                batch_id, markdown_content, extract_id = cached
+                logger.info(f"Reusing cached MinerU result {extract_id} for {filename}")
+            else:
+                # Step 1: Get upload URL
+                logger.info(f"Step 1/4: Requesting upload URL for {filename}...")
+                batch_id, upload_url, error = self._get_upload_url(filename)
+                if error:
+                    return None, None, None, error, 0
+                
+                logger.info(f"Got upload URL. Batch ID: {batch_id}")
+                
+                # Step 2: Upload file
+                logger.info(f"Step 2/4: Uploading file {filename}...")
+                error = self._upload_file(file_path, upload_url)
+                if error:
+                    return batch_id, None, None, error, 0
+                
+                logger.info("File uploaded successfully.")
+                
+                # Step 3: Poll for parsing result
+                logger.info("Step 3/4: Waiting for parsing to complete...")
+                markdown_content, extract_id, error = self._poll_result(batch_id)
+                if error:
+                    return batch_id, None, None, error, 0
+                
+                logger.info("File parsed successfully.")
+                if cache_key:
+                    # Callers may keep serving images from this directory, so
+                    # eviction only forgets the entry and never deletes it.
+                    cache.put(cache_key, extract_id, batch_id=batch_id, owned=False)
             
             # Step 4: Enhance markdown with image captions
             if markdown_content and self._can_generate_captions():
@@ -226,6 +242,33 @@ class FileParserService:
             logger.error(error_msg, exc_info=True)
             return None, None, None, error_msg, 0
     
+    def mineru_cache_key(self, file_path: str) -> str:
+        """Parse cache key: file bytes plus the options that change MinerU output."""
+        return compute_cache_key(
+            file_path,
+            model_version=self.mineru_model_version,
+            api_base=self.mineru_api_base,
+        )
+
+    def _load_cached_result(self, cache, cache_key: str) -> Optional[tuple[Optional[str], str, str]]:
+        """Rebuild (batch_id, markdown_content, extract_id) from a cached MinerU result directory."""
+        entry = cache.get(cache_key)
+        if not entry:
+            return None
+        extract_id = entry['extract_id']
+        mineru_storage = self.upload_folder / 'mineru_files' / extract_id
+        markdown_files = sorted(
+            path for path in mineru_storage.rglob('*')
+            if path.suffix in ('.md', '.MD') and path.is_file()
+        )
+        if not markdown_files:
+            return None
+        markdown_file_path = markdown_files[0].relative_to(mineru_storage).as_posix()
+        with open(markdown_files[0], 'r', encoding='utf-8') as f:
+            markdown_content = f.read()
+        markdown_content = self._replace_image_paths(markdown_content, markdown_file_path, extract_id)
+        return entry.get('batch_id'), markdown_content, extract_id
+
     def _parse_text_file(self, file_path: str, filename: str) -> tuple[Optional[str], Optional[str], Optional[str], Optional[str], int]:
         """
         Parse plain text file directly without MinerU
@@ -324,7 +367,7 @@ class FileParserService:
         }
         
         try:
-            response = requests.post(
+            response = http_client.post(
                 self.get_upload_url_api,
                 headers=headers,
                 json=upload_data,
@@ -351,7 +394,7 @@ class FileParserService:
         """Upload file to MinerU"""
         try:
             with open(file_path, 'rb') as f:
-                response = requests.put(
+                response = http_client.put(
                     upload_url,
                     data=f,
                     headers={"Authorization": None},  # Remove auth for upload
@@ -390,7 +433,7 @@ class FileParserService:
                 return None, None, error_msg
             
             try:
-                response = requests.get(result_url, headers=headers, timeout=30)
+                response = http_client.get(result_url, headers=headers, timeout=30)
                 response.raise_for_status()
                 task_info = response.json()
                 
@@ -426,7 +469,7 @@ class FileParserService:
             Tuple of (markdown_content, extract_id, error_message)
         """
         try:
-            response = requests.get(zip_url, timeout=60)
+            response = http_client.get(zip_url, timeout=60)
             response.raise_for_status()
             
             # Generate unique directory name for this extraction
@@ -647,119 +690,143 @@ class FileParserService:
     
     def _generate_captions_parallel(self, image_urls: List[str], max_workers: int = 12, max_retries: int = 3) -> tuple[List[str], int]:
         """
-        Generate captions for multiple images in parallel with retry mechanism
+        Generate captions for multiple images concurrently with retry mechanism
+
+        Captions run as coroutines on the shared event loop (services.async_runner),
+        so waiting on the vision model does not hold a thread per image.
         
         Args:
             image_urls: List of image URLs
-            max_workers: Maximum number of parallel workers
+            max_workers: Maximum number of captions in flight (the caption rate limiter may allow fewer)
             max_retries: Maximum number of retries for each image
             
         Returns:
             Tuple of (list of captions, number of failed images)
         """
-        captions = [""] * len(image_urls)
+        async def caption_all():
+            semaphore = asyncio.Semaphore(max_workers)
+
+            async def caption_one(url: str, idx: int) -> str:
+                async with semaphore:
+                    return await self._agenerate_caption_with_retry(url, idx, len(image_urls), max_retries)
+
+            return await asyncio.gather(
+                *(caption_one(url, idx) for idx, url in enumerate(image_urls)),
+                return_exceptions=True,
+            )
+
+        captions = []
         failed_count = 0
-        
-        def generate_with_retry(url: str, idx: int) -> tuple[int, str, bool]:
-            """Generate caption with retry logic"""
-            for attempt in range(max_retries):
-                try:
-                    caption = self._generate_single_caption(url)
-                    if caption:
-                        logger.debug(f"Generated caption for image {idx + 1}/{len(image_urls)} (attempt {attempt + 1})")
-                        return (idx, caption, True)
-                    else:
-                        logger.warning(f"Empty caption for image {idx + 1} (attempt {attempt + 1}/{max_retries})")
-                except Exception as e:
-                    logger.warning(f"Failed to generate caption for image {idx + 1} (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                    if attempt < max_retries - 1:
-                        import time
-                        time.sleep(1 * (attempt + 1))  # Exponential backoff: 1s, 2s, 3s
-            
-            # All retries failed
-            logger.error(f"Failed to generate caption for image {idx + 1} after {max_retries} attempts")
-            return (idx, "", False)
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_idx = {
-                executor.submit(generate_with_retry, url, idx): idx
-                for idx, url in enumerate(image_urls)
-            }
-            
-            for future in as_completed(future_to_idx):
-                try:
-                    idx, caption, success = future.result()
-                    captions[idx] = caption
-                    if not success:
-                        failed_count += 1
-                except Exception as e:
-                    idx = future_to_idx[future]
-                    logger.error(f"Unexpected error generating caption for image {idx + 1}: {str(e)}")
-                    failed_count += 1
+        for idx, result in enumerate(async_runner.run(caption_all())):
+            if isinstance(result, BaseException):
+                logger.error(f"Unexpected error generating caption for image {idx + 1}: {str(result)}")
+                result = ""
+            if not result:
+                failed_count += 1
+            captions.append(result)
         
         return captions, failed_count
+
+    async def _agenerate_caption_with_retry(self, url: str, idx: int, total: int, max_retries: int) -> str:
+        """Generate caption with retry logic; empty string after ``max_retries`` failures"""
+        for attempt in range(max_retries):
+            try:
+                async with caption_resource_limiter.aslot(f"caption image={idx + 1}/{total}"):
+                    caption = await self._agenerate_single_caption(url)
+                if caption:
+                    logger.debug(f"Generated caption for image {idx + 1}/{total} (attempt {attempt + 1})")
+                    return caption
+                else:
+                    logger.warning(f"Empty caption for image {idx + 1} (attempt {attempt + 1}/{max_retries})")
+            except Exception as e:
+                logger.warning(f"Failed to generate caption for image {idx + 1} (attempt {attempt + 1}/{max_retries}): {str(e)}")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(1 * (attempt + 1))  # Exponential backoff: 1s, 2s, 3s
+
+        # All retries failed
+        logger.error(f"Failed to generate caption for image {idx + 1} after {max_retries} attempts")
+        return ""
+
+    _CAPTION_PROMPT = "请用一句简短的中文描述这张图片的主要内容。只返回描述文字，不要其他解释。"
     
     def _generate_single_caption(self, image_url: str) -> str:
         """
         Generate caption for a single image (supports both HTTP URLs and local paths)
-        
+
+        Blocking wrapper around ``_agenerate_single_caption`` for callers outside
+        the event loop (e.g. the settings caption test).
+
         Args:
             image_url: URL or local path of the image
-            
+
         Returns:
-            Generated caption
+            Generated caption, empty string on failure
         """
+        return async_runner.run(self._agenerate_single_caption(image_url))
+
+    async def _agenerate_single_caption(self, image_url: str) -> str:
+        """Generate one caption: image loading in the fallback pool, the model call awaited"""
+        temp_path = None
         try:
-            # Load image based on URL type
-            if image_url.startswith('http://') or image_url.startswith('https://'):
-                # Download from HTTP(S) URL
-                response = requests.get(image_url, timeout=30)
-                response.raise_for_status()
-                image = Image.open(io.BytesIO(response.content))
-            elif image_url.startswith('/files/mineru/'):
-                # Local MinerU extracted file with prefix matching support
-                from utils.path_utils import find_mineru_file_with_prefix
-                
-                # Find file with prefix matching
-                img_path = find_mineru_file_with_prefix(
-                    image_url,
-                    upload_folder=self.upload_folder
-                )
-                
-                if img_path is None or not img_path.exists():
-                    logger.warning(f"Local image file not found (with prefix matching): {image_url}")
-                    return ""
-                
-                image = Image.open(img_path)
-            else:
-                # Unsupported path type
-                logger.warning(f"Unsupported image path type: {image_url}")
+            temp_path = await asyncio.to_thread(self._prepare_caption_image, image_url)
+            if temp_path is None:
                 return ""
-            
             # Generate caption via provider factory
-            prompt = "请用一句简短的中文描述这张图片的主要内容。只返回描述文字，不要其他解释。"
-
-            with tempfile.NamedTemporaryFile(prefix='caption_', suffix='.jpg', delete=False) as tmp:
-                temp_path = tmp.name
-            try:
-                if image.mode in ('RGBA', 'LA', 'P'):
-                    image = image.convert('RGB')
-                image.save(temp_path, format="JPEG", quality=95)
-                image.close()
-
-                provider = self._get_caption_provider()
-                caption = provider.generate_with_image(prompt, temp_path)
-            finally:
-                try:
-                    os.remove(temp_path)
-                except OSError:
-                    pass
-
+            provider = self._get_caption_provider()
+            caption = await provider.agenerate_with_image(self._CAPTION_PROMPT, temp_path)
             # Strip <think>...</think> tags from reasoning models
-            caption = strip_think_tags(caption)
-
-            return caption
-            
+            return strip_think_tags(caption)
         except Exception as e:
+            report_throttle(e)
             logger.warning(f"Failed to generate caption for {image_url}: {str(e)}")
             return ""  # Return empty string on failure
+        finally:
+            self._remove_caption_image(temp_path)
+
+    def _prepare_caption_image(self, image_url: str) -> Optional[str]:
+        """Load the image (HTTP URL or MinerU path) into a temporary JPEG; None if unavailable"""
+        # Load image based on URL type
+        if image_url.startswith('http://') or image_url.startswith('https://'):
+            # Download from HTTP(S) URL
+            response = http_client.get(image_url, timeout=30)
+            response.raise_for_status()
+            image = Image.open(io.BytesIO(response.content))
+        elif image_url.startswith('/files/mineru/'):
+            # Local MinerU extracted file with prefix matching support
+            from utils.path_utils import find_mineru_file_with_prefix
+            
+            # Find file with prefix matching
+            img_path = find_mineru_file_with_prefix(
+                image_url,
+                upload_folder=self.upload_folder
+            )
+            
+            if img_path is None or not img_path.exists():
+                logger.warning(f"Local image file not found (with prefix matching): {image_url}")
+                return None
+            
+            image = Image.open(img_path)
+        else:
+            # Unsupported path type
+            logger.warning(f"Unsupported image path type: {image_url}")
+            return None
+
+        with tempfile.NamedTemporaryFile(prefix='caption_', suffix='.jpg', delete=False) as tmp:
+            temp_path = tmp.name
+        try:
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGB')
+            image.save(temp_path, format="JPEG", quality=95)
+            image.close()
+        except Exception:
+            self._remove_caption_image(temp_path)
+            raise
+        return temp_path
+
+    @staticmethod
+    def _remove_caption_image(temp_path: Optional[str]) -> None:
+        if temp_path:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
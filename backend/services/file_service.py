@@ -4,11 +4,12 @@ File Service - handles all file operations
 import os
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 from werkzeug.utils import secure_filename
 from PIL import Image
 from models import Project
 from models import db
+from services.image_encoder import png_compress_level, submit_encode, write_image_durably
 
 
 def convert_image_to_rgb(image: Image.Image) -> Image.Image:
@@ -169,7 +170,8 @@ class FileService:
     
     def save_generated_image(self, image: Image.Image, project_id: str,
                            page_id: str, image_format: str = 'PNG',
-                           version_number: int = None) -> str:
+                           version_number: int = None,
+                           compress_level: Optional[int] = None) -> str:
         """
         Save generated image with version support
 
@@ -179,6 +181,7 @@ class FileService:
             page_id: Page ID
             image_format: Image format (PNG, JPEG, etc.)
             version_number: Optional version number. If None, uses timestamp-based naming
+            compress_level: PNG zlib level; None reads IMAGE_PNG_COMPRESS_LEVEL
 
         Returns:
             Relative file path from upload folder
@@ -199,9 +202,11 @@ class FileService:
 
         filepath = pages_dir / filename
 
-        # Save image - format is determined by file extension or explicitly specified
-        # Some PIL Image objects may not support format parameter, so we use extension
-        image.save(str(filepath))
+        # Save image - format is determined by file extension; PNG uses a fast zlib level
+        if compress_level is None:
+            compress_level = png_compress_level()
+        save_options = {'compress_level': compress_level} if ext == 'png' else {}
+        write_image_durably(image, filepath, **save_options)
 
         # Return relative path
         return filepath.relative_to(self.upload_folder).as_posix()
@@ -255,11 +260,43 @@ class FileService:
         image = convert_image_to_rgb(image)
 
         # Save as compressed JPEG
-        image.save(str(filepath), 'JPEG', quality=quality, optimize=True)
+        write_image_durably(image, filepath, 'JPEG', quality=quality, optimize=True)
 
         # Return relative path
         return relative_path
 
+    def save_page_version_images(self, image: Image.Image, project_id: str,
+                                 page_id: str, version_number: int,
+                                 image_format: str = 'PNG') -> Tuple[str, str]:
+        """
+        Encode the original and its JPEG thumbnail concurrently on the encoder pool
+
+        Both files are fsynced and renamed into place before this returns, so the
+        caller can commit the version row pointing at them.
+
+        Args:
+            image: PIL Image object
+            project_id: Project ID
+            page_id: Page ID
+            version_number: Version number
+            image_format: Format of the original (PNG, JPEG, etc.)
+
+        Returns:
+            (image_path, cached_image_path) relative to the upload folder
+        """
+        # Decode lazily-loaded images once, before two threads read the pixels
+        image.load()
+        # Settings are resolved here: encoder threads run without the Flask app context
+        original = submit_encode(
+            self.save_generated_image, image, project_id, page_id,
+            image_format=image_format, version_number=version_number,
+            compress_level=png_compress_level(),
+        )
+        thumbnail = submit_encode(
+            self.save_cached_image, image, project_id, page_id, version_number, quality=85,
+        )
+        return original.result(), thumbnail.result()
+
     def save_material_image(self, image: Image.Image, project_id: Optional[str],
                             image_format: str = 'PNG') -> str:
         """
@@ -387,9 +424,11 @@ class FileService:
 
         # Find and delete all page image files (all versions and caches)
         # Pattern matches: {page_id}_v1.png, {page_id}_v1_thumb.jpg, etc.
-        for file in pages_dir.glob(f"{page_id}_*"):
-            if file.is_file():
-                file.unlink()
+        # plus the size variants served from .thumbs/ (see services.thumbnail_service)
+        for pattern in (f"{page_id}_*", f".thumbs/{page_id}_*"):
+            for file in pages_dir.glob(pattern):
+                if file.is_file():
+                    file.unlink()
 
         return True
     
@@ -0,0 +1,222 @@
+"""
+Shared HTTP client - pooled keep-alive connections for external providers
+
+MinerU upload/poll/download, Baidu OCR / inpainting, image downloads and the
+Volcengine SDK used to call bare ``requests.get/post``, paying a TCP + TLS
+handshake per call (every 2 seconds while polling MinerU). They now go
+through this module:
+
+* One ``HTTPAdapter`` (urllib3 pool manager) shared by all threads: up to
+  HTTP_POOL_HOSTS per-host pools with HTTP_POOL_MAXSIZE keep-alive
+  connections each. Threads get their own ``requests.Session`` mounted on
+  it, so pools are shared while cookies and headers are not.
+* Central timeouts: ``(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)`` unless the
+  call passes its own ``timeout``.
+* Central retries (HTTP_MAX_RETRIES): failed connects for any method (the
+  request was never sent); read errors and 429/502/503/504 only for
+  idempotent methods, honouring ``Retry-After``, so a POST is never sent
+  twice. The final response is returned as-is so callers' status handling
+  is unchanged.
+* Proxies come from the environment (HTTP(S)_PROXY / ALL_PROXY / NO_PROXY),
+  including ``socks5://`` / ``socks5h://`` via requests[socks] for the
+  desktop build.
+
+Clients built on httpx (ElevenLabs) use ``get_httpx_client()``, which also
+speaks HTTP/2 when HTTP_CLIENT_HTTP2 is enabled and ``h2`` is installed.
+``pool_stats()`` backs GET /api/settings/http-pools.
+"""
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_POOL_HOSTS = 16
+DEFAULT_POOL_MAXSIZE = 32
+
+_RETRY_STATUSES = (429, 502, 503, 504)
+
+_lock = threading.Lock()
+_local = threading.local()
+_adapter: Optional[HTTPAdapter] = None
+_httpx_client = None
+_generation = 0
+
+
+def _setting(key: str, default: Any) -> Any:
+    """app.config first, then environment, then ``default`` (converted to its type)."""
+    value = None
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            value = current_app.config.get(key)
+    except ImportError:
+        pass
+    if value in (None, ''):
+        value = os.getenv(key)
+    if value in (None, ''):
+        return default
+    try:
+        if isinstance(default, bool):
+            return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+        return type(default)(value)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid {key}={value!r}")
+        return default
+
+
+def default_timeout() -> Tuple[float, float]:
+    return (_setting('HTTP_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT),
+            _setting('HTTP_READ_TIMEOUT', DEFAULT_READ_TIMEOUT))
+
+
+def _build_adapter() -> HTTPAdapter:
+    retries = max(0, _setting('HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=0.5,
+        status_forcelist=_RETRY_STATUSES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_connections=max(1, _setting('HTTP_POOL_HOSTS', DEFAULT_POOL_HOSTS)),
+        pool_maxsize=max(1, _setting('HTTP_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE)),
+        max_retries=retry,
+    )
+
+
+def shared_adapter() -> HTTPAdapter:
+    """The process-wide adapter; mount it on third-party sessions to share its pools."""
+    global _adapter
+    with _lock:
+        if _adapter is None:
+            _adapter = _build_adapter()
+        return _adapter
+
+
+class PooledSession(requests.Session):
+    """``requests.Session`` on the shared adapter that applies the central default timeout."""
+
+    def __init__(self):
+        super().__init__()
+        mount_shared_adapter(self)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = default_timeout()
+        return super().request(method, url, **kwargs)
+
+
+def mount_shared_adapter(session: requests.Session) -> requests.Session:
+    adapter = shared_adapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> PooledSession:
+    """This thread's session (sessions are not shared across threads; their pools are)."""
+    session = getattr(_local, 'session', None)
+    if session is None or getattr(_local, 'generation', None) != _generation:
+        session = PooledSession()
+        _local.session = session
+        _local.generation = _generation
+    return session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request('PUT', url, **kwargs)
+
+
+def get_httpx_client():
+    """Shared ``httpx.Client`` (keep-alive, optional HTTP/2) for SDKs that accept one."""
+    global _httpx_client
+    with _lock:
+        if _httpx_client is None:
+            import httpx
+
+            http2 = _setting('HTTP_CLIENT_HTTP2', False)
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("HTTP_CLIENT_HTTP2 is enabled but 'h2' is not installed; using HTTP/1.1")
+                    http2 = False
+            connect, read = default_timeout()
+            _httpx_client = httpx.Client(
+                timeout=httpx.Timeout(read, connect=connect),
+                # 显式 transport 时 Client 的 http2/limits 参数不生效，需设在 transport 上
+                transport=httpx.HTTPTransport(
+                    http2=http2,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=_setting('HTTP_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE)),
+                    retries=max(0, _setting('HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES)),
+                ),
+                follow_redirects=True,
+            )
+        return _httpx_client
+
+
+def pool_stats() -> List[Dict[str, Any]]:
+    """Per-host connection reuse of the shared pools (this process only)."""
+    with _lock:
+        adapter = _adapter
+    if adapter is None:
+        return []
+    managers = [adapter.poolmanager, *adapter.proxy_manager.values()]
+    stats = []
+    for manager in managers:
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            requests_made, connections = pool.num_requests, pool.num_connections
+            stats.append({
+                'scheme': pool.scheme,
+                'host': pool.host,
+                'port': pool.port,
+                'proxied': manager is not adapter.poolmanager,
+                'requests': requests_made,
+                'connections_opened': connections,
+                'reused': max(0, requests_made - connections),
+                'idle': sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0,
+            })
+    return sorted(stats, key=lambda item: (item['host'], item['port'] or 0))
+
+
+def reset() -> None:
+    """Close all pools; later calls start fresh (settings reloaded)."""
+    global _adapter, _httpx_client, _generation
+    with _lock:
+        adapter, client = _adapter, _httpx_client
+        _adapter, _httpx_client = None, None
+        _generation += 1
+    if adapter is not None:
+        adapter.close()
+    if client is not None:
+        client.close()
@@ -87,6 +87,9 @@ from .factories import (
 # 主服务
 from .service import ImageEditabilityService
 
+# 分析结果存储
+from .analysis_store import EditableAnalysisStore
+
 __all__ = [
     # 数据模型
     'BBox',
@@ -123,5 +126,7 @@ __all__ = [
     'ServiceConfig',
     # 主服务
     'ImageEditabilityService',
+    # 分析结果存储
+    'EditableAnalysisStore',
 ]
 
@@ -0,0 +1,127 @@
+"""
+分析结果存储 - 按页面图片版本持久化 EditableImage 分析结果
+
+可编辑导出中最耗时的是版面分析（MinerU/OCR、inpaint、递归子图）和文字样式提取。
+同一张页面图片（按内容哈希识别，等价于同一个图片版本）在相同导出设置下分析结果不变，
+所以把 EditableImage 树和该页的 text_styles_cache 存成 JSON，之后的导出（包括只导出
+部分页面）直接复用，只有图片变化过的页面需要重新分析。
+
+存储位置：{project_dir}/editable_analysis/{图片哈希}_{设置哈希}.json
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .data_models import EditableElement, EditableImage
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_FORMAT_VERSION = 1
+
+
+def _iter_elements(elements: Iterable[EditableElement]):
+    for element in elements:
+        yield element
+        yield from _iter_elements(element.children)
+
+
+def _referenced_files(editable_image: EditableImage):
+    """分析结果引用的本地文件（背景图、元素裁剪图等），任何一个丢失都不能复用"""
+    if editable_image.clean_background:
+        yield editable_image.clean_background
+    for element in _iter_elements(editable_image.elements):
+        if element.image_path:
+            yield element.image_path
+        if element.inpainted_background_path:
+            yield element.inpainted_background_path
+
+
+def element_ids(editable_image: EditableImage) -> set:
+    """EditableImage 中所有元素（含子元素）的 element_id"""
+    return {element.element_id for element in _iter_elements(editable_image.elements)}
+
+
+class EditableAnalysisStore:
+    """
+    按图片内容 + 导出设置缓存的 EditableImage 分析结果
+
+    线程安全：每个条目是独立文件，写入使用临时文件 + os.replace 原子替换。
+    """
+
+    def __init__(self, storage_dir: str, settings: Dict[str, Any]):
+        """
+        Args:
+            storage_dir: 存储目录（通常为 {project_dir}/editable_analysis）
+            settings: 影响分析结果的导出设置（提取方法、修复方法、递归深度等）
+        """
+        self._storage_dir = Path(storage_dir)
+        settings_json = json.dumps(settings, sort_keys=True, default=str)
+        self._settings_key = hashlib.sha256(settings_json.encode('utf-8')).hexdigest()[:16]
+
+    def _entry_path(self, image_path: str) -> Path:
+        digest = hashlib.sha256()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return self._storage_dir / f"{digest.hexdigest()[:32]}_{self._settings_key}.json"
+
+    def load(self, image_path: str) -> Optional[Tuple[EditableImage, Dict[str, Any]]]:
+        """
+        读取图片的已存分析结果
+
+        Returns:
+            (editable_image, text_styles) 或 None（未分析过、格式过期或引用文件已丢失）
+        """
+        from .text_attribute_extractors import TextStyleResult
+
+        try:
+            entry_path = self._entry_path(image_path)
+            if not entry_path.exists():
+                return None
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != ANALYSIS_FORMAT_VERSION:
+                return None
+
+            editable_image = EditableImage.from_dict(data['editable_image'])
+            missing = [path for path in _referenced_files(editable_image) if not os.path.exists(path)]
+            if missing:
+                logger.info(f"已存分析结果引用的文件已丢失，将重新分析: {missing[0]}")
+                return None
+
+            # 同内容的图片可能位于不同路径（不同版本文件），以当前路径为准
+            editable_image.image_path = image_path
+            text_styles = {
+                element_id: TextStyleResult.from_dict(style)
+                for element_id, style in (data.get('text_styles') or {}).items()
+            }
+            return editable_image, text_styles
+        except Exception as e:
+            logger.warning(f"读取已存分析结果失败 {image_path}: {e}")
+            return None
+
+    def save(self, image_path: str, editable_image: EditableImage, text_styles: Dict[str, Any]) -> None:
+        """保存一页的分析结果和该页元素的文字样式"""
+        try:
+            entry_path = self._entry_path(image_path)
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            page_element_ids = element_ids(editable_image)
+            data = {
+                'version': ANALYSIS_FORMAT_VERSION,
+                'editable_image': editable_image.to_dict(),
+                'text_styles': {
+                    element_id: style.to_dict()
+                    for element_id, style in text_styles.items()
+                    if element_id in page_element_ids
+                },
+            }
+            tmp_path = entry_path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, entry_path)
+        except Exception as e:
+            logger.warning(f"保存分析结果失败 {image_path}: {e}")
@@ -38,6 +38,11 @@ class BBox:
             'y1': self.y1
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, float]) -> 'BBox':
+        """从字典创建实例"""
+        return cls(x0=data['x0'], y0=data['y0'], x1=data['x1'], y1=data['y1'])
+    
     def scale(self, scale_x: float, scale_y: float) -> 'BBox':
         """缩放bbox"""
         return BBox(
@@ -104,6 +109,22 @@ class EditableElement:
             'children': [child.to_dict() for child in self.children]
         }
         return result
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'EditableElement':
+        """从 to_dict() 的结果还原（递归还原子元素）"""
+        return cls(
+            element_id=data['element_id'],
+            element_type=data['element_type'],
+            bbox=BBox.from_dict(data['bbox']),
+            bbox_global=BBox.from_dict(data['bbox_global']),
+            content=data.get('content'),
+            image_path=data.get('image_path'),
+            is_icon=data.get('is_icon'),
+            children=[cls.from_dict(child) for child in data.get('children', [])],
+            inpainted_background_path=data.get('inpainted_background_path'),
+            metadata=data.get('metadata') or {},
+        )
 
 
 @dataclass
@@ -142,4 +163,19 @@ class EditableImage:
             'parent_id': self.parent_id,
             'metadata': self.metadata
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'EditableImage':
+        """从 to_dict() 的结果还原"""
+        return cls(
+            image_id=data['image_id'],
+            image_path=data['image_path'],
+            width=data['width'],
+            height=data['height'],
+            elements=[EditableElement.from_dict(elem) for elem in data.get('elements', [])],
+            clean_background=data.get('clean_background'),
+            depth=data.get('depth', 0),
+            parent_id=data.get('parent_id'),
+            metadata=data.get('metadata') or {},
+        )
 
@@ -18,6 +18,7 @@ from typing import Dict, Any, List, Optional, Tuple, Type
 from pathlib import Path
 from PIL import Image
 
+from utils import geometry
 from utils.latex_utils import latex_to_text
 
 logger = logging.getLogger(__name__)
@@ -186,23 +187,30 @@ class MinerUElementExtractor(ElementExtractor):
 
         return ExtractionResult(elements=elements, context=context)
     
+    def _cache_key(self, image_path: str) -> Optional[str]:
+        """按图片内容+MinerU解析参数计算缓存键（图片转PDF的字节不稳定，所以对原图取哈希）"""
+        try:
+            cache_key = self._parser_service.mineru_cache_key(image_path)
+            return cache_key if isinstance(cache_key, str) else None
+        except Exception as e:
+            logger.debug(f"计算MinerU缓存键失败: {e}")
+            return None
+
     def _find_cache(self, image_path: str) -> Optional[str]:
         """查找缓存的MinerU结果"""
         try:
-            import hashlib
-            import time
-            
-            img_path = Path(image_path)
-            if not img_path.exists():
+            from services.mineru_cache import get_mineru_cache
+
+            cache = get_mineru_cache(self._upload_folder)
+            if not cache.enabled or not Path(image_path).exists():
                 return None
-            
-            mineru_files_dir = self._upload_folder / 'mineru_files'
-            if not mineru_files_dir.exists():
+
+            cache_key = self._cache_key(image_path)
+            entry = cache.get(cache_key) if cache_key else None
+            if not entry:
                 return None
-            
-            # 简单策略：不使用缓存（更安全）
-            return None
-            
+            return str((self._upload_folder / 'mineru_files' / entry['extract_id']).resolve())
+
         except Exception as e:
             logger.debug(f"查找缓存失败: {e}")
             return None
@@ -225,7 +233,7 @@ class MinerUElementExtractor(ElementExtractor):
             # 调用MinerU解析
             image_id = str(uuid.uuid4())[:8]
             batch_id, markdown_content, extract_id, error_message, failed_image_count = \
-                self._parser_service.parse_file(pdf_path, f"image_{image_id}.pdf")
+                self._parser_service.parse_file(pdf_path, f"image_{image_id}.pdf", use_cache=False)
 
             if error_message or not extract_id:
                 logger.error(f"{'  ' * depth}MinerU解析失败: {error_message}")
@@ -237,6 +245,11 @@ class MinerUElementExtractor(ElementExtractor):
                 logger.error(f"{'  ' * depth}{err}")
                 return None, err
 
+            cache_key = self._cache_key(image_path)
+            if cache_key:
+                from services.mineru_cache import get_mineru_cache
+                get_mineru_cache(self._upload_folder).put(cache_key, extract_id, batch_id=batch_id)
+
             return str(mineru_result_dir), None
 
         finally:
@@ -577,32 +590,7 @@ class BaiduOCRElementExtractor(ElementExtractor):
             })
         
         def calculate_min_gap(cell_data):
-            if len(cell_data) <= 1:
-                return float('inf')
-            
-            min_gap = float('inf')
-            for i, data1 in enumerate(cell_data):
-                x0_1, y0_1, x1_1, y1_1 = data1['current_bbox']
-                for j, data2 in enumerate(cell_data):
-                    if i >= j:
-                        continue
-                    x0_2, y0_2, x1_2, y1_2 = data2['current_bbox']
-                    
-                    x_overlap = not (x1_1 <= x0_2 or x1_2 <= x0_1)
-                    y_overlap = not (y1_1 <= y0_2 or y1_2 <= y0_1)
-                    
-                    if x_overlap and y_overlap:
-                        overlap_x = min(x1_1, x1_2) - max(x0_1, x0_2)
-                        overlap_y = min(y1_1, y1_2) - max(y0_1, y0_2)
-                        min_gap = min(min_gap, -min(overlap_x, overlap_y))
-                    elif x_overlap:
-                        gap = y0_2 - y1_1 if y1_1 <= y0_2 else y0_1 - y1_2
-                        min_gap = min(min_gap, gap)
-                    elif y_overlap:
-                        gap = x0_2 - x1_1 if x1_1 <= x0_2 else x0_1 - x1_2
-                        min_gap = min(min_gap, gap)
-            
-            return min_gap
+            return geometry.min_pairwise_gap(geometry.as_array(data['current_bbox'] for data in cell_data))
         
         iteration = 0
         total_shrink_ratio = 0
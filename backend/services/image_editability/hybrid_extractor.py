@@ -11,8 +11,10 @@
 import logging
 from typing import Dict, Any, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 from PIL import Image
 
+from utils import geometry
 from .extractors import (
     ElementExtractor, 
     ExtractionResult, 
@@ -25,7 +27,7 @@ logger = logging.getLogger(__name__)
 
 
 class BBoxUtils:
-    """边界框工具类"""
+    """边界框工具类（单对比较；批量比较请直接用 utils.geometry 的矩阵函数）"""
     
     @staticmethod
     def is_contained(inner_bbox: List[float], outer_bbox: List[float], threshold: float = 0.8) -> bool:
@@ -42,30 +44,8 @@ class BBoxUtils:
         """
         if not inner_bbox or not outer_bbox:
             return False
-        
-        ix0, iy0, ix1, iy1 = inner_bbox
-        ox0, oy0, ox1, oy1 = outer_bbox
-        
-        # 计算交集
-        inter_x0 = max(ix0, ox0)
-        inter_y0 = max(iy0, oy0)
-        inter_x1 = min(ix1, ox1)
-        inter_y1 = min(iy1, oy1)
-        
-        if inter_x1 <= inter_x0 or inter_y1 <= inter_y0:
-            return False
-        
-        # 计算交集面积
-        inter_area = (inter_x1 - inter_x0) * (inter_y1 - inter_y0)
-        
-        # 计算inner_bbox面积
-        inner_area = (ix1 - ix0) * (iy1 - iy0)
-        
-        if inner_area <= 0:
-            return False
-        
-        # 判断包含比例
-        return (inter_area / inner_area) >= threshold
+        ratio = geometry.containment_matrix(geometry.as_array([inner_bbox]), geometry.as_array([outer_bbox]))
+        return bool(ratio[0, 0] >= threshold)
     
     @staticmethod
     def has_intersection(bbox1: List[float], bbox2: List[float], min_overlap_ratio: float = 0.1) -> bool:
@@ -82,34 +62,8 @@ class BBoxUtils:
         """
         if not bbox1 or not bbox2:
             return False
-        
-        x0_1, y0_1, x1_1, y1_1 = bbox1
-        x0_2, y0_2, x1_2, y1_2 = bbox2
-        
-        # 计算交集
-        inter_x0 = max(x0_1, x0_2)
-        inter_y0 = max(y0_1, y0_2)
-        inter_x1 = min(x1_1, x1_2)
-        inter_y1 = min(y1_1, y1_2)
-        
-        if inter_x1 <= inter_x0 or inter_y1 <= inter_y0:
-            return False
-        
-        # 计算交集面积
-        inter_area = (inter_x1 - inter_x0) * (inter_y1 - inter_y0)
-        
-        # 计算两个bbox的面积
-        area1 = (x1_1 - x0_1) * (y1_1 - y0_1)
-        area2 = (x1_2 - x0_2) * (y1_2 - y0_2)
-        
-        # 取较小面积作为基准
-        min_area = min(area1, area2)
-        
-        if min_area <= 0:
-            return False
-        
-        # 判断重叠比例
-        return (inter_area / min_area) >= min_overlap_ratio
+        ratio = geometry.overlap_min_area_matrix(geometry.as_array([bbox1]), geometry.as_array([bbox2]))
+        return bool(ratio[0, 0] >= min_overlap_ratio)
     
     @staticmethod
     def get_intersection_ratio(bbox1: List[float], bbox2: List[float]) -> Tuple[float, float]:
@@ -125,27 +79,7 @@ class BBoxUtils:
         """
         if not bbox1 or not bbox2:
             return (0.0, 0.0)
-        
-        x0_1, y0_1, x1_1, y1_1 = bbox1
-        x0_2, y0_2, x1_2, y1_2 = bbox2
-        
-        # 计算交集
-        inter_x0 = max(x0_1, x0_2)
-        inter_y0 = max(y0_1, y0_2)
-        inter_x1 = min(x1_1, x1_2)
-        inter_y1 = min(y1_1, y1_2)
-        
-        if inter_x1 <= inter_x0 or inter_y1 <= inter_y0:
-            return (0.0, 0.0)
-        
-        inter_area = (inter_x1 - inter_x0) * (inter_y1 - inter_y0)
-        area1 = (x1_1 - x0_1) * (y1_1 - y0_1)
-        area2 = (x1_2 - x0_2) * (y1_2 - y0_2)
-        
-        ratio1 = inter_area / area1 if area1 > 0 else 0.0
-        ratio2 = inter_area / area2 if area2 > 0 else 0.0
-        
-        return (ratio1, ratio2)
+        return geometry.intersection_ratios(bbox1, bbox2)
 
 
 class HybridElementExtractor(ElementExtractor):
@@ -344,46 +278,36 @@ class HybridElementExtractor(ElementExtractor):
         logger.info(f"{indent}  MinerU分类: 图片={len(image_elements)}, 表格={len(table_elements)}, 其他={len(other_elements)}")
         
         # 标记需要保留/删除的百度OCR元素
-        baidu_to_keep = set(range(len(baidu_elements)))  # 初始全部保留
-        baidu_in_table = set()  # 在表格内的百度OCR元素
+        # 三条规则都是 百度OCR × MinerU 的两两比较，一次算出比例矩阵（行: 百度OCR）
+        baidu_boxes = geometry.as_array(elem.get('bbox') for elem in baidu_elements)
         
         # 规则1: 图片类型bbox里包含的百度OCR bbox → 删除
-        for img_elem in image_elements:
-            img_bbox = img_elem.get('bbox', [])
-            for idx, baidu_elem in enumerate(baidu_elements):
-                baidu_bbox = baidu_elem.get('bbox', [])
-                if BBoxUtils.is_contained(baidu_bbox, img_bbox, self._contain_threshold):
-                    baidu_to_keep.discard(idx)
-                    logger.debug(f"{indent}    百度OCR[{idx}]被图片包含，删除")
+        in_image = geometry.containment_matrix(
+            baidu_boxes, geometry.as_array(elem.get('bbox') for elem in image_elements)
+        ) >= self._contain_threshold
+        baidu_to_keep = [idx for idx in range(len(baidu_elements)) if not in_image[idx].any()]
+        for idx in np.flatnonzero(in_image.any(axis=1)):
+            logger.debug(f"{indent}    百度OCR[{idx}]被图片包含，删除")
         
         # 规则2: 表格类型bbox里包含的百度OCR bbox → 保留，并标记
-        tables_to_remove = set()
-        for table_idx, table_elem in enumerate(table_elements):
-            table_bbox = table_elem.get('bbox', [])
-            has_contained_text = False
-            for idx, baidu_elem in enumerate(baidu_elements):
-                baidu_bbox = baidu_elem.get('bbox', [])
-                if BBoxUtils.is_contained(baidu_bbox, table_bbox, self._contain_threshold):
-                    baidu_in_table.add(idx)
-                    has_contained_text = True
-                    logger.debug(f"{indent}    百度OCR[{idx}]在表格内，保留")
-            
-            if has_contained_text:
-                tables_to_remove.add(table_idx)
-                logger.debug(f"{indent}    表格[{table_idx}]有文字，删除表格bbox")
+        in_table = geometry.containment_matrix(
+            baidu_boxes, geometry.as_array(elem.get('bbox') for elem in table_elements)
+        ) >= self._contain_threshold
+        baidu_in_table = set(np.flatnonzero(in_table.any(axis=1)).tolist())
+        tables_to_remove = set(np.flatnonzero(in_table.any(axis=0)).tolist())
+        for idx in sorted(baidu_in_table):
+            logger.debug(f"{indent}    百度OCR[{idx}]在表格内，保留")
+        for table_idx in sorted(tables_to_remove):
+            logger.debug(f"{indent}    表格[{table_idx}]有文字，删除表格bbox")
         
         # 规则3: 其他类型与百度OCR bbox有交集 → 使用百度OCR结果
-        other_to_remove = set()
-        for other_idx, other_elem in enumerate(other_elements):
-            other_bbox = other_elem.get('bbox', [])
-            for idx, baidu_elem in enumerate(baidu_elements):
-                if idx not in baidu_to_keep:
-                    continue
-                baidu_bbox = baidu_elem.get('bbox', [])
-                if BBoxUtils.has_intersection(other_bbox, baidu_bbox, self._intersection_threshold):
-                    other_to_remove.add(other_idx)
-                    logger.debug(f"{indent}    MinerU其他[{other_idx}]与百度OCR[{idx}]有交集，使用百度OCR")
-                    break
+        overlaps_baidu = geometry.overlap_min_area_matrix(
+            geometry.as_array(elem.get('bbox') for elem in other_elements), baidu_boxes[baidu_to_keep]
+        ) >= self._intersection_threshold
+        other_to_remove = set(np.flatnonzero(overlaps_baidu.any(axis=1)).tolist())
+        for other_idx in sorted(other_to_remove):
+            idx = baidu_to_keep[int(np.argmax(overlaps_baidu[other_idx]))]
+            logger.debug(f"{indent}    MinerU其他[{other_idx}]与百度OCR[{idx}]有交集，使用百度OCR")
         
         # 构建最终结果
         merged = []
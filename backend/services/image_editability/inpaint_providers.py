@@ -13,13 +13,23 @@ Inpaint提供者 - 抽象不同的inpaint实现
 import logging
 import tempfile
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union
+
+import numpy as np
 from PIL import Image
 
-from utils.mask_utils import create_mask_from_bboxes
+from utils.mask_utils import build_bbox_mask_array
 
 logger = logging.getLogger(__name__)
 
+# 重绘输入既可以是PIL图像，也可以是 HxW / HxWxC 的 uint8 数组（如OpenCV处理后的结果），
+# 数组只在需要调用外部API时才转换为PIL图像
+InpaintImage = Union[Image.Image, np.ndarray]
+
+
+def _to_pil(image: InpaintImage) -> Image.Image:
+    return Image.fromarray(image) if isinstance(image, np.ndarray) else image
+
 
 class InpaintProvider(ABC):
     """
@@ -35,7 +45,7 @@ class InpaintProvider(ABC):
     @abstractmethod
     def inpaint_regions(
         self,
-        image: Image.Image,
+        image: InpaintImage,
         bboxes: List[tuple],
         types: Optional[List[str]] = None,
         **kwargs
@@ -44,7 +54,7 @@ class InpaintProvider(ABC):
         对图像中指定区域进行inpaint处理
         
         Args:
-            image: 原始PIL图像对象
+            image: 原始图像，PIL图像或uint8数组
             bboxes: 边界框列表，每个bbox格式为 (x0, y0, x1, y1)
             types: 可选的元素类型列表，与bboxes一一对应（如 'text', 'image', 'table'等）
             **kwargs: 其他由具体实现自定义的参数
@@ -73,7 +83,7 @@ class DefaultInpaintProvider(InpaintProvider):
     
     def inpaint_regions(
         self,
-        image: Image.Image,
+        image: InpaintImage,
         bboxes: List[tuple],
         types: Optional[List[str]] = None,
         **kwargs
@@ -190,7 +200,7 @@ class GenerativeEditInpaintProvider(InpaintProvider):
     
     def inpaint_regions(
         self,
-        image: Image.Image,
+        image: InpaintImage,
         bboxes: List[tuple],
         types: Optional[List[str]] = None,
         **kwargs
@@ -210,6 +220,7 @@ class GenerativeEditInpaintProvider(InpaintProvider):
         try:
             from services.prompts import get_clean_background_prompt
 
+            image = _to_pil(image)
             normalized_regions = self._build_normalized_removal_regions(
                 image.size,
                 bboxes,
@@ -282,7 +293,7 @@ class BaiduInpaintProvider(InpaintProvider):
     
     def inpaint_regions(
         self,
-        image: Image.Image,
+        image: InpaintImage,
         bboxes: List[tuple],
         types: Optional[List[str]] = None,
         **kwargs
@@ -298,8 +309,9 @@ class BaiduInpaintProvider(InpaintProvider):
         try:
             logger.info(f"BaiduInpaintProvider: 开始修复 {len(bboxes)} 个区域...")
             
+            pil_image = _to_pil(image)
             result_image = self._provider.inpaint_bboxes(
-                image=image,
+                image=pil_image,
                 bboxes=bboxes,
                 expand_pixels=expand_pixels
             )
@@ -311,8 +323,14 @@ class BaiduInpaintProvider(InpaintProvider):
                 return None
             
             # 合并原图和修复后的图片，只取bboxes区域的修复结果（不扩展，避免影响bbox外的区域）
-            mask = create_mask_from_bboxes(image.size, bboxes, expand_pixels=0)
-            return Image.composite(result_image, image, mask.convert('L'))
+            if result_image.mode != pil_image.mode:
+                result_image = result_image.convert(pil_image.mode)
+            original = image if isinstance(image, np.ndarray) else np.asarray(pil_image)
+            repaired = np.asarray(result_image)
+            mask = build_bbox_mask_array(pil_image.size, bboxes, expand_pixels=0) > 0
+            if original.ndim == 3:
+                mask = mask[..., None]
+            return Image.fromarray(np.where(mask, repaired, original))
         
         except Exception as e:
             logger.error(f"BaiduInpaintProvider处理失败: {e}", exc_info=True)
@@ -356,7 +374,7 @@ class HybridInpaintProvider(InpaintProvider):
     
     def inpaint_regions(
         self,
-        image: Image.Image,
+        image: InpaintImage,
         bboxes: List[tuple],
         types: Optional[List[str]] = None,
         **kwargs
@@ -13,6 +13,7 @@ from dataclasses import dataclass, field, asdict
 from typing import Dict, Any, List, Optional, Tuple, Union
 from PIL import Image
 from services.prompts import get_text_attribute_extraction_prompt
+from services.rate_limiter import report_throttle
 
 logger = logging.getLogger(__name__)
 
@@ -290,6 +291,7 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
             return self._parse_result(result_json)
         
         except Exception as e:
+            report_throttle(e)
             logger.error(f"CaptionModelTextAttributeExtractor提取失败: {e}", exc_info=True)
             return TextStyleResult(confidence=0.0, metadata={'error': str(e)})
     
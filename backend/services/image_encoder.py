@@ -0,0 +1,87 @@
+"""
+Image encoder - durable, off-thread encoding of generated page images
+
+A generated page is written twice: the full-resolution original and a JPEG
+thumbnail for the frontend. Encoding used to run back to back on the
+generation worker thread. Here both files are encoded concurrently on a
+small dedicated pool. Pillow releases the GIL while resizing and while
+zlib/libjpeg compress, so threads really do run in parallel. Each file is
+written to a temp name, fsynced and renamed into place, so callers can
+commit the database row that points at it once ``wait`` returns.
+
+The pool is shared by all generation threads and bounded by
+IMAGE_ENCODE_WORKERS, so a 100-page batch cannot oversubscribe the CPU
+with encoders.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Union
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PNG_COMPRESS_LEVEL = 1
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _setting(key: str, default: int) -> int:
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context() and current_app.config.get(key) is not None:
+            return int(current_app.config[key])
+    except ImportError:
+        pass
+    return int(os.getenv(key, default))
+
+
+def png_compress_level() -> int:
+    """zlib level for page originals: 1 encodes a 4K slide ~1.5x faster than the default 6."""
+    return _setting('IMAGE_PNG_COMPRESS_LEVEL', DEFAULT_PNG_COMPRESS_LEVEL)
+
+
+def get_encode_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = _setting('IMAGE_ENCODE_WORKERS', 0) or min(4, os.cpu_count() or 1)
+            _executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='image-encode')
+        return _executor
+
+
+def _fsync_dir(directory: Path) -> None:
+    if os.name != 'posix':
+        return
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_image_durably(image: Image.Image, path: Union[str, os.PathLike],
+                        image_format: Optional[str] = None, **save_options) -> None:
+    """Encode ``image`` to ``path`` atomically: temp file, fsync, rename, fsync the directory."""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            image.save(f, format=image_format or Image.registered_extensions().get(path.suffix.lower()),
+                       **save_options)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    _fsync_dir(path.parent)
+
+
+def submit_encode(func, *args, **kwargs) -> Future:
+    """Run an encoding callable on the shared encoder pool."""
+    return get_encode_executor().submit(func, *args, **kwargs)
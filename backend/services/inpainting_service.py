@@ -7,14 +7,16 @@ Inpainting 服务
 """
 import logging
 from typing import List, Tuple, Union, Optional
+
+import numpy as np
 from PIL import Image
 
 from services.ai_providers.image.volcengine_inpainting_provider import VolcengineInpaintingProvider
 from services.ai_providers.image.gemini_inpainting_provider import GeminiInpaintingProvider
 from utils.mask_utils import (
+    build_bbox_mask,
     create_mask_from_bboxes,
     create_inverse_mask_from_bboxes,
-    create_mask_from_image_and_bboxes,
     merge_overlapping_bboxes,
     visualize_mask_overlay
 )
@@ -86,7 +88,7 @@ class InpaintingService:
     
     def remove_regions_by_bboxes(
         self,
-        image: Image.Image,
+        image: Union[Image.Image, np.ndarray],
         bboxes: List[Union[Tuple[int, int, int, int], dict]],
         expand_pixels: int = 5,
         merge_bboxes: bool = False,
@@ -99,7 +101,7 @@ class InpaintingService:
         根据边界框列表消除图像中的指定区域
         
         Args:
-            image: 原始图像（PIL Image）
+            image: 原始图像（PIL Image 或 HxWxC uint8 数组）
             bboxes: 边界框列表，支持以下格式：
                     - (x1, y1, x2, y2) 元组
                     - {"x1": x1, "y1": y1, "x2": x2, "y2": y2} 字典
@@ -116,6 +118,8 @@ class InpaintingService:
         """
         try:
             logger.info(f"开始处理图像消除，原始 bbox 数量: {len(bboxes)}")
+            if isinstance(image, np.ndarray):
+                image = Image.fromarray(image)
             
             # 合并重叠的边界框（如果启用）
             if merge_bboxes and len(bboxes) > 1:
@@ -135,12 +139,8 @@ class InpaintingService:
                 bboxes = merge_overlapping_bboxes(normalized_bboxes, merge_threshold)
                 logger.info(f"合并后 bbox 数量: {len(bboxes)}")
             
-            # 生成掩码图像
-            mask = create_mask_from_image_and_bboxes(
-                image,
-                bboxes,
-                expand_pixels=expand_pixels
-            )
+            # 生成掩码（单通道数组 + 共享内存的 L 模式图像，provider 都按灰度使用）
+            _, mask = build_bbox_mask(image.size, bboxes, expand_pixels=expand_pixels)
             
             logger.info(f"掩码图像已生成，尺寸: {mask.size}")
             
@@ -238,7 +238,7 @@ class InpaintingService:
         Returns:
             叠加了黑色半透明掩码的预览图
         """
-        mask = create_mask_from_image_and_bboxes(image, bboxes, expand_pixels)
+        mask, _ = build_bbox_mask(image.size, bboxes, expand_pixels)
         return visualize_mask_overlay(image, mask, alpha)
     
     @staticmethod
@@ -0,0 +1,184 @@
+"""
+MinerU parse cache - content-addressed reuse of MinerU result directories
+
+A MinerU round trip (upload, poll, download zip) takes tens of seconds per file.
+Results are stored under ``mineru_files/<extract_id>``; this cache maps
+``sha256(file bytes + parser options)`` to that directory so unchanged slide
+images and reference documents are never sent to MinerU twice.
+
+Entries live as small JSON files in ``mineru_files/.parse_cache/`` (one file per
+key, written atomically), so concurrent threads and worker processes can share
+the cache without a lock. Entry mtime is the LRU clock: hits touch it, and when
+the cached result directories exceed the size budget the least recently used
+entries are dropped.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = '.parse_cache'
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_cache_key(file_path: Union[str, os.PathLike], **options: Any) -> str:
+    """Hash file bytes together with the parser options that affect MinerU output."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class MinerUParseCache:
+    """Content-addressed index of MinerU result directories with size-based LRU eviction."""
+
+    def __init__(self, upload_folder: Union[str, os.PathLike], max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            upload_folder: Upload root containing ``mineru_files``
+            max_bytes: Size budget of cached result directories; 0 disables the cache
+        """
+        self.mineru_root = Path(upload_folder).resolve() / 'mineru_files'
+        self.index_dir = self.mineru_root / CACHE_DIR_NAME
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _entry_path(self, key: str) -> Path:
+        return self.index_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry (``extract_id``, ``batch_id``, ...) or None."""
+        if not self.enabled:
+            return None
+        entry_path = self._entry_path(key)
+        entry = None
+        try:
+            entry = json.loads(entry_path.read_text(encoding='utf-8'))
+            if not (self.mineru_root / entry['extract_id']).is_dir():
+                # Result directory was removed (e.g. reference file deleted)
+                entry_path.unlink(missing_ok=True)
+                entry = None
+            else:
+                os.utime(entry_path)
+        except (OSError, ValueError, KeyError):
+            entry = None
+
+        with self._lock:
+            if entry:
+                self.hits += 1
+            else:
+                self.misses += 1
+        logger.debug(f"MinerU cache {'hit' if entry else 'miss'} for {key[:12]}")
+        return entry
+
+    def put(self, key: str, extract_id: str, batch_id: Optional[str] = None,
+            owned: bool = True) -> None:
+        """Record a MinerU result directory under ``key`` and enforce the size budget.
+
+        Args:
+            owned: Whether eviction may delete the result directory. Reference
+                files keep serving images from their directory, so their entries
+                are only dropped from the index.
+        """
+        if not self.enabled or not extract_id:
+            return
+        result_dir = self.mineru_root / extract_id
+        entry = {
+            'extract_id': extract_id,
+            'batch_id': batch_id,
+            'size': _dir_size(result_dir),
+            'owned': owned,
+            'created_at': time.time(),
+        }
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_dir / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+            tmp_path.write_text(json.dumps(entry), encoding='utf-8')
+            os.replace(tmp_path, self._entry_path(key))
+        except OSError as e:
+            logger.warning(f"Failed to write MinerU cache entry: {e}")
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the budget is met. Returns entries removed."""
+        entries = []
+        total = 0
+        for entry_path in self.index_dir.glob('*.json'):
+            try:
+                entry = json.loads(entry_path.read_text(encoding='utf-8'))
+                last_used = entry_path.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            entries.append((last_used, entry_path, entry))
+            total += entry.get('size', 0)
+
+        removed = 0
+        for _, entry_path, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            entry_path.unlink(missing_ok=True)
+            if entry.get('owned') and entry.get('extract_id'):
+                shutil.rmtree(self.mineru_root / entry['extract_id'], ignore_errors=True)
+            total -= entry.get('size', 0)
+            removed += 1
+        if removed:
+            logger.info(f"MinerU cache evicted {removed} entries, {total} bytes cached")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+_caches: Dict[Path, MinerUParseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_mineru_cache(upload_folder: Union[str, os.PathLike]) -> MinerUParseCache:
+    """Process-wide cache instance per upload folder (keeps hit/miss counters together)."""
+    max_mb = None
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            max_mb = current_app.config.get('MINERU_CACHE_MAX_MB')
+    except ImportError:
+        pass
+    if max_mb is None:
+        max_mb = os.getenv('MINERU_CACHE_MAX_MB', str(DEFAULT_MAX_BYTES // (1024 * 1024)))
+    max_bytes = int(float(max_mb) * 1024 * 1024)
+
+    root = Path(upload_folder).resolve()
+    with _caches_lock:
+        cache = _caches.get(root)
+        if cache is None:
+            cache = _caches[root] = MinerUParseCache(root, max_bytes)
+        cache.max_bytes = max_bytes
+        return cache
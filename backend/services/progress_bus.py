@@ -0,0 +1,145 @@
+"""
+Progress bus - in-process pub/sub for background task progress
+
+Generation and export tasks publish every progress update here instead of
+committing each one to ``Task.progress``; the SSE endpoint
+``GET /api/projects/<project_id>/tasks/<task_id>/stream`` and any other
+subscriber in the same process get them immediately. The database only
+receives coarse checkpoints (``ProgressCheckpoint``, or batched writes via
+``services.progress_writer`` for page generation) plus the terminal state,
+so a client that reconnects or polls the classic status endpoint still sees
+roughly current progress.
+
+Tasks executed by the worker pool (TASK_EXECUTION_MODE=worker) publish in the
+worker process, which the web process cannot observe; subscribers there fall
+back to reading the checkpoints from the database.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED')
+DEFAULT_CHECKPOINT_SECONDS = 5.0
+# Finished tasks stay readable this long for late subscribers
+_RETENTION_SECONDS = 300
+
+
+class ProgressBus:
+    """Latest state per task plus a sequence number subscribers can wait on."""
+
+    def __init__(self, retention_seconds: float = _RETENTION_SECONDS):
+        self._cond = threading.Condition()
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._seqs: Dict[str, int] = {}
+        self._finished_at: Dict[str, float] = {}
+        self._retention_seconds = retention_seconds
+
+    def publish(self, task_id: str, progress: Optional[Dict[str, Any]] = None,
+                status: Optional[str] = None, error_message: Optional[str] = None) -> int:
+        """Merge an update into the task state and wake subscribers. Returns the new sequence number."""
+        with self._cond:
+            state = self._states.setdefault(task_id, {})
+            if progress is not None:
+                state['progress'] = dict(progress)
+            if status is not None:
+                state['status'] = status
+                if status in TERMINAL_STATUSES:
+                    self._finished_at[task_id] = time.monotonic()
+            if error_message is not None:
+                state['error_message'] = error_message
+            seq = self._seqs.get(task_id, 0) + 1
+            self._seqs[task_id] = seq
+            self._prune()
+            self._cond.notify_all()
+            return seq
+
+    def get(self, task_id: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Return (seq, state copy); seq is 0 and state None if nothing was published."""
+        with self._cond:
+            return self._snapshot(task_id)
+
+    def wait(self, task_id: str, after_seq: int, timeout: float) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Block until the task has an update newer than ``after_seq`` or ``timeout`` elapses."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._seqs.get(task_id, 0) <= after_seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._snapshot(task_id)
+
+    def _snapshot(self, task_id: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        state = self._states.get(task_id)
+        if state is None:
+            return 0, None
+        copied = dict(state)
+        if 'progress' in copied:
+            copied['progress'] = dict(copied['progress'])
+        return self._seqs[task_id], copied
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self._retention_seconds
+        for task_id, finished_at in list(self._finished_at.items()):
+            if finished_at < cutoff:
+                self._finished_at.pop(task_id, None)
+                self._states.pop(task_id, None)
+                self._seqs.pop(task_id, None)
+
+
+class ProgressCheckpoint:
+    """
+    Decide when a progress update is worth a database commit
+
+    A checkpoint is due when ``interval`` seconds passed since the last one or
+    when progress advanced by at least ``min_step`` of ``total``. Callers always
+    persist the terminal state themselves.
+    """
+
+    def __init__(self, total: int, interval: Optional[float] = None, min_step: float = 0.1):
+        self.total = max(int(total or 0), 1)
+        self.interval = checkpoint_interval() if interval is None else interval
+        self.min_step = min_step
+        self._last_time = time.monotonic()
+        self._last_done = 0
+
+    def due(self, done: int) -> bool:
+        now = time.monotonic()
+        if now - self._last_time >= self.interval or (done - self._last_done) >= self.total * self.min_step:
+            self._last_time = now
+            self._last_done = done
+            return True
+        return False
+
+
+def checkpoint_interval() -> float:
+    """Seconds between progress checkpoints (TASK_PROGRESS_CHECKPOINT_SECONDS)."""
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            value = current_app.config.get('TASK_PROGRESS_CHECKPOINT_SECONDS')
+            if value is not None:
+                return float(value)
+    except ImportError:
+        pass
+    return DEFAULT_CHECKPOINT_SECONDS
+
+
+def progress_delta(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of a task state (status, error_message, progress.*) that changed since ``previous``."""
+    previous = previous or {}
+    delta = {
+        key: value for key, value in current.items()
+        if key != 'progress' and previous.get(key) != value
+    }
+    old_progress = previous.get('progress') or {}
+    changed = {
+        key: value for key, value in (current.get('progress') or {}).items()
+        if old_progress.get(key) != value
+    }
+    if changed:
+        delta['progress'] = changed
+    return delta
+
+
+progress_bus = ProgressBus()
@@ -0,0 +1,172 @@
+"""
+Batched progress writer - coalesce per-page results of generation tasks
+
+Description and image generation finish pages one by one from a thread pool.
+Committing every page status and the task progress separately puts two write
+transactions per page on SQLite's single writer; with several tasks running
+the writers queue up and fail with "database is locked".
+
+``BatchedProgressWriter`` keeps page statuses and the task progress in memory
+and writes them in one transaction every ``flush_interval_ms`` or every
+``flush_every`` completed pages, using bulk ``UPDATE ... WHERE id IN (...)``
+statements. Generated page content (descriptions) is the exception: it is
+written as soon as it arrives, so a crash between flushes never loses output
+that was already paid for and a resumed task does not regenerate it.
+Subscribers of the progress bus still see every page immediately.
+"""
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+
+from models import db, Page, Task
+from services.progress_bus import progress_bus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL_MS = 1000
+DEFAULT_FLUSH_EVERY = 10
+_MAX_RETRIES = 5
+_RETRY_BASE_DELAY = 0.5
+
+
+def _flush_settings():
+    interval_ms, every = DEFAULT_FLUSH_INTERVAL_MS, DEFAULT_FLUSH_EVERY
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            interval_ms = current_app.config.get('TASK_PROGRESS_FLUSH_MS', interval_ms)
+            every = current_app.config.get('TASK_PROGRESS_FLUSH_EVERY', every)
+    except ImportError:
+        pass
+    return interval_ms, every
+
+
+class BatchedProgressWriter:
+    """
+    Buffer page results and task progress, write them in one transaction per batch
+
+    Must be used from the thread that owns the app context (the task's result
+    loop), not from the generation worker threads.
+    """
+
+    def __init__(self, task_id: str, progress: Dict[str, Any],
+                 flush_interval_ms: Optional[int] = None, flush_every: Optional[int] = None):
+        """
+        Args:
+            task_id: Task whose progress is written
+            progress: Initial progress dict (already persisted by the caller)
+            flush_interval_ms: Max age of a buffered result (TASK_PROGRESS_FLUSH_MS)
+            flush_every: Max buffered page results (TASK_PROGRESS_FLUSH_EVERY)
+        """
+        default_interval_ms, default_every = _flush_settings()
+        self.task_id = task_id
+        self.progress = dict(progress)
+        self.flush_interval = (default_interval_ms if flush_interval_ms is None else flush_interval_ms) / 1000.0
+        self.flush_every = max(1, default_every if flush_every is None else flush_every)
+        self.commits = 0
+        self._page_statuses: Dict[str, str] = {}
+        self._progress_dirty = False
+        self._first_pending_at: Optional[float] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered page results."""
+        return len(self._page_statuses)
+
+    def _mark_pending(self) -> None:
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+
+    def page_done(self, page_id: str, status: str,
+                  description_content: Optional[Dict[str, Any]] = None) -> None:
+        """Buffer a page's final status; a generated description is written immediately."""
+        if description_content is not None:
+            description = json.dumps(description_content, ensure_ascii=False)
+            self._commit(lambda: self._write_description(page_id, status, description))
+            self._page_statuses.pop(page_id, None)
+            return
+        self._page_statuses[page_id] = status
+        self._mark_pending()
+
+    def update_progress(self, **fields: Any) -> None:
+        """Update task progress fields; published at once, persisted with the next flush."""
+        self.progress.update(fields)
+        self._progress_dirty = True
+        self._mark_pending()
+        progress_bus.publish(self.task_id, progress=self.progress)
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Seconds until buffered results must be flushed; None if nothing is buffered."""
+        if self._first_pending_at is None:
+            return None
+        return max(0.0, self._first_pending_at + self.flush_interval - time.monotonic())
+
+    def due(self) -> bool:
+        return self.pending >= self.flush_every or self.seconds_until_due() == 0.0
+
+    def flush_if_due(self) -> bool:
+        return self.flush() if self.due() else False
+
+    def flush(self) -> bool:
+        """Write everything buffered in a single transaction. Returns True if anything was written."""
+        if self._first_pending_at is None:
+            return False
+
+        self._commit(self._execute_updates)
+        logger.debug(f"Task {self.task_id}: flushed {self.pending} page result(s)")
+        self._page_statuses.clear()
+        self._progress_dirty = False
+        self._first_pending_at = None
+        return True
+
+    def _commit(self, write: Callable[[], None]) -> None:
+        """Run ``write`` and commit, retrying while SQLite reports the database locked."""
+        for attempt in range(_MAX_RETRIES):
+            try:
+                write()
+                db.session.commit()
+                break
+            except OperationalError as e:
+                db.session.rollback()
+                if "database is locked" not in str(e) or attempt == _MAX_RETRIES - 1:
+                    raise
+                delay = _RETRY_BASE_DELAY * (2 ** attempt)
+                logger.warning(f"Database locked, retrying progress write in {delay:.1f}s (attempt {attempt + 1}/{_MAX_RETRIES})")
+                time.sleep(delay)
+        self.commits += 1
+
+    def _write_description(self, page_id: str, status: str, description: str) -> None:
+        db.session.execute(
+            update(Page)
+            .where(Page.id == page_id)
+            .values(description_content=description, status=status, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+    def _execute_updates(self) -> None:
+        now = datetime.utcnow()
+
+        by_status: Dict[str, List[str]] = defaultdict(list)
+        for page_id, status in self._page_statuses.items():
+            by_status[status].append(page_id)
+        for status, page_ids in by_status.items():
+            db.session.execute(
+                update(Page)
+                .where(Page.id.in_(page_ids))
+                .values(status=status, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+
+        if self._progress_dirty:
+            db.session.execute(
+                update(Task)
+                .where(Task.id == self.task_id)
+                .values(progress=json.dumps(self.progress))
+                .execution_options(synchronize_session=False)
+            )
@@ -0,0 +1,58 @@
+"""
+Prompt cache accounting - how much of a task's prompt input was served from cache
+
+Per-page description calls share one large project prefix (reference files,
+original input, outline, requirements, output rules) built once per task. Text
+providers send it through their native context cache where one exists
+(``TextProvider.generate_text_with_prefix``) and report the provider's usage
+numbers with ``report_prompt_cache``; a task collects them by running its calls
+inside ``track_prompt_cache(stats)`` and publishes ``stats.as_progress()``.
+
+Like ``rate_limiter.report_usage``, reporting applies to the collector of the
+current thread (or asyncio task) and does nothing outside ``track_prompt_cache``.
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+
+class PromptCacheStats:
+    """Thread-safe totals of prompt tokens and cache hits over a task's calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def add(self, prompt_tokens: int, cached_tokens: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += max(0, int(prompt_tokens or 0))
+            self.cached_tokens += max(0, int(cached_tokens or 0))
+
+    def as_progress(self) -> Dict[str, int]:
+        """Fields merged into task progress."""
+        with self._lock:
+            return {'prompt_tokens': self.prompt_tokens, 'cached_prompt_tokens': self.cached_tokens}
+
+
+_current_stats: ContextVar[Optional[PromptCacheStats]] = ContextVar('prompt_cache_stats', default=None)
+
+
+@contextmanager
+def track_prompt_cache(stats: Optional[PromptCacheStats]):
+    """Collect ``report_prompt_cache`` calls made by this thread or task into ``stats``."""
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def report_prompt_cache(prompt_tokens: Optional[int], cached_tokens: Optional[int]) -> None:
+    """Record one call's prompt size and the part of it read from a cache."""
+    stats = _current_stats.get()
+    if stats is not None and (prompt_tokens or cached_tokens):
+        stats.add(prompt_tokens or 0, cached_tokens or 0)
@@ -12,6 +12,7 @@ AI Service Prompts - 集中管理所有 AI 服务的 prompt 模板
 """
 import json
 import logging
+import os
 import re
 from typing import List, Dict, Optional, TYPE_CHECKING, Any
 
@@ -257,7 +258,11 @@ def _format_reference_files_xml(reference_files_content: Optional[List[Dict[str,
     for file_info in reference_files_content:
         filename = file_info.get('filename', 'unknown')
         content = file_info.get('content', '')
-        xml_parts.append(f'  <file name="{filename}">')
+        if file_info.get('excerpt_of'):
+            # 逐页检索只带了相关片段，提示模型这不是全文
+            xml_parts.append(f'  <file name="{filename}" excerpt="true">')
+        else:
+            xml_parts.append(f'  <file name="{filename}">')
         xml_parts.append('    <content>')
         xml_parts.append(content)
         xml_parts.append('    </content>')
@@ -267,6 +272,53 @@ def _format_reference_files_xml(reference_files_content: Optional[List[Dict[str,
     return '\n'.join(xml_parts)
 
 
+def _reference_setting(key: str, default: int) -> int:
+    """Integer setting from app.config (database settings), then environment."""
+    value = None
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            value = current_app.config.get(key)
+    except ImportError:
+        pass
+    if value in (None, ''):
+        value = os.getenv(key)
+    try:
+        return int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid {key}={value!r}")
+        return default
+
+
+def _reference_files_inline(reference_files_content) -> bool:
+    """Whether every page gets the full reference files (within REFERENCE_CONTEXT_TOKEN_BUDGET)."""
+    from services.reference_index import DEFAULT_TOKEN_BUDGET, fits_token_budget
+
+    return fits_token_budget(
+        reference_files_content or [],
+        _reference_setting('REFERENCE_CONTEXT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET),
+    )
+
+
+def _page_reference_excerpts(reference_files_content, page_outline) -> List[Dict[str, str]]:
+    """BM25 top chunks of the reference files for the page's title and points."""
+    from services.reference_index import (
+        DEFAULT_TOKEN_BUDGET, DEFAULT_TOP_K, select_reference_excerpts,
+    )
+
+    if isinstance(page_outline, dict):
+        query = ' '.join([str(page_outline.get('title') or '')] +
+                         [str(point) for point in page_outline.get('points') or []])
+    else:
+        query = str(page_outline)
+    return select_reference_excerpts(
+        reference_files_content,
+        query,
+        token_budget=_reference_setting('REFERENCE_CONTEXT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET),
+        top_k=max(1, _reference_setting('REFERENCE_RETRIEVAL_TOP_K', DEFAULT_TOP_K)),
+    )
+
+
 def _format_requirements(requirements: str, context: str = "outline") -> str:
     """格式化用户提供的生成要求，返回可直接拼接到 prompt 中的文本段。
 
@@ -634,22 +686,23 @@ You are a helpful assistant that modifies PPT outlines based on user requirement
 # ═══════════════════════════════════════════════════════════════════════════════
 
 
-def get_page_description_prompt(project_context: 'ProjectContext', outline: list,
-                                page_outline: dict, page_index: int,
-                                part_info: str = "",
+def get_page_description_prefix(project_context: 'ProjectContext', outline: list,
                                 language: str = None,
                                 detail_level: str = "default",
                                 extra_fields: list = None) -> str:
-    """生成单个页面描述的 prompt"""
+    """单页描述 prompt 中所有页面共享的前缀（每个任务只构建一次）
+
+    前缀逐字节不变，便于提供商的上下文缓存 / 自动前缀缓存命中：参考文件
+    （未超出 REFERENCE_CONTEXT_TOKEN_BUDGET 时为全文）、原始需求、大纲、要求与输出规则。
+    页面相关的内容全部放在 get_page_description_suffix 中。
+    """
     original_input = _get_original_input(project_context)
 
     prompt = (f"""\
 我们正在为PPT的每一页生成内容描述。
 用户的原始需求是：\n{original_input}\n
-我们已经有了完整的大纲：\n{outline}\n{part_info}
-{_format_requirements(project_context.description_requirements, "description")}现在请为第 {page_index} 页生成描述：
-{page_outline}
-{"**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等（输出到标题后）, 不添加任何素材。**" if page_index == 1 else ""}
+我们已经有了完整的大纲：\n{outline}\n
+{_format_requirements(project_context.description_requirements, "description")}
 ## 重要提示
 - "页面文字"中的内容会被逐字渲染到 PPT 页面上：只写真正要出现在页面上的文字，不要包含任何说明性文字、注释或设计意图（设计意图写入下方对应字段）。
 - 标题规则：内容页的标题优先写成论断句——一句话陈述本页结论（如"算力瓶颈才是历次 AI 寒冬的根因"），而不是话题短语（如"AI 寒冬回顾"）。大纲中该页的第一条 takeaway 要点是标题的首选来源。封面、目录、章节过渡等功能页保持简短标题。
@@ -668,7 +721,42 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
 {get_language_instruction(language)}
 """)
 
-    return _build_prompt(prompt, project_context.reference_files_content, tag='get_page_description_prompt')
+    reference_files = project_context.reference_files_content
+    return _format_reference_files_xml(reference_files if _reference_files_inline(reference_files) else None) + prompt
+
+
+def get_page_description_suffix(project_context: 'ProjectContext',
+                                page_outline: dict, page_index: int,
+                                part_info: str = "") -> str:
+    """单页描述 prompt 中该页独有的部分：页面大纲，以及参考文件超出预算时的检索片段"""
+    reference_files = project_context.reference_files_content
+    excerpts_xml = ""
+    if not _reference_files_inline(reference_files):
+        excerpts_xml = "\n" + _format_reference_files_xml(_page_reference_excerpts(reference_files, page_outline))
+
+    return (f"""\
+{excerpts_xml}
+现在请为第 {page_index} 页生成描述：
+{page_outline}{part_info}
+{"**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等（输出到标题后）, 不添加任何素材。**" if page_index == 1 else ""}
+""")
+
+
+def get_page_description_prompt(project_context: 'ProjectContext', outline: list,
+                                page_outline: dict, page_index: int,
+                                part_info: str = "",
+                                language: str = None,
+                                detail_level: str = "default",
+                                extra_fields: list = None,
+                                prefix: str = None) -> str:
+    """生成单个页面描述的 prompt（共享前缀 + 页面后缀）
+
+    prefix: get_page_description_prefix 的结果；批量生成时由调用方构建一次后复用
+    """
+    if prefix is None:
+        prefix = get_page_description_prefix(project_context, outline, language, detail_level, extra_fields)
+    suffix = get_page_description_suffix(project_context, page_outline, page_index, part_info)
+    return _build_prompt(prefix + suffix, tag='get_page_description_prompt')
 
 
 def get_all_descriptions_stream_prompt(project_context: 'ProjectContext',
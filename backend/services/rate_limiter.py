@@ -0,0 +1,531 @@
+"""
+Adaptive rate limiter - provider-aware concurrency control for AI calls
+
+Every AI call made by background tasks runs inside ``<limiter>.slot(label)``.
+The limiter keeps one ``AdaptiveLimiter`` per provider and model (resolved
+from ``{TEXT|IMAGE|IMAGE_CAPTION}_MODEL_SOURCE`` / ``AI_PROVIDER_FORMAT`` and
+the model name), each combining:
+
+* AIMD concurrency: the allowed number of in-flight calls grows by one per
+  window of successful calls up to the configured worker count
+  (MAX_IMAGE_WORKERS / MAX_DESCRIPTION_WORKERS), and is halved when the
+  provider answers 429/503. Only one halving happens per window; throttles
+  reported by calls started before the last decrease only extend the backoff.
+* Backoff: after a throttle no new call starts until ``Retry-After`` (or
+  Gemini's ``retryDelay``) has passed, else an exponential 1s..60s delay.
+* Optional token buckets for requests per minute and tokens per minute
+  (``{TEXT|IMAGE|IMAGE_CAPTION}_RATE_LIMIT_RPM`` / ``_TPM``, 0 = unlimited).
+
+Waiting calls are admitted in fair-share order (``services.scheduler``):
+interactive single-page work ahead of bulk runs, projects taking turns.
+
+Providers and extractors that swallow or retry errors themselves call
+``report_throttle(exc)`` / ``report_usage(tokens)``; these apply to the slot
+held by the current thread (or asyncio task) and do nothing outside a slot.
+Coroutines on the shared event loop (``services.async_runner``) hold slots
+with ``async with <limiter>.aslot(label)``, which waits without a thread.
+
+State is per process: in worker mode (TASK_EXECUTION_MODE=worker) each worker
+adapts on its own. ``rate_limit_snapshot()`` backs GET /api/settings/rate-limits.
+"""
+import asyncio
+import logging
+import math
+import os
+import re
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from services.scheduler import PRIORITY_BULK, FairShareScheduler, Ticket
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUS_CODES = (429, 503)
+_THROTTLE_MARKERS = (
+    'resource_exhausted', 'rate limit', 'rate_limit', 'ratelimit',
+    'too many requests', 'overloaded', 'quota exceeded', 'service unavailable',
+)
+_STATUS_IN_MESSAGE = re.compile(r'^(?:429|503)\b|\b(?:error code|status code|status|http)[:\s]+(?:429|503)\b', re.I)
+_RETRY_DELAY_IN_MESSAGE = re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s")
+
+DECREASE_FACTOR = 0.5
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+# Slot held by the current thread / asyncio task
+_current_slot: ContextVar[Optional['_SlotState']] = ContextVar('rate_limit_slot', default=None)
+
+
+def _setting(key: str) -> Optional[str]:
+    """app.config (database settings) first, then environment; empty means unset."""
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            value = current_app.config.get(key)
+            if value not in (None, ''):
+                return str(value)
+    except ImportError:
+        pass
+    return os.getenv(key) or None
+
+
+def _int_setting(key: str) -> int:
+    try:
+        return max(0, int(_setting(key) or 0))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {key}={_setting(key)!r}")
+        return 0
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attr in ('status_code', 'code', 'status'):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return getattr(getattr(exc, 'response', None), 'status_code', None)
+
+
+def _exception_chain(exc: BaseException):
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """Whether the error (or one it was raised from) is a provider 429/503."""
+    for error in _exception_chain(exc):
+        if _status_code(error) in THROTTLE_STATUS_CODES:
+            return True
+        message = str(error)
+        lowered = message.lower()
+        if _STATUS_IN_MESSAGE.search(message) or any(marker in lowered for marker in _THROTTLE_MARKERS):
+            return True
+    return False
+
+
+def _parse_retry_after(value) -> Optional[float]:
+    if value in (None, ''):
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Delay requested by the provider via Retry-After / retry-after-ms headers or Gemini retryDelay."""
+    for error in _exception_chain(exc):
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+        if headers is not None:
+            try:
+                retry_after_ms = headers.get('retry-after-ms')
+                if retry_after_ms not in (None, ''):
+                    return max(0.0, float(retry_after_ms) / 1000)
+                seconds = _parse_retry_after(headers.get('retry-after'))
+                if seconds is not None:
+                    return seconds
+            except (AttributeError, TypeError, ValueError):
+                pass
+        match = _RETRY_DELAY_IN_MESSAGE.search(str(error))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """Refills ``rate_per_minute`` tokens per minute, holding at most one minute's worth."""
+
+    def __init__(self, rate_per_minute: int, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+    def wait_seconds(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available (requests above capacity wait for a full bucket)."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return 0.0 if missing <= 0 else missing * 60.0 / self.capacity
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+
+class _SlotState:
+    """What the current thread or task holds: the limiter, its window epoch and already-counted throttles."""
+
+    def __init__(self, limiter: 'AdaptiveLimiter', epoch: int):
+        self.limiter = limiter
+        self.epoch = epoch
+        self.throttled = False
+        self.reported = set()
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency window plus request/token buckets for one provider and model."""
+
+    def __init__(self, name: str, max_concurrency: int, requests_per_minute: int = 0,
+                 tokens_per_minute: int = 0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.limit = float(self.max_concurrency)
+        self._clock = clock
+        self._condition = threading.Condition()
+        # (loop, asyncio.Event) of coroutines waiting in aacquire, woken with the condition
+        self._async_waiters = set()
+        self._request_bucket = TokenBucket(requests_per_minute, clock) if requests_per_minute else None
+        self._token_bucket = TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        self.in_use = 0
+        self._scheduler = FairShareScheduler()
+        self._epoch = 0
+        self._blocked_until = 0.0
+        self._consecutive_throttles = 0
+        self.successes = 0
+        self.throttles = 0
+        self.last_throttle_at: Optional[datetime] = None
+        self.last_retry_after: Optional[float] = None
+
+    def update_capacity(self, capacity: int):
+        new_capacity = max(1, int(capacity))
+        with self._condition:
+            if new_capacity == self.max_concurrency:
+                return
+            logger.info(f"Updating {self.name} limiter: {self.max_concurrency} -> {new_capacity}")
+            # A limiter running at its ceiling follows the new ceiling; a backed-off one keeps adapting
+            if self.limit >= self.max_concurrency:
+                self.limit = float(new_capacity)
+            self.max_concurrency = new_capacity
+            self.limit = min(self.limit, float(new_capacity))
+            self._notify_all()
+
+    def _wait_seconds(self, tokens: int) -> Optional[float]:
+        """0 if a call may start now, None to wait for a release, else seconds to sleep."""
+        if self.in_use >= math.floor(self.limit):
+            return None
+        delays = [self._blocked_until - self._clock()]
+        if self._request_bucket:
+            delays.append(self._request_bucket.wait_seconds(1))
+        if self._token_bucket and tokens:
+            delays.append(self._token_bucket.wait_seconds(tokens))
+        delay = max(delays)
+        return delay if delay > 0 else 0.0
+
+    def acquire(self, label: str, tokens: int = 0, project_id: Optional[str] = None,
+                priority: str = PRIORITY_BULK) -> _SlotState:
+        ticket = Ticket(project_id, priority, label)
+        waited = False
+        with self._condition:
+            self._scheduler.enqueue(ticket)
+            try:
+                while True:
+                    delay = self._wait_seconds(tokens)
+                    if delay == 0:
+                        if self._scheduler.peek() is ticket:
+                            break
+                        reason, delay = 'waiting for turn', None
+                    else:
+                        reason = 'limiter full' if delay is None else f'backing off {delay:.1f}s'
+                    if not waited:
+                        waited = True
+                        logger.info(
+                            f"{self.name} {reason} ({self.in_use}/{math.floor(self.limit)}), waiting: {label}"
+                        )
+                    self._condition.wait(timeout=delay)
+            except BaseException:
+                self._scheduler.discard(ticket)
+                self._notify_all()
+                raise
+            state = self._grant(ticket, tokens)
+        if waited:
+            logger.info(f"{self.name} limiter slot acquired: {label}")
+        return state
+
+    async def aacquire(self, label: str, tokens: int = 0, project_id: Optional[str] = None,
+                       priority: str = PRIORITY_BULK) -> _SlotState:
+        """``acquire`` for coroutines: waits on the event loop instead of blocking a thread."""
+        ticket = Ticket(project_id, priority, label)
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        waited = False
+        with self._condition:
+            self._scheduler.enqueue(ticket)
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                with self._condition:
+                    delay = self._wait_seconds(tokens)
+                    if delay == 0:
+                        if self._scheduler.peek() is ticket:
+                            state = self._grant(ticket, tokens)
+                            break
+                        reason, delay = 'waiting for turn', None
+                    else:
+                        reason = 'limiter full' if delay is None else f'backing off {delay:.1f}s'
+                    waiter[1].clear()
+                    if not waited:
+                        waited = True
+                        logger.info(
+                            f"{self.name} {reason} ({self.in_use}/{math.floor(self.limit)}), waiting: {label}"
+                        )
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._condition:
+                self._scheduler.discard(ticket)
+                self._notify_all()
+            raise
+        finally:
+            with self._condition:
+                self._async_waiters.discard(waiter)
+        if waited:
+            logger.info(f"{self.name} limiter slot acquired: {label}")
+        return state
+
+    def _grant(self, ticket: Ticket, tokens: int) -> _SlotState:
+        """Admit ``ticket`` (caller holds the condition and has checked it may start)."""
+        self._scheduler.grant(ticket)
+        self.in_use += 1
+        if self._request_bucket:
+            self._request_bucket.take(1)
+        if self._token_bucket and tokens:
+            self._token_bucket.take(tokens)
+        # The next ticket in line may fit as well
+        self._notify_all()
+        return _SlotState(self, self._epoch)
+
+    def _notify_all(self):
+        """Wake blocked threads and waiting coroutines (caller holds the condition)."""
+        self._condition.notify_all()
+        for loop, event in list(self._async_waiters):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                self._async_waiters.discard((loop, event))
+
+    def release(self, state: _SlotState, succeeded: bool):
+        with self._condition:
+            self.in_use -= 1
+            if succeeded and not state.throttled:
+                self.successes += 1
+                self._consecutive_throttles = 0
+                # Additive increase: about +1 per window of successful calls
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / max(self.limit, 1.0))
+            self._notify_all()
+
+    def record_throttle(self, state: Optional[_SlotState], retry_after: Optional[float] = None):
+        with self._condition:
+            now = self._clock()
+            self.throttles += 1
+            self._consecutive_throttles += 1
+            self.last_throttle_at = datetime.now(timezone.utc)
+            self.last_retry_after = retry_after
+            if state is None or state.epoch == self._epoch:
+                previous = self.limit
+                self.limit = max(1.0, self.limit * DECREASE_FACTOR)
+                self._epoch += 1
+                logger.warning(
+                    f"{self.name} throttled by provider, concurrency {previous:.1f} -> {self.limit:.1f}"
+                )
+            backoff = retry_after if retry_after is not None else min(
+                MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** (self._consecutive_throttles - 1)
+            )
+            self._blocked_until = max(self._blocked_until, now + backoff)
+
+    def record_usage(self, tokens: int):
+        """Charge tokens actually used; the bucket may go negative and delay the next calls."""
+        if self._token_bucket and tokens:
+            with self._condition:
+                self._token_bucket.take(tokens)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._condition:
+            backoff = max(0.0, self._blocked_until - self._clock())
+            return {
+                'concurrency_limit': math.floor(self.limit),
+                'concurrency_window': round(self.limit, 2),
+                'max_concurrency': self.max_concurrency,
+                'in_use': self.in_use,
+                'waiting': len(self._scheduler),
+                'scheduler': self._scheduler.snapshot(),
+                'backoff_seconds': round(backoff, 2),
+                'requests_per_minute': int(self._request_bucket.capacity) if self._request_bucket else None,
+                'tokens_per_minute': int(self._token_bucket.capacity) if self._token_bucket else None,
+                'successes': self.successes,
+                'throttles': self.throttles,
+                'last_throttle_at': self.last_throttle_at.isoformat() if self.last_throttle_at else None,
+                'last_retry_after': self.last_retry_after,
+            }
+
+
+_limiters: 'weakref.WeakValueDictionary[str, ResourceLimiter]' = weakref.WeakValueDictionary()
+
+
+class ResourceLimiter:
+    """
+    Concurrency limiter for one kind of AI resource, adapting per provider and model
+
+    ``model_type`` ("text", "image" or "image_caption") selects the settings used to
+    resolve the provider/model key and the optional RPM/TPM budgets; without it all
+    calls share a single key. ``capacity`` is the ceiling of every AIMD window.
+    """
+
+    def __init__(self, name: str, capacity: int, model_type: Optional[str] = None):
+        self.name = name
+        self.capacity = max(1, int(capacity))
+        self.model_type = model_type
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, AdaptiveLimiter] = {}
+        _limiters[name] = self
+
+    def update_capacity(self, capacity: int):
+        with self._lock:
+            self.capacity = max(1, int(capacity))
+            limiters = list(self._by_key.values())
+        for limiter in limiters:
+            limiter.update_capacity(self.capacity)
+
+    def resolve_key(self) -> str:
+        """
+        ``provider:model`` key from the current settings (app.config, then environment)
+
+        Pool threads spawned without an app context should not resolve their own
+        key: the task thread resolves it once and passes it to ``slot(key=...)``.
+        """
+        if not self.model_type:
+            return 'default'
+        prefix = self.model_type.upper()
+        provider = (_setting(f'{prefix}_MODEL_SOURCE') or _setting('AI_PROVIDER_FORMAT') or 'gemini').lower()
+        model = _setting(f'{prefix}_MODEL') or 'default'
+        return f'{provider}:{model}'
+
+    def limiter_for(self, key: Optional[str] = None) -> AdaptiveLimiter:
+        key = key or self.resolve_key()
+        with self._lock:
+            limiter = self._by_key.get(key)
+            if limiter is None:
+                prefix = (self.model_type or '').upper()
+                limiter = AdaptiveLimiter(
+                    f'{self.name}[{key}]',
+                    self.capacity,
+                    requests_per_minute=_int_setting(f'{prefix}_RATE_LIMIT_RPM') if prefix else 0,
+                    tokens_per_minute=_int_setting(f'{prefix}_RATE_LIMIT_TPM') if prefix else 0,
+                )
+                self._by_key[key] = limiter
+            return limiter
+
+    @contextmanager
+    def slot(self, label: str, on_acquire: Optional[Callable[[], None]] = None, tokens: int = 0,
+             project_id: Optional[str] = None, priority: str = PRIORITY_BULK, key: Optional[str] = None):
+        """
+        Hold one call slot; a 429/503 escaping the block shrinks the window and starts a backoff
+
+        Waiters are served in fair-share order (services.scheduler): ``priority``
+        "interactive" for single-page edits, "bulk" for batch runs, round-robin
+        across ``project_id`` within a priority. ``key`` is the provider/model
+        resolved by the calling task (see ``resolve_key``).
+        """
+        limiter = self.limiter_for(key)
+        state = limiter.acquire(label, tokens=tokens, project_id=project_id, priority=priority)
+        context_token = _current_slot.set(state)
+        succeeded = False
+        try:
+            if on_acquire:
+                on_acquire()
+            yield
+            succeeded = True
+        except Exception as e:
+            _report(state, e)
+            raise
+        finally:
+            _current_slot.reset(context_token)
+            limiter.release(state, succeeded)
+
+    @asynccontextmanager
+    async def aslot(self, label: str, on_acquire: Optional[Callable[[], None]] = None, tokens: int = 0,
+                    project_id: Optional[str] = None, priority: str = PRIORITY_BULK, key: Optional[str] = None):
+        """``slot`` for coroutines: same limiter and accounting, the wait does not hold a thread"""
+        limiter = self.limiter_for(key)
+        state = await limiter.aacquire(label, tokens=tokens, project_id=project_id, priority=priority)
+        context_token = _current_slot.set(state)
+        succeeded = False
+        try:
+            if on_acquire:
+                on_acquire()
+            yield
+            succeeded = True
+        except Exception as e:
+            _report(state, e)
+            raise
+        finally:
+            _current_slot.reset(context_token)
+            limiter.release(state, succeeded)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._by_key.items())
+        return [
+            {'provider': key.split(':', 1)[0], 'model': key.split(':', 1)[-1], **limiter.snapshot()}
+            for key, limiter in items
+        ]
+
+
+def _report(state: _SlotState, exc: BaseException, retry_after: Optional[float] = None) -> bool:
+    if id(exc) in state.reported or not is_throttle_error(exc):
+        return False
+    state.reported.add(id(exc))
+    state.throttled = True
+    state.limiter.record_throttle(state, retry_after if retry_after is not None else retry_after_seconds(exc))
+    return True
+
+
+def report_throttle(exc: BaseException, retry_after: Optional[float] = None) -> bool:
+    """Feed an error handled inside a slot (retried or swallowed) to its limiter; True if it was a throttle."""
+    state = _current_slot.get()
+    if state is None or exc is None:
+        return False
+    return _report(state, exc, retry_after)
+
+
+def report_usage(tokens: int):
+    """Charge tokens used by a call made inside a slot against the TPM budget."""
+    state = _current_slot.get()
+    if state is not None and tokens:
+        state.limiter.record_usage(int(tokens))
+
+
+def rate_limit_snapshot() -> List[Dict[str, Any]]:
+    """Current window, in-flight calls and backoff of every registered limiter."""
+    return [
+        {'name': name, 'capacity': limiter.capacity, 'providers': limiter.snapshot()}
+        for name, limiter in sorted(_limiters.items())
+    ]
+
+
+image_resource_limiter = ResourceLimiter("image", int(os.getenv('MAX_IMAGE_WORKERS', '20')), model_type='image')
+text_resource_limiter = ResourceLimiter("text", int(os.getenv('MAX_DESCRIPTION_WORKERS', '20')), model_type='text')
+caption_resource_limiter = ResourceLimiter(
+    "caption", int(os.getenv('MAX_DESCRIPTION_WORKERS', '20')), model_type='image_caption'
+)
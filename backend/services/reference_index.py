@@ -0,0 +1,306 @@
+"""
+Reference index - per-page retrieval over parsed reference files
+
+Parsed reference files (MinerU markdown) used to be pasted whole into every
+page description prompt, so a 40-page deck built from two long PDFs resent the
+same documents 40 times. Instead each file is split into heading-aware chunks
+with a BM25 inverted index; a page prompt only carries the chunks that best
+match that page's title and points, within REFERENCE_CONTEXT_TOKEN_BUDGET.
+
+The index is built when a file finishes parsing and stored next to the upload
+as ``<file>.chunks.json``, stamped with the markdown's sha256 so a re-parse is
+never served a stale index. Files without a sidecar (parsed before this
+existed) are indexed in memory on first use. Tokenisation needs no external
+dependency: lowercase latin words plus CJK character bigrams.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = '.chunks.json'
+INDEX_SCHEMA = 1
+DEFAULT_TOKEN_BUDGET = 6000
+DEFAULT_TOP_K = 8
+CHUNK_MAX_CHARS = 1500
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.*)$')
+_LATIN_WORD = re.compile(r'[a-z0-9][a-z0-9_\-]*')
+_CJK_RUN = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]+')
+_CJK_CHAR = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯＀-￯]')
+
+_MEMORY_CACHE_SIZE = 32
+_memory_cache: 'OrderedDict[str, ReferenceIndex]' = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count: one per CJK character, one per four other characters."""
+    if not text:
+        return 0
+    cjk = len(_CJK_CHAR.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def tokenize(text: str) -> List[str]:
+    lowered = text.lower()
+    terms = _LATIN_WORD.findall(lowered)
+    for run in _CJK_RUN.findall(lowered):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def content_digest(markdown: str) -> str:
+    return hashlib.sha256((markdown or '').encode('utf-8')).hexdigest()
+
+
+def chunk_markdown(markdown: str, max_chars: int = CHUNK_MAX_CHARS) -> List[Dict[str, str]]:
+    """
+    Split markdown into chunks of at most ``max_chars`` along headings and paragraphs.
+
+    Each chunk remembers its heading path so an excerpt can still say which
+    section it came from.
+    """
+    chunks: List[Dict[str, str]] = []
+    headings: List[Tuple[int, str]] = []
+    buffer: List[str] = []
+    size = 0
+
+    def flush():
+        nonlocal buffer, size
+        text = '\n'.join(buffer).strip()
+        if text:
+            chunks.append({'heading': ' > '.join(h for _, h in headings), 'text': text})
+        buffer, size = [], 0
+
+    for block in re.split(r'\n\s*\n', markdown or ''):
+        block = block.strip('\n')
+        if not block.strip():
+            continue
+        match = _HEADING.match(block.strip())
+        if match and '\n' not in block.strip():
+            flush()
+            level = len(match.group(1))
+            headings = [h for h in headings if h[0] < level] + [(level, match.group(2).strip())]
+            continue
+        # 超长段落（如大表格）按行再切
+        pieces = [block] if len(block) <= max_chars else _split_long_block(block, max_chars)
+        for piece in pieces:
+            if size and size + len(piece) > max_chars:
+                flush()
+            buffer.append(piece)
+            size += len(piece) + 2
+    flush()
+    return chunks
+
+
+def _split_long_block(block: str, max_chars: int) -> List[str]:
+    pieces, current, size = [], [], 0
+    for line in block.split('\n'):
+        while len(line) > max_chars:
+            if current:
+                pieces.append('\n'.join(current))
+                current, size = [], 0
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if size and size + len(line) > max_chars:
+            pieces.append('\n'.join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        pieces.append('\n'.join(current))
+    return pieces
+
+
+class ReferenceIndex:
+    """Chunked document with a BM25 inverted index."""
+
+    def __init__(self, digest: str, chunks: List[Dict[str, Any]], postings: Dict[str, List[List[int]]],
+                 avg_length: float):
+        self.digest = digest
+        self.chunks = chunks
+        self.postings = postings
+        self.avg_length = avg_length or 1.0
+
+    @classmethod
+    def build(cls, markdown: str, max_chars: int = CHUNK_MAX_CHARS) -> 'ReferenceIndex':
+        chunks = chunk_markdown(markdown, max_chars)
+        postings: Dict[str, List[List[int]]] = {}
+        total_length = 0
+        for chunk_id, chunk in enumerate(chunks):
+            terms = tokenize(f"{chunk['heading']}\n{chunk['text']}")
+            chunk['length'] = len(terms)
+            chunk['tokens'] = estimate_tokens(chunk['text'])
+            total_length += len(terms)
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, []).append([chunk_id, tf])
+        avg_length = total_length / len(chunks) if chunks else 1.0
+        return cls(content_digest(markdown), chunks, postings, avg_length)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'schema': INDEX_SCHEMA,
+            'digest': self.digest,
+            'avg_length': self.avg_length,
+            'chunks': self.chunks,
+            'postings': self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ReferenceIndex':
+        return cls(data['digest'], data['chunks'], data['postings'], data['avg_length'])
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(chunk['tokens'] for chunk in self.chunks)
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K) -> List[Tuple[int, float]]:
+        """BM25 scores of the best ``top_k`` chunks as (chunk_id, score), best first."""
+        count = len(self.chunks)
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for chunk_id, tf in posting:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.chunks[chunk_id]['length'] / self.avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top_k]
+
+
+def index_path_for(file_path: Union[str, os.PathLike]) -> Path:
+    return Path(f"{file_path}{INDEX_SUFFIX}")
+
+
+def build_and_save_index(markdown: str, file_path: Union[str, os.PathLike]) -> ReferenceIndex:
+    """Index parsed markdown and store it next to the uploaded file (atomic write)."""
+    index = ReferenceIndex.build(markdown)
+    path = index_path_for(file_path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(json.dumps(index.to_dict(), ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp_path, path)
+    _remember(index)
+    logger.info(f"Indexed reference file {Path(file_path).name}: {len(index.chunks)} chunks")
+    return index
+
+
+def _remember(index: ReferenceIndex) -> None:
+    with _memory_cache_lock:
+        _memory_cache[index.digest] = index
+        _memory_cache.move_to_end(index.digest)
+        while len(_memory_cache) > _MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def get_index(markdown: str, index_path: Optional[Union[str, os.PathLike]] = None) -> ReferenceIndex:
+    """
+    Index for ``markdown``: process cache, then the persisted sidecar, then an in-memory build.
+
+    A sidecar whose digest does not match the markdown (file re-parsed) is ignored.
+    """
+    digest = content_digest(markdown)
+    with _memory_cache_lock:
+        index = _memory_cache.get(digest)
+        if index is not None:
+            _memory_cache.move_to_end(digest)
+            return index
+
+    if index_path:
+        try:
+            data = json.loads(Path(index_path).read_text(encoding='utf-8'))
+            if data.get('schema') == INDEX_SCHEMA and data.get('digest') == digest:
+                index = ReferenceIndex.from_dict(data)
+        except (OSError, ValueError, KeyError):
+            index = None
+
+    if index is None:
+        index = ReferenceIndex.build(markdown)
+    _remember(index)
+    return index
+
+
+def fits_token_budget(reference_files_content: Sequence[Dict[str, Any]], token_budget: int) -> bool:
+    """True when the files can be sent whole: budget 0 (disabled) or total chunk tokens within it."""
+    files = [f for f in reference_files_content if f.get('content')]
+    if token_budget <= 0 or not files:
+        return True
+    return sum(get_index(f['content'], f.get('index_path')).total_tokens for f in files) <= token_budget
+
+
+def select_reference_excerpts(
+    reference_files_content: Sequence[Dict[str, Any]],
+    query: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    top_k: int = DEFAULT_TOP_K,
+) -> List[Dict[str, Any]]:
+    """
+    Reference files trimmed to the chunks relevant to ``query``.
+
+    Returns the input unchanged when it already fits ``token_budget`` (or the
+    budget is 0). Otherwise ranks all chunks of all files by BM25, takes the
+    best ``top_k`` that fit the budget and returns one entry per file with its
+    chosen chunks in document order, flagged with ``excerpt_of`` (chunk count).
+    When no chunk matches the query at all, the leading chunks of each file
+    fill the budget instead.
+    """
+    if fits_token_budget(reference_files_content, token_budget):
+        return list(reference_files_content)
+    files = [f for f in reference_files_content if f.get('content')]
+    indexes = [get_index(f['content'], f.get('index_path')) for f in files]
+
+    candidates = []
+    for file_no, index in enumerate(indexes):
+        for chunk_id, score in index.search(query, top_k):
+            candidates.append((score, file_no, chunk_id))
+    candidates.sort(key=lambda item: (-item[0], item[1], item[2]))
+    if not candidates:
+        # 查询词一个都没命中（标题过短、措辞或语言不同）：退回各文件开头的块，
+        # 按文件轮流填满预算，而不是让这一页完全没有参考资料
+        longest = max(len(index.chunks) for index in indexes)
+        candidates = [(0.0, file_no, chunk_id)
+                      for chunk_id in range(longest)
+                      for file_no, index in enumerate(indexes)
+                      if chunk_id < len(index.chunks)]
+
+    chosen: Dict[int, List[int]] = {}
+    used = picked = 0
+    for _, file_no, chunk_id in candidates:
+        if picked >= top_k:
+            break
+        tokens = indexes[file_no].chunks[chunk_id]['tokens']
+        if used + tokens > token_budget:
+            continue
+        chosen.setdefault(file_no, []).append(chunk_id)
+        used += tokens
+        picked += 1
+
+    excerpts = []
+    for file_no, chunk_ids in sorted(chosen.items()):
+        index = indexes[file_no]
+        parts = []
+        for chunk_id in sorted(chunk_ids):
+            chunk = index.chunks[chunk_id]
+            parts.append(f"[{chunk['heading']}]\n{chunk['text']}" if chunk['heading'] else chunk['text'])
+        excerpts.append({
+            'filename': files[file_no].get('filename', 'unknown'),
+            'content': '\n\n...\n\n'.join(parts),
+            'excerpt_of': len(index.chunks),
+        })
+    return excerpts
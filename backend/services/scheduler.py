@@ -0,0 +1,112 @@
+"""
+Fair-share scheduler - decides which waiting AI call gets the next limiter slot
+
+Batch tasks start one thread per page, so a 100-page image run puts 100
+waiters in front of the rate limiter. Without an order, whoever wakes first
+wins and a single-page regeneration queued behind such a batch waits for most
+of it. ``FairShareScheduler`` keeps waiters in per-priority, per-project FIFO
+queues:
+
+* Priority classes are served by smooth weighted round-robin
+  (``PRIORITY_WEIGHTS``): interactive single-page edits get four slots for
+  every bulk slot while both are waiting, and bulk work never starves.
+* Inside a class, projects take turns, so two batch runs share the slots
+  evenly regardless of their page counts.
+
+The scheduler itself never blocks; ``services.rate_limiter.AdaptiveLimiter``
+consults it under its own lock before granting a slot.
+"""
+from collections import OrderedDict, deque
+from itertools import count
+from typing import Any, Deque, Dict, List, Optional
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BULK = 'bulk'
+PRIORITY_WEIGHTS = {PRIORITY_INTERACTIVE: 4, PRIORITY_BULK: 1}
+
+_sequence = count()
+
+
+class Ticket:
+    """One waiting call; identity is what the scheduler tracks."""
+
+    __slots__ = ('project_id', 'priority', 'label', 'seq')
+
+    def __init__(self, project_id: Optional[str], priority: str, label: str = ''):
+        if priority not in PRIORITY_WEIGHTS:
+            raise ValueError(f"Unknown priority: {priority}")
+        self.project_id = project_id
+        self.priority = priority
+        self.label = label
+        self.seq = next(_sequence)
+
+
+class FairShareScheduler:
+    """Per-priority, per-project queues with weighted round-robin between priorities. Not thread-safe."""
+
+    def __init__(self, weights: Optional[Dict[str, int]] = None):
+        self.weights = dict(weights or PRIORITY_WEIGHTS)
+        self._queues: Dict[str, 'OrderedDict[Optional[str], Deque[Ticket]]'] = {
+            priority: OrderedDict() for priority in self.weights
+        }
+        self._current = {priority: 0 for priority in self.weights}
+        self.granted = {priority: 0 for priority in self.weights}
+
+    def __len__(self) -> int:
+        return sum(len(queue) for projects in self._queues.values() for queue in projects.values())
+
+    def enqueue(self, ticket: Ticket):
+        self._queues[ticket.priority].setdefault(ticket.project_id, deque()).append(ticket)
+
+    def _next_priority(self) -> Optional[str]:
+        pending = [priority for priority, projects in self._queues.items() if projects]
+        if not pending:
+            return None
+        # Smooth WRR: the class with the highest accumulated credit goes next
+        return max(pending, key=lambda priority: (self._current[priority] + self.weights[priority],
+                                                  self.weights[priority]))
+
+    def peek(self) -> Optional[Ticket]:
+        """The ticket that should be granted next, or None if nobody waits."""
+        priority = self._next_priority()
+        if priority is None:
+            return None
+        return next(iter(self._queues[priority].values()))[0]
+
+    def grant(self, ticket: Ticket):
+        """Remove a granted ticket and advance the round-robin state."""
+        pending = [priority for priority, projects in self._queues.items() if projects]
+        total = sum(self.weights[priority] for priority in pending)
+        for priority in pending:
+            self._current[priority] += self.weights[priority]
+        self._current[ticket.priority] -= total
+        self.granted[ticket.priority] += 1
+
+        projects = self._queues[ticket.priority]
+        queue = projects[ticket.project_id]
+        queue.remove(ticket)
+        # The project goes to the back of its class so the other projects take their turn
+        del projects[ticket.project_id]
+        if queue:
+            projects[ticket.project_id] = queue
+        if not any(self._queues.values()):
+            self._current = {priority: 0 for priority in self.weights}
+
+    def discard(self, ticket: Ticket):
+        """Drop a ticket whose caller stopped waiting."""
+        projects = self._queues[ticket.priority]
+        queue = projects.get(ticket.project_id)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        if not queue:
+            del projects[ticket.project_id]
+
+    def snapshot(self) -> Dict[str, Any]:
+        queued: Dict[str, List[Dict[str, Any]]] = {}
+        for priority, projects in self._queues.items():
+            queued[priority] = [
+                {'project_id': project_id, 'waiting': len(queue)}
+                for project_id, queue in projects.items()
+            ]
+        return {'queued': queued, 'granted': dict(self.granted)}
@@ -2,15 +2,16 @@
 Task Manager - handles background tasks using ThreadPoolExecutor
 No need for Celery or Redis, uses in-memory task tracking
 """
+import asyncio
+import inspect
 import logging
 import os
 import shutil
 import tempfile
 import threading
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from contextlib import contextmanager
-from typing import Callable, List, Dict, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Awaitable, Callable, List, Dict, Any, Optional
 from datetime import datetime
 from math import gcd
 import time
@@ -18,6 +19,10 @@ from sqlalchemy import func
 from sqlalchemy.exc import OperationalError
 from PIL import Image, ImageDraw, ImageFilter
 from models import db, Task, Page, Material, PageImageVersion, Settings, ProjectTemplateAsset, Project
+from services import async_runner
+from services.progress_bus import progress_bus, ProgressCheckpoint
+from services.progress_writer import BatchedProgressWriter
+from services.prompt_cache import PromptCacheStats, track_prompt_cache
 from utils import get_filtered_pages
 from utils.image_utils import check_image_resolution
 
@@ -173,98 +178,130 @@ def generate_image_until_quality_passes(
             )
             last_review = review
             last_error = None
-            if review.get('passed'):
-                logger.info("Image quality control passed for page %s on attempt %s", page_index, attempt)
+            if _quality_review_passed(review, page_index, attempt, attempts):
                 return image
+        except Exception as e:
+            last_error = e
+            last_review = None
+            _log_quality_attempt_error(e, page_index, attempt, attempts)
+            if attempt >= attempts and not quality_control_enabled:
+                raise
+
+    raise _quality_control_error(last_review, last_error) from last_error
+
+
+async def agenerate_image_until_quality_passes(
+    agenerate_image: Callable[[], Awaitable[Optional[Image.Image]]],
+    ai_service,
+    generation_prompt: str,
+    page_desc: str,
+    page_data: Optional[Dict[str, Any]] = None,
+    page_index: Optional[int] = None,
+    quality_control_enabled: bool = False,
+    max_attempts: int = IMAGE_QUALITY_CONTROL_MAX_ATTEMPTS,
+) -> Image.Image:
+    """generate_image_until_quality_passes for coroutines; the QC review runs in the loop's fallback pool."""
+    attempts = max(1, int(max_attempts)) if quality_control_enabled else 1
+    last_error: Optional[Exception] = None
+    last_review: Optional[dict] = None
+
+    for attempt in range(1, attempts + 1):
+        try:
+            image = await agenerate_image()
+            if not image:
+                raise ValueError("Failed to generate image")
 
-            logger.warning(
-                "Image quality control rejected page %s on attempt %s/%s: %s",
-                page_index,
-                attempt,
-                attempts,
-                _format_quality_review_failure(review),
+            if not quality_control_enabled:
+                return image
+
+            review = await asyncio.to_thread(
+                review_image_quality,
+                ai_service,
+                image,
+                generation_prompt,
+                page_desc,
+                page_data=page_data,
+                page_index=page_index,
             )
+            last_review = review
+            last_error = None
+            if _quality_review_passed(review, page_index, attempt, attempts):
+                return image
         except Exception as e:
             last_error = e
             last_review = None
-            logger.warning(
-                "Image quality control attempt %s/%s failed for page %s: %s",
-                attempt,
-                attempts,
-                page_index,
-                e,
-            )
+            _log_quality_attempt_error(e, page_index, attempt, attempts)
             if attempt >= attempts and not quality_control_enabled:
                 raise
 
-    if last_review:
-        reason = _format_quality_review_failure(last_review)
-        raise ImageQualityControlError(f"图片质量控制未通过：{reason}。请调整页面描述或提示词后重试。")
-    if last_error:
-        raise ImageQualityControlError(f"图片质量控制失败：{last_error}。请调整页面描述或提示词后重试。") from last_error
-    raise ImageQualityControlError("图片质量控制未通过。请调整页面描述或提示词后重试。")
-from pathlib import Path
-from services.pdf_service import split_pdf_to_pages
+    raise _quality_control_error(last_review, last_error) from last_error
 
 
-class ResourceLimiter:
-    """Thread-safe concurrency limiter for a shared external resource."""
+def _quality_review_passed(review: dict, page_index: Optional[int], attempt: int, attempts: int) -> bool:
+    if review.get('passed'):
+        logger.info("Image quality control passed for page %s on attempt %s", page_index, attempt)
+        return True
 
-    def __init__(self, name: str, capacity: int):
-        self.name = name
-        self.capacity = max(1, int(capacity))
-        self._in_use = 0
-        self._condition = threading.Condition()
+    logger.warning(
+        "Image quality control rejected page %s on attempt %s/%s: %s",
+        page_index,
+        attempt,
+        attempts,
+        _format_quality_review_failure(review),
+    )
+    return False
 
-    def update_capacity(self, capacity: int):
-        new_capacity = max(1, int(capacity))
-        with self._condition:
-            if new_capacity == self.capacity:
-                return
-            logger.info(f"Updating {self.name} limiter: {self.capacity} -> {new_capacity}")
-            self.capacity = new_capacity
-            self._condition.notify_all()
-
-    @contextmanager
-    def slot(self, label: str, on_acquire: Optional[Callable[[], None]] = None):
-        waited = False
-        with self._condition:
-            while self._in_use >= self.capacity:
-                if not waited:
-                    waited = True
-                    logger.info(
-                        f"{self.name} limiter full ({self._in_use}/{self.capacity}), "
-                        f"waiting: {label}"
-                    )
-                self._condition.wait(timeout=0.5)
 
-            self._in_use += 1
+def _log_quality_attempt_error(error: Exception, page_index: Optional[int], attempt: int, attempts: int) -> None:
+    logger.warning(
+        "Image quality control attempt %s/%s failed for page %s: %s",
+        attempt,
+        attempts,
+        page_index,
+        error,
+    )
 
-        if waited:
-            logger.info(f"{self.name} limiter slot acquired: {label}")
 
-        try:
-            if on_acquire:
-                on_acquire()
-            yield
-        finally:
-            with self._condition:
-                self._in_use -= 1
-                self._condition.notify()
+def _quality_control_error(last_review: Optional[dict], last_error: Optional[Exception]) -> ImageQualityControlError:
+    if last_review:
+        reason = _format_quality_review_failure(last_review)
+        return ImageQualityControlError(f"图片质量控制未通过：{reason}。请调整页面描述或提示词后重试。")
+    if last_error:
+        return ImageQualityControlError(f"图片质量控制失败：{last_error}。请调整页面描述或提示词后重试。")
+    return ImageQualityControlError("图片质量控制未通过。请调整页面描述或提示词后重试。")
+from pathlib import Path
+from services.pdf_service import split_pdf_to_pages
+from services.rate_limiter import ResourceLimiter  # noqa: F401  re-export (moved to services.rate_limiter)
+from services.rate_limiter import (
+    caption_resource_limiter,
+    image_resource_limiter,
+    text_resource_limiter,
+)
+from services.scheduler import PRIORITY_INTERACTIVE
 
 
 class TaskManager:
     """Simple task manager using ThreadPoolExecutor"""
     
-    def __init__(self, max_workers: int = 4):
-        """Initialize task manager"""
+    def __init__(self, max_workers: int = 4, queue_tasks: bool = False):
+        """Initialize task manager
+
+        With ``queue_tasks`` enabled, tasks whose arguments are persisted in
+        Task.params are left in the database for ``services.worker`` processes
+        instead of running in this process.
+        """
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.active_tasks = {}  # task_id -> Future
         self.lock = threading.Lock()
         self.max_workers = max_workers
+        self.queue_tasks = queue_tasks
     
     def submit_task(self, task_id: str, func: Callable, *args, **kwargs):
         """Submit a background task"""
+        if self.queue_tasks and _is_queueable_task(task_id, func):
+            logger.info(f"Task {task_id} queued for background workers")
+            return
+
         with self.lock:
             executor = self.executor
 
@@ -326,10 +363,11 @@ def _compute_background_worker_target(description_workers: int, image_workers: i
     return max(8, int(description_workers) + int(image_workers) + 4)
 
 
-# Global task manager and resource limiters
-task_manager = TaskManager(max_workers=max(8, int(os.getenv('MAX_BACKGROUND_TASK_WORKERS', '16'))))
-image_resource_limiter = ResourceLimiter("image", int(os.getenv('MAX_IMAGE_WORKERS', '20')))
-text_resource_limiter = ResourceLimiter("text", int(os.getenv('MAX_DESCRIPTION_WORKERS', '20')))
+# Global task manager (resource limiters live in services.rate_limiter)
+task_manager = TaskManager(
+    max_workers=max(8, int(os.getenv('MAX_BACKGROUND_TASK_WORKERS', '16'))),
+    queue_tasks=os.getenv('TASK_EXECUTION_MODE', 'thread').lower() == 'worker',
+)
 
 
 def sync_resource_limits(description_workers: int, image_workers: int):
@@ -339,6 +377,7 @@ def sync_resource_limits(description_workers: int, image_workers: int):
     )
     image_resource_limiter.update_capacity(image_workers)
     text_resource_limiter.update_capacity(description_workers)
+    caption_resource_limiter.update_capacity(description_workers)
 
 
 def save_image_with_version(image, project_id: str, page_id: str, file_service,
@@ -359,32 +398,24 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
 
     这个函数会：
     1. 计算下一个版本号（使用 MAX 查询确保安全）
-    2. 标记所有旧版本为非当前版本
-    3. 保存图片到最终位置
-    4. 生成并保存压缩的缓存图片
-    5. 创建新版本记录
-    6. 如果提供了 page_obj，更新页面状态和图片路径
+    2. 在编码线程池中并行保存原图和压缩的缓存图片，文件落盘（fsync）后才继续
+    3. 标记所有旧版本为非当前版本
+    4. 创建新版本记录
+    5. 如果提供了 page_obj，更新页面状态和图片路径
     """
     # 使用 MAX 查询确保版本号安全（即使有版本被删除也不会重复）
     max_version = db.session.query(func.max(PageImageVersion.version_number)).filter_by(page_id=page_id).scalar() or 0
     next_version = max_version + 1
 
-    # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
-    PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
-
-    # 保存原图到最终位置（使用版本号）
-    image_path = file_service.save_generated_image(
+    # 先编码落盘再写库：编码期间不持有数据库写锁，提交的版本记录指向的文件一定已完整写入
+    image_path, cached_image_path = file_service.save_page_version_images(
         image, project_id, page_id,
         version_number=next_version,
-        image_format=image_format
+        image_format=image_format,
     )
 
-    # 生成并保存压缩的缓存图片（用于前端快速显示）
-    cached_image_path = file_service.save_cached_image(
-        image, project_id, page_id,
-        version_number=next_version,
-        quality=85
-    )
+    # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
+    PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
 
     # 创建新版本记录
     new_version = PageImageVersion(
@@ -454,6 +485,37 @@ def _commit_with_retry(max_retries=5, base_delay=0.5):
                 raise
 
 
+def _pages_with_image_since(page_ids: List[str], since: Optional[datetime]) -> set:
+    """Return page ids that already saved a new image version at or after ``since``.
+
+    The version row is committed together with the image file, so it is the
+    durable checkpoint of a page's work unit inside a batch image task.
+    """
+    if not page_ids or since is None:
+        return set()
+    rows = (
+        db.session.query(PageImageVersion.page_id)
+        .filter(PageImageVersion.page_id.in_(page_ids), PageImageVersion.created_at >= since)
+        .distinct()
+        .all()
+    )
+    return {row[0] for row in rows}
+
+
+def _description_generated_since(page, since: Optional[datetime]) -> bool:
+    """Whether the page's stored description was written at or after ``since``."""
+    if since is None:
+        return False
+    desc_content = page.get_description_content() or {}
+    generated_at = desc_content.get('generated_at')
+    if not generated_at:
+        return False
+    try:
+        return datetime.fromisoformat(generated_at) >= since
+    except (TypeError, ValueError):
+        return False
+
+
 SUPPORTED_IMAGE_ASPECT_RATIOS = (
     '1:1',
     '1:4',
@@ -547,6 +609,27 @@ def _build_region_edit_instruction(prompt: str, operation: str) -> str:
     )
 
 
+def _as_completed_flushing(futures, progress_writer: BatchedProgressWriter):
+    """as_completed() that also flushes ``progress_writer`` when buffered results age out between completions."""
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=progress_writer.seconds_until_due(), return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future
+        progress_writer.flush_if_due()
+
+
+def _flush_after_failure(progress_writer: Optional[BatchedProgressWriter]) -> None:
+    """Persist page results buffered before a task failed, so a resumed run skips them."""
+    if progress_writer is None:
+        return
+    try:
+        progress_writer.flush()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Failed to flush buffered progress of task {progress_writer.task_id}: {e}")
+
+
 def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                                project_context, outline: List[Dict],
                                max_workers: int = 5, app=None,
@@ -574,6 +657,7 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
     
     # 在整个任务中保持应用上下文
     with app.app_context():
+        progress_writer = None
         try:
             # 重要：在后台线程开始时就获取task和设置状态
             task = Task.query.get(task_id)
@@ -583,6 +667,7 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
             
             task.status = 'PROCESSING'
             db.session.commit()
+            progress_bus.publish(task_id, status='PROCESSING')
             logger.info(f"Task {task_id} status updated to PROCESSING")
             
             # Flatten outline to get pages
@@ -593,43 +678,70 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
             
             if len(pages) != len(pages_data):
                 raise ValueError("Page count mismatch")
+
+            # A resumed task skips pages whose description was already saved
+            # by the interrupted run.
+            done_page_ids = set()
+            if task.resume_count:
+                done_page_ids = {
+                    page.id for page in pages
+                    if _description_generated_since(page, task.created_at)
+                }
+                logger.info(
+                    f"Task {task_id} resumed: {len(done_page_ids)}/{len(pages)} descriptions already saved"
+                )
             
-            # Mark all pages as GENERATING_DESCRIPTION before starting
+            # Mark pending pages as GENERATING_DESCRIPTION before starting
             for page in pages:
-                page.status = 'GENERATING_DESCRIPTION'
+                if page.id not in done_page_ids:
+                    page.status = 'GENERATING_DESCRIPTION'
 
             # Initialize progress
-            task.set_progress({
+            progress = {
                 "total": len(pages),
-                "completed": 0,
+                "completed": len(done_page_ids),
                 "failed": 0
-            })
+            }
+            task.set_progress(progress)
             db.session.commit()
+            progress_bus.publish(task_id, progress=progress)
+            # Page results and progress are written in batches, not per page
+            progress_writer = BatchedProgressWriter(task_id, progress)
 
             # Generate descriptions in parallel
-            completed = 0
+            completed = len(done_page_ids)
             failed = 0
+
+            # 所有页面共享的 prompt 前缀只构建一次，逐字节相同以命中提供商的前缀缓存
+            prompt_prefix = ai_service.build_page_description_prefix(
+                project_context, outline, language=language, detail_level=detail_level
+            )
+            cache_stats = PromptCacheStats()
             
-            def generate_single_desc(page_id, page_outline, page_index):
+            # 各页作为协程跑在共享事件循环上（services.async_runner），等待模型响应不占线程
+            from services.ai_service_manager import get_ai_service
+            page_ai_service = get_ai_service()
+            page_concurrency = asyncio.Semaphore(max_workers)
+
+            async def generate_single_desc(page_id, page_outline, page_index):
                 """
                 Generate description for a single page
                 注意：只传递 page_id（字符串），不传递 ORM 对象，避免跨线程会话问题
                 """
-                # 关键修复：在子线程中也需要应用上下文
+                # 每页独立的应用上下文（即独立的数据库会话），Settings 查询在回退线程池中执行
                 with app.app_context():
                     try:
-                        # Get singleton AI service instance
-                        from services.ai_service_manager import get_ai_service
-                        ai_service = get_ai_service()
-                        
-                        with text_resource_limiter.slot(
-                            f"description project={project_id} page={page_id}"
+                        async with page_concurrency, text_resource_limiter.aslot(
+                            f"description project={project_id} page={page_id}",
+                            project_id=project_id,
                         ):
-                            desc_result = ai_service.generate_page_description(
-                                project_context, outline, page_outline, page_index,
-                                language=language,
-                                detail_level=detail_level
-                            )
+                            with track_prompt_cache(cache_stats):
+                                desc_result = await page_ai_service.agenerate_page_description(
+                                    project_context, outline, page_outline, page_index,
+                                    language=language,
+                                    detail_level=detail_level,
+                                    prompt_prefix=prompt_prefix,
+                                )
 
                         # generate_page_description returns dict with text + optional extra_fields
                         desc_content = {
@@ -646,47 +758,40 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                         logger.error(f"Failed to generate description for page {page_id}: {error_detail}")
                         return (page_id, None, str(e))
             
-            # Use ThreadPoolExecutor for parallel generation
-            # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(generate_single_desc, page.id, page_data, i)
-                    for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
-                ]
-                
+            # 关键：提前提取 page.id，不要传递 ORM 对象到协程
+            futures = [
+                async_runner.submit(generate_single_desc(page.id, page_data, i))
+                for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
+                if page.id not in done_page_ids
+            ]
+            try:
                 # Process results as they complete
-                for future in as_completed(futures):
+                for future in _as_completed_flushing(futures, progress_writer):
                     page_id, desc_content, error = future.result()
                     
-                    db.session.expire_all()
-                    
-                    # Update page in database
-                    page = Page.query.get(page_id)
-                    if page:
-                        if error:
-                            page.status = 'FAILED'
-                            failed += 1
-                        else:
-                            page.set_description_content(desc_content)
-                            page.status = 'DESCRIPTION_GENERATED'
-                            completed += 1
-                        
-                        db.session.commit()
+                    if error:
+                        progress_writer.page_done(page_id, 'FAILED')
+                        failed += 1
+                    else:
+                        progress_writer.page_done(page_id, 'DESCRIPTION_GENERATED', desc_content)
+                        completed += 1
                     
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
+                    progress_writer.update_progress(completed=completed, failed=failed, **cache_stats.as_progress())
+                    logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
+            finally:
+                wait(futures)
+            progress_writer.flush()
             
             # Mark task as completed
+            db.session.expire_all()
             task = Task.query.get(task_id)
             if task:
                 task.status = 'COMPLETED'
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
-                logger.info(f"Task {task_id} COMPLETED - {completed} pages generated, {failed} failed")
+                progress_bus.publish(task_id, progress=progress_writer.progress, status='COMPLETED')
+                logger.info(f"Task {task_id} COMPLETED - {completed} pages generated, {failed} failed, "
+                            f"{cache_stats.cached_tokens}/{cache_stats.prompt_tokens} prompt tokens from cache")
             
             # Update project status
             from models import Project
@@ -697,6 +802,7 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                 logger.info(f"Project {project_id} status updated to DESCRIPTIONS_GENERATED")
         
         except Exception as e:
+            _flush_after_failure(progress_writer)
             # Mark task as failed
             task = Task.query.get(task_id)
             if task:
@@ -704,6 +810,7 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                 task.error_message = str(e)
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
+            progress_bus.publish(task_id, status='FAILED', error_message=str(e))
 
 
 def generate_images_task(task_id: str, project_id: str, ai_service, file_service,
@@ -728,6 +835,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
         raise ValueError("Flask app instance must be provided")
     
     with app.app_context():
+        progress_writer = None
         try:
             # Update task status to PROCESSING
             task = Task.query.get(task_id)
@@ -736,17 +844,30 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
             
             task.status = 'PROCESSING'
             db.session.commit()
+            progress_bus.publish(task_id, status='PROCESSING')
             
             # Get pages for this project (filtered by page_ids if provided)
             pages = get_filtered_pages(project_id, page_ids)
             all_pages_data = ai_service.flatten_outline(outline)
             image_prompt_field_names = (
-                image_prompt_field_names
+                set(image_prompt_field_names)
                 if image_prompt_field_names is not None
                 else get_image_prompt_field_names()
             )
             quality_control_enabled = get_image_quality_control_enabled()
 
+            # A resumed task never regenerates a page whose image version was
+            # already saved by the interrupted run.
+            done_page_ids = set()
+            if task.resume_count:
+                done_page_ids = _pages_with_image_since([page.id for page in pages], task.created_at)
+                for page in pages:
+                    if page.id not in done_page_ids:
+                        page.status = 'QUEUED'
+                logger.info(
+                    f"Task {task_id} resumed: {len(done_page_ids)}/{len(pages)} images already saved"
+                )
+
             # Build mapping from order_index to page_data so filtered pages
             # get matched to the correct outline entry (not just first N)
             pages_data_by_index = {i: pd for i, pd in enumerate(all_pages_data)}
@@ -755,97 +876,112 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
             # 这样可以确保即使用户在上传新模板后立即生成，也能使用最新模板
             
             # Initialize progress
-            task.set_progress({
+            progress = {
                 "total": len(pages),
-                "completed": 0,
+                "completed": len(done_page_ids),
                 "failed": 0
-            })
+            }
+            task.set_progress(progress)
             db.session.commit()
+            progress_bus.publish(task_id, progress=progress)
+            # Page results and progress are written in batches, not per page
+            progress_writer = BatchedProgressWriter(task_id, progress)
             
             # Generate images in parallel
-            completed = 0
+            completed = len(done_page_ids)
             failed = 0
             resolution_mismatched = 0  # Count of resolution mismatches
             
-            def generate_single_image(page_id, page_data, page_index):
+            page_concurrency = asyncio.Semaphore(max_workers)
+
+            def prepare_page_image(page_id, page_data, page_index):
+                """Mark the page GENERATING and build its image prompt (DB and files; runs in the fallback pool)."""
+                page_obj = Page.query.get(page_id)
+                if not page_obj:
+                    raise ValueError(f"Page {page_id} not found")
+                page_obj.status = 'GENERATING'
+                db.session.commit()
+                logger.debug(f"Page {page_id} status updated to GENERATING")
+
+                # Get description content
+                desc_content = page_obj.get_description_content()
+                if not desc_content:
+                    raise ValueError("No description content for page")
+                
+                # 获取描述文本（可能是 text 字段或 text_content 数组）
+                desc_text = desc_content.get('text', '')
+                if not desc_text and desc_content.get('text_content'):
+                    # 如果 text 字段不存在，尝试从 text_content 数组获取
+                    text_content = desc_content.get('text_content', [])
+                    if isinstance(text_content, list):
+                        desc_text = '\n'.join(text_content)
+                    else:
+                        desc_text = str(text_content)
+
+                # 将 extra_fields 拼入描述文本供图片生成使用
+                desc_text = _append_extra_fields(desc_text, desc_content, image_prompt_field_names)
+
+                logger.debug(f"Got description text for page {page_id}: {desc_text[:100]}...")
+                
+                # 从当前页面的描述内容中提取图片 URL
+                page_additional_ref_images = []
+                has_material_images = False
+                
+                # 从描述文本中提取图片
+                if desc_text:
+                    image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
+                    if image_urls:
+                        logger.info(f"Found {len(image_urls)} image(s) in page {page_id} description")
+                        page_additional_ref_images = image_urls
+                        has_material_images = True
+                
+                # Per-page-template (PRD §13): resolve image + style
+                # per-page, falling back to project-level for legacy/single-mode.
+                project_for_template = Project.query.get(project_id)
+                page_ref_image_path, page_style_text = resolve_page_template(
+                    page_obj, project_for_template, file_service)
+                has_template_image = bool(page_ref_image_path)
+
+                # Generate image prompt
+                prompt = ai_service.generate_image_prompt(
+                    outline, page_data, desc_text, page_index,
+                    has_material_images=has_material_images,
+                    extra_requirements=extra_requirements,
+                    language=language,
+                    has_template=has_template_image,
+                    aspect_ratio=aspect_ratio,
+                    page_style_text=page_style_text,
+                )
+                logger.debug(f"Generated image prompt for page {page_id}")
+                absolute_index = _get_absolute_page_index(page_obj, page_index)
+                return prompt, desc_text, page_ref_image_path, page_additional_ref_images, absolute_index
+
+            def save_page_image(page_id, image):
+                page_obj = Page.query.get(page_id)
+                image_path, _ = save_image_with_version(image, project_id, page_id, file_service, page_obj=page_obj)
+                return image_path
+
+            async def generate_single_image(page_id, page_data, page_index):
                 """
                 Generate image for a single page
                 注意：只传递 page_id（字符串），不传递 ORM 对象，避免跨线程会话问题
                 """
-                # 关键修复：在子线程中也需要应用上下文
+                # 每页独立的应用上下文（即独立的数据库会话）；数据库与文件操作放到回退线程池，
+                # 事件循环上只等待模型调用
                 with app.app_context():
                     try:
                         logger.debug(f"Starting image generation for page {page_id}, index {page_index}")
-                        # Get page from database in this thread
-                        page_obj = Page.query.get(page_id)
-                        if not page_obj:
-                            raise ValueError(f"Page {page_id} not found")
-                        
-                        def mark_generating():
-                            page_for_update = Page.query.get(page_id)
-                            if page_for_update:
-                                page_for_update.status = 'GENERATING'
-                                db.session.commit()
-                                logger.debug(f"Page {page_id} status updated to GENERATING")
-
-                        with image_resource_limiter.slot(
+                        async with page_concurrency, image_resource_limiter.aslot(
                             f"project={project_id} page={page_id}",
-                            on_acquire=mark_generating,
+                            project_id=project_id,
                         ):
-                            # Get description content
-                            desc_content = page_obj.get_description_content()
-                            if not desc_content:
-                                raise ValueError("No description content for page")
-                            
-                            # 获取描述文本（可能是 text 字段或 text_content 数组）
-                            desc_text = desc_content.get('text', '')
-                            if not desc_text and desc_content.get('text_content'):
-                                # 如果 text 字段不存在，尝试从 text_content 数组获取
-                                text_content = desc_content.get('text_content', [])
-                                if isinstance(text_content, list):
-                                    desc_text = '\n'.join(text_content)
-                                else:
-                                    desc_text = str(text_content)
-
-                            # 将 extra_fields 拼入描述文本供图片生成使用
-                            desc_text = _append_extra_fields(desc_text, desc_content, image_prompt_field_names)
-
-                            logger.debug(f"Got description text for page {page_id}: {desc_text[:100]}...")
-                            
-                            # 从当前页面的描述内容中提取图片 URL
-                            page_additional_ref_images = []
-                            has_material_images = False
-                            
-                            # 从描述文本中提取图片
-                            if desc_text:
-                                image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
-                                if image_urls:
-                                    logger.info(f"Found {len(image_urls)} image(s) in page {page_id} description")
-                                    page_additional_ref_images = image_urls
-                                    has_material_images = True
-                            
-                            # Per-page-template (PRD §13): resolve image + style
-                            # per-page, falling back to project-level for legacy/single-mode.
-                            project_for_template = Project.query.get(project_id)
-                            page_ref_image_path, page_style_text = resolve_page_template(
-                                page_obj, project_for_template, file_service)
-                            has_template_image = bool(page_ref_image_path)
-
-                            # Generate image prompt
-                            prompt = ai_service.generate_image_prompt(
-                                outline, page_data, desc_text, page_index,
-                                has_material_images=has_material_images,
-                                extra_requirements=extra_requirements,
-                                language=language,
-                                has_template=has_template_image,
-                                aspect_ratio=aspect_ratio,
-                                page_style_text=page_style_text,
+                            prompt, desc_text, page_ref_image_path, page_additional_ref_images, absolute_index = (
+                                await asyncio.to_thread(prepare_page_image, page_id, page_data, page_index)
                             )
-                            logger.debug(f"Generated image prompt for page {page_id}")
                             
                             logger.info(f"🎨 Calling AI service to generate image for page {page_index}/{len(pages)}...")
-                            image = generate_image_until_quality_passes(
-                                lambda: ai_service.generate_image(
+                            image = await agenerate_image_until_quality_passes(
+                                lambda: ai_service.agenerate_image(
                                     prompt, page_ref_image_path, aspect_ratio, resolution,
                                     additional_ref_images=page_additional_ref_images if page_additional_ref_images else None
                                 ),
@@ -853,7 +989,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                                 prompt,
                                 desc_text,
                                 page_data=page_data,
-                                page_index=_get_absolute_page_index(page_obj, page_index),
+                                page_index=absolute_index,
                                 quality_control_enabled=quality_control_enabled,
                             )
                         logger.info(f"✅ Image generated successfully for page {page_index}")
@@ -866,11 +1002,8 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                         if not is_match:
                             logger.warning(f"Resolution mismatch for page {page_index}: requested {resolution}, got {actual_res}")
                         
-                        # 优化：直接在子线程中计算版本号并保存到最终位置
-                        # 每个页面独立，使用数据库事务保证版本号原子性，避免临时文件
-                        image_path, next_version = save_image_with_version(
-                            image, project_id, page_id, file_service, page_obj=page_obj
-                        )
+                        # 每个页面独立，使用数据库事务保证版本号原子性，直接保存到最终位置
+                        image_path = await asyncio.to_thread(save_page_image, page_id, image)
                         
                         return (page_id, image_path, None, not is_match)
                         
@@ -880,53 +1013,41 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                         logger.error(f"Failed to generate image for page {page_id}: {error_detail}")
                         return (page_id, None, str(e), None)
             
-            # Use ThreadPoolExecutor for parallel generation
-            # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(
-                        generate_single_image, page.id,
-                        pages_data_by_index.get(page.order_index, {}), i
-                    )
-                    for i, page in enumerate(pages, 1)
-                ]
-                
+            # 关键：提前提取 page.id，不要传递 ORM 对象到协程
+            futures = [
+                async_runner.submit(generate_single_image(
+                    page.id, pages_data_by_index.get(page.order_index, {}), i
+                ))
+                for i, page in enumerate(pages, 1)
+                if page.id not in done_page_ids
+            ]
+            try:
                 # Process results as they complete
-                for future in as_completed(futures):
+                for future in _as_completed_flushing(futures, progress_writer):
                     page_id, image_path, error, is_mismatched = future.result()
                     
                     if is_mismatched:
                         resolution_mismatched += 1
                     
-                    db.session.expire_all()
-                    
-                    # Update page in database (主要是为了更新失败状态)
-                    page = Page.query.get(page_id)
-                    if page:
-                        if error:
-                            page.status = 'FAILED'
-                            failed += 1
-                            db.session.commit()
-                        else:
-                            # 图片已在子线程中保存并创建版本记录，这里只需要更新计数
-                            completed += 1
-                            # 刷新页面对象以获取最新状态
-                            db.session.refresh(page)
+                    if error:
+                        # 成功的页面已在协程中保存图片并创建版本记录，这里只需记录失败状态
+                        progress_writer.page_done(page_id, 'FAILED')
+                        failed += 1
+                    else:
+                        completed += 1
                     
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        progress = task.get_progress()
-                        progress['completed'] = completed
-                        progress['failed'] = failed
-                        # 第一次检测到不匹配时设置警告
-                        if resolution_mismatched > 0 and 'warning_message' not in progress:
-                            progress['warning_message'] = "图片返回分辨率与设置不符，建议使用gemini格式以避免此问题"
-                        task.set_progress(progress)
-                        db.session.commit()
-                        logger.info(f"Image Progress: {completed}/{len(pages)} pages completed")
+                    progress_fields = {'completed': completed, 'failed': failed}
+                    # 第一次检测到不匹配时设置警告
+                    if resolution_mismatched > 0 and 'warning_message' not in progress_writer.progress:
+                        progress_fields['warning_message'] = "图片返回分辨率与设置不符，建议使用gemini格式以避免此问题"
+                    progress_writer.update_progress(**progress_fields)
+                    logger.info(f"Image Progress: {completed}/{len(pages)} pages completed")
+            finally:
+                wait(futures)
+            progress_writer.flush()
             
             # Mark task as completed
+            db.session.expire_all()
             task = Task.query.get(task_id)
             if task:
                 task.status = 'COMPLETED'
@@ -934,6 +1055,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 if resolution_mismatched > 0:
                     logger.warning(f"Task {task_id} has {resolution_mismatched} resolution mismatches")
                 db.session.commit()
+                progress_bus.publish(task_id, progress=progress_writer.progress, status='COMPLETED')
                 logger.info(f"Task {task_id} COMPLETED - {completed} images generated, {failed} failed")
             
             # Update project status
@@ -944,6 +1066,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 logger.info(f"Project {project_id} status updated to COMPLETED")
         
         except Exception as e:
+            _flush_after_failure(progress_writer)
             # Mark task as failed
             task = Task.query.get(task_id)
             if task:
@@ -951,6 +1074,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 task.error_message = str(e)
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
+            progress_bus.publish(task_id, status='FAILED', error_message=str(e))
 
 
 def generate_single_page_image_task(task_id: str, project_id: str, page_id: str, 
@@ -1069,6 +1193,8 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
             with image_resource_limiter.slot(
                 f"project={project_id} page={page_id}",
                 on_acquire=mark_generating,
+                project_id=project_id,
+                priority=PRIORITY_INTERACTIVE,
             ):
                 logger.info(f"🎨 Generating image for page {page_id}...")
                 image = generate_image_until_quality_passes(
@@ -1172,6 +1298,8 @@ def edit_page_image_task(task_id: str, project_id: str, page_id: str,
                 with image_resource_limiter.slot(
                     f"edit project={project_id} page={page_id}",
                     on_acquire=mark_generating,
+                    project_id=project_id,
+                    priority=PRIORITY_INTERACTIVE,
                 ):
                     image = ai_service.edit_image(
                         edit_instruction,
@@ -1277,6 +1405,8 @@ def generate_material_image_task(task_id: str, project_id: str, prompt: str,
             with image_resource_limiter.slot(
                 f"material-generate project={project_id} task={task_id}",
                 on_acquire=mark_processing,
+                project_id=project_id,
+                priority=PRIORITY_INTERACTIVE,
             ):
                 image = ai_service.generate_image(
                     prompt=prompt,
@@ -1392,6 +1522,8 @@ def process_material_image_task(
             with image_resource_limiter.slot(
                 f"material-process operation={operation} project={project_id} task={task_id}",
                 on_acquire=mark_processing,
+                project_id=project_id,
+                priority=PRIORITY_INTERACTIVE,
             ):
                 if operation == 'generate':
                     result_image = ai_service.generate_image(
@@ -1626,7 +1758,8 @@ def process_ppt_renovation_task(task_id: str, project_id: str, ai_service,
                         else:
                             # Step B: AI extract structured content
                             with text_resource_limiter.slot(
-                                f"renovation-extract project={project_id} page-index={idx}"
+                                f"renovation-extract project={project_id} page-index={idx}",
+                                project_id=project_id,
                             ):
                                 content = ai_service.extract_page_content(md_text, language=language)
                             error = None
@@ -1643,7 +1776,8 @@ def process_ppt_renovation_task(task_id: str, project_id: str, ai_service,
                                         image_path = file_service.get_absolute_path(page_obj.generated_image_path)
                                     if image_path and Path(image_path).exists():
                                         with text_resource_limiter.slot(
-                                            f"layout-caption project={project_id} page-index={idx}"
+                                            f"layout-caption project={project_id} page-index={idx}",
+                                            project_id=project_id,
                                         ):
                                             caption = ai_service.generate_layout_caption(image_path)
                                         if caption:
@@ -1812,8 +1946,10 @@ def export_editable_pptx_with_recursive_analysis_task(
         from PIL import Image
         from models import Project
         from services.export_service import ExportService, ExportError
+        from services.mineru_cache import get_mineru_cache
 
         logger.info(f"开始递归分析导出任务 {task_id} for project {project_id}")
+        mineru_cache = get_mineru_cache(app.config['UPLOAD_FOLDER'])
 
         current_stage = "准备"
 
@@ -1848,6 +1984,10 @@ def export_editable_pptx_with_recursive_analysis_task(
                 "help_text": failure.help_text,
             })
             db.session.commit()
+            progress_bus.publish(
+                task_id, progress=failed_task.get_progress(),
+                status='FAILED', error_message=failure.message,
+            )
 
         try:
             # Get project
@@ -1883,22 +2023,25 @@ def export_editable_pptx_with_recursive_analysis_task(
             
             # 初始化任务进度（包含消息日志）
             task = Task.query.get(task_id)
-            task.set_progress({
+            initial_progress = {
                 "total": 100,  # 使用百分比
                 "completed": 0,
                 "failed": 0,
                 "current_step": "准备中...",
                 "percent": 0,
                 "messages": ["开始导出可编辑PPTX..."]  # 消息日志
-            })
+            }
+            task.set_progress(initial_progress)
             db.session.commit()
+            progress_bus.publish(task_id, progress=initial_progress)
             
-            # 进度回调函数 - 更新数据库中的进度
+            # 进度回调函数 - 推送到进度总线，数据库只按检查点写入
             progress_messages = ["开始导出可编辑PPTX..."]
             max_messages = 10  # 最多保留最近10条消息
+            checkpoint = ProgressCheckpoint(100)
             
             def progress_callback(step: str, message: str, percent: int):
-                """更新任务进度到数据库"""
+                """更新任务进度"""
                 nonlocal progress_messages, current_stage
                 try:
                     current_stage = step
@@ -1909,18 +2052,20 @@ def export_editable_pptx_with_recursive_analysis_task(
                     if len(progress_messages) > max_messages:
                         progress_messages = progress_messages[-max_messages:]
                     
-                    # 更新数据库
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.set_progress({
-                            "total": 100,
-                            "completed": percent,
-                            "failed": 0,
-                            "current_step": message,
-                            "percent": percent,
-                            "messages": progress_messages.copy()
-                        })
-                        db.session.commit()
+                    progress = {
+                        "total": 100,
+                        "completed": percent,
+                        "failed": 0,
+                        "current_step": message,
+                        "percent": percent,
+                        "messages": progress_messages.copy()
+                    }
+                    progress_bus.publish(task_id, progress=progress)
+                    if checkpoint.due(percent):
+                        task = Task.query.get(task_id)
+                        if task:
+                            task.set_progress(progress)
+                            db.session.commit()
                 except Exception as e:
                     logger.warning(f"更新进度失败: {e}")
             
@@ -1958,6 +2103,19 @@ def export_editable_pptx_with_recursive_analysis_task(
             text_attribute_extractor = TextAttributeExtractorFactory.create_caption_model_extractor()
             progress_callback("准备", "文字属性提取器已初始化", 5)
             
+            # 已存的逐页分析结果：未变化的页面图片不再重复版面分析和样式提取
+            from services.image_editability.analysis_store import EditableAnalysisStore
+            analysis_store = EditableAnalysisStore(
+                os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'editable_analysis'),
+                settings={
+                    'max_depth': max_depth,
+                    'extractor': export_extractor_method,
+                    'inpaint': export_inpaint_method,
+                    'icon_subject_extraction': enable_icon_subject_extraction,
+                    'caption_model': app.config.get('IMAGE_CAPTION_MODEL') if text_attribute_extractor else None,
+                },
+            )
+            
             # Step 3: 调用导出方法（使用项目的导出设置）
             logger.info(f"Step 3: 创建可编辑PPTX (extractor={export_extractor_method}, inpaint={export_inpaint_method}, fail_fast={fail_fast})...")
             progress_callback("配置", f"提取方法: {export_extractor_method}, 背景修复: {export_inpaint_method}", 6)
@@ -1974,7 +2132,8 @@ def export_editable_pptx_with_recursive_analysis_task(
                 export_extractor_method=export_extractor_method,
                 export_inpaint_method=export_inpaint_method,
                 enable_icon_subject_extraction=enable_icon_subject_extraction,
-                fail_fast=fail_fast
+                fail_fast=fail_fast,
+                analysis_store=analysis_store,
             )
             
             logger.info(f"✓ 可编辑PPTX已创建: {output_path}")
@@ -1991,6 +2150,12 @@ def export_editable_pptx_with_recursive_analysis_task(
                 warning_messages = export_warnings.to_summary()
                 progress_messages.extend(warning_messages)
                 logger.warning(f"导出有 {len(warning_messages)} 条警告")
+
+            # 计数器是进程级的（包含并发的导出和文件解析），只记录日志，不归到本任务
+            mineru_cache_totals = mineru_cache.stats()
+            logger.info(
+                f"MinerU缓存（进程累计）: 命中 {mineru_cache_totals['hits']} 次, 未命中 {mineru_cache_totals['misses']} 次"
+            )
             
             task = Task.query.get(task_id)
             if task:
@@ -2011,6 +2176,7 @@ def export_editable_pptx_with_recursive_analysis_task(
                     "warning_details": export_warnings.to_dict() if export_warnings else {}  # 详细警告信息
                 })
                 db.session.commit()
+                progress_bus.publish(task_id, progress=task.get_progress(), status='COMPLETED')
                 logger.info(f"✓ 任务 {task_id} 完成 - 递归分析导出成功（深度={max_depth}）")
 
         except ExportError as e:
@@ -2069,6 +2235,8 @@ def export_video_task(
             check_ffmpeg_ass_filter_available,
             create_placeholder_frame,
         )
+        from services.tts_audio_cache import get_tts_audio_cache
+        from services.video_clip_cache import get_video_clip_cache
 
         # 读取 ElevenLabs 配置
         _settings = Settings.get_settings()
@@ -2082,6 +2250,7 @@ def export_video_task(
 
         progress_messages = ["开始导出讲解视频..."]
         max_messages = 10
+        checkpoint = ProgressCheckpoint(100)
 
         def progress_callback(step: str, message: str, percent: int):
             """进度回调 — percent 范围对应 generate_narration_video 的内部进度 (20-95%)"""
@@ -2096,17 +2265,20 @@ def export_video_task(
                 mapped_pct = int(20 + percent * 0.75)
                 mapped_pct = min(mapped_pct, 95)
 
-                task = Task.query.get(task_id)
-                if task:
-                    task.set_progress({
-                        "total": 100,
-                        "completed": mapped_pct,
-                        "failed": 0,
-                        "current_step": message,
-                        "percent": mapped_pct,
-                        "messages": progress_messages.copy(),
-                    })
-                    db.session.commit()
+                progress = {
+                    "total": 100,
+                    "completed": mapped_pct,
+                    "failed": 0,
+                    "current_step": message,
+                    "percent": mapped_pct,
+                    "messages": progress_messages.copy(),
+                }
+                progress_bus.publish(task_id, progress=progress)
+                if checkpoint.due(mapped_pct):
+                    task = Task.query.get(task_id)
+                    if task:
+                        task.set_progress(progress)
+                        db.session.commit()
             except Exception as e:
                 logger.warning(f"更新进度失败: {e}")
 
@@ -2134,6 +2306,7 @@ def export_video_task(
                 "messages": progress_messages,
             })
             db.session.commit()
+            progress_bus.publish(task_id, progress=task.get_progress(), status='PROCESSING')
 
             # 检查 FFmpeg
             ffmpeg_path = app.config.get('FFMPEG_PATH', 'ffmpeg')
@@ -2336,6 +2509,16 @@ def export_video_task(
                 fail_fast=fail_fast,
                 elevenlabs_config=elevenlabs_config,
                 speed=speed,
+                render_workers=app.config.get('VIDEO_RENDER_WORKERS', 0),
+                render_memory_budget_mb=app.config.get('VIDEO_RENDER_MEMORY_MB', 0),
+                subtitles_per_clip=app.config.get('VIDEO_SUBTITLES_PER_CLIP', True),
+                tts_concurrency=app.config.get('TTS_CONCURRENCY', 4),
+                audio_cache=get_tts_audio_cache(app.config['UPLOAD_FOLDER']),
+                ken_burns_backend=app.config.get('VIDEO_KEN_BURNS_BACKEND', 'opencv'),
+                clip_cache=(
+                    get_video_clip_cache(app.config['UPLOAD_FOLDER'], project_id)
+                    if app.config.get('VIDEO_CLIP_CACHE_ENABLED', True) else None
+                ),
             )
 
             # ── Step 4: 标记完成 ──
@@ -2357,6 +2540,7 @@ def export_video_task(
                     "filename": filename,
                 })
                 db.session.commit()
+                progress_bus.publish(task_id, progress=task.get_progress(), status='COMPLETED')
                 logger.info(f"✅ 任务 {task_id} 完成 - 视频已导出: {output_path}")
 
         except Exception as e:
@@ -2370,6 +2554,7 @@ def export_video_task(
                 task.error_message = str(e)
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
+            progress_bus.publish(task_id, status='FAILED', error_message=str(e))
 
         finally:
             # 清理占位帧临时目录
@@ -2592,7 +2777,8 @@ def analyze_template_task(task_id: str, project_id: str, asset_id: str,
         task = Task.query.get(task_id)
         if not task:
             return
-        with text_resource_limiter.slot(label=f'analyze_template:{asset_id}'):
+        with text_resource_limiter.slot(label=f'analyze_template:{asset_id}', project_id=project_id,
+                                        priority=PRIORITY_INTERACTIVE):
             try:
                 _set_task_processing(task_id)
                 task.set_progress({'asset_id': asset_id, 'stage': 'calling_ai'})
@@ -2668,7 +2854,8 @@ def auto_match_templates_task(task_id: str, project_id: str,
         task = Task.query.get(task_id)
         if not task:
             return
-        with text_resource_limiter.slot(label=f'auto_match:{project_id}'):
+        with text_resource_limiter.slot(label=f'auto_match:{project_id}', project_id=project_id,
+                                        priority=PRIORITY_INTERACTIVE):
             try:
                 _set_task_processing(task_id)
                 language = (app.config.get('OUTPUT_LANGUAGE') or 'zh').lower()
@@ -2777,3 +2964,183 @@ def auto_match_templates_task(task_id: str, project_id: str,
                     task.error_message = str(exc)[:500]
                     task.completed_at = datetime.utcnow()
                     db.session.commit()
+
+
+# ============================================================================
+# Restart recovery
+# ============================================================================
+
+# Task types that store their arguments in Task.params, so the call can be
+# rebuilt in another process (restart recovery, services.worker).
+QUEUEABLE_TASK_FUNCS = {
+    'GENERATE_DESCRIPTIONS': generate_descriptions_task,
+    'GENERATE_IMAGES': generate_images_task,
+    'GENERATE_PAGE_IMAGE': generate_single_page_image_task,
+    'EDIT_PAGE_IMAGE': edit_page_image_task,
+    'EXPORT_VIDEO': export_video_task,
+    'EXPORT_EDITABLE_PPTX': export_editable_pptx_with_recursive_analysis_task,
+}
+# Subset that checkpoints per-page work, so an interrupted run can be resumed.
+RESUMABLE_TASK_TYPES = ('GENERATE_DESCRIPTIONS', 'GENERATE_IMAGES')
+MAX_TASK_RESUMES = 3
+INTERRUPTED_TASK_STATUSES = ('PENDING', 'PROCESSING')
+INTERRUPTED_TASK_MESSAGE = '任务因后端重启而中断，请重新发起'
+
+# Transient page states -> (state when the page has a result, state otherwise)
+_STALE_PAGE_STATUSES = {
+    'QUEUED': ('generated_image_path', 'COMPLETED'),
+    'GENERATING': ('generated_image_path', 'COMPLETED'),
+    'GENERATING_DESCRIPTION': ('description_content', 'DESCRIPTION_GENERATED'),
+}
+
+
+def load_project_context(project_id: str):
+    """Rebuild the ProjectContext a description task needs (project + parsed reference files)."""
+    from services.ai_service import ProjectContext
+    from models import ReferenceFile
+
+    project = Project.query.get(project_id)
+    if not project:
+        raise ValueError(f"Project {project_id} not found")
+    reference_files = ReferenceFile.query.filter_by(
+        project_id=project_id,
+        parse_status='completed'
+    ).all()
+    files_content = [
+        {'filename': ref_file.filename, 'content': ref_file.markdown_content}
+        for ref_file in reference_files
+        if ref_file.markdown_content
+    ]
+    return ProjectContext(project, files_content)
+
+
+def build_task_call(task: Task, app) -> tuple[Callable, Dict[str, Any]]:
+    """Rebuild the task function and keyword arguments from a persisted Task row.
+
+    JSON arguments come from ``Task.params``; service objects (AI service, file
+    service, project context, Flask app) are recreated in the current process.
+    """
+    func = QUEUEABLE_TASK_FUNCS.get(task.task_type)
+    params = task.get_params()
+    if func is None or params is None:
+        raise ValueError(f"Task {task.id} ({task.task_type}) has no persisted arguments")
+
+    from services.ai_service_manager import get_ai_service
+    from services.file_service import FileService
+
+    resource_factories = {
+        'ai_service': get_ai_service,
+        'file_service': lambda: FileService(app.config['UPLOAD_FOLDER']),
+        'project_context': lambda: load_project_context(task.project_id),
+    }
+    accepted = inspect.signature(func).parameters
+    kwargs = {name: value for name, value in params.items() if name in accepted}
+    kwargs['project_id'] = task.project_id
+    kwargs['app'] = app
+    for name, factory in resource_factories.items():
+        if name in accepted and name not in kwargs:
+            kwargs[name] = factory()
+    return func, kwargs
+
+
+def _is_queueable_task(task_id: str, func: Callable) -> bool:
+    """Whether a submitted task can be handed to the worker pool instead of run here."""
+    if func not in QUEUEABLE_TASK_FUNCS.values():
+        return False
+    task = Task.query.get(task_id)
+    return bool(task and task.params and QUEUEABLE_TASK_FUNCS.get(task.task_type) is func)
+
+
+def _release_stale_pages(project_ids: set) -> None:
+    """Move pages left in a transient status by a dead task back to a settled status."""
+    if not project_ids:
+        return
+    stale_pages = Page.query.filter(
+        Page.project_id.in_(project_ids),
+        Page.status.in_(list(_STALE_PAGE_STATUSES)),
+    ).all()
+    for page in stale_pages:
+        result_field, settled_status = _STALE_PAGE_STATUSES[page.status]
+        page.status = settled_status if getattr(page, result_field) else 'FAILED'
+
+
+def recover_interrupted_tasks(app, queued: Optional[bool] = None, worker_ids: Optional[List[str]] = None,
+                              resume: bool = True) -> Dict[str, int]:
+    """Resume or fail tasks left PENDING/PROCESSING by a previous backend process.
+
+    Resumable tasks (see RESUMABLE_TASK_TYPES) are resubmitted and skip the
+    pages they already finished; everything else is marked FAILED so clients
+    stop polling a task that will never finish. Call once at startup, before
+    new tasks are submitted.
+
+    ``queued`` narrows the scope when TASK_EXECUTION_MODE=worker: the web
+    process recovers only the tasks it runs itself (``False``), the worker pool
+    recovers queueable tasks claimed by a dead worker (``True``). Resumed
+    queued tasks are released back to the queue rather than run here.
+    ``worker_ids`` limits recovery to tasks claimed by those workers (a single
+    crashed worker process); with ``resume=False`` every match is marked FAILED.
+    """
+    summary = {'resumed': 0, 'failed': 0}
+    with app.app_context():
+        query = Task.query.filter(Task.status.in_(INTERRUPTED_TASK_STATUSES))
+        if queued is True:
+            query = query.filter(
+                Task.task_type.in_(list(QUEUEABLE_TASK_FUNCS)),
+                Task.worker_id.isnot(None),
+            )
+        elif queued is False:
+            query = query.filter(Task.task_type.notin_(list(QUEUEABLE_TASK_FUNCS)))
+        if worker_ids is not None:
+            query = query.filter(Task.worker_id.in_(list(worker_ids)))
+        interrupted = query.order_by(Task.created_at).all()
+        resumed_projects = set()
+        failed_projects = set()
+        to_submit = []
+        resumed_count = 0
+        failed_count = 0
+
+        for task in interrupted:
+            if task_manager.is_task_active(task.id):
+                continue
+
+            if (
+                resume
+                and task.task_type in RESUMABLE_TASK_TYPES
+                and task.params
+                and (task.resume_count or 0) < MAX_TASK_RESUMES
+            ):
+                try:
+                    call = None if queued else build_task_call(task, app)
+                except Exception as e:
+                    logger.warning(f"Cannot resume task {task.id} ({task.task_type}): {e}")
+                else:
+                    task.resume_count = (task.resume_count or 0) + 1
+                    task.status = 'PENDING'
+                    task.worker_id = None
+                    if call:
+                        to_submit.append((task.id, *call))
+                    resumed_projects.add(task.project_id)
+                    resumed_count += 1
+                    continue
+
+            task.status = 'FAILED'
+            task.error_message = INTERRUPTED_TASK_MESSAGE
+            task.completed_at = datetime.utcnow()
+            failed_projects.add(task.project_id)
+            failed_count += 1
+
+        _release_stale_pages(failed_projects - resumed_projects)
+        _commit_with_retry()
+
+        for task_id, task_func, kwargs in to_submit:
+            task_manager.submit_task(task_id, task_func, **kwargs)
+            logger.info(f"Resumed interrupted task {task_id} ({task_func.__name__})")
+
+        summary['resumed'] = resumed_count
+        summary['failed'] = failed_count
+
+    if summary['resumed'] or summary['failed']:
+        logger.info(
+            f"Task recovery: {summary['resumed']} resumed, {summary['failed']} marked as failed"
+        )
+    return summary
@@ -0,0 +1,180 @@
+"""
+Thumbnail service - size/format variants of served images and HTTP cache headers
+
+Slide images are stored at full resolution (plus one 1920 px JPEG thumbnail),
+but the project list and the filmstrip show them as 80-256 px tiles. Clients
+ask for a variant with ``?w=<px>`` and optionally ``&format=webp|avif|jpeg|auto``;
+the width snaps up to one of ``THUMBNAIL_WIDTHS`` so arbitrary widths cannot
+fill the disk. Variants are generated on first request and cached next to the
+source in a ``.thumbs/`` directory; a variant older than its source is rebuilt.
+
+Responses carry a strong content-hash ETag. Versioned files (``<page>_v3.png``)
+or URLs with a ``v`` cache-buster never change, so they get a one-year
+immutable ``Cache-Control``; everything else is revalidated with the ETag.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTHS = (256, 640, 1280)
+THUMBS_DIR_NAME = '.thumbs'
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# format -> (PIL format, file extension, save options)
+VARIANT_FORMATS: Dict[str, Tuple[str, str, dict]] = {
+    'jpeg': ('JPEG', '.jpg', {'quality': 85, 'optimize': True}),
+    'png': ('PNG', '.png', {'optimize': True}),
+    'webp': ('WEBP', '.webp', {'quality': 80, 'method': 4}),
+    'avif': ('AVIF', '.avif', {'quality': 60}),
+}
+
+_VERSIONED_NAME = re.compile(r'_v\d+(?:_thumb)?\.[A-Za-z0-9]+$')
+_ETAG_CACHE_SIZE = 4096
+
+_etag_cache: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+_etag_lock = threading.Lock()
+_variant_locks: Dict[str, threading.Lock] = {}
+_variant_locks_guard = threading.Lock()
+
+
+def is_image_file(filename: str) -> bool:
+    return Path(filename).suffix.lower() in IMAGE_EXTENSIONS
+
+
+def snap_width(requested: int) -> Optional[int]:
+    """Smallest pyramid width that covers ``requested``; None means the original is needed."""
+    for width in THUMBNAIL_WIDTHS:
+        if requested <= width:
+            return width
+    return None
+
+
+def supported_formats() -> Tuple[str, ...]:
+    """Variant formats the installed Pillow can encode."""
+    formats = ['jpeg', 'png']
+    if features.check('webp'):
+        formats.append('webp')
+    if features.check('avif'):
+        formats.append('avif')
+    return tuple(formats)
+
+
+def negotiate_format(requested: Optional[str], accept: str = '') -> Optional[str]:
+    """
+    Resolve the ``format`` query parameter.
+
+    'auto' picks the smallest format the browser advertises in Accept
+    (AVIF, then WebP); unknown or unsupported formats fall back to None
+    (keep the default variant format).
+    """
+    if not requested:
+        return None
+    requested = requested.lower()
+    available = supported_formats()
+    if requested == 'auto':
+        for candidate in ('avif', 'webp'):
+            if candidate in available and f'image/{candidate}' in (accept or ''):
+                return candidate
+        return None
+    if requested == 'jpg':
+        requested = 'jpeg'
+    return requested if requested in available else None
+
+
+def _variant_lock(path: Path) -> threading.Lock:
+    with _variant_locks_guard:
+        return _variant_locks.setdefault(str(path), threading.Lock())
+
+
+def get_variant(source_path: Path, width: Optional[int] = None, fmt: Optional[str] = None) -> Path:
+    """
+    Path of the requested variant of ``source_path``, generating it if needed.
+
+    Args:
+        source_path: Original image file
+        width: Pyramid width (see snap_width); None keeps the original size
+        fmt: Key of VARIANT_FORMATS; None keeps JPEG for opaque and PNG for transparent images
+
+    Returns:
+        ``source_path`` itself when no variant is needed, otherwise the cached variant file
+    """
+    source_path = Path(source_path)
+    if width is None and fmt is None:
+        return source_path
+
+    with Image.open(source_path) as probe:
+        source_width = probe.width
+        source_format = probe.format
+        has_alpha = probe.mode in ('RGBA', 'LA') or (probe.mode == 'P' and 'transparency' in probe.info)
+    if fmt is None:
+        fmt = 'png' if has_alpha else 'jpeg'
+    if width is not None and width >= source_width:
+        width = None
+
+    pil_format, extension, save_options = VARIANT_FORMATS[fmt]
+    if width is None and pil_format == source_format:
+        return source_path
+    variant_path = source_path.parent / THUMBS_DIR_NAME / f"{source_path.stem}_w{width or 'orig'}{extension}"
+
+    with _variant_lock(variant_path):
+        source_mtime = source_path.stat().st_mtime
+        if variant_path.exists() and variant_path.stat().st_mtime >= source_mtime:
+            return variant_path
+
+        from services.file_service import convert_image_to_rgb, resize_image_for_thumbnail
+
+        variant_path.parent.mkdir(exist_ok=True)
+        with Image.open(source_path) as image:
+            image.load()
+            if width is not None:
+                image = resize_image_for_thumbnail(image, width)
+            if pil_format == 'JPEG':
+                image = convert_image_to_rgb(image)
+            elif image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if has_alpha else 'RGB')
+            tmp_path = variant_path.with_name(f".{variant_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            image.save(str(tmp_path), pil_format, **save_options)
+        os.replace(tmp_path, variant_path)
+        logger.debug(f"Generated image variant {variant_path.name}")
+        return variant_path
+
+
+def strong_etag(path: Path) -> str:
+    """Content-hash ETag, memoized per (path, mtime, size) so each file is hashed once."""
+    stat = os.stat(path)
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _etag_lock:
+        etag = _etag_cache.get(key)
+        if etag is not None:
+            _etag_cache.move_to_end(key)
+            return etag
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()[:32]
+
+    with _etag_lock:
+        _etag_cache[key] = etag
+        while len(_etag_cache) > _ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+    return etag
+
+
+def cache_control_for(filename: str, versioned_url: bool = False) -> str:
+    """Immutable caching for content that can never change under the same URL."""
+    if versioned_url or _VERSIONED_NAME.search(filename):
+        return IMMUTABLE_CACHE_CONTROL
+    return REVALIDATE_CACHE_CONTROL
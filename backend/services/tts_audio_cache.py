@@ -0,0 +1,161 @@
+"""
+TTS audio cache - reuse synthesized narration across video exports
+
+Re-exporting a narrated video after editing one slide used to synthesize every
+page again. Finished page audio is stored under ``<UPLOAD_FOLDER>/tts_cache/``
+keyed by ``sha256(text, voice, rate, speed, provider)``: ``<key>.mp3`` plus a
+``<key>.json`` sidecar holding the duration and the optional ElevenLabs
+character alignment. Both are written atomically, so export threads and worker
+processes can share the directory without a lock. Sidecar mtime is the LRU
+clock: hits touch it, and entries beyond the size budget are dropped oldest
+first.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = 'tts_cache'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class TTSAudioCache:
+    """Content-addressed page audio with size-based LRU eviction."""
+
+    def __init__(self, cache_dir: Union[str, os.PathLike], max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: Directory holding the cached audio files
+            max_bytes: Size budget of cached audio; 0 disables the cache
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key_for(text: str, voice: str, rate: str, speed: float, provider: str) -> str:
+        """Everything that changes the synthesized audio goes into the key."""
+        payload = json.dumps(
+            {'text': text, 'voice': voice, 'rate': rate, 'speed': round(float(speed), 3), 'provider': provider},
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.cache_dir / f"{key}.mp3", self.cache_dir / f"{key}.json"
+
+    def get(self, key: str, dest_path: Union[str, os.PathLike]) -> Optional[Tuple[float, Optional[dict]]]:
+        """Copy cached audio to ``dest_path`` and return (duration, alignment), or None on a miss."""
+        if not self.enabled:
+            return None
+        audio_path, meta_path = self._paths(key)
+        result = None
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            shutil.copyfile(audio_path, dest_path)
+            os.utime(meta_path)
+            result = (float(meta['duration']), meta.get('alignment'))
+        except (OSError, ValueError, KeyError, TypeError):
+            result = None
+
+        with self._lock:
+            if result:
+                self.hits += 1
+            else:
+                self.misses += 1
+        logger.debug(f"TTS cache {'hit' if result else 'miss'} for {key[:12]}")
+        return result
+
+    def put(self, key: str, src_path: Union[str, os.PathLike], duration: float,
+            alignment: Optional[dict] = None) -> None:
+        """Store page audio under ``key`` and enforce the size budget."""
+        if not self.enabled:
+            return
+        audio_path, meta_path = self._paths(key)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_audio = self.cache_dir / f".{key}.mp3{suffix}"
+            shutil.copyfile(src_path, tmp_audio)
+            os.replace(tmp_audio, audio_path)
+            meta = {
+                'duration': duration,
+                'alignment': alignment,
+                'size': audio_path.stat().st_size,
+                'created_at': time.time(),
+            }
+            tmp_meta = self.cache_dir / f".{key}.json{suffix}"
+            tmp_meta.write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_meta, meta_path)
+        except OSError as e:
+            logger.warning(f"Failed to write TTS cache entry: {e}")
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the budget is met. Returns entries removed."""
+        entries = []
+        total = 0
+        for meta_path in self.cache_dir.glob('*.json'):
+            try:
+                size = json.loads(meta_path.read_text(encoding='utf-8')).get('size', 0)
+                last_used = meta_path.stat().st_mtime
+            except (OSError, ValueError, AttributeError):
+                continue
+            entries.append((last_used, meta_path, size))
+            total += size
+
+        removed = 0
+        for _, meta_path, size in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix('.mp3').unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"TTS cache evicted {removed} entries, {total} bytes cached")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+_caches: Dict[Path, TTSAudioCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_tts_audio_cache(upload_folder: Union[str, os.PathLike]) -> TTSAudioCache:
+    """Process-wide cache instance per upload folder (keeps hit/miss counters together)."""
+    max_mb = None
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            max_mb = current_app.config.get('TTS_AUDIO_CACHE_MAX_MB')
+    except ImportError:
+        pass
+    if max_mb is None:
+        max_mb = os.getenv('TTS_AUDIO_CACHE_MAX_MB', str(DEFAULT_MAX_BYTES // (1024 * 1024)))
+    max_bytes = int(float(max_mb) * 1024 * 1024)
+
+    root = Path(upload_folder).resolve() / CACHE_DIR_NAME
+    with _caches_lock:
+        cache = _caches.get(root)
+        if cache is None:
+            cache = _caches[root] = TTSAudioCache(root, max_bytes)
+        cache.max_bytes = max_bytes
+        return cache
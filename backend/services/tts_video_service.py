@@ -17,6 +17,7 @@ import subprocess
 import threading
 import time
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Optional, Callable, Tuple
 
 logger = logging.getLogger(__name__)
@@ -41,6 +42,14 @@ _FFMPEG_IDLE_TIMEOUT_SECONDS = 600.0
 # 进度输出频率（秒）
 _FFMPEG_PROGRESS_INTERVAL_SECONDS = 1.0
 
+# edge-tts 并发合成时同时在途的请求数
+_DEFAULT_TTS_CONCURRENCY = 4
+
+# 视频片段并行渲染的默认内存预算（MB）；单个 1080p libx264 编码进程约占 300MB
+_DEFAULT_RENDER_MEMORY_BUDGET_MB = 4096
+# 估算单个编码进程内存时按缓存多少帧 bgr24 画面计算（x264 lookahead + 参考帧 + 管道缓冲）
+_CLIP_MEMORY_FRAMES = 48
+
 
 def _inject_ffmpeg_progress_args(cmd: List[str]) -> List[str]:
     """为 FFmpeg 命令追加进度输出，便于 idle watchdog 判断进程是否卡死。"""
@@ -270,8 +279,63 @@ def _derive_ffprobe_path(ffmpeg_path: str) -> str:
     )
 
 
+# MPEG Layer III 帧头查表：码率（kbps，按 MPEG1 / MPEG2/2.5 区分）、采样率
+_MP3_BITRATES = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _mp3_duration(audio_path: str) -> Optional[float]:
+    """逐帧读取 MP3 帧头累计采样数得到时长（CBR/VBR 均适用），非 Layer III MP3 返回 None。"""
+    try:
+        with open(audio_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    pos = 0
+    if data[:3] == b'ID3' and len(data) >= 10:
+        tag_size = (data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F)
+        pos = 10 + tag_size + (10 if data[5] & 0x10 else 0)
+
+    samples = 0
+    sample_rate = 0
+    frames = 0
+    while pos + 4 <= len(data):
+        b1, b2 = data[pos + 1], data[pos + 2]
+        version, layer = (b1 >> 3) & 3, (b1 >> 1) & 3
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+        valid = (
+            data[pos] == 0xFF and (b1 & 0xE0) == 0xE0 and version != 1 and layer == 1
+            and bitrate_index not in (0, 15) and rate_index != 3
+        )
+        if not valid:
+            if frames:
+                break  # 尾部 ID3v1 标签或垃圾数据
+            pos += 1  # 首帧前重新同步
+            continue
+        bitrate = _MP3_BITRATES[3 if version == 3 else 2][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+        frame_samples = 1152 if version == 3 else 576
+        frame_length = frame_samples // 8 * bitrate // sample_rate + ((b2 >> 1) & 1)
+        samples += frame_samples
+        frames += 1
+        pos += frame_length
+
+    if not frames:
+        return None
+    return samples / sample_rate
+
+
 def get_audio_duration(audio_path: str, ffmpeg_path: str = 'ffmpeg') -> float:
-    """使用 ffprobe 获取音频时长（秒）"""
+    """获取音频时长（秒）：MP3 直接解析帧头，其他格式或解析失败时用 ffprobe"""
+    if audio_path.lower().endswith('.mp3'):
+        duration = _mp3_duration(audio_path)
+        if duration:
+            return duration
+
     ffprobe_path = _derive_ffprobe_path(ffmpeg_path)
     cmd = [
         ffprobe_path, '-v', 'quiet',
@@ -372,6 +436,71 @@ def generate_tts_audio_sync(
     return duration
 
 
+async def _generate_tts_batch_async(
+    jobs: List[Tuple[str, str]],
+    voice: str,
+    rate: str,
+    concurrency: int,
+    on_done: Optional[Callable[[int, Optional[BaseException]], None]] = None,
+) -> List[Optional[BaseException]]:
+    """在同一个事件循环里并发合成多段 edge-tts 音频，semaphore 限制同时在途的请求数。"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def synthesize(index: int, text: str, output_path: str) -> Optional[BaseException]:
+        async with semaphore:
+            try:
+                await _generate_tts_async(text, output_path, voice, rate)
+                error = None
+            except Exception as e:
+                error = e
+        if on_done:
+            on_done(index, error)
+        return error
+
+    return await asyncio.gather(*(
+        synthesize(index, text, output_path) for index, (text, output_path) in enumerate(jobs)
+    ))
+
+
+def generate_tts_batch_sync(
+    jobs: List[Tuple[str, str]],
+    voice: str = 'zh-CN-XiaoxiaoNeural',
+    rate: str = '+0%',
+    concurrency: int = _DEFAULT_TTS_CONCURRENCY,
+    ffmpeg_path: str = 'ffmpeg',
+    on_done: Optional[Callable[[int, Optional[BaseException]], None]] = None,
+) -> List[Tuple[Optional[float], Optional[BaseException]]]:
+    """
+    并发生成多段 TTS 音频（edge-tts），整批只创建一个事件循环。
+
+    Args:
+        jobs: [(text, output_path), ...]
+        concurrency: 同时在途的合成请求上限
+        on_done: 每段完成（或失败）时回调 (job_index, error)
+
+    Returns:
+        与 jobs 等长的 [(duration, error), ...]，失败项 duration 为 None
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        errors = loop.run_until_complete(
+            _generate_tts_batch_async(jobs, voice, rate, concurrency, on_done=on_done)
+        )
+    finally:
+        loop.close()
+
+    results: List[Tuple[Optional[float], Optional[BaseException]]] = []
+    for (_, output_path), error in zip(jobs, errors):
+        if error is None:
+            try:
+                results.append((get_audio_duration(output_path, ffmpeg_path), None))
+                continue
+            except Exception as e:
+                error = e
+        results.append((None, error))
+    return results
+
+
 def generate_elevenlabs_audio_sync(
     text: str,
     output_path: str,
@@ -393,7 +522,10 @@ def generate_elevenlabs_audio_sync(
     from elevenlabs.core import ApiError as ElevenLabsApiError
     from elevenlabs import VoiceSettings
 
-    client = ElevenLabs(api_key=api_key)
+    from services.http_client import get_httpx_client
+
+    # 共享 keep-alive 连接池（逐页合成时不必每页重新握手）；SDK 按请求传入 240s 超时
+    client = ElevenLabs(api_key=api_key, timeout=240, httpx_client=get_httpx_client())
     # ElevenLabs 实际接受 speed 范围 0.7–1.2
     clamped_speed = max(0.7, min(float(speed), 1.2))
     voice_settings = VoiceSettings(
@@ -795,6 +927,9 @@ KEN_BURNS_EFFECTS = ['zoom_in', 'zoom_out', 'pan_left', 'pan_right']
 KEN_BURNS_MAX_ZOOM = 1.08
 KEN_BURNS_PAN_CANVAS_SCALE = 1.08
 
+# 帧生成后端：opencv 在 Python 侧逐帧 warpAffine；ffmpeg 交给 zoompan 滤镜
+KEN_BURNS_BACKENDS = ('opencv', 'ffmpeg')
+
 
 def _prepare_canvas(src, content_w: int, content_h: int, canvas_w: int, canvas_h: int):
     """将任意画幅的图片 contain 到 content 区域，居中放置在 canvas 上，空白用高斯模糊填充。
@@ -821,6 +956,93 @@ def _prepare_canvas(src, content_w: int, content_h: int, canvas_w: int, canvas_h
     return bg, (x_off, y_off, new_w, new_h)
 
 
+def _ken_burns_motion(
+    effect_type: str,
+    width: int,
+    height: int,
+    canvas_w: int,
+    canvas_h: int,
+    slide_x: int,
+    slide_w: int,
+    max_zoom: float,
+) -> Tuple[float, float, float, float, float]:
+    """动效起止点 (z_start, z_end, cx_start, cx_end, cy)，中间帧线性插值。"""
+    cy = canvas_h / 2.0
+    if effect_type in ('pan_right', 'pan_left'):
+        min_cx = max(width / 2.0, slide_x + slide_w - width / 2.0)
+        max_cx = min_cx + max(min(canvas_w - width / 2.0, slide_x + width / 2.0) - min_cx, 0.0)
+        if effect_type == 'pan_right':
+            return 1.0, 1.0, min_cx, max_cx, cy
+        return 1.0, 1.0, max_cx, min_cx, cy
+    if effect_type == 'zoom_out':
+        return max_zoom, 1.0, canvas_w / 2.0, canvas_w / 2.0, cy
+    return 1.0, max_zoom, canvas_w / 2.0, canvas_w / 2.0, cy
+
+
+def ken_burns_schedule(
+    motion: Tuple[float, float, float, float, float],
+    total_frames: int,
+    width: int,
+    height: int,
+    canvas_w: int,
+    canvas_h: int,
+):
+    """用 NumPy 一次算出所有帧的仿射矩阵 (N, 2, 3)，按 WARP_INVERSE_MAP 语义把输出像素映射回画布。
+
+    与旧实现（getRectSubPix 按 (cx, cy) 裁出 width/z × height/z 再 resize）逐帧几何等价。
+    """
+    import numpy as np
+
+    z_start, z_end, cx_start, cx_end, cy = motion
+    total_frames = max(total_frames, 1)
+    t = np.arange(total_frames) / max(total_frames - 1, 1)
+    z = z_start + (z_end - z_start) * t
+    crop_w = width / z
+    crop_h = height / z
+    cx = np.clip(cx_start + (cx_end - cx_start) * t, crop_w / 2.0, canvas_w - crop_w / 2.0)
+    cy = np.clip(np.full_like(t, cy), crop_h / 2.0, canvas_h - crop_h / 2.0)
+
+    matrices = np.zeros((len(t), 2, 3), dtype=np.float64)
+    matrices[:, 0, 0] = 1.0 / z
+    matrices[:, 1, 1] = 1.0 / z
+    # 像素中心对齐：输出像素 u 对应画布坐标 cx + (u - (width - 1) / 2) / z
+    matrices[:, 0, 2] = cx - (width - 1) / (2.0 * z)
+    matrices[:, 1, 2] = cy - (height - 1) / (2.0 * z)
+    return matrices
+
+
+def iter_ken_burns_frames(canvas, schedule, width: int, height: int):
+    """按仿射矩阵逐帧 warpAffine 到同一块预分配的缓冲区并 yield 它（调用方须在下一帧前用完）。
+
+    canvas 为 BGRA 时 warpAffine 走 4 通道 SIMD 路径，单核下比 BGR 快一倍以上，缓冲区通道数与 canvas 一致。
+    """
+    import cv2
+    import numpy as np
+
+    frame = np.empty((height, width, canvas.shape[2]), dtype=np.uint8)
+    flags = cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP
+    for matrix in schedule:
+        cv2.warpAffine(canvas, matrix, (width, height), dst=frame, flags=flags, borderMode=cv2.BORDER_REPLICATE)
+        yield frame
+
+
+def _zoompan_filter(
+    motion: Tuple[float, float, float, float, float],
+    total_frames: int,
+    width: int,
+    height: int,
+    canvas_w: int,
+    fps: int,
+) -> str:
+    """把同一条运动轨迹写成 FFmpeg zoompan 表达式（zoom 相对整张画布，所以乘上 canvas_w / width）。"""
+    z_start, z_end, cx_start, cx_end, cy = motion
+    t = f"on/{max(total_frames - 1, 1)}"
+    zoom = f"({z_start:.6f}+{z_end - z_start:.6f}*{t})*{canvas_w / width:.6f}"
+    x = f"{cx_start:.3f}+{cx_end - cx_start:.3f}*{t}-iw/zoom/2"
+    y = f"{cy:.3f}-ih/zoom/2"
+    return f"zoompan=z='{zoom}':x='{x}':y='{y}':d={total_frames}:s={width}x{height}:fps={fps}"
+
+
 def create_ken_burns_clip(
     image_path: str,
     output_path: str,
@@ -833,11 +1055,19 @@ def create_ken_burns_clip(
     idle_timeout: float = _FFMPEG_IDLE_TIMEOUT_SECONDS,
     fade_in_seconds: float = 0.0,
     fade_out_seconds: float = 0.0,
+    subtitle_path: Optional[str] = None,
+    backend: str = 'opencv',
 ) -> None:
-    """OpenCV 逐帧渲染 Ken Burns 动效，pipe rawvideo 给 FFmpeg 编码。
-    用 _prepare_canvas 适配任意画幅，getRectSubPix 实现浮点精度裁切。"""
+    """渲染 Ken Burns 动效片段。用 _prepare_canvas 适配任意画幅，运动轨迹由 ken_burns_schedule 预先算好。
+
+    backend='opencv'：每帧一次 warpAffine（BGRA）写入复用的缓冲区，经 memoryview 零拷贝 pipe rawvideo 给 FFmpeg；
+    backend='ffmpeg'：只把画布写成一张图片，由 FFmpeg zoompan 自己生成运动，Python 侧不再逐帧处理。
+    传入 subtitle_path 时在同一次编码中烧录该页 ASS 字幕。"""
     import cv2
 
+    if backend not in KEN_BURNS_BACKENDS:
+        raise ValueError(f"Unknown Ken Burns backend: {backend}")
+
     total_frames = max(int(duration * fps), 1)
     src = cv2.imread(image_path)
     if src is None:
@@ -859,6 +1089,7 @@ def create_ken_burns_clip(
         canvas_h,
     )
     ih, iw = img.shape[:2]
+    motion = _ken_burns_motion(effect_type, width, height, iw, ih, slide_x, slide_w, max_zoom)
 
     fade_filters: List[str] = []
     if fade_in_seconds > 0:
@@ -866,23 +1097,46 @@ def create_ken_burns_clip(
     if fade_out_seconds > 0:
         fade_out_start = max(duration - fade_out_seconds, 0.0)
         fade_filters.append(f'fade=t=out:st={fade_out_start}:d={fade_out_seconds}')
+    if subtitle_path:
+        fade_filters.append(_ass_filter_arg(subtitle_path))
+    encode_args = [
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+        '-preset', 'medium', '-crf', '23',
+        '-movflags', '+faststart',
+        output_path,
+    ]
+
+    if backend == 'ffmpeg':
+        canvas_path = output_path + '.canvas.png'
+        cv2.imwrite(canvas_path, img)
+        filters = [_zoompan_filter(motion, total_frames, width, height, iw, fps)] + fade_filters
+        cmd = [
+            ffmpeg_path, '-y',
+            '-i', canvas_path,
+            '-vf', ','.join(filters),
+            '-frames:v', str(total_frames),
+            '-t', str(duration),
+        ] + encode_args
+        try:
+            _run_ffmpeg_command(cmd, "FFmpeg failed for Ken Burns clip", idle_timeout=idle_timeout)
+        finally:
+            if os.path.exists(canvas_path):
+                os.remove(canvas_path)
+        return
 
     cmd = [
         ffmpeg_path, '-y',
-        '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+        '-f', 'rawvideo', '-pix_fmt', 'bgra',
         '-s', f'{width}x{height}', '-r', str(fps),
         '-i', 'pipe:0',
         '-t', str(duration),
     ]
     if fade_filters:
         cmd += ['-vf', ','.join(fade_filters)]
-    cmd += [
-        '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
-        '-preset', 'medium', '-crf', '23',
-        '-movflags', '+faststart',
-        output_path,
-    ]
+    cmd += encode_args
 
+    schedule = ken_burns_schedule(motion, total_frames, width, height, iw, ih)
+    canvas = cv2.cvtColor(img, cv2.COLOR_BGR2BGRA)
     proc = subprocess.Popen(
         _inject_ffmpeg_progress_args(cmd),
         stdin=subprocess.PIPE,
@@ -891,39 +1145,12 @@ def create_ken_burns_clip(
     )
 
     try:
-        for i in range(total_frames):
-            t = i / max(total_frames - 1, 1)
-
-            if effect_type == 'zoom_in':
-                z = 1.0 + (max_zoom - 1.0) * t
-                cx, cy = iw / 2.0, ih / 2.0
-            elif effect_type == 'zoom_out':
-                z = max_zoom - (max_zoom - 1.0) * t
-                cx, cy = iw / 2.0, ih / 2.0
-            elif effect_type == 'pan_right':
-                z = 1.0
-                min_cx = max(width / 2.0, slide_x + slide_w - width / 2.0)
-                max_cx = min(iw - width / 2.0, slide_x + width / 2.0)
-                cx = min_cx + max(max_cx - min_cx, 0.0) * t
-                cy = ih / 2.0
-            elif effect_type == 'pan_left':
-                z = 1.0
-                min_cx = max(width / 2.0, slide_x + slide_w - width / 2.0)
-                max_cx = min(iw - width / 2.0, slide_x + width / 2.0)
-                cx = max_cx - max(max_cx - min_cx, 0.0) * t
-                cy = ih / 2.0
-            else:
-                z = 1.0 + (max_zoom - 1.0) * t
-                cx, cy = iw / 2.0, ih / 2.0
-
-            crop_w = width / z
-            crop_h = height / z
-            cx = max(crop_w / 2.0, min(cx, iw - crop_w / 2.0))
-            cy = max(crop_h / 2.0, min(cy, ih - crop_h / 2.0))
-
-            patch = cv2.getRectSubPix(img, (int(crop_w + 0.5), int(crop_h + 0.5)), (cx, cy))
-            frame = cv2.resize(patch, (width, height), interpolation=cv2.INTER_LINEAR)
-            proc.stdin.write(frame.tobytes())
+        view = None
+        for frame in iter_ken_burns_frames(canvas, schedule, width, height):
+            # 缓冲区每帧复用，memoryview 只需建一次，写管道时不再 tobytes() 拷贝
+            if view is None:
+                view = memoryview(frame).cast('B')
+            proc.stdin.write(view)
 
         proc.stdin.close()
         _wait_for_process_with_idle_watchdog(
@@ -951,6 +1178,7 @@ def create_silent_clip(
     idle_timeout: float = _FFMPEG_IDLE_TIMEOUT_SECONDS,
     fade_in_seconds: float = 0.0,
     fade_out_seconds: float = 0.0,
+    ken_burns_backend: str = 'opencv',
 ) -> None:
     """创建无声视频片段（用于没有旁白的页面）"""
     if enable_ken_burns:
@@ -960,6 +1188,7 @@ def create_silent_clip(
             width=width, height=height, fps=fps,
             effect_type=effect_type, ffmpeg_path=ffmpeg_path, idle_timeout=idle_timeout,
             fade_in_seconds=fade_in_seconds, fade_out_seconds=fade_out_seconds,
+            backend=ken_burns_backend,
         )
         cmd = [
             ffmpeg_path, '-y',
@@ -1009,14 +1238,17 @@ def create_static_clip(
     idle_timeout: float = _FFMPEG_IDLE_TIMEOUT_SECONDS,
     fade_in_seconds: float = 0.0,
     fade_out_seconds: float = 0.0,
+    subtitle_path: Optional[str] = None,
 ) -> None:
-    """从单张图片创建静态视频片段（无动效）"""
+    """从单张图片创建静态视频片段（无动效），传入 subtitle_path 时同时烧录该页字幕"""
     vf = f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2"
     if fade_in_seconds > 0:
         vf += f",fade=t=in:st=0:d={fade_in_seconds}"
     if fade_out_seconds > 0:
         fade_out_start = max(duration - fade_out_seconds, 0.0)
         vf += f",fade=t=out:st={fade_out_start}:d={fade_out_seconds}"
+    if subtitle_path:
+        vf += f",{_ass_filter_arg(subtitle_path)}"
 
     cmd = [
         ffmpeg_path, '-y',
@@ -1375,14 +1607,8 @@ def _escape_ffmpeg_filter_value(value: str) -> str:
     return escaped
 
 
-def burn_subtitles(
-    video_path: str,
-    subtitle_path: str,
-    output_path: str,
-    ffmpeg_path: str = 'ffmpeg',
-    idle_timeout: float = _FFMPEG_IDLE_TIMEOUT_SECONDS,
-) -> None:
-    """将 ASS 字幕烧录到视频中"""
+def _ass_filter_arg(subtitle_path: str) -> str:
+    """构造 FFmpeg ass 滤镜参数（带 CJK 字体目录）"""
     escaped_sub = _escape_ffmpeg_filter_value(subtitle_path)
 
     ass_args = f"ass=filename='{escaped_sub}'"
@@ -1390,11 +1616,21 @@ def burn_subtitles(
     if fonts_dir:
         escaped_fontsdir = _escape_ffmpeg_filter_value(fonts_dir)
         ass_args += f":fontsdir='{escaped_fontsdir}'"
+    return ass_args
 
+
+def burn_subtitles(
+    video_path: str,
+    subtitle_path: str,
+    output_path: str,
+    ffmpeg_path: str = 'ffmpeg',
+    idle_timeout: float = _FFMPEG_IDLE_TIMEOUT_SECONDS,
+) -> None:
+    """将 ASS 字幕烧录到视频中（整片重新编码，逐片烧录模式下不再需要）"""
     cmd = [
         ffmpeg_path, '-y',
         '-i', video_path,
-        '-vf', ass_args,
+        '-vf', _ass_filter_arg(subtitle_path),
         '-c:v', 'libx264',
         '-c:a', 'copy',
         '-pix_fmt', 'yuv420p',
@@ -1424,7 +1660,8 @@ def mux_video_audio(
         '-i', video_path,
         '-i', audio_path,
         '-c:v', 'copy',
-        '-c:a', 'aac',
+        # 与静音片段的 anullsrc 音轨参数一致，拼接时才能直接流复制
+        '-c:a', 'aac', '-ar', '44100', '-ac', '2',
         '-shortest',
         '-movflags', '+faststart',
         output_path,
@@ -1438,6 +1675,7 @@ def composite_video(
     fps: int = 25,
     ffmpeg_path: str = 'ffmpeg',
     idle_timeout: float = _FFMPEG_IDLE_TIMEOUT_SECONDS,
+    stream_copy: bool = False,
 ) -> None:
     """
     使用 FFmpeg concat demuxer 将多个视频片段拼接为最终 MP4。
@@ -1448,6 +1686,7 @@ def composite_video(
         fps: 帧率（确保拼接后一致）
         ffmpeg_path: ffmpeg 路径
         idle_timeout: 连续无输出多久视为卡死
+        stream_copy: 片段编码参数一致时直接流复制拼接，不再重新编码
     """
     if len(clip_paths) == 1:
         # 单片段直接复制
@@ -1472,15 +1711,19 @@ def composite_video(
             '-f', 'concat',
             '-safe', '0',
             '-i', concat_file,
-            '-c:v', 'libx264',
-            '-c:a', 'aac',
-            '-r', str(fps),
-            '-pix_fmt', 'yuv420p',
-            '-preset', 'medium',
-            '-crf', '23',
-            '-movflags', '+faststart',
-            output_path,
         ]
+        if stream_copy:
+            cmd += ['-c', 'copy']
+        else:
+            cmd += [
+                '-c:v', 'libx264',
+                '-c:a', 'aac',
+                '-r', str(fps),
+                '-pix_fmt', 'yuv420p',
+                '-preset', 'medium',
+                '-crf', '23',
+            ]
+        cmd += ['-movflags', '+faststart', output_path]
         _run_ffmpeg_command(cmd, "FFmpeg concat failed", idle_timeout=idle_timeout)
     finally:
         if os.path.exists(concat_file):
@@ -1494,6 +1737,97 @@ def composite_video(
 # ═══════════════════════════════════════════════════════════════════════════════
 
 
+def estimate_clip_memory_mb(width: int, height: int) -> int:
+    """估算渲染一个视频片段（FFmpeg/libx264 编码进程 + Ken Burns 画布）的峰值内存。"""
+    return max(64, int(width * height * 3 * _CLIP_MEMORY_FRAMES / (1024 * 1024)))
+
+
+def resolve_render_workers(
+    page_count: int,
+    width: int,
+    height: int,
+    max_workers: int = 0,
+    memory_budget_mb: int = 0,
+) -> int:
+    """
+    Phase B 并行渲染的片段数：不超过 CPU 核数（或 max_workers）、页数，
+    以及内存预算能容纳的编码进程数；至少为 1。
+    """
+    workers = max_workers if max_workers and max_workers > 0 else (os.cpu_count() or 1)
+    budget = memory_budget_mb if memory_budget_mb and memory_budget_mb > 0 else _DEFAULT_RENDER_MEMORY_BUDGET_MB
+    by_memory = budget // estimate_clip_memory_mb(width, height)
+    return max(1, min(workers, page_count, by_memory))
+
+
+def _render_page_clip(
+    index: int,
+    image_path: str,
+    audio_path: Optional[str],
+    tmp_dir: str,
+    display_duration: float,
+    leading_pad: float,
+    trailing_pad: float,
+    effect: str,
+    width: int,
+    height: int,
+    fps: int,
+    enable_ken_burns: bool,
+    ffmpeg_path: str,
+    subtitle_path: Optional[str] = None,
+    ken_burns_backend: str = 'opencv',
+) -> str:
+    """渲染单页片段（画面 + 音轨 + 该页字幕，无旁白则为静音片段），返回片段路径。各页互不依赖，可并行执行。"""
+    if not audio_path:
+        # 静音片段（含无声音轨以保证 concat 兼容）
+        silent_path = os.path.join(tmp_dir, f'silent_{index:03d}.mp4')
+        create_silent_clip(
+            image_path, silent_path, duration=display_duration,
+            width=width, height=height, fps=fps,
+            effect_type=effect, enable_ken_burns=enable_ken_burns,
+            ffmpeg_path=ffmpeg_path,
+            fade_in_seconds=leading_pad,
+            fade_out_seconds=trailing_pad,
+            ken_burns_backend=ken_burns_backend,
+        )
+        return silent_path
+
+    if leading_pad > 0 or trailing_pad > 0:
+        padded_audio = os.path.join(tmp_dir, f'audio_padded_{index:03d}.mp3')
+        pad_audio_with_silence(
+            audio_path, padded_audio,
+            leading_seconds=leading_pad,
+            trailing_seconds=trailing_pad,
+            ffmpeg_path=ffmpeg_path,
+        )
+        audio_path = padded_audio
+
+    video_clip = os.path.join(tmp_dir, f'video_{index:03d}.mp4')
+    if enable_ken_burns:
+        create_ken_burns_clip(
+            image_path, video_clip, display_duration,
+            width=width, height=height, fps=fps,
+            effect_type=effect, ffmpeg_path=ffmpeg_path,
+            fade_in_seconds=leading_pad,
+            fade_out_seconds=trailing_pad,
+            subtitle_path=subtitle_path,
+            backend=ken_burns_backend,
+        )
+    else:
+        create_static_clip(
+            image_path, video_clip, display_duration,
+            width=width, height=height, fps=fps,
+            ffmpeg_path=ffmpeg_path,
+            fade_in_seconds=leading_pad,
+            fade_out_seconds=trailing_pad,
+            subtitle_path=subtitle_path,
+        )
+
+    # Mux video + audio
+    muxed_path = os.path.join(tmp_dir, f'muxed_{index:03d}.mp4')
+    mux_video_audio(video_clip, audio_path, muxed_path, ffmpeg_path=ffmpeg_path)
+    return muxed_path
+
+
 def generate_narration_video(
     pages_data: List[dict],
     output_path: str,
@@ -1509,6 +1843,13 @@ def generate_narration_video(
     fail_fast: bool = False,
     elevenlabs_config: Optional[dict] = None,
     speed: float = 1.0,
+    render_workers: int = 0,
+    render_memory_budget_mb: int = 0,
+    subtitles_per_clip: bool = True,
+    tts_concurrency: int = _DEFAULT_TTS_CONCURRENCY,
+    audio_cache=None,
+    ken_burns_backend: str = 'opencv',
+    clip_cache=None,
 ) -> None:
     """
     完整的播报视频生成流水线。
@@ -1529,6 +1870,15 @@ def generate_narration_video(
         progress_callback: 进度回调 (step, message, percent)
         silent_duration: 无旁白页面的静音时长（秒），0 表示使用默认值
         fail_fast: 是否在缺少有效旁白音频时立即失败
+        render_workers: 并行渲染视频片段的最大数量，0 表示按 CPU 核数
+        render_memory_budget_mb: 并行渲染的内存预算（MB），0 表示使用默认值
+        subtitles_per_clip: 在各页片段编码时烧录该页字幕，最终只做流复制拼接；
+            False 时沿用拼接后整片重新编码烧录字幕
+        tts_concurrency: edge-tts 同时在途的合成请求数
+        audio_cache: 页面音频缓存（services.tts_audio_cache.TTSAudioCache），None 表示不缓存
+        ken_burns_backend: Ken Burns 帧生成方式，'opencv'（warpAffine 逐帧 pipe）或 'ffmpeg'（zoompan 滤镜）
+        clip_cache: 项目级页面片段缓存（services.video_clip_cache.VideoClipCache），
+            未变化的页面直接复用上次导出的片段，None 表示每次全部重新渲染
     """
     if not pages_data:
         raise ValueError("No pages to process")
@@ -1556,38 +1906,118 @@ def generate_narration_video(
 
     try:
         total = len(pages_data)
-        muxed_clips: List[str] = []
         subtitle_entries: List[dict] = []
         cumulative_time = 0.0
 
         # ── Phase A: TTS 音频生成 ──
-        # 先统一生成所有 TTS 音频，获取每页实际时长
+        # 先统一生成所有 TTS 音频，获取每页实际时长。已合成过的页面（文本、声音、语速、
+        # 服务商均未变）直接从 audio_cache 复用；其余 edge-tts 页面在同一个事件循环里并发合成。
         page_durations: List[float] = []
         audio_paths: List[Optional[str]] = []
         alignments: List[Optional[dict]] = []
         silent_page_indexes: List[int] = []
 
-        # 整段合成快路径：ElevenLabs 且至少 2 页有 narration 时，按字符上限拆批
-        # 一批一合成 + 切片回单页，解决"逐页冷启动"导致的页间割裂感。
-        # 失败（alignment 缺失 / 某页未对齐 / API 错）直接 raise，fail-fast，不回退。
+        use_elevenlabs = bool(elevenlabs_config and elevenlabs_config.get('api_key'))
+        elevenlabs_voice_id = (elevenlabs_config or {}).get('voice_id') or 'JBFqnCBsd6RMkjVDRZzb'
+        # edge-tts 用 rate 字符串：speed=1.1 → "+10%"
+        effective_rate = rate
+        if not use_elevenlabs and abs(speed - 1.0) > 1e-3:
+            pct = int(round((speed - 1.0) * 100))
+            effective_rate = f"{'+' if pct >= 0 else ''}{pct}%"
+
         narration_indexes = [
             idx for idx, p in enumerate(pages_data)
             if (p.get('narration_text') or '').strip()
         ]
-        whole_text_results: Optional[dict] = None
-        if (
-            elevenlabs_config and elevenlabs_config.get('api_key')
-            and len(narration_indexes) >= 2
-        ):
+        # 页索引 → (audio_path, alignment, duration) 或合成异常
+        audio_results: dict = {}
+        audio_errors: dict = {}
+        cache_keys: dict = {}
+        synthesized_count = 0
+
+        def report_audio_progress() -> None:
+            if progress_callback and narration_indexes:
+                pct = int(20 + synthesized_count / len(narration_indexes) * 30)  # 20-50%
+                progress_callback(
+                    "TTS", f"已生成 {synthesized_count}/{len(narration_indexes)} 页音频", pct,
+                )
+
+        if audio_cache is not None:
+            for i in narration_indexes:
+                cache_keys[i] = audio_cache.key_for(
+                    text=pages_data[i]['narration_text'].strip(),
+                    voice=elevenlabs_voice_id if use_elevenlabs else voice,
+                    rate='' if use_elevenlabs else effective_rate,
+                    speed=speed,
+                    provider='elevenlabs' if use_elevenlabs else 'edge-tts',
+                )
+                audio_path = os.path.join(tmp_dir, f'audio_{i:03d}.mp3')
+                cached = audio_cache.get(cache_keys[i], audio_path)
+                if cached:
+                    duration, alignment = cached
+                    audio_results[i] = (audio_path, alignment, duration)
+                    synthesized_count += 1
+            if audio_results:
+                logger.info(f"TTS cache: reused {len(audio_results)}/{len(narration_indexes)} pages")
+                report_audio_progress()
+        pending_indexes = [i for i in narration_indexes if i not in audio_results]
+
+        if use_elevenlabs and len(pending_indexes) >= 2:
+            # 整段合成快路径：ElevenLabs 且至少 2 页待合成时，按字符上限拆批
+            # 一批一合成 + 切片回单页，解决"逐页冷启动"导致的页间割裂感。
+            # 失败（alignment 缺失 / 某页未对齐 / API 错）直接 raise，fail-fast，不回退。
             whole_text_pairs = _generate_elevenlabs_whole_and_split(
-                pages_data, narration_indexes, tmp_dir,
+                pages_data, pending_indexes, tmp_dir,
                 api_key=elevenlabs_config['api_key'],
-                voice_id=elevenlabs_config.get('voice_id') or 'JBFqnCBsd6RMkjVDRZzb',
+                voice_id=elevenlabs_voice_id,
                 ffmpeg_path=ffmpeg_path,
                 speed=speed,
                 progress_callback=progress_callback,
             )
-            whole_text_results = dict(zip(narration_indexes, whole_text_pairs))
+            audio_results.update(zip(pending_indexes, whole_text_pairs))
+        elif use_elevenlabs:
+            for i in pending_indexes:
+                audio_path = os.path.join(tmp_dir, f'audio_{i:03d}.mp3')
+                try:
+                    duration, alignment = generate_elevenlabs_audio_sync(
+                        pages_data[i]['narration_text'], audio_path,
+                        api_key=elevenlabs_config['api_key'],
+                        voice_id=elevenlabs_voice_id,
+                        ffmpeg_path=ffmpeg_path,
+                        speed=speed,
+                    )
+                    audio_results[i] = (audio_path, alignment, duration)
+                except Exception as e:
+                    audio_errors[i] = e
+                synthesized_count += 1
+                report_audio_progress()
+        elif pending_indexes:
+            jobs = [
+                (pages_data[i]['narration_text'], os.path.join(tmp_dir, f'audio_{i:03d}.mp3'))
+                for i in pending_indexes
+            ]
+
+            def on_tts_done(job_index: int, error: Optional[BaseException]) -> None:
+                nonlocal synthesized_count
+                synthesized_count += 1
+                report_audio_progress()
+
+            batch_results = generate_tts_batch_sync(
+                jobs, voice=voice, rate=effective_rate,
+                concurrency=tts_concurrency, ffmpeg_path=ffmpeg_path,
+                on_done=on_tts_done,
+            )
+            for i, (_, audio_path), (duration, error) in zip(pending_indexes, jobs, batch_results):
+                if error is None:
+                    audio_results[i] = (audio_path, None, duration)
+                else:
+                    audio_errors[i] = error
+
+        if audio_cache is not None:
+            for i in pending_indexes:
+                if i in audio_results:
+                    audio_path, alignment, duration = audio_results[i]
+                    audio_cache.put(cache_keys[i], audio_path, duration, alignment)
 
         for i, page in enumerate(pages_data):
             narration = page.get('narration_text')
@@ -1597,39 +2027,19 @@ def generate_narration_video(
             alignment: Optional[dict] = None
             duration = silent_duration
             if narration and narration.strip():
-                if whole_text_results is not None and i in whole_text_results:
-                    audio_path, alignment, duration = whole_text_results[i]
+                if i in audio_results:
+                    audio_path, alignment, duration = audio_results[i]
                 else:
-                    audio_path = os.path.join(tmp_dir, f'audio_{i:03d}.mp3')
-                    try:
-                        if elevenlabs_config and elevenlabs_config.get('api_key'):
-                            duration, alignment = generate_elevenlabs_audio_sync(
-                                narration, audio_path,
-                                api_key=elevenlabs_config['api_key'],
-                                voice_id=elevenlabs_config.get('voice_id') or 'JBFqnCBsd6RMkjVDRZzb',
-                                ffmpeg_path=ffmpeg_path,
-                                speed=speed,
-                            )
-                        else:
-                            # edge-tts 用 rate 字符串：speed=1.1 → "+10%"
-                            effective_rate = rate
-                            if abs(speed - 1.0) > 1e-3:
-                                pct = int(round((speed - 1.0) * 100))
-                                effective_rate = f"{'+' if pct >= 0 else ''}{pct}%"
-                            duration = generate_tts_audio_sync(
-                                narration, audio_path, voice=voice, rate=effective_rate, ffmpeg_path=ffmpeg_path,
-                            )
-                    except Exception as e:
-                        if fail_fast:
-                            raise RuntimeError(
-                                f"第 {page_idx + 1} 页旁白语音生成失败，当前项目未开启“允许返回半成品”，已停止导出: {e}"
-                            ) from e
-
-                        logger.warning(f"TTS failed for page {page_idx}: {e}, using silent clip")
-                        audio_path = None
-                        alignment = None
-                        duration = silent_duration
-                        silent_page_indexes.append(page_idx + 1)
+                    e = audio_errors.get(i)
+                    if fail_fast:
+                        raise RuntimeError(
+                            f"第 {page_idx + 1} 页旁白语音生成失败，当前项目未开启“允许返回半成品”，已停止导出: {e}"
+                        ) from e
+
+                    logger.warning(f"TTS failed for page {page_idx}: {e}, using silent clip")
+                    silent_page_indexes.append(page_idx + 1)
+                    if progress_callback:
+                        progress_callback("TTS", f"第 {i+1}/{total} 页无有效语音，改为静音片段", 50)
             else:
                 if fail_fast:
                     raise RuntimeError(
@@ -1641,28 +2051,20 @@ def generate_narration_video(
             audio_paths.append(audio_path)
             alignments.append(alignment)
 
-            if progress_callback:
-                pct = int(20 + (i + 1) / total * 30)  # 20-50%
-                if audio_path:
-                    message = f"已生成第 {i+1}/{total} 页音频"
-                else:
-                    message = f"第 {i+1}/{total} 页无有效语音，改为静音片段"
-                progress_callback("TTS", message, pct)
-
         if fail_fast and silent_page_indexes:
             pages = '、'.join(str(idx) for idx in silent_page_indexes)
             raise RuntimeError(
                 f"以下页面没有可用旁白语音：第 {pages} 页。当前项目未开启“允许返回半成品”，已停止导出。"
             )
 
-        # ── Phase B: 视频片段 + 字幕条目 ──
+        # ── Phase B: 字幕条目 + 并行渲染视频片段 ──
+        # 字幕时间轴依赖前面各页时长，先顺序算好；各页片段互不依赖，交给有界线程池
+        # 并行渲染（实际编码在各自的 FFmpeg 子进程中进行，可占满多核），最后按页序拼接。
+        clip_jobs: List[dict] = []
         for i, page in enumerate(pages_data):
-            image_path = page['image_path']
             narration = page.get('narration_text')
             page_idx = page.get('page_index', i)
-            effect = KEN_BURNS_EFFECTS[page_idx % len(KEN_BURNS_EFFECTS)]
             audio_duration = page_durations[i]
-            audio_path = audio_paths[i]
             alignment = alignments[i]
 
             # 整片头/尾的静音 padding 与画面淡入/淡出
@@ -1670,21 +2072,12 @@ def generate_narration_video(
             is_last = (i == total - 1)
             leading_pad = _LEADING_PAD_SECONDS if is_first else 0.0
             trailing_pad = _TRAILING_PAD_SECONDS if is_last else 0.0
-
-            if audio_path and (leading_pad > 0 or trailing_pad > 0):
-                padded_audio = os.path.join(tmp_dir, f'audio_padded_{i:03d}.mp3')
-                pad_audio_with_silence(
-                    audio_path, padded_audio,
-                    leading_seconds=leading_pad,
-                    trailing_seconds=trailing_pad,
-                    ffmpeg_path=ffmpeg_path,
-                )
-                audio_path = padded_audio
-
             display_duration = audio_duration + leading_pad + trailing_pad
 
-            # 收集字幕条目（字幕仅覆盖真实语音区间，避开首/末静音）
-            sub_start = cumulative_time + leading_pad
+            # 收集字幕条目（字幕仅覆盖真实语音区间，避开首/末静音）；
+            # 逐片烧录时时间轴相对本页片段起点，否则相对整片
+            sub_start = (0.0 if subtitles_per_clip else cumulative_time) + leading_pad
+            page_subtitle_path = None
             if narration and narration.strip() and audio_paths[i]:
                 if alignment:
                     page_subs = _build_timed_subtitle_entries_from_alignment(
@@ -1694,66 +2087,111 @@ def generate_narration_video(
                     page_subs = _build_timed_subtitle_entries(
                         narration.strip(), sub_start, audio_duration,
                     )
-                subtitle_entries.extend(page_subs)
-            cumulative_time += display_duration
-
-            if audio_paths[i]:
-                video_clip = os.path.join(tmp_dir, f'video_{i:03d}.mp4')
-                if enable_ken_burns:
-                    create_ken_burns_clip(
-                        image_path, video_clip, display_duration,
-                        width=width, height=height, fps=fps,
-                        effect_type=effect, ffmpeg_path=ffmpeg_path,
-                        fade_in_seconds=leading_pad,
-                        fade_out_seconds=trailing_pad,
-                    )
+                if subtitles_per_clip:
+                    if page_subs:
+                        page_subtitle_path = os.path.join(tmp_dir, f'subtitles_{i:03d}.ass')
+                        generate_ass_subtitle(page_subs, page_subtitle_path, width=width, height=height)
                 else:
-                    create_static_clip(
-                        image_path, video_clip, display_duration,
-                        width=width, height=height, fps=fps,
-                        ffmpeg_path=ffmpeg_path,
-                        fade_in_seconds=leading_pad,
-                        fade_out_seconds=trailing_pad,
-                    )
+                    subtitle_entries.extend(page_subs)
+            cumulative_time += display_duration
 
-                # Mux video + audio
-                muxed_path = os.path.join(tmp_dir, f'muxed_{i:03d}.mp4')
-                mux_video_audio(video_clip, audio_path, muxed_path, ffmpeg_path=ffmpeg_path)
-                muxed_clips.append(muxed_path)
-            else:
-                # 静音片段（含无声音轨以保证 concat 兼容）
-                silent_path = os.path.join(tmp_dir, f'silent_{i:03d}.mp4')
-                create_silent_clip(
-                    image_path, silent_path, duration=display_duration,
+            clip_jobs.append({
+                'index': i,
+                'image_path': page['image_path'],
+                'audio_path': audio_paths[i],
+                'tmp_dir': tmp_dir,
+                'display_duration': display_duration,
+                'leading_pad': leading_pad,
+                'trailing_pad': trailing_pad,
+                'effect': KEN_BURNS_EFFECTS[page_idx % len(KEN_BURNS_EFFECTS)],
+                'width': width,
+                'height': height,
+                'fps': fps,
+                'enable_ken_burns': enable_ken_burns,
+                'ffmpeg_path': ffmpeg_path,
+                'subtitle_path': page_subtitle_path,
+                'ken_burns_backend': ken_burns_backend,
+            })
+
+        clip_paths: List[Optional[str]] = [None] * total
+        clip_keys: List[Optional[str]] = [None] * total
+        if clip_cache is not None:
+            # 片段缓存键覆盖片段的全部输入：图片内容、旁白、声音设置、画面参数和该页字幕
+            voice_settings = (
+                {'provider': 'elevenlabs', 'voice_id': elevenlabs_voice_id, 'speed': speed}
+                if use_elevenlabs else {'provider': 'edge-tts', 'voice': voice, 'rate': effective_rate}
+            )
+            for job in clip_jobs:
+                i = job['index']
+                subtitle_text = None
+                if job['subtitle_path']:
+                    with open(job['subtitle_path'], encoding='utf-8') as f:
+                        subtitle_text = f.read()
+                clip_keys[i] = clip_cache.key_for(
+                    image=clip_cache.file_digest(job['image_path']),
+                    narration=(pages_data[i].get('narration_text') or '').strip(),
+                    voice=voice_settings if job['audio_path'] else None,
                     width=width, height=height, fps=fps,
-                    effect_type=effect, enable_ken_burns=enable_ken_burns,
-                    ffmpeg_path=ffmpeg_path,
-                    fade_in_seconds=leading_pad,
-                    fade_out_seconds=trailing_pad,
+                    duration=round(job['display_duration'], 3),
+                    leading_pad=job['leading_pad'], trailing_pad=job['trailing_pad'],
+                    effect=job['effect'] if enable_ken_burns else None,
+                    ken_burns_backend=ken_burns_backend if enable_ken_burns else None,
+                    subtitles=subtitle_text,
                 )
-                muxed_clips.append(silent_path)
-
+                clip_paths[i] = clip_cache.get(clip_keys[i])
+        render_jobs = [job for job in clip_jobs if clip_paths[job['index']] is None]
+        done_count = total - len(render_jobs)
+        if done_count:
+            logger.info(f"Reusing {done_count}/{total} cached clips")
             if progress_callback:
-                pct = int(50 + (i + 1) / total * 30)  # 50-80%
-                progress_callback("视频", f"已生成第 {i+1}/{total} 页视频片段", pct)
+                progress_callback("视频", f"复用 {done_count}/{total} 页未变化的视频片段", int(50 + done_count / total * 30))
+
+        workers = resolve_render_workers(
+            max(len(render_jobs), 1), width, height,
+            max_workers=render_workers, memory_budget_mb=render_memory_budget_mb,
+        )
+        logger.info(f"Rendering {len(render_jobs)} clips with {workers} parallel worker(s)")
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='video-clip')
+        try:
+            futures = {executor.submit(_render_page_clip, **job): job['index'] for job in render_jobs}
+            for future in as_completed(futures):
+                i = futures[future]
+                clip_paths[i] = future.result()
+                if clip_cache is not None:
+                    clip_paths[i] = clip_cache.put(clip_keys[i], clip_paths[i])
+                done_count += 1
+                if progress_callback:
+                    pct = int(50 + done_count / total * 30)  # 50-80%
+                    progress_callback("视频", f"已生成 {done_count}/{total} 页视频片段", pct)
+        finally:
+            # 任一片段失败时不再启动排队中的片段
+            executor.shutdown(wait=True, cancel_futures=True)
+        muxed_clips = [path for path in clip_paths if path]
 
         # ── Phase C: 拼接视频 ──
         if progress_callback:
             progress_callback("合成", "正在拼接视频…", 82)
 
-        raw_video = os.path.join(tmp_dir, 'raw_composite.mp4')
-        composite_video(muxed_clips, raw_video, fps=fps, ffmpeg_path=ffmpeg_path)
+        if subtitles_per_clip:
+            # 字幕已在片段编码时烧录，各片段编码参数一致，直接流复制拼接
+            composite_video(muxed_clips, output_path, fps=fps, ffmpeg_path=ffmpeg_path, stream_copy=True)
+        else:
+            raw_video = os.path.join(tmp_dir, 'raw_composite.mp4')
+            composite_video(muxed_clips, raw_video, fps=fps, ffmpeg_path=ffmpeg_path)
+
+            # ── Phase D: 烧录字幕 ──
+            if subtitle_entries:
+                if progress_callback:
+                    progress_callback("字幕", "正在烧录字幕…", 88)
 
-        # ── Phase D: 烧录字幕 ──
-        if subtitle_entries:
-            if progress_callback:
-                progress_callback("字幕", "正在烧录字幕…", 88)
+                ass_path = os.path.join(tmp_dir, 'subtitles.ass')
+                generate_ass_subtitle(subtitle_entries, ass_path, width=width, height=height)
+                burn_subtitles(raw_video, ass_path, output_path, ffmpeg_path=ffmpeg_path)
+            else:
+                shutil.copy2(raw_video, output_path)
 
-            ass_path = os.path.join(tmp_dir, 'subtitles.ass')
-            generate_ass_subtitle(subtitle_entries, ass_path, width=width, height=height)
-            burn_subtitles(raw_video, ass_path, output_path, ffmpeg_path=ffmpeg_path)
-        else:
-            shutil.copy2(raw_video, output_path)
+        if clip_cache is not None:
+            clip_cache.retain(key for key in clip_keys if key)
 
         if progress_callback:
             progress_callback("完成", "视频导出完成", 100)
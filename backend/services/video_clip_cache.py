@@ -0,0 +1,112 @@
+"""
+Video clip cache - incremental narration video export
+
+A narrated export renders one muxed clip per page (picture, audio and burned
+subtitles) and stream-copies them into the final MP4. Decks in review get
+exported many times with one or two slides changed, so finished clips are
+kept under ``<UPLOAD_FOLDER>/<project_id>/video_cache/<key>.mp4``, keyed by
+everything that goes into a clip: image content hash, narration text, voice
+settings, resolution, fps, effect, padding and the page's subtitle file. The
+next export only renders pages whose key changed.
+
+After a successful export, clips the deck no longer uses are dropped
+(``retain``), so the cache stays roughly the size of one export. Clips touched
+within the grace period survive, which keeps two concurrent exports of the
+same project from deleting each other's inputs.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = 'video_cache'
+RETAIN_GRACE_SECONDS = 3600
+
+
+class VideoClipCache:
+    """Content-addressed page clips of one project."""
+
+    def __init__(self, cache_dir: Union[str, os.PathLike]):
+        self.cache_dir = Path(cache_dir)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def file_digest(path: Union[str, os.PathLike]) -> str:
+        """sha256 of a file's content (slide images are re-saved on every edit, so mtime is not enough)."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key_for(**fields: Any) -> str:
+        payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.mp4"
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached clip, or None on a miss. The clip is used in place, not copied."""
+        path = self._path(key)
+        try:
+            os.utime(path)
+            result = str(path)
+        except OSError:
+            result = None
+
+        with self._lock:
+            if result:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return result
+
+    def put(self, key: str, clip_path: Union[str, os.PathLike]) -> str:
+        """Move a freshly rendered clip into the cache and return its new path."""
+        path = self._path(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_dir / f".{key}.mp4.{os.getpid()}.{threading.get_ident()}.tmp"
+            os.replace(clip_path, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # 跨文件系统等情况下放弃缓存，片段仍可正常使用
+            logger.warning(f"Failed to cache video clip: {e}")
+            return str(clip_path)
+        return str(path)
+
+    def retain(self, keys: Iterable[str], grace_seconds: float = RETAIN_GRACE_SECONDS) -> int:
+        """Delete clips not in ``keys`` and not used within ``grace_seconds``. Returns clips removed."""
+        keep = set(keys)
+        cutoff = time.time() - grace_seconds
+        removed = 0
+        for path in self.cache_dir.glob('*.mp4'):
+            if path.stem in keep:
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"Video clip cache dropped {removed} stale clips in {self.cache_dir}")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+def get_video_clip_cache(upload_folder: Union[str, os.PathLike], project_id: str) -> VideoClipCache:
+    return VideoClipCache(Path(upload_folder) / project_id / CACHE_DIR_NAME)
@@ -0,0 +1,206 @@
+"""
+Background task worker pool
+
+With TASK_EXECUTION_MODE=worker the web process only records tasks (arguments
+in Task.params) and returns; this module runs them in separate processes so
+long generation/export jobs neither compete with request handling for the GIL
+nor die with the web server.
+
+Usage (from the backend directory):
+    python -m services.worker                 # one process per CPU core
+    python -m services.worker --processes 4
+
+Run a single worker pool per database: on startup it recovers tasks claimed by
+workers of a previous run.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+from datetime import datetime
+from typing import Dict, Optional
+
+from models import db, Task
+from services.task_manager import (
+    QUEUEABLE_TASK_FUNCS,
+    build_task_call,
+    recover_interrupted_tasks,
+    task_manager,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 1.0
+# How many queued candidates to try per poll before sleeping when other workers win the race
+CLAIM_BATCH_SIZE = 5
+
+
+def claim_next_task(worker_id: str) -> Optional[str]:
+    """Atomically claim the oldest queued task. Must be called inside an app context.
+
+    The claim is a conditional UPDATE (worker_id IS NULL), so when several
+    processes race for the same row exactly one of them wins.
+    """
+    candidates = (
+        db.session.query(Task.id)
+        .filter(
+            Task.status == 'PENDING',
+            Task.worker_id.is_(None),
+            Task.params.isnot(None),
+            Task.task_type.in_(list(QUEUEABLE_TASK_FUNCS)),
+        )
+        .order_by(Task.created_at)
+        .limit(CLAIM_BATCH_SIZE)
+        .all()
+    )
+    for (task_id,) in candidates:
+        claimed = (
+            Task.query.filter(Task.id == task_id, Task.worker_id.is_(None))
+            .update({Task.worker_id: worker_id}, synchronize_session=False)
+        )
+        db.session.commit()
+        if claimed:
+            return task_id
+    return None
+
+
+def worker_id_for(index: int, pid: Optional[int] = None) -> str:
+    """Identifier a worker process stores in Task.worker_id when it claims a task."""
+    return f"{socket.gethostname()}:{pid or os.getpid()}:{index}"
+
+
+def release_dead_worker_tasks(app, worker_id: str) -> Dict[str, int]:
+    """Requeue (or fail) the tasks a crashed worker process left in PROCESSING."""
+    return recover_interrupted_tasks(
+        app, queued=True, worker_ids=[worker_id],
+        resume=bool(app.config.get('RESUME_INTERRUPTED_TASKS')),
+    )
+
+
+def run_claimed_task(task_id: str, app) -> None:
+    """Rebuild a claimed task from its persisted arguments and run it in this process."""
+    with app.app_context():
+        task = Task.query.get(task_id)
+        if not task:
+            return
+        try:
+            func, kwargs = build_task_call(task, app)
+        except Exception as e:
+            logger.error(f"Cannot start task {task_id} ({task.task_type}): {e}", exc_info=True)
+            task.status = 'FAILED'
+            task.error_message = str(e)
+            task.completed_at = datetime.utcnow()
+            db.session.commit()
+            return
+
+    logger.info(f"Running task {task_id} ({func.__name__})")
+    func(task_id, **kwargs)
+
+
+def _worker_main(index: int, poll_interval: float, stop_event) -> None:
+    """Worker process entry point: claim and run tasks until asked to stop."""
+    # The supervisor owns Ctrl+C / SIGTERM handling and sets stop_event, so the
+    # task in flight finishes instead of being killed halfway.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from app import app
+
+    # Tasks that spawn sub-tasks (e.g. template analysis) run them in this process.
+    task_manager.queue_tasks = False
+    with app.app_context():
+        # Never share connections inherited from the supervisor across fork().
+        db.engine.dispose()
+
+    worker_id = worker_id_for(index)
+    logger.info(f"Worker {worker_id} started")
+    while not stop_event.is_set():
+        try:
+            with app.app_context():
+                task_id = claim_next_task(worker_id)
+        except Exception as e:
+            logger.warning(f"Worker {worker_id} failed to poll the task queue: {e}")
+            task_id = None
+
+        if task_id is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        try:
+            run_claimed_task(task_id, app)
+        except Exception as e:
+            logger.error(f"Task {task_id} crashed in worker {worker_id}: {e}", exc_info=True)
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def run_worker_pool(processes: int, poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+    """Start ``processes`` worker processes and supervise them until SIGINT/SIGTERM."""
+    from app import app
+
+    if app.config.get('TASK_EXECUTION_MODE') != 'worker':
+        # In thread mode the web process already runs every task it creates.
+        raise SystemExit("TASK_EXECUTION_MODE must be 'worker' to run the worker pool")
+
+    if app.config.get('RESUME_INTERRUPTED_TASKS'):
+        recover_interrupted_tasks(app, queued=True)
+
+    # Children must not race on schema migrations the supervisor just ran.
+    os.environ['BANANA_SKIP_AUTO_MIGRATE'] = '1'
+    with app.app_context():
+        db.engine.dispose()
+
+    stop_event = multiprocessing.Event()
+
+    def _start(index: int):
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(index, poll_interval, stop_event),
+            name=f"banana-worker-{index}",
+        )
+        process.start()
+        return process
+
+    def _request_stop(signum, frame):
+        logger.info("Stopping workers after their current task...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+
+    workers = [_start(index) for index in range(processes)]
+    logger.info(f"Worker pool started with {processes} process(es)")
+    while not stop_event.is_set():
+        stop_event.wait(poll_interval * 5)
+        for index, process in enumerate(workers):
+            if not process.is_alive() and not stop_event.is_set():
+                logger.warning(f"Worker {process.name} exited with code {process.exitcode}, restarting")
+                # 先释放崩溃进程已认领的任务，否则它们停留在 PROCESSING 直到整个进程池重启
+                try:
+                    release_dead_worker_tasks(app, worker_id_for(index, process.pid))
+                except Exception as e:
+                    logger.error(f"Failed to release tasks of worker {process.name}: {e}", exc_info=True)
+                with app.app_context():
+                    db.engine.dispose()
+                workers[index] = _start(index)
+
+    for process in workers:
+        process.join()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run queued Banana Slides background tasks")
+    parser.add_argument(
+        '--processes', type=int, default=os.cpu_count() or 1,
+        help="number of worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        '--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+        help="seconds between queue polls when idle",
+    )
+    args = parser.parse_args(argv)
+    run_worker_pool(max(1, args.processes), max(0.1, args.poll_interval))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""Shared event loop for async provider calls and async rate-limiter slots."""
+import asyncio
+import base64
+import contextvars
+import threading
+import time
+from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from PIL import Image
+
+from services import async_runner
+from services.rate_limiter import AdaptiveLimiter, ResourceLimiter, report_throttle
+
+_request_id = contextvars.ContextVar('request_id', default=None)
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+
+
+def test_hundreds_of_calls_share_one_loop_thread_and_caller_context():
+    threads_before = threading.active_count()
+    _request_id.set('task-42')
+
+    async def fake_call(i):
+        await asyncio.sleep(0.2)
+        return i, _request_id.get(), threading.current_thread().name
+
+    started = time.monotonic()
+    results = async_runner.gather(fake_call(i) for i in range(500))
+    elapsed = time.monotonic() - started
+
+    assert [i for i, _, _ in results] == list(range(500))
+    assert {context for _, context, _ in results} == {'task-42'}
+    assert {name for _, _, name in results} == {'ai-event-loop'}
+    assert elapsed < 5  # 并发执行，而非 500 × 0.2s
+    assert threading.active_count() <= threads_before + 1
+
+
+def test_async_slots_respect_window_and_learn_from_throttles():
+    limiter = ResourceLimiter('async-test', 3)
+    peak = in_flight = 0
+
+    async def call(i):
+        nonlocal peak, in_flight
+        async with limiter.aslot(f'page {i}'):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.02)
+            in_flight -= 1
+            if i == 0:
+                assert report_throttle(ProviderError(429))
+        return i
+
+    assert async_runner.gather(call(i) for i in range(20)) == list(range(20))
+
+    (state,) = limiter.snapshot()
+    assert 1 <= peak <= 3
+    assert state['throttles'] == 1  # reported through the task's slot
+    assert state['in_use'] == 0 and state['waiting'] == 0
+
+
+def test_async_acquire_is_woken_by_thread_release():
+    limiter = AdaptiveLimiter('image[async-wake]', 1)
+    held = limiter.acquire('held by a worker thread')
+    threading.Timer(0.1, limiter.release, args=(held, True)).start()
+
+    async def wait_for_slot():
+        state = await limiter.aacquire('coroutine')
+        limiter.release(state, succeeded=True)
+        return True
+
+    assert async_runner.run(wait_for_slot(), timeout=5)
+
+
+def test_openai_text_provider_awaits_async_client():
+    from services.ai_providers.text.openai_provider import OpenAITextProvider
+
+    response = SimpleNamespace(
+        usage=None,
+        choices=[SimpleNamespace(message=SimpleNamespace(content='<think>plan</think>答案'))],
+    )
+    async_client = MagicMock()
+    async_client.chat.completions.create = AsyncMock(return_value=response)
+    with patch('services.ai_providers.text.openai_provider.OpenAI') as sync_client, \
+            patch('services.ai_providers.text.openai_provider.AsyncOpenAI', return_value=async_client):
+        provider = OpenAITextProvider(api_key='k', model='gpt-test')
+        assert async_runner.run(provider.agenerate_text('question')) == '答案'
+
+    sync_client.return_value.chat.completions.create.assert_not_called()
+    assert async_client.chat.completions.create.await_args.kwargs['model'] == 'gpt-test'
+
+
+def _png_b64(color):
+    buffer = BytesIO()
+    Image.new('RGB', (8, 8), color=color).save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def test_openai_image_provider_awaits_images_api_and_chat_routes():
+    from services.ai_providers.image.openai_provider import OpenAIImageProvider
+
+    template = Image.new('RGB', (64, 36), color='white')
+    async_client = MagicMock()
+    async_client.images.generate = AsyncMock(return_value=SimpleNamespace(data=[SimpleNamespace(b64_json=_png_b64('red'))]))
+    async_client.images.edit = AsyncMock(return_value=SimpleNamespace(data=[SimpleNamespace(b64_json=_png_b64('blue'))]))
+    message = SimpleNamespace(images=[{'image_url': {'url': f"data:image/png;base64,{_png_b64('green')}"}}])
+    async_client.chat.completions.create = AsyncMock(return_value=SimpleNamespace(choices=[SimpleNamespace(message=message)]))
+
+    images_provider = OpenAIImageProvider(api_key='k', model='gpt-image-1')
+    chat_provider = OpenAIImageProvider(api_key='k', model='gemini-3-pro-image-preview')
+    for provider in (images_provider, chat_provider):
+        provider.client = MagicMock()
+        provider._async_client = async_client
+
+    generated = async_runner.run(images_provider.agenerate_image('a cover slide'))
+    edited = async_runner.run(images_provider.agenerate_image('a cover slide', ref_images=[template]))
+    chatted = async_runner.run(chat_provider.agenerate_image('a cover slide', ref_images=[template]))
+
+    assert generated.getpixel((0, 0)) == (255, 0, 0)
+    assert edited.getpixel((0, 0)) == (0, 0, 255)
+    assert chatted.getpixel((0, 0)) == (0, 128, 0)
+    assert async_client.images.edit.await_args.kwargs['image'].name == 'image.png'
+    content = async_client.chat.completions.create.await_args.kwargs['messages'][1]['content']
+    assert content[0]['image_url']['url'].startswith('data:image/jpeg;base64,')
+    assert content[-1] == {'type': 'text', 'text': 'a cover slide'}
+    for method in (images_provider.client.images.generate, images_provider.client.images.edit,
+                   chat_provider.client.chat.completions.create):
+        method.assert_not_called()
+
+
+def test_genai_image_provider_retries_on_aio_client():
+    from google.genai import errors
+    from tenacity import wait_none
+    from services.ai_providers.image.genai_provider import GenAIImageProvider
+
+    with patch('services.ai_providers.image.genai_provider.make_genai_client', return_value=MagicMock()):
+        provider = GenAIImageProvider(model='gemini-test-image')
+    final = Image.new('RGB', (8, 8), color='purple')
+    response = SimpleNamespace(parts=[SimpleNamespace(text='draft notes'), SimpleNamespace(text=None, as_image=lambda: final)])
+    generate = AsyncMock(side_effect=[errors.ServerError(503, {}), response])
+    provider.client.aio.models.generate_content = generate
+
+    with patch.object(GenAIImageProvider.agenerate_image.retry, 'wait', wait_none()):
+        image = async_runner.run(provider.agenerate_image('a chart', ref_images=[Image.new('RGB', (16, 16))]))
+
+    assert image is final
+    assert generate.await_count == 2
+    assert generate.await_args.kwargs['contents'][-1] == 'a chart'
+    provider.client.models.generate_content.assert_not_called()
+
+
+def test_text_providers_read_caption_images_off_the_loop_thread(tmp_path):
+    from services.ai_providers.text.anthropic_provider import AnthropicTextProvider
+    from services.ai_providers.text.genai_provider import GenAITextProvider
+    from services.ai_providers.text.openai_provider import OpenAITextProvider
+
+    image_path = str(tmp_path / 'caption.jpg')
+    Image.new('RGB', (32, 32), color='orange').save(image_path, format='JPEG')
+    encoded_in = []
+
+    def recording(build):
+        def wrapper(*args):
+            encoded_in.append(threading.current_thread().name)
+            return build(*args)
+        return wrapper
+
+    with patch('services.ai_providers.text.openai_provider.OpenAI'):
+        openai_provider = OpenAITextProvider(api_key='k', model='gpt-test')
+    openai_provider._async_client = MagicMock()
+    openai_provider._async_client.chat.completions.create = AsyncMock(return_value=SimpleNamespace(
+        usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content='橙色方块'))]))
+    with patch('services.ai_providers.text.anthropic_provider.Anthropic'):
+        anthropic_provider = AnthropicTextProvider(api_key='k')
+    anthropic_provider._acreate = AsyncMock(return_value='橙色方块')
+
+    with patch.object(OpenAITextProvider, '_image_messages', staticmethod(recording(OpenAITextProvider._image_messages))), \
+            patch.object(AnthropicTextProvider, '_image_messages',
+                         staticmethod(recording(AnthropicTextProvider._image_messages))):
+        assert async_runner.run(openai_provider.agenerate_with_image('describe', image_path)) == '橙色方块'
+        assert async_runner.run(anthropic_provider.agenerate_with_image('describe', image_path)) == '橙色方块'
+    assert len(encoded_in) == 2 and 'ai-event-loop' not in encoded_in
+
+    with patch('services.ai_providers.text.genai_provider.make_genai_client', return_value=MagicMock()):
+        genai_provider = GenAITextProvider(model='gemini-test')
+    genai_provider.client.aio.models.generate_content = AsyncMock(
+        return_value=SimpleNamespace(text='橙色方块', usage_metadata=None))
+    assert async_runner.run(genai_provider.agenerate_with_image('describe', image_path)) == '橙色方块'
+    part, prompt = genai_provider.client.aio.models.generate_content.await_args.kwargs['contents']
+    assert prompt == 'describe'
+    with open(image_path, 'rb') as f:
+        assert (part.inline_data.mime_type, part.inline_data.data) == ('image/jpeg', f.read())
+
+
+def test_description_task_pages_await_on_the_loop_not_one_thread_each(client, sample_project, monkeypatch):
+    from models import db, Page, Task
+    from services import task_manager as tm
+
+    project_id = sample_project['project_id']
+    app = client.application
+    pages = 60
+    seen_threads = set()
+
+    class FakeAIService:
+        def flatten_outline(self, outline):
+            return outline
+
+        def build_page_description_prefix(self, project_context, outline, **kwargs):
+            return 'prefix\n'
+
+        async def agenerate_page_description(self, project_context, outline, page_outline, page_index, **kwargs):
+            seen_threads.add(threading.current_thread().name)
+            await asyncio.sleep(0.1)
+            return {'text': f"Page {page_index}", 'extra_fields': {'演讲者备注': 'note'}}
+
+    fake_ai = FakeAIService()
+    monkeypatch.setattr('services.ai_service_manager.get_ai_service', lambda: fake_ai)
+    outline = [{'title': f'Page {i}', 'points': []} for i in range(pages)]
+    with app.app_context():
+        db.session.add_all(Page(project_id=project_id, order_index=i, status='DRAFT') for i in range(pages))
+        task = Task(project_id=project_id, task_type='GENERATE_DESCRIPTIONS', status='PENDING')
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+
+    threads_before = threading.active_count()
+    started = time.monotonic()
+    tm.generate_descriptions_task(task_id, project_id, fake_ai, None, outline, max_workers=pages, app=app)
+    elapsed = time.monotonic() - started
+
+    assert seen_threads == {'ai-event-loop'}
+    assert elapsed < 5  # 按限流窗口并发等待，而非 60 × 0.1s 串行
+    assert threading.active_count() <= threads_before + 1
+    with app.app_context():
+        assert Task.query.get(task_id).get_progress()['completed'] == pages
+        saved = Page.query.filter_by(project_id=project_id).all()
+        assert {page.status for page in saved} == {'DESCRIPTION_GENERATED'}
+        assert saved[0].get_description_content()['extra_fields'] == {'演讲者备注': 'note'}
@@ -3,11 +3,17 @@
 from __future__ import annotations
 
 import json
+import threading
+import time
 from pathlib import Path
 
+import pytest
+
 from cli.banana_cli.commands import run as run_cmd
 from cli.banana_cli.config import CLIConfig
+from cli.banana_cli.errors import InputError, TaskError
 from cli.banana_cli.jobs import runner as run_runner
+from cli.banana_cli.jobs.concurrency import parse_stage_limits
 from cli.banana_cli.jobs.workflow import wait_task
 from cli.banana_cli.models import ArtifactRecord, JobSpec, TaskRecord
 
@@ -281,3 +287,110 @@ def test_cmd_monitor_watch_until_completed(monkeypatch):
     assert result["success"] is True
     assert result["data"]["status"] == "COMPLETED"
     assert sleep_calls == [5]
+
+
+def _idea_job(job_id: str, **extra) -> JobSpec:
+    return JobSpec.model_validate(
+        {
+            "job_id": job_id,
+            "job_type": "full_generation",
+            "creation_type": "idea",
+            "idea_prompt": "demo",
+            "export": {"formats": ["pptx"]},
+            **extra,
+        }
+    )
+
+
+def test_run_jobs_parallel_keeps_state_markers_and_report_consistent(tmp_path: Path, monkeypatch):
+    state_file = tmp_path / "state.json"
+    marker_file = tmp_path / "done.json"
+    lock = threading.Lock()
+    active = {"jobs": 0, "exports": 0}
+    peak = {"jobs": 0, "exports": 0}
+
+    def _enter(key: str) -> None:
+        with lock:
+            active[key] += 1
+            peak[key] = max(peak[key], active[key])
+
+    def _leave(key: str) -> None:
+        with lock:
+            active[key] -= 1
+
+    def _fake_execute(_api, job, *, timeout_sec, poll_interval, progress_callback=None, stage_limiter=None):
+        _enter("jobs")
+        project_id = f"proj-{job.job_id}"
+        progress_callback({"event": "project_created", "project_id": project_id, "stage": "PROJECT_CREATED"})
+        time.sleep(0.05)
+        with stage_limiter.slot("export"):
+            _enter("exports")
+            time.sleep(0.05)
+            _leave("exports")
+        _leave("jobs")
+        return {
+            "project_id": project_id,
+            "tasks": [],
+            "artifacts": [ArtifactRecord(format="pptx", download_url=f"http://localhost/{project_id}.pptx")],
+        }
+
+    monkeypatch.setattr(run_runner, "execute_full_generation", _fake_execute)
+    jobs = [_idea_job(f"job-{i}") for i in range(8)]
+
+    report = run_runner.run_jobs(
+        object(),
+        jobs,
+        CLIConfig(base_url="http://localhost:5461"),
+        state_file=str(state_file),
+        done_marker_file=str(marker_file),
+        progress_interval_sec=3600,
+        parallel=4,
+        stage_limits={"export": 2},
+    )
+
+    assert peak["jobs"] == 4
+    assert peak["exports"] == 2
+    assert [j.job_id for j in report.jobs] == [f"job-{i}" for i in range(8)]
+    assert report.totals == {"total": 8, "success": 8, "failed": 0}
+    state = json.loads(state_file.read_text(encoding="utf-8"))
+    assert state["status"] == "COMPLETED"
+    assert state["summary"] == {"total": 8, "completed": 8, "success": 8, "failed": 0}
+    assert state["running_job_ids"] == [] and state["current_job_id"] is None
+    assert sorted(j["project_id"] for j in state["jobs"]) == sorted(f"proj-job-{i}" for i in range(8))
+    markers = json.loads(marker_file.read_text(encoding="utf-8"))
+    assert sorted(markers["jobs"]) == sorted(f"job-{i}" for i in range(8))
+
+
+def test_run_jobs_parallel_fail_fast_stops_starting_new_jobs(monkeypatch):
+    started: list[str] = []
+
+    def _fake_execute(_api, job, *, timeout_sec, poll_interval, progress_callback=None):
+        started.append(job.job_id)
+        if job.job_id == "job-0":
+            raise TaskError("boom")
+        time.sleep(0.05)
+        return {"project_id": None, "tasks": [], "artifacts": []}
+
+    monkeypatch.setattr(run_runner, "execute_full_generation", _fake_execute)
+    jobs = [_idea_job("job-0", policy={"continue_on_error": False})]
+    jobs += [_idea_job(f"job-{i}") for i in range(1, 10)]
+
+    report = run_runner.run_jobs(
+        object(),
+        jobs,
+        CLIConfig(base_url="http://localhost:5461"),
+        progress_interval_sec=3600,
+        parallel=2,
+    )
+
+    assert len(started) < len(jobs)
+    assert report.jobs[0].status == "FAILED" and report.jobs[0].error.message == "boom"
+    assert report.totals["total"] == len(started)
+
+
+def test_parse_stage_limits_rejects_unknown_stage():
+    assert parse_stage_limits(["export=2", "images=3"]) == {"export": 2, "images": 3}
+    with pytest.raises(InputError):
+        parse_stage_limits(["render=2"])
+    with pytest.raises(InputError):
+        parse_stage_limits(["export=0"])
@@ -0,0 +1,80 @@
+"""DATABASE_URL selects the backend: engine options and JSON column types follow it."""
+
+import json
+import threading
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
+from models import db, Page, Task
+from models.types import JSONText
+from utils.database import build_engine_options, display_database_url, normalize_database_url
+
+
+def test_engine_options_follow_database_backend(monkeypatch):
+    monkeypatch.delenv('DB_POOL_SIZE', raising=False)
+    monkeypatch.delenv('DB_MAX_OVERFLOW', raising=False)
+
+    sqlite_options = build_engine_options('sqlite:////tmp/banana.db', worker_threads=28)
+    assert sqlite_options['connect_args']['check_same_thread'] is False
+    # SQLite 只有一把写锁，沿用 SQLAlchemy 默认连接池，不随工作线程放大
+    assert not {'pool_size', 'max_overflow', 'pool_timeout'} & sqlite_options.keys()
+
+    url = normalize_database_url('postgres://banana:secret@db:5432/banana')
+    assert url == 'postgresql://banana:secret@db:5432/banana'
+    assert 'secret' not in display_database_url(url)
+
+    pg_options = build_engine_options(url, worker_threads=28)
+    assert pg_options['connect_args'] == {}
+    assert pg_options['pool_size'] >= 28
+    assert pg_options['max_overflow'] >= 10
+
+    monkeypatch.setenv('DB_POOL_SIZE', '7')
+    assert build_engine_options(url, worker_threads=28)['pool_size'] == 7
+
+
+def test_json_columns_are_jsonb_on_postgresql_and_text_on_sqlite():
+    pg_ddl = str(CreateTable(Task.__table__).compile(dialect=postgresql.dialect()))
+    assert 'progress JSONB' in pg_ddl and 'params JSONB' in pg_ddl
+    sqlite_ddl = str(CreateTable(Page.__table__).compile(dialect=sqlite.dialect()))
+    assert 'description_content TEXT' in sqlite_ddl
+
+    # Models keep exchanging JSON strings with the column on every backend
+    column_type = JSONText()
+    pg = postgresql.dialect()
+    stored = column_type.process_bind_param('{"total": 2, "text": "页"}', pg)
+    assert stored == {'total': 2, 'text': '页'}
+    assert json.loads(column_type.process_result_value(stored, pg)) == stored
+    assert column_type.process_bind_param('{"a": 1}', sqlite.dialect()) == '{"a": 1}'
+
+
+def test_concurrent_page_status_writes_do_not_need_lock_retries(client, sample_project, monkeypatch):
+    from services import task_manager as tm
+
+    retries = []
+    monkeypatch.setattr(tm.time, 'sleep', lambda delay: retries.append(delay))
+    project_id = sample_project['project_id']
+    app = client.application
+    with app.app_context():
+        pages = [Page(project_id=project_id, order_index=i, status='QUEUED') for i in range(8)]
+        db.session.add_all(pages)
+        db.session.commit()
+        page_ids = [page.id for page in pages]
+
+    def write_statuses(page_id):
+        with app.app_context():
+            for status in ('GENERATING', 'GENERATING', 'COMPLETED'):
+                Page.query.filter_by(id=page_id).update({'status': status})
+                tm._commit_with_retry()
+            db.session.remove()
+
+    threads = [threading.Thread(target=write_statuses, args=(page_id,)) for page_id in page_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert retries == []
+    with app.app_context():
+        statuses = {page.status for page in Page.query.filter(Page.id.in_(page_ids))}
+        assert statuses == {'COMPLETED'}
@@ -0,0 +1,96 @@
+"""
+Unit tests for reusing persisted EditableImage analysis across editable exports.
+"""
+
+from unittest.mock import patch
+
+from PIL import Image
+
+from services.export_service import ExportService
+from services.image_editability import BBox, EditableElement, EditableImage, TextStyleResult
+from services.image_editability.analysis_store import EditableAnalysisStore
+
+
+def _slide(path, color):
+    Image.new('RGB', (300, 120), color).save(path)
+    return str(path)
+
+
+class _FakeEditabilityService:
+    analyzed = []
+
+    def __init__(self, config):
+        pass
+
+    def make_image_editable(self, image_path):
+        self.analyzed.append(image_path)
+        image_id = f"img{len(self.analyzed)}"
+        bbox = BBox(40, 30, 260, 90)
+        return EditableImage(
+            image_id=image_id,
+            image_path=image_path,
+            width=300,
+            height=120,
+            elements=[EditableElement(
+                element_id=f"{image_id}_0", element_type='text', bbox=bbox, bbox_global=bbox,
+                content='Hello',
+            )],
+        )
+
+
+def test_store_round_trips_analysis_and_page_text_styles(tmp_path):
+    image_path = _slide(tmp_path / 'slide.png', 'white')
+    background = _slide(tmp_path / 'clean.png', 'gray')
+    bbox = BBox(1, 2, 30, 40)
+    child = EditableElement('c1', 'text', bbox, bbox, content='child')
+    editable = EditableImage(
+        image_id='p1', image_path=image_path, width=300, height=120,
+        elements=[EditableElement('e1', 'image', bbox, bbox, children=[child], metadata={'source': 'mineru'})],
+        clean_background=background,
+    )
+    store = EditableAnalysisStore(tmp_path / 'analysis', settings={'max_depth': 2})
+    store.save(image_path, editable, {
+        'c1': TextStyleResult(font_color_rgb=(255, 0, 0), is_bold=True),
+        'other-page': TextStyleResult(),
+    })
+
+    loaded, styles = store.load(image_path)
+
+    assert loaded.to_dict() == editable.to_dict()
+    assert set(styles) == {'c1'}
+    assert styles['c1'].font_color_rgb == (255, 0, 0) and styles['c1'].is_bold
+    # Different settings or a lost background file must force re-analysis
+    assert EditableAnalysisStore(tmp_path / 'analysis', settings={'max_depth': 1}).load(image_path) is None
+    (tmp_path / 'clean.png').unlink()
+    assert store.load(image_path) is None
+
+
+def test_export_reanalyses_only_changed_pages(tmp_path):
+    slides = [_slide(tmp_path / f'slide{i}.png', color) for i, color in enumerate(['white', 'black'])]
+    store = EditableAnalysisStore(tmp_path / 'analysis', settings={})
+    _FakeEditabilityService.analyzed = []
+
+    def export(image_paths, name):
+        ExportService.create_editable_pptx_with_recursive_analysis(
+            image_paths=image_paths,
+            output_file=str(tmp_path / name),
+            slide_width_pixels=300,
+            slide_height_pixels=120,
+            analysis_store=store,
+        )
+
+    with patch('services.image_editability.ServiceConfig.from_defaults', return_value=None), \
+            patch('services.image_editability.ImageEditabilityService', _FakeEditabilityService):
+        export(slides, 'first.pptx')
+        assert sorted(_FakeEditabilityService.analyzed) == sorted(slides)
+
+        # Subset export of an unchanged page: nothing to analyse
+        export(slides[1:], 'subset.pptx')
+        assert len(_FakeEditabilityService.analyzed) == 2
+
+        # Editing slide 0 creates a new image; only it is analysed again
+        edited = _slide(tmp_path / 'slide0_v2.png', 'red')
+        export([edited, slides[1]], 'second.pptx')
+
+    assert _FakeEditabilityService.analyzed[2:] == [edited]
+    assert (tmp_path / 'second.pptx').exists()
@@ -9,12 +9,13 @@ import tempfile
 import uuid
 import zipfile
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from PIL import Image
 
 from services.file_parser_service import FileParserService, _resolve_upload_folder
+from services.rate_limiter import caption_resource_limiter
 
 
 def _create_temp_image() -> str:
@@ -23,8 +24,8 @@ def _create_temp_image() -> str:
         return tmp.name
 
 
-def test_generate_single_caption_uses_provider_factory():
-    """Caption generation should delegate to the provider factory's generate_with_image."""
+def test_generate_captions_parallel_uses_async_provider_factory():
+    """Captions should be awaited through the provider factory's agenerate_with_image."""
     image_path = _create_temp_image()
     try:
         service = FileParserService(
@@ -33,17 +34,30 @@ def test_generate_single_caption_uses_provider_factory():
             provider_format='openai',
         )
 
+        sent_paths = []
+
+        async def caption(prompt, path):
+            sent_paths.append(path)
+            assert os.path.exists(path)
+            if len(sent_paths) == 1:
+                raise RuntimeError('temporary failure')
+            return '<think>看图</think>示例描述'
+
         mock_provider = MagicMock()
-        mock_provider.generate_with_image.return_value = '示例描述'
+        mock_provider.agenerate_with_image = AsyncMock(side_effect=caption)
 
         with patch('utils.path_utils.find_mineru_file_with_prefix', return_value=Path(image_path)):
             with patch.object(service, '_get_caption_provider', return_value=mock_provider):
-                caption = service._generate_single_caption('/files/mineru/demo.png')
-
-        assert caption == '示例描述'
-        mock_provider.generate_with_image.assert_called_once()
-        call_args = mock_provider.generate_with_image.call_args
-        assert '描述' in call_args[0][0]
+                captions, failed = service._generate_captions_parallel(['/files/mineru/demo.png'])
+
+        # 第一次失败后重试成功
+        assert (captions, failed) == (['示例描述'], 0)
+        assert mock_provider.agenerate_with_image.await_count == 2
+        assert '描述' in mock_provider.agenerate_with_image.await_args[0][0]
+        mock_provider.generate_with_image.assert_not_called()
+        # 临时 JPEG 每次调用后都被删除，限流槽位全部归还
+        assert len(set(sent_paths)) == 2 and not any(os.path.exists(p) for p in sent_paths)
+        assert all(state['in_use'] == 0 for state in caption_resource_limiter.snapshot())
     finally:
         if os.path.exists(image_path):
             os.remove(image_path)
@@ -73,8 +87,8 @@ def test_can_generate_captions_returns_true_when_factory_succeeds():
         assert service._can_generate_captions() is True
 
 
-def test_generate_single_caption_vertex_uses_provider_factory():
-    """Vertex provider should also go through the factory (the original bug)."""
+def test_generate_captions_parallel_counts_empty_and_missing_images():
+    """Empty captions are retried, then counted as failures alongside missing images."""
     image_path = _create_temp_image()
     try:
         service = FileParserService(
@@ -84,19 +98,29 @@ def test_generate_single_caption_vertex_uses_provider_factory():
         )
 
         mock_provider = MagicMock()
-        mock_provider.generate_with_image.return_value = '顶点描述'
+        mock_provider.agenerate_with_image = AsyncMock(return_value='')
 
         with patch('utils.path_utils.find_mineru_file_with_prefix', return_value=Path(image_path)):
             with patch.object(service, '_get_caption_provider', return_value=mock_provider):
-                caption = service._generate_single_caption('/files/mineru/demo.png')
+                captions, failed = service._generate_captions_parallel(
+                    ['/files/mineru/a.png', '/files/mineru/b.png', 'ftp://unsupported/c.png'], max_retries=2,
+                )
 
-        assert caption == '顶点描述'
-        mock_provider.generate_with_image.assert_called_once()
+        assert (captions, failed) == (['', '', ''], 3)
+        assert mock_provider.agenerate_with_image.await_count == 4  # 2 images × 2 attempts
     finally:
         if os.path.exists(image_path):
             os.remove(image_path)
 
 
+def test_generate_single_caption_wraps_async_path():
+    """The blocking entry point (settings caption test) runs the same coroutine."""
+    service = FileParserService(mineru_token='test-token', provider_format='vertex')
+    with patch.object(service, '_agenerate_single_caption', AsyncMock(return_value='顶点描述')) as agenerate:
+        assert service._generate_single_caption('/files/mineru/demo.png') == '顶点描述'
+    agenerate.assert_awaited_once_with('/files/mineru/demo.png')
+
+
 def _build_mineru_zip() -> bytes:
     zip_buffer = io.BytesIO()
     with zipfile.ZipFile(zip_buffer, 'w') as archive:
@@ -117,7 +141,7 @@ def test_download_markdown_uses_flask_upload_folder_for_mineru_results(app, tmp_
         mock_response.content = _build_mineru_zip()
         mock_response.raise_for_status.return_value = None
 
-        with patch('requests.get', return_value=mock_response):
+        with patch('services.http_client.get', return_value=mock_response):
             with patch('uuid.uuid4', return_value=uuid.UUID('f58159a1-0000-0000-0000-000000000000')):
                 markdown, extract_id, error = service._download_markdown('https://example.test/result.zip')
 
@@ -139,7 +163,7 @@ def test_download_markdown_resolves_flask_upload_folder_at_runtime(app, tmp_path
 
     with app.app_context():
         monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(desktop_uploads))
-        with patch('requests.get', return_value=mock_response):
+        with patch('services.http_client.get', return_value=mock_response):
             with patch('uuid.uuid4', return_value=uuid.UUID('ab2d6b8b-0000-0000-0000-000000000000')):
                 _markdown, extract_id, error = service._download_markdown('https://example.test/result.zip')
 
@@ -0,0 +1,47 @@
+import io
+import os
+
+from PIL import Image
+
+
+def _write_page_image(app, project_id="thumb-project", filename="page-1_v2.png", size=(1920, 1080)):
+    pages_dir = os.path.join(app.config["UPLOAD_FOLDER"], project_id, "pages")
+    os.makedirs(pages_dir, exist_ok=True)
+    path = os.path.join(pages_dir, filename)
+    Image.new("RGB", size, (30, 120, 200)).save(path)
+    return f"/files/{project_id}/pages/{filename}", path
+
+
+def test_width_variant_is_generated_once_and_cached_immutably(client, app):
+    url, source_path = _write_page_image(app)
+    full = client.get(url)
+
+    response = client.get(f"{url}?w=200")
+
+    assert response.status_code == 200
+    assert response.mimetype == "image/jpeg"
+    variant = Image.open(io.BytesIO(response.data))
+    assert variant.width == 256  # snapped up to the pyramid level
+    assert len(response.data) * 10 < len(full.data)
+    assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    variant_path = os.path.join(os.path.dirname(source_path), ".thumbs", "page-1_v2_w256.jpg")
+    assert os.path.exists(variant_path)
+
+    etag = response.headers["ETag"]
+    assert not etag.startswith("W/")
+    revalidated = client.get(f"{url}?w=256", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+
+
+def test_format_auto_negotiates_from_accept_and_unversioned_files_revalidate(client, app):
+    url, _ = _write_page_image(app, filename="template.png", size=(800, 450))
+
+    webp = client.get(f"{url}?w=640&format=auto", headers={"Accept": "image/webp,image/*"})
+    plain = client.get(f"{url}?format=auto", headers={"Accept": "image/*"})
+
+    assert webp.mimetype == "image/webp"
+    assert "Accept" in webp.headers["Vary"]
+    assert webp.headers["Cache-Control"] == "no-cache"
+    # No supported format advertised and no resize requested: the original is served as is
+    assert plain.mimetype == "image/png"
+    assert client.get(f"{url}?w=0").status_code == 400
@@ -0,0 +1,97 @@
+"""Bbox geometry: sweep + union-find merging and vectorized containment match the pairwise loops."""
+
+import random
+
+import numpy as np
+
+from services.image_editability.hybrid_extractor import BBoxUtils
+from utils import geometry
+from utils.mask_utils import merge_overlapping_bboxes
+
+
+def _random_boxes(rng, count, canvas=2000, max_size=120):
+    boxes = []
+    for _ in range(count):
+        x0, y0 = rng.randrange(canvas), rng.randrange(canvas)
+        boxes.append((x0, y0, x0 + rng.randrange(1, max_size), y0 + rng.randrange(1, max_size)))
+    return boxes
+
+
+def _pairwise_merge(boxes, threshold):
+    """The all-pairs fixpoint loop merge_overlapping_bboxes used before the sweep."""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        new_boxes, used = [], set()
+        for i, current in enumerate(boxes):
+            if i in used:
+                continue
+            for j, other in enumerate(boxes):
+                if j <= i or j in used:
+                    continue
+                if (current[0] - threshold <= other[2] and other[0] <= current[2] + threshold and
+                        current[1] - threshold <= other[3] and other[1] <= current[3] + threshold):
+                    current = (min(current[0], other[0]), min(current[1], other[1]),
+                               max(current[2], other[2]), max(current[3], other[3]))
+                    used.add(j)
+                    merged = True
+            new_boxes.append(current)
+            used.add(i)
+        boxes = new_boxes
+    return boxes
+
+
+def test_merge_matches_pairwise_fixpoint():
+    rng = random.Random(7)
+    for count, threshold in ((0, 10), (1, 10), (40, 0), (300, 10), (600, 25)):
+        boxes = _random_boxes(rng, count)
+        assert merge_overlapping_bboxes(boxes, threshold) == _pairwise_merge(boxes, threshold)
+
+    # 合并后的大框才碰到的框也要并入（需要第二轮）
+    chain = [(0, 0, 10, 10), (100, 0, 110, 10), (12, 0, 98, 4), (50, 30, 60, 40), (0, 12, 5, 25)]
+    assert merge_overlapping_bboxes(chain, 2) == _pairwise_merge(chain, 2) == [(0, 0, 110, 25), (50, 30, 60, 40)]
+
+
+def test_vectorized_ratios_match_scalar_checks():
+    rng = random.Random(11)
+    inner = _random_boxes(rng, 60, canvas=400) + [[], None, (5, 5, 5, 9)]
+    outer = _random_boxes(rng, 40, canvas=400, max_size=300)
+    contained = geometry.containment_matrix(geometry.as_array(inner), geometry.as_array(outer)) >= 0.8
+    overlapping = geometry.overlap_min_area_matrix(geometry.as_array(inner), geometry.as_array(outer)) >= 0.1
+
+    for i, a in enumerate(inner):
+        for j, b in enumerate(outer):
+            expected_contained = expected_overlap = False
+            if a and b:
+                iw = min(a[2], b[2]) - max(a[0], b[0])
+                ih = min(a[3], b[3]) - max(a[1], b[1])
+                area_a = (a[2] - a[0]) * (a[3] - a[1])
+                area_b = (b[2] - b[0]) * (b[3] - b[1])
+                if iw > 0 and ih > 0 and area_a > 0:
+                    expected_contained = iw * ih / area_a >= 0.8
+                    expected_overlap = iw * ih / min(area_a, area_b) >= 0.1
+            assert contained[i, j] == expected_contained == BBoxUtils.is_contained(a, b)
+            assert overlapping[i, j] == expected_overlap == BBoxUtils.has_intersection(a, b)
+
+
+def test_min_pairwise_gap_matches_pairwise_loop():
+    rng = np.random.default_rng(3)
+    origin = rng.uniform(0, 500, size=(150, 2))
+    boxes = np.hstack([origin, origin + rng.uniform(5, 60, size=(150, 2))])
+
+    expected = float('inf')
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            (ax0, ay0, ax1, ay1), (bx0, by0, bx1, by1) = boxes[i], boxes[j]
+            x_overlap = not (ax1 <= bx0 or bx1 <= ax0)
+            y_overlap = not (ay1 <= by0 or by1 <= ay0)
+            if x_overlap and y_overlap:
+                expected = min(expected, -min(min(ax1, bx1) - max(ax0, bx0), min(ay1, by1) - max(ay0, by0)))
+            elif x_overlap:
+                expected = min(expected, by0 - ay1 if ay1 <= by0 else ay0 - by1)
+            elif y_overlap:
+                expected = min(expected, bx0 - ax1 if ax1 <= bx0 else ax0 - bx1)
+
+    assert geometry.min_pairwise_gap(boxes) == expected
+    assert geometry.min_pairwise_gap(boxes[:1]) == float('inf')
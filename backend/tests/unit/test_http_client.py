@@ -0,0 +1,83 @@
+"""Shared HTTP client: keep-alive reuse across threads, central retry policy and pool stats."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    hits = {}
+    lock = threading.Lock()
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        with self.lock:
+            self.hits[(self.command, self.path)] = self.hits.get((self.command, self.path), 0) + 1
+            count = self.hits[(self.command, self.path)]
+        # /flaky 第一次返回 503
+        status = 503 if self.path == '/flaky' and count == 1 else 200
+        body = b'ok'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 503:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    for key in ('HTTP_PROXY', 'HTTPS_PROXY', 'ALL_PROXY', 'http_proxy', 'https_proxy', 'all_proxy'):
+        monkeypatch.delenv(key, raising=False)
+    _Handler.hits = {}
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    http_client.reset()
+    yield f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+    httpd.server_close()
+    http_client.reset()
+
+
+def test_connections_are_reused_across_calls_and_threads(server):
+    def poll(_):
+        for _ in range(5):
+            assert http_client.get(f'{server}/status').text == 'ok'
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        list(pool.map(poll, range(3)))
+
+    [stats] = [s for s in http_client.pool_stats() if s['port'] == int(server.rsplit(':', 1)[1])]
+    assert stats['requests'] == 15
+    assert stats['connections_opened'] <= 3
+    assert stats['reused'] == 15 - stats['connections_opened']
+
+
+def test_retries_idempotent_requests_only(server):
+    assert http_client.get(f'{server}/flaky').status_code == 200
+    assert _Handler.hits[('GET', '/flaky')] == 2
+
+    # POST 不自动重试，调用方拿到原始状态码
+    assert http_client.post(f'{server}/flaky', json={'a': 1}).status_code == 503
+    assert _Handler.hits[('POST', '/flaky')] == 1
+
+
+def test_http_pools_endpoint(client, server):
+    http_client.get(f'{server}/status')
+    response = client.get('/api/settings/http-pools')
+    assert response.status_code == 200
+    pools = response.get_json()['data']['pools']
+    assert any(p['host'] == '127.0.0.1' and p['requests'] == 1 for p in pools)
@@ -2,12 +2,14 @@ from PIL import Image
 import pytest
 
 from models import Settings, db
+from services import async_runner
 from services.ai_service import AIService
 from services.task_manager import (
     IMAGE_QUALITY_CONTROL_MAX_ATTEMPTS,
     ImageQualityControlError,
     _format_quality_review_failure,
     _get_absolute_page_index,
+    agenerate_image_until_quality_passes,
     generate_image_until_quality_passes,
     get_image_quality_control_enabled,
     review_image_quality,
@@ -111,6 +113,37 @@ def test_image_quality_control_retries_until_review_passes():
     assert ai_service.calls[0][1]['page_index'] == 1
 
 
+def test_async_image_quality_control_retries_until_review_passes():
+    ai_service = FakeReviewService([
+        {'passed': False, 'issues': ['garbled text'], 'reason': 'Text is unreadable'},
+        {'passed': True, 'issues': [], 'reason': 'Looks good'},
+    ])
+    generated = []
+
+    async def agenerate():
+        generated.append(True)
+        return _image()
+
+    result = async_runner.run(agenerate_image_until_quality_passes(
+        agenerate,
+        ai_service,
+        'prompt',
+        'description',
+        page_index=1,
+        quality_control_enabled=True,
+    ))
+
+    assert result.size == (160, 90)
+    assert len(generated) == 2
+    assert len(ai_service.calls) == 2
+
+    ai_service = FakeReviewService([{'passed': False, 'issues': ['bad style'], 'reason': 'Mismatch'}] * 2)
+    with pytest.raises(ImageQualityControlError, match='Mismatch'):
+        async_runner.run(agenerate_image_until_quality_passes(
+            agenerate, ai_service, 'prompt', 'description', quality_control_enabled=True, max_attempts=2,
+        ))
+
+
 def test_image_quality_control_fails_without_returning_unreviewed_image():
     ai_service = FakeReviewService([
         {'passed': False, 'issues': ['bad style'], 'reason': 'Mismatch'},
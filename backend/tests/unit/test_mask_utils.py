@@ -0,0 +1,91 @@
+"""Array-backed mask builders and overlay rendering match the old ImageDraw / per-pixel output."""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from services.image_editability.inpaint_providers import BaiduInpaintProvider
+from utils.mask_utils import build_bbox_mask, create_mask_from_bboxes, visualize_mask_overlay
+
+BBOXES = [
+    (10, 12, 40, 30),
+    (35.6, 20.4, 60.5, 44.9),
+    {'x': 70, 'y': 5, 'width': 25, 'height': 10},
+    {'x1': 2, 'y1': 50, 'x2': 12, 'y2': 58},
+    (90, 55, 140, 90),       # 超出图像，裁剪
+    (50, 50, 53, 52),        # 收缩后无效
+    (20, 20, 20, 40),        # 零宽度
+    'not-a-bbox',
+]
+
+
+def _draw_reference(size, bboxes, expand):
+    """The ImageDraw loop create_mask_from_bboxes used before."""
+    mask = Image.new('RGB', size, (0, 0, 0))
+    draw = ImageDraw.Draw(mask)
+    for bbox in bboxes:
+        if isinstance(bbox, dict):
+            if 'x1' in bbox:
+                x1, y1, x2, y2 = bbox['x1'], bbox['y1'], bbox['x2'], bbox['y2']
+            else:
+                x1, y1, x2, y2 = bbox['x'], bbox['y'], bbox['x'] + bbox['width'], bbox['y'] + bbox['height']
+        elif isinstance(bbox, tuple):
+            x1, y1, x2, y2 = bbox
+        else:
+            continue
+        if expand > 0:
+            x1, y1, x2, y2 = max(0, x1 - expand), max(0, y1 - expand), min(size[0], x2 + expand), min(size[1], y2 + expand)
+        elif expand < 0:
+            x1, y1, x2, y2 = x1 - expand, y1 - expand, x2 + expand, y2 + expand
+            if x2 <= x1 or y2 <= y1:
+                continue
+        x1, y1 = max(0, min(x1, size[0])), max(0, min(y1, size[1]))
+        x2, y2 = max(0, min(x2, size[0])), max(0, min(y2, size[1]))
+        if x2 <= x1 or y2 <= y1:
+            continue
+        draw.rectangle([x1, y1, x2, y2], fill=(255, 255, 255))
+    return np.asarray(mask)
+
+
+def test_array_mask_matches_imagedraw_and_shares_memory():
+    size = (120, 80)
+    for expand in (0, 4, -2):
+        expected = _draw_reference(size, BBOXES, expand)
+        assert np.array_equal(np.asarray(create_mask_from_bboxes(size, BBOXES, expand_pixels=expand)), expected)
+        array, image = build_bbox_mask(size, BBOXES, expand_pixels=expand)
+        assert array.shape == (80, 120) and image.mode == 'L'
+        assert np.array_equal(array, expected[..., 0])
+
+    array[0, 0] = 123
+    assert image.getpixel((0, 0)) == 123
+
+
+def test_overlay_blends_mask_in_one_pass():
+    original = Image.new('RGB', (64, 48), (200, 100, 50))
+    mask_array, mask_image = build_bbox_mask(original.size, [(8, 8, 30, 20)])
+
+    overlay = Image.new('RGBA', original.size, (0, 0, 0, 0))
+    for y in range(original.height):
+        for x in range(original.width):
+            if mask_image.getpixel((x, y)) > 200:
+                overlay.putpixel((x, y), (0, 0, 0, int(128 * 0.6)))
+    expected = Image.alpha_composite(original.convert('RGBA'), overlay).convert('RGB')
+
+    assert np.array_equal(np.asarray(visualize_mask_overlay(original, mask_image, 0.6)), np.asarray(expected))
+    assert np.array_equal(np.asarray(visualize_mask_overlay(original, mask_array, 0.6)), np.asarray(expected))
+
+
+def test_baidu_provider_accepts_ndarray_and_only_replaces_bbox_pixels():
+    original = np.full((40, 60, 3), 10, dtype=np.uint8)
+    backend = MagicMock()
+    backend.inpaint_bboxes.return_value = Image.new('RGB', (60, 40), (250, 250, 250))
+
+    result = BaiduInpaintProvider(backend).inpaint_regions(original, [(5, 5, 20, 15)], expand_pixels=2)
+
+    assert isinstance(backend.inpaint_bboxes.call_args.kwargs['image'], Image.Image)
+    result = np.asarray(result)
+    assert (result[5:16, 5:21] == 250).all()
+    result_outside = result.copy()
+    result_outside[5:16, 5:21] = 10
+    assert (result_outside == 10).all()
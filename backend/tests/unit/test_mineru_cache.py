@@ -0,0 +1,96 @@
+"""
+Unit tests for the content-addressed MinerU parse cache.
+"""
+
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+
+from services.file_parser_service import FileParserService
+from services.image_editability.extractors import MinerUElementExtractor
+from services.mineru_cache import MinerUParseCache, get_mineru_cache
+
+
+def _fake_mineru(service, upload_folder: Path, calls: list):
+    """Patch the MinerU HTTP round trip with one that writes a result directory."""
+    def poll_result(batch_id):
+        extract_id = f"ex{len(calls)}"
+        calls.append(batch_id)
+        result_dir = upload_folder / 'mineru_files' / extract_id
+        (result_dir / 'images').mkdir(parents=True)
+        (result_dir / 'images' / 'fig.png').write_bytes(b'png')
+        (result_dir / 'full.md').write_text('# Title\n![](images/fig.png)', encoding='utf-8')
+        markdown = service._replace_image_paths('# Title\n![](images/fig.png)', 'full.md', extract_id)
+        return markdown, extract_id, None
+
+    return [
+        patch.object(service, '_get_upload_url', return_value=('batch-1', 'https://upload', None)),
+        patch.object(service, '_upload_file', return_value=None),
+        patch.object(service, '_poll_result', side_effect=poll_result),
+        patch.object(service, '_can_generate_captions', return_value=False),
+    ]
+
+
+def test_parse_file_reuses_cached_result_for_identical_bytes(tmp_path):
+    service = FileParserService(mineru_token='test-token', upload_folder=tmp_path)
+    doc_a = tmp_path / 'a.pdf'
+    doc_b = tmp_path / 'copy-of-a.pdf'
+    doc_a.write_bytes(b'%PDF-1.4 same content')
+    doc_b.write_bytes(b'%PDF-1.4 same content')
+    calls = []
+    patches = _fake_mineru(service, tmp_path, calls)
+    for p in patches:
+        p.start()
+    try:
+        first = service.parse_file(str(doc_a), 'a.pdf')
+        second = service.parse_file(str(doc_b), 'copy-of-a.pdf')
+    finally:
+        for p in patches:
+            p.stop()
+
+    assert calls == ['batch-1']
+    assert second == first
+    assert '/files/mineru/ex0/images/fig' in second[1]
+    assert get_mineru_cache(tmp_path).stats() == {'hits': 1, 'misses': 1}
+
+
+def test_mineru_extractor_skips_parsing_unchanged_slide(tmp_path):
+    service = FileParserService(mineru_token='test-token', upload_folder=tmp_path)
+    extractor = MinerUElementExtractor(service, tmp_path)
+    image_path = tmp_path / 'slide.png'
+    Image.new('RGB', (32, 18), color='blue').save(image_path)
+    (tmp_path / 'mineru_files' / 'slide01').mkdir(parents=True)
+
+    assert extractor._find_cache(str(image_path)) is None
+    with patch.object(service, 'parse_file', return_value=('b', 'md', 'slide01', None, 0)) as parse_file, \
+            patch('services.export_service.ExportService.create_pdf_from_images', return_value=None):
+        result_dir, error = extractor._parse_image(str(image_path), depth=0)
+
+    assert error is None
+    assert parse_file.call_args.kwargs['use_cache'] is False
+    assert extractor._find_cache(str(image_path)) == result_dir
+
+
+def test_eviction_drops_least_recently_used_entries(tmp_path):
+    cache = MinerUParseCache(tmp_path, max_bytes=250)
+    for extract_id in ('old', 'reference', 'new'):
+        result_dir = tmp_path / 'mineru_files' / extract_id
+        result_dir.mkdir(parents=True)
+        (result_dir / 'layout.json').write_bytes(b'x' * 100)
+
+    cache.put('k-old', 'old')
+    cache.put('k-reference', 'reference', owned=False)
+    past = time.time() - 60
+    os.utime(cache.index_dir / 'k-old.json', (past, past))
+    os.utime(cache.index_dir / 'k-reference.json', (past + 1, past + 1))
+    assert cache.get('k-old')  # touching makes 'reference' the least recently used
+
+    cache.put('k-new', 'new')
+
+    assert cache.get('k-reference') is None
+    assert (tmp_path / 'mineru_files' / 'reference').is_dir()  # not owned: only forgotten
+    assert cache.get('k-old')['extract_id'] == 'old'
+    assert cache.get('k-new')['extract_id'] == 'new'
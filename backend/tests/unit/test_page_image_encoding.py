@@ -0,0 +1,53 @@
+"""Generated page images: concurrent durable encoding before the version row is committed."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from models import db, Page, PageImageVersion
+from services import task_manager as tm
+from services.file_service import FileService
+from services.image_encoder import write_image_durably
+
+
+def test_version_row_is_committed_only_after_both_files_are_on_disk(app, sample_project):
+    project_id = sample_project['project_id']
+    with app.app_context():
+        page = Page(project_id=project_id, order_index=0, status='GENERATING')
+        db.session.add(page)
+        db.session.commit()
+        file_service = FileService(app.config['UPLOAD_FOLDER'])
+        upload = app.config['UPLOAD_FOLDER']
+        real_commit = tm._commit_with_retry
+        seen_at_commit = []
+
+        def checking_commit(*args, **kwargs):
+            seen_at_commit.append(sorted(os.listdir(os.path.join(upload, project_id, 'pages'))))
+            return real_commit(*args, **kwargs)
+
+        image = Image.new('RGB', (2400, 1350), 'navy')
+        with patch.object(tm, '_commit_with_retry', side_effect=checking_commit):
+            image_path, version = tm.save_image_with_version(image, project_id, page.id, file_service, page_obj=page)
+
+        assert version == 1
+        assert seen_at_commit == [[f'{page.id}_v1.png', f'{page.id}_v1_thumb.jpg']]
+        assert PageImageVersion.query.filter_by(page_id=page.id, is_current=True).one().image_path == image_path
+        with Image.open(os.path.join(upload, page.cached_image_path)) as thumb:
+            assert (thumb.format, thumb.width) == ('JPEG', 1920)
+        with Image.open(os.path.join(upload, image_path)) as original:
+            assert (original.format, original.size) == ('PNG', (2400, 1350))
+
+
+def test_failed_encode_keeps_previous_file_and_leaves_no_temp(tmp_path):
+    target = tmp_path / 'page_v1.png'
+    write_image_durably(Image.new('RGB', (8, 8), 'red'), target)
+
+    with pytest.raises(OSError):
+        # JPEG cannot hold an alpha channel
+        write_image_durably(Image.new('RGBA', (8, 8)), target, 'JPEG')
+
+    assert os.listdir(tmp_path) == ['page_v1.png']
+    with Image.open(target) as kept:
+        assert kept.getpixel((0, 0)) == (255, 0, 0)
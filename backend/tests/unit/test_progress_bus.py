@@ -0,0 +1,116 @@
+"""Task progress is pushed through the in-process bus and the SSE stream endpoint."""
+
+import json
+import queue
+import threading
+
+import pytest
+
+from cli.banana_cli.jobs.workflow import wait_task
+from models import db, Task
+from services.progress_bus import ProgressBus, ProgressCheckpoint, progress_bus, progress_delta
+
+
+def _parse_sse(chunk):
+    text = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+    event = data = None
+    for line in text.splitlines():
+        if line.startswith('event:'):
+            event = line[len('event:'):].strip()
+        elif line.startswith('data:'):
+            data = json.loads(line[len('data:'):])
+    return event, data
+
+
+@pytest.mark.unit
+def test_bus_wait_returns_latest_state_and_checkpoints_are_coarse():
+    bus = ProgressBus()
+    assert bus.wait('t1', 0, timeout=0.01) == (0, None)
+
+    bus.publish('t1', progress={'total': 10, 'completed': 1, 'failed': 0}, status='PROCESSING')
+    seq = bus.publish('t1', progress={'total': 10, 'completed': 2, 'failed': 0})
+    assert bus.wait('t1', 0, timeout=1) == (seq, {
+        'status': 'PROCESSING',
+        'progress': {'total': 10, 'completed': 2, 'failed': 0},
+    })
+    assert progress_delta(
+        {'status': 'PROCESSING', 'progress': {'completed': 1, 'total': 10}},
+        {'status': 'PROCESSING', 'progress': {'completed': 2, 'total': 10}},
+    ) == {'progress': {'completed': 2}}
+
+    checkpoint = ProgressCheckpoint(total=20, interval=3600)
+    assert [done for done in range(1, 21) if checkpoint.due(done)] == [2, 4, 6, 8, 10, 12, 14, 16, 18, 20]
+
+
+@pytest.mark.unit
+def test_stream_endpoint_pushes_deltas_until_done(client, sample_project):
+    project_id = sample_project['project_id']
+    with client.application.app_context():
+        task = Task(project_id=project_id, task_type='GENERATE_IMAGES', status='PROCESSING')
+        task.set_progress({'total': 3, 'completed': 0, 'failed': 0})
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+
+    # Read the stream in its own thread (as a real client would) so this
+    # thread can publish updates between events.
+    chunks = queue.Queue()
+    stream_client = client.application.test_client()
+
+    def read_stream():
+        response = stream_client.get(f'/api/projects/{project_id}/tasks/{task_id}/stream', buffered=False)
+        chunks.put(response.mimetype)
+        for chunk in response.response:
+            chunks.put(chunk)
+        response.close()
+        chunks.put(None)
+
+    reader = threading.Thread(target=read_stream, daemon=True)
+    reader.start()
+    assert chunks.get(timeout=10) == 'text/event-stream'
+
+    event, data = _parse_sse(chunks.get(timeout=10))
+    assert event == 'snapshot'
+    assert data['progress'] == {'total': 3, 'completed': 0, 'failed': 0}
+
+    progress_bus.publish(task_id, progress={'total': 3, 'completed': 1, 'failed': 0})
+    assert _parse_sse(chunks.get(timeout=10)) == ('progress', {'progress': {'completed': 1}})
+
+    progress_bus.publish(task_id, progress={'total': 3, 'completed': 3, 'failed': 0}, status='COMPLETED')
+    event, data = _parse_sse(chunks.get(timeout=10))
+    assert event == 'done'
+    assert data['status'] == 'COMPLETED'
+    assert data['progress']['completed'] == 3
+    assert chunks.get(timeout=10) is None
+    reader.join(timeout=10)
+
+
+class _StreamingTaskAPI:
+    def __init__(self):
+        self.polled = 0
+
+    def stream_events(self, _path):
+        yield 'snapshot', {'status': 'PROCESSING', 'task_type': 'GENERATE_IMAGES',
+                           'progress': {'total': 2, 'completed': 0, 'failed': 0}}
+        yield None, None
+        yield 'progress', {'progress': {'completed': 1}}
+        yield 'done', {'status': 'COMPLETED', 'task_type': 'GENERATE_IMAGES',
+                       'progress': {'total': 2, 'completed': 2, 'failed': 0}}
+
+    def get(self, _path):
+        self.polled += 1
+        raise AssertionError('should not poll when the stream finishes')
+
+
+@pytest.mark.unit
+def test_cli_wait_task_follows_the_stream():
+    api = _StreamingTaskAPI()
+    events = []
+
+    final = wait_task(api, 'proj-1', 'task-1', timeout_sec=5, poll_interval=0,
+                      progress_callback=events.append)
+
+    assert final['status'] == 'COMPLETED'
+    assert [event['progress']['completed'] for event in events if event['event'] == 'task_polled'] == [0, 1, 2]
+    assert events[-1]['event'] == 'task_completed'
+    assert api.polled == 0
@@ -0,0 +1,74 @@
+"""Generation tasks batch page results and task progress into few transactions."""
+
+from sqlalchemy import event
+
+import pytest
+
+from models import db, Page, Task
+from services.progress_bus import progress_bus
+from services.progress_writer import BatchedProgressWriter
+
+
+def _make_pages(project_id, count):
+    pages = [Page(project_id=project_id, order_index=i, status='GENERATING_DESCRIPTION') for i in range(count)]
+    task = Task(project_id=project_id, task_type='GENERATE_DESCRIPTIONS', status='PROCESSING')
+    db.session.add_all([*pages, task])
+    db.session.commit()
+    return [page.id for page in pages], task.id
+
+
+@pytest.mark.unit
+def test_writer_batches_statuses_and_writes_descriptions_immediately(client, sample_project):
+    project_id = sample_project['project_id']
+    with client.application.app_context():
+        page_ids, task_id = _make_pages(project_id, 4)
+        writer = BatchedProgressWriter(
+            task_id, {'total': 4, 'completed': 0, 'failed': 0}, flush_interval_ms=60_000, flush_every=3,
+        )
+        commits = []
+
+        def count_commit(conn):
+            commits.append(conn)
+
+        event.listen(db.engine, 'commit', count_commit)
+        try:
+            writer.page_done(page_ids[0], 'DESCRIPTION_GENERATED', {'text': 'one'})
+            # 生成的描述立即落库，崩溃重启后不会丢失已付费的结果
+            assert len(commits) == 1 and writer.pending == 0
+            writer.page_done(page_ids[1], 'FAILED')
+            writer.update_progress(completed=1, failed=1)
+            assert not writer.flush_if_due()
+            assert progress_bus.get(task_id)[1]['progress']['completed'] == 1
+
+            writer.page_done(page_ids[2], 'FAILED')
+            writer.page_done(page_ids[3], 'FAILED')
+            writer.update_progress(completed=1, failed=3)
+            assert writer.flush_if_due()
+        finally:
+            event.remove(db.engine, 'commit', count_commit)
+
+        assert len(commits) == 2  # the description, then one batch for the rest
+        db.session.expire_all()
+        pages = {page.id: page for page in Page.query.filter(Page.id.in_(page_ids))}
+        assert pages[page_ids[0]].status == 'DESCRIPTION_GENERATED'
+        assert pages[page_ids[0]].get_description_content() == {'text': 'one'}
+        assert pages[page_ids[1]].status == 'FAILED'
+        assert pages[page_ids[2]].status == 'FAILED'
+        assert pages[page_ids[3]].status == 'FAILED'
+        assert db.session.get(Task, task_id).get_progress() == {'total': 4, 'completed': 1, 'failed': 3}
+        assert writer.pending == 0 and writer.seconds_until_due() is None
+
+
+@pytest.mark.unit
+def test_writer_flush_is_due_once_buffered_results_age_out(client, sample_project):
+    project_id = sample_project['project_id']
+    with client.application.app_context():
+        page_ids, task_id = _make_pages(project_id, 1)
+        writer = BatchedProgressWriter(task_id, {'total': 1, 'completed': 0, 'failed': 0},
+                                       flush_interval_ms=0, flush_every=100)
+        assert not writer.flush()
+
+        writer.page_done(page_ids[0], 'FAILED')
+        assert writer.due()
+        assert writer.flush_if_due()
+        assert writer.commits == 1
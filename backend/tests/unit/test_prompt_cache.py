@@ -0,0 +1,156 @@
+"""Shared page-description prefix: byte-identical per task, sent through provider context caches."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services import async_runner
+from services.ai_providers.text.anthropic_provider import AnthropicTextProvider
+from services.ai_providers.text.genai_provider import GenAITextProvider
+from services.ai_service import ProjectContext
+from services.prompt_cache import PromptCacheStats, track_prompt_cache
+from services.prompts import (
+    get_page_description_prefix, get_page_description_prompt, get_page_description_suffix,
+)
+
+OUTLINE = [
+    {'title': 'Cover', 'points': []},
+    {'title': 'Revenue growth', 'points': ['subscription renewals'], 'part': 'Business'},
+]
+
+
+def _context(content):
+    files = [{'filename': 'report.md', 'content': content}]
+    return ProjectContext({'idea_prompt': 'annual review', 'creation_type': 'idea'}, files)
+
+
+def test_prefix_is_shared_and_page_parts_go_to_suffix(app):
+    long_doc = '\n\n'.join(f'## Section {i}\n\n' + f'revenue detail {i} ' * 200 for i in range(30))
+    with app.app_context():
+        app.config['REFERENCE_CONTEXT_TOKEN_BUDGET'] = 6000
+        for context, inline in ((_context('short reference'), True), (_context(long_doc), False)):
+            prefix = get_page_description_prefix(context, OUTLINE, language='zh')
+            assert prefix == get_page_description_prefix(context, OUTLINE, language='zh')
+            assert ('<uploaded_files>' in prefix) is inline
+
+            suffix = get_page_description_suffix(context, OUTLINE[1], 2, part_info='\nThis page belongs to: Business')
+            assert 'Revenue growth' in suffix and 'Revenue growth' not in prefix.split('大纲')[0]
+            assert ('excerpt="true"' in suffix) is (not inline)
+            assert get_page_description_prompt(context, OUTLINE, OUTLINE[1], 2, part_info='\nThis page belongs to: Business',
+                                               language='zh') == prefix + suffix
+
+
+def test_anthropic_marks_prefix_for_caching_and_reports_hits():
+    with patch('services.ai_providers.text.anthropic_provider.Anthropic'):
+        provider = AnthropicTextProvider(api_key='k')
+    provider.client.messages.create.return_value = SimpleNamespace(
+        content=[SimpleNamespace(text='ok')],
+        usage=SimpleNamespace(input_tokens=50, cache_read_input_tokens=3000, cache_creation_input_tokens=0),
+    )
+
+    stats = PromptCacheStats()
+    with track_prompt_cache(stats):
+        assert provider.generate_text_with_prefix('PREFIX', 'page 2') == 'ok'
+    provider.generate_text_with_prefix('PREFIX', 'page 3')  # 不在 track 范围内，不计数
+
+    content = provider.client.messages.create.call_args.kwargs['messages'][0]['content']
+    assert content[0] == {'type': 'text', 'text': 'PREFIX', 'cache_control': {'type': 'ephemeral'}}
+    assert content[1] == {'type': 'text', 'text': 'page 3'}
+    assert stats.as_progress() == {'prompt_tokens': 3050, 'cached_prompt_tokens': 3000}
+
+
+def test_genai_creates_cached_content_once_and_falls_back():
+    with patch('services.ai_providers.text.genai_provider.make_genai_client', return_value=MagicMock()):
+        provider = GenAITextProvider(model='gemini-test')
+    client = provider.client
+    client.caches.create.return_value = SimpleNamespace(name='cachedContents/abc')
+    client.models.generate_content.return_value = SimpleNamespace(
+        text='ok', usage_metadata=SimpleNamespace(total_token_count=10, prompt_token_count=5000,
+                                                  cached_content_token_count=4900))
+    prefix = 'shared project prefix ' * 600
+
+    stats = PromptCacheStats()
+    with track_prompt_cache(stats):
+        for page in range(3):
+            assert provider.generate_text_with_prefix(prefix, f'page {page}') == 'ok'
+    assert client.caches.create.call_count == 1
+    call = client.models.generate_content.call_args.kwargs
+    assert call['contents'] == 'page 2' and call['config'].cached_content == 'cachedContents/abc'
+    assert stats.as_progress() == {'prompt_tokens': 15000, 'cached_prompt_tokens': 14700}
+
+    # 短前缀不建缓存；建缓存失败后整段发送且不再重试
+    provider.generate_text_with_prefix('short', ' page')
+    assert client.models.generate_content.call_args.kwargs['contents'] == 'short page'
+    client.caches.create.side_effect = RuntimeError('caching not supported')
+    other = 'another prefix ' * 900
+    provider.generate_text_with_prefix(other, 'x')
+    provider.generate_text_with_prefix(other, 'y')
+    assert client.caches.create.call_count == 2
+    assert client.models.generate_content.call_args.kwargs['contents'] == other + 'y'
+
+
+def test_genai_cached_call_retries_transient_errors_and_drops_only_bad_caches():
+    from google.genai import errors
+    from tenacity import wait_none
+
+    with patch('services.ai_providers.text.genai_provider.make_genai_client', return_value=MagicMock()):
+        provider = GenAITextProvider(model='gemini-test')
+    client = provider.client
+    client.caches.create.side_effect = [SimpleNamespace(name='cachedContents/one'),
+                                        SimpleNamespace(name='cachedContents/two')]
+    ok = SimpleNamespace(text='ok', usage_metadata=None)
+    prefix = 'shared project prefix ' * 600
+    throttled = errors.ClientError(429, {'error': {'message': 'Resource exhausted', 'status': 'RESOURCE_EXHAUSTED'}})
+    expired = errors.ClientError(404, {'error': {'message': 'CachedContent not found', 'status': 'NOT_FOUND'}})
+
+    with patch.object(GenAITextProvider._generate_with_cache.retry, 'wait', wait_none()):
+        # 5xx 在缓存调用内重试，缓存保留
+        client.models.generate_content.side_effect = [errors.ServerError(503, {}), ok]
+        assert provider.generate_text_with_prefix(prefix, 'page 1') == 'ok'
+        client.caches.delete.assert_not_called()
+
+        # 限流重试耗尽后直接抛出，不整段重发前缀
+        client.models.generate_content.side_effect = throttled
+        with pytest.raises(errors.ClientError):
+            provider.generate_text_with_prefix(prefix, 'page 2')
+        assert {c.kwargs['contents'] for c in client.models.generate_content.call_args_list[2:]} == {'page 2'}
+        client.caches.delete.assert_not_called()
+
+        # 缓存失效：删除旧缓存，本页整段发送，下一页重建
+        client.models.generate_content.side_effect = [expired, ok, ok]
+        assert provider.generate_text_with_prefix(prefix, 'page 3') == 'ok'
+        client.caches.delete.assert_called_once_with(name='cachedContents/one')
+        assert client.models.generate_content.call_args.kwargs['contents'] == prefix + 'page 3'
+        provider.generate_text_with_prefix(prefix, 'page 4')
+        assert client.models.generate_content.call_args.kwargs['config'].cached_content == 'cachedContents/two'
+    assert client.caches.create.call_count == 2
+
+
+def test_async_prefix_calls_use_the_same_caches():
+    from google.genai import errors
+
+    with patch('services.ai_providers.text.anthropic_provider.Anthropic'):
+        anthropic = AnthropicTextProvider(api_key='k')
+    anthropic._acreate = AsyncMock(return_value='ok')
+    assert async_runner.run(anthropic.agenerate_text_with_prefix('PREFIX', 'page 2')) == 'ok'
+    (messages,), _ = anthropic._acreate.await_args
+    assert messages[0]['content'][0]['cache_control'] == {'type': 'ephemeral'}
+    anthropic.client.messages.create.assert_not_called()
+
+    with patch('services.ai_providers.text.genai_provider.make_genai_client', return_value=MagicMock()):
+        provider = GenAITextProvider(model='gemini-test')
+    client = provider.client
+    client.caches.create.return_value = SimpleNamespace(name='cachedContents/abc')
+    expired = errors.ClientError(404, {'error': {'message': 'CachedContent not found', 'status': 'NOT_FOUND'}})
+    ok = SimpleNamespace(text='ok', usage_metadata=None)
+    client.aio.models.generate_content = AsyncMock(side_effect=[ok, expired, ok])
+    prefix = 'shared project prefix ' * 600
+
+    assert async_runner.run(provider.agenerate_text_with_prefix(prefix, 'page 1')) == 'ok'
+    assert client.aio.models.generate_content.await_args.kwargs['config'].cached_content == 'cachedContents/abc'
+    # 缓存失效：删除旧缓存，本页整段发送
+    assert async_runner.run(provider.agenerate_text_with_prefix(prefix, 'page 2')) == 'ok'
+    client.caches.delete.assert_called_once_with(name='cachedContents/abc')
+    assert client.aio.models.generate_content.await_args.kwargs['contents'] == prefix + 'page 2'
+    client.models.generate_content.assert_not_called()
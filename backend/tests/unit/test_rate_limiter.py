@@ -0,0 +1,113 @@
+"""Adaptive rate limiter: AIMD window, Retry-After backoff and per provider/model state."""
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from services.rate_limiter import (
+    AdaptiveLimiter,
+    ResourceLimiter,
+    is_throttle_error,
+    report_throttle,
+    retry_after_seconds,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+def test_throttle_halves_window_once_and_success_regrows_it():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter('image[test]', 8, requests_per_minute=60, clock=clock)
+
+    # Two calls in flight when the provider starts answering 429 with Retry-After: 3
+    first, second = limiter.acquire('a'), limiter.acquire('b')
+    error = ProviderError(429, {'retry-after': '3'})
+    assert is_throttle_error(error) and retry_after_seconds(error) == 3.0
+    limiter.record_throttle(first, retry_after_seconds(error))
+    limiter.record_throttle(second, retry_after_seconds(error))
+    limiter.release(first, succeeded=False)
+    limiter.release(second, succeeded=False)
+
+    state = limiter.snapshot()
+    assert state['concurrency_limit'] == 4  # halved once per window, not twice
+    assert state['backoff_seconds'] == 3.0
+    assert limiter._wait_seconds(0) == pytest.approx(3.0)
+
+    clock.now += 3
+    assert limiter._wait_seconds(0) == 0
+    for _ in range(12):
+        limiter.release(limiter.acquire('ok'), succeeded=True)
+        clock.now += 1
+    assert limiter.snapshot()['concurrency_limit'] > 4
+    assert not is_throttle_error(ValueError('page 429 has no description'))
+
+
+def test_slots_are_keyed_by_provider_and_model_and_learn_from_errors(app):
+    limiter = ResourceLimiter('text-test', 6, model_type='text')
+    with app.app_context():
+        previous_model = app.config.get('TEXT_MODEL')
+        app.config['TEXT_MODEL_SOURCE'] = 'openai'
+        app.config['TEXT_MODEL'] = 'gpt-test'
+        try:
+            with pytest.raises(RuntimeError):
+                with limiter.slot('page 1'):
+                    try:
+                        raise ProviderError(503)
+                    except ProviderError as e:
+                        raise RuntimeError('description failed') from e
+
+            with limiter.slot('page 2'):
+                # Swallowed by an extractor but still reported
+                assert report_throttle(Exception('429 RESOURCE_EXHAUSTED. retryDelay: "7s"'))
+        finally:
+            app.config.pop('TEXT_MODEL_SOURCE', None)
+            app.config['TEXT_MODEL'] = previous_model
+
+    (state,) = limiter.snapshot()
+    assert (state['provider'], state['model']) == ('openai', 'gpt-test')
+    assert state['throttles'] == 2
+    assert state['concurrency_limit'] == 1
+    assert state['last_retry_after'] == 7.0
+    assert not report_throttle(ProviderError(429))  # outside a slot
+
+
+def test_pool_threads_use_the_key_resolved_by_their_task(app, monkeypatch):
+    limiter = ResourceLimiter('caption-test', 4, model_type='image_caption')
+    monkeypatch.delenv('IMAGE_CAPTION_MODEL_SOURCE', raising=False)
+    keys = {}
+    with app.app_context():
+        for project, source in (('a', 'openai'), ('b', 'anthropic')):
+            monkeypatch.setitem(app.config, 'IMAGE_CAPTION_MODEL_SOURCE', source)
+            keys[project] = limiter.resolve_key()
+
+    def pool_call(key):
+        with limiter.slot('style', key=key):
+            pass
+
+    # 项目 a 的线程池在 b 解析之后运行，仍记在 a 的提供商下
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(pool_call, [keys['a'], keys['a'], keys['b']]))
+
+    successes = {state['provider']: state['successes'] for state in limiter.snapshot()}
+    assert successes == {'openai': 2, 'anthropic': 1}
+
+
+def test_rate_limits_endpoint_reports_limiters(client):
+    response = client.get('/api/settings/rate-limits')
+    assert response.status_code == 200
+    names = {item['name'] for item in response.get_json()['data']['limiters']}
+    assert {'image', 'text', 'caption'} <= names
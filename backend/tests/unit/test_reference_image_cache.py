@@ -0,0 +1,77 @@
+"""Reference image preprocessing cache"""
+import base64
+import threading
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from services.ai_providers.image import reference_cache
+from services.ai_providers.image.openai_provider import OpenAIImageProvider
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    reference_cache.reset()
+    yield
+    reference_cache.reset()
+
+
+def _make_provider():
+    with patch('services.ai_providers.image.openai_provider.OpenAI'):
+        return OpenAIImageProvider(api_key='test-key', model='gemini-3-pro-image-preview')
+
+
+def test_template_file_is_encoded_once_and_downscaled(tmp_path):
+    path = tmp_path / 'template.png'
+    Image.new('RGB', (4096, 2304), color='red').save(path)
+    provider = _make_provider()
+
+    # 每页都重新打开模板，内容哈希相同即命中
+    encoded = [provider._encode_image_to_base64(Image.open(path)) for _ in range(5)]
+
+    stats = reference_cache.get_cache().stats()
+    assert (stats['misses'], stats['hits']) == (1, 4)
+    assert len(set(encoded)) == 1
+    assert Image.open(BytesIO(base64.b64decode(encoded[0]))).size == (2048, 1152)
+
+
+def test_key_includes_target_size_and_content(tmp_path):
+    provider = _make_provider()
+    template = Image.new('RGB', (64, 64), color='blue')
+
+    small = provider._edit_reference_png(template, 32, 32)
+    large = provider._edit_reference_png(template, 128, 128)
+    other = provider._edit_reference_png(Image.new('RGB', (64, 64), color='green'), 32, 32)
+
+    assert Image.open(BytesIO(small)).size == (32, 32)
+    assert Image.open(BytesIO(large)).size == (128, 128)
+    assert small != other
+    assert reference_cache.get_cache().stats()['entries'] == 3
+
+
+def test_concurrent_misses_encode_once_and_lru_is_bounded():
+    cache = reference_cache.ReferenceImageCache(max_bytes=10)
+    calls = []
+    start = threading.Event()
+
+    def build():
+        calls.append(1)
+        start.wait(1)
+        return b'12345'
+
+    threads = [threading.Thread(target=cache.get_or_create, args=('a', build)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+    cache.get_or_create('b', lambda: b'12345')
+    cache.get_or_create('c', lambda: b'12345')
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['bytes'] <= 10
+    cache.get_or_create('a', build)
+    assert len(calls) == 2  # 'a' was evicted as least recently used
@@ -0,0 +1,87 @@
+"""Per-page retrieval over reference files: BM25 chunk index, persisted sidecar and prompt budget."""
+
+import json
+
+from services.ai_service import ProjectContext
+from services.prompts import get_page_description_prompt
+from services.reference_index import (
+    ReferenceIndex, build_and_save_index, estimate_tokens, get_index, index_path_for,
+    select_reference_excerpts,
+)
+
+
+def _document(sections):
+    parts = ['# Annual Report']
+    for title, body in sections:
+        parts.append(f'## {title}')
+        parts.extend(f'{body} paragraph {i}. ' * 20 for i in range(4))
+    return '\n\n'.join(parts)
+
+
+SECTIONS = [
+    ('Revenue', 'Quarterly revenue grew on subscription renewals'),
+    ('Hiring', 'Engineering headcount and recruiting pipeline'),
+    ('碳排放', '数据中心的碳排放与可再生能源采购'),
+    ('Roadmap', 'Next year product roadmap and launches'),
+]
+
+
+def test_search_ranks_matching_section_and_keeps_heading_path():
+    index = ReferenceIndex.build(_document(SECTIONS), max_chars=600)
+
+    assert len(index.chunks) > len(SECTIONS)
+    for query, heading in (('revenue subscription', 'Revenue'), ('recruiting headcount', 'Hiring'),
+                           ('可再生能源', '碳排放')):
+        best_chunk, _ = index.search(query, top_k=1)[0]
+        assert index.chunks[best_chunk]['heading'] == f'Annual Report > {heading}'
+    assert index.search('nothing matches zzz') == []
+
+
+def test_unmatched_query_falls_back_to_leading_chunks_of_each_file():
+    files = [{'filename': 'notes.md', 'content': 'alpha beta gamma. ' * 3000},
+             {'filename': 'report.md', 'content': _document(SECTIONS) * 3}]
+
+    excerpts = select_reference_excerpts(files, 'earnings outlook 利润', token_budget=2000)
+
+    assert [e['filename'] for e in excerpts] == ['notes.md', 'report.md']
+    assert excerpts[0]['content'].startswith('alpha beta gamma.')
+    assert excerpts[1]['content'].startswith('[Annual Report > Revenue]')
+    assert sum(estimate_tokens(e['content']) for e in excerpts) <= 2000 * 1.1
+
+
+def test_sidecar_is_reused_and_ignored_after_reparse(tmp_path):
+    markdown = _document(SECTIONS)
+    upload = tmp_path / 'report.pdf'
+    build_and_save_index(markdown, upload)
+    sidecar = index_path_for(upload)
+    data = json.loads(sidecar.read_text(encoding='utf-8'))
+
+    # 篡改分块内容以确认读的是 sidecar 而不是重新构建
+    data['chunks'][0]['text'] = 'from sidecar'
+    sidecar.write_text(json.dumps(data), encoding='utf-8')
+    changed = markdown + '\n\nappendix'
+    assert get_index(changed, sidecar).chunks[0]['text'] != 'from sidecar'
+
+    from services import reference_index
+    reference_index._memory_cache.clear()
+    assert get_index(markdown, sidecar).chunks[0]['text'] == 'from sidecar'
+
+
+def test_page_prompt_uses_excerpts_only_over_budget(app, monkeypatch):
+    files = [{'filename': 'report.md', 'content': _document(SECTIONS)}]
+    context = ProjectContext({'idea_prompt': 'company review', 'creation_type': 'idea'}, files)
+    page = {'title': 'Hiring plan', 'points': ['recruiting pipeline', 'engineering headcount']}
+
+    with app.app_context():
+        app.config['REFERENCE_CONTEXT_TOKEN_BUDGET'] = 0
+        full = get_page_description_prompt(context, [page], page, 2)
+        app.config['REFERENCE_CONTEXT_TOKEN_BUDGET'] = 400
+        app.config['REFERENCE_RETRIEVAL_TOP_K'] = 3
+        trimmed = get_page_description_prompt(context, [page], page, 2)
+
+    assert files[0]['content'] in full and 'excerpt="true"' not in full
+    assert 'excerpt="true"' in trimmed and len(trimmed) < len(full) / 2
+    assert 'recruiting pipeline paragraph' in trimmed and 'subscription renewals' not in trimmed
+
+    excerpts = select_reference_excerpts(files, 'revenue', token_budget=10 ** 6)
+    assert excerpts == files
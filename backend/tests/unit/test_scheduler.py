@@ -0,0 +1,71 @@
+"""Fair-share admission: interactive edits ahead of bulk runs, projects taking turns."""
+
+import threading
+import time
+
+from services.rate_limiter import ResourceLimiter
+from services.scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, FairShareScheduler, Ticket
+
+
+def _drain(scheduler):
+    order = []
+    while True:
+        ticket = scheduler.peek()
+        if ticket is None:
+            return order
+        scheduler.grant(ticket)
+        order.append(ticket.label)
+
+
+def test_weighted_round_robin_across_priorities_and_projects():
+    scheduler = FairShareScheduler()
+    for i in range(6):
+        scheduler.enqueue(Ticket('big-deck', PRIORITY_BULK, f'big{i}'))
+    for i in range(2):
+        scheduler.enqueue(Ticket('small-deck', PRIORITY_BULK, f'small{i}'))
+    for i in range(5):
+        scheduler.enqueue(Ticket('editor', PRIORITY_INTERACTIVE, f'edit{i}'))
+
+    order = _drain(scheduler)
+
+    # Interactive work goes first but bulk still gets one slot in five
+    assert order[:2] == ['edit0', 'edit1']
+    assert 'big0' in order[:5]
+    # Bulk projects alternate, so the small deck is not stuck behind the big one
+    bulk = [label for label in order if not label.startswith('edit')]
+    assert bulk[:4] == ['big0', 'small0', 'big1', 'small1']
+    assert scheduler.snapshot()['granted'] == {PRIORITY_INTERACTIVE: 5, PRIORITY_BULK: 8}
+    assert len(scheduler) == 0
+
+
+def test_single_page_edit_overtakes_queued_batch_pages():
+    limiter = ResourceLimiter('image-fair-test', 1)
+    order = []
+    release = threading.Event()
+
+    def run(label, project_id, priority):
+        with limiter.slot(label, project_id=project_id, priority=priority):
+            order.append(label)
+            if label == 'holder':
+                release.wait(timeout=5)
+
+    def start(*args):
+        thread = threading.Thread(target=run, args=args)
+        thread.start()
+        return thread
+
+    threads = [start('holder', 'batch', PRIORITY_BULK)]
+    while not order:
+        time.sleep(0.01)
+    threads += [start(f'page{i}', 'batch', PRIORITY_BULK) for i in range(4)]
+    threads.append(start('edit', 'other', PRIORITY_INTERACTIVE))
+    deadline = time.time() + 5
+    while limiter.snapshot()[0]['waiting'] < 5 and time.time() < deadline:
+        time.sleep(0.01)
+
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order[:2] == ['holder', 'edit']
+    assert sorted(order[2:]) == ['page0', 'page1', 'page2', 'page3']
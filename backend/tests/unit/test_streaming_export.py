@@ -0,0 +1,81 @@
+"""
+Streaming PDF/PPTX export: pages are written one image at a time.
+"""
+
+import io
+import os
+import zipfile
+
+import fitz
+from PIL import Image
+
+from services.export_service import ExportService
+
+
+def _image(path, color, mode='RGB', fmt=None):
+    Image.new(mode, (320, 180), color).save(path, format=fmt)
+    return str(path)
+
+
+def test_pdf_export_streams_each_image_format(tmp_path):
+    paths = [
+        _image(tmp_path / 'rgb.png', (255, 0, 0)),            # PNG data embedded without decoding
+        _image(tmp_path / 'alpha.png', (0, 255, 0, 255), 'RGBA'),  # decoded + deflated
+        _image(tmp_path / 'photo.jpg', (0, 0, 255)),          # JPEG embedded as-is
+    ]
+    output = tmp_path / 'deck.pdf'
+
+    assert ExportService.create_pdf_from_images(paths, output_file=str(output)) is None
+
+    with fitz.open(str(output)) as doc:
+        assert doc.page_count == 3
+        assert doc.metadata['author'] == 'banana-slides'
+        assert 'banana-slides' in doc.get_xml_metadata()
+        assert round(doc[0].rect.width) == 720 and round(doc[0].rect.height) == 405
+        centers = []
+        for page in doc:
+            pix = page.get_pixmap(dpi=36)
+            centers.append(pix.pixel(pix.width // 2, pix.height // 2))
+    assert centers[0][0] > 240 and centers[0][1] < 20
+    assert centers[1][1] > 240 and centers[1][0] < 20
+    assert centers[2][2] > 230 and centers[2][0] < 30
+    assert not os.path.exists(f"{output}.part")
+
+
+def test_pptx_export_streams_original_image_bytes(tmp_path):
+    first = _image(tmp_path / 'first.png', 'red')
+    second = _image(tmp_path / 'second.jpg', 'blue')
+
+    pptx_bytes = ExportService.create_pptx_from_images([first, second, first])
+
+    with zipfile.ZipFile(io.BytesIO(pptx_bytes)) as pptx_zip:
+        media = {
+            name: pptx_zip.read(name)
+            for name in pptx_zip.namelist() if name.startswith('ppt/media/')
+        }
+    # Repeated images share one part, and parts hold the untouched source files
+    assert sorted(media.values()) == sorted([open(first, 'rb').read(), open(second, 'rb').read()])
+
+
+def test_export_pdf_download_supports_range_requests(client, sample_project):
+    from models import db, Page
+
+    project_id = sample_project['project_id']
+    app = client.application
+    with app.app_context():
+        pages_dir = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'pages')
+        os.makedirs(pages_dir, exist_ok=True)
+        _image(os.path.join(pages_dir, 'p1.png'), 'white')
+        page = Page(project_id=project_id, order_index=0, status='COMPLETED',
+                    generated_image_path=f'{project_id}/pages/p1.png')
+        db.session.add(page)
+        db.session.commit()
+
+    response = client.get(
+        f'/api/projects/{project_id}/export/pdf?download=1',
+        headers={'Range': 'bytes=0-7'},
+    )
+
+    assert response.status_code == 206
+    assert response.data == b'%PDF-1.7'
+    assert 'attachment' in response.headers['Content-Disposition']
@@ -0,0 +1,130 @@
+"""Restart recovery of interrupted background tasks."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+
+from models import db, Page, PageImageVersion, Task
+from services import task_manager as tm
+
+
+class FakeImageAIService:
+    def __init__(self):
+        self.generated_pages = []
+
+    def flatten_outline(self, outline):
+        return [page for part in outline for page in part.get('pages', [part])]
+
+    def extract_image_urls_from_markdown(self, text):
+        return []
+
+    def generate_image_prompt(self, outline, page_data, desc_text, page_index, **kwargs):
+        return f"prompt for {page_data.get('title')}"
+
+    async def agenerate_image(self, prompt, *args, **kwargs):
+        self.generated_pages.append(prompt)
+        return Image.new('RGB', (160, 90), color='green')
+
+
+def _create_pages(project_id, count):
+    pages = []
+    for index in range(count):
+        page = Page(project_id=project_id, order_index=index, status='GENERATING')
+        page.set_outline_content({'title': f'Page {index + 1}', 'points': []})
+        page.set_description_content({'text': f'Description {index + 1}'})
+        db.session.add(page)
+        pages.append(page)
+    db.session.commit()
+    return pages
+
+
+@pytest.mark.unit
+def test_resumed_image_task_skips_pages_with_saved_versions(client, sample_project, monkeypatch):
+    project_id = sample_project['project_id']
+    app = client.application
+    fake_ai = FakeImageAIService()
+    monkeypatch.setattr('services.ai_service_manager.get_ai_service', lambda: fake_ai)
+    submitted = []
+    monkeypatch.setattr(
+        tm.task_manager, 'submit_task',
+        lambda task_id, func, *args, **kwargs: submitted.append((task_id, func, kwargs)),
+    )
+
+    with app.app_context():
+        pages = _create_pages(project_id, 3)
+        task = Task(
+            project_id=project_id,
+            task_type='GENERATE_IMAGES',
+            status='PROCESSING',
+            created_at=datetime.utcnow() - timedelta(minutes=5),
+        )
+        task.set_params({
+            'outline': [{'title': f'Page {i + 1}', 'points': []} for i in range(3)],
+            'use_template': True,
+            'max_workers': 2,
+            'aspect_ratio': '16:9',
+            'resolution': '1K',
+            'image_prompt_field_names': set(),
+        })
+        db.session.add(task)
+        # Page 1 finished before the restart: its version row is the checkpoint.
+        db.session.add(PageImageVersion(
+            page_id=pages[0].id, image_path='pages/done.png', version_number=1, is_current=True,
+        ))
+        pages[0].generated_image_path = 'pages/done.png'
+        db.session.commit()
+        task_id = task.id
+        done_page_id = pages[0].id
+
+    summary = tm.recover_interrupted_tasks(app)
+
+    assert summary == {'resumed': 1, 'failed': 0}
+    assert len(submitted) == 1
+    submitted_task_id, func, kwargs = submitted[0]
+    assert submitted_task_id == task_id
+    assert func is tm.generate_images_task
+    assert kwargs['project_id'] == project_id
+    assert kwargs['image_prompt_field_names'] == []
+
+    func(submitted_task_id, **kwargs)
+
+    assert sorted(fake_ai.generated_pages) == ['prompt for Page 2', 'prompt for Page 3']
+    with app.app_context():
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED'
+        assert task.resume_count == 1
+        assert task.get_progress()['completed'] == 3
+        assert PageImageVersion.query.filter_by(page_id=done_page_id).count() == 1
+
+
+@pytest.mark.unit
+def test_non_resumable_tasks_are_failed_and_pages_released(client, sample_project, monkeypatch):
+    project_id = sample_project['project_id']
+    app = client.application
+    monkeypatch.setattr(
+        tm.task_manager, 'submit_task',
+        lambda *args, **kwargs: pytest.fail('nothing should be resubmitted'),
+    )
+
+    with app.app_context():
+        pages = _create_pages(project_id, 2)
+        pages[1].generated_image_path = 'pages/old.png'
+        exhausted = Task(project_id=project_id, task_type='GENERATE_IMAGES', status='PROCESSING',
+                         resume_count=tm.MAX_TASK_RESUMES)
+        exhausted.set_params({'outline': []})
+        video = Task(project_id=project_id, task_type='EXPORT_VIDEO', status='PENDING')
+        db.session.add_all([exhausted, video])
+        db.session.commit()
+        task_ids = [exhausted.id, video.id]
+
+    summary = tm.recover_interrupted_tasks(app)
+
+    assert summary == {'resumed': 0, 'failed': 2}
+    with app.app_context():
+        for task_id in task_ids:
+            task = Task.query.get(task_id)
+            assert task.status == 'FAILED'
+            assert task.error_message == tm.INTERRUPTED_TASK_MESSAGE
+        statuses = [page.status for page in Page.query.filter_by(project_id=project_id).order_by(Page.order_index)]
+        assert statuses == ['FAILED', 'COMPLETED']
@@ -0,0 +1,146 @@
+"""Queue mode: the web process enqueues tasks and services.worker claims them."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Task
+from services import task_manager as tm
+from services import worker
+
+
+def _queued_task(project_id, task_type='GENERATE_IMAGES', minutes_ago=0, **fields):
+    task = Task(
+        project_id=project_id,
+        task_type=task_type,
+        status='PENDING',
+        created_at=datetime.utcnow() - timedelta(minutes=minutes_ago),
+        **fields,
+    )
+    task.set_params({'outline': []})
+    db.session.add(task)
+    return task
+
+
+@pytest.mark.unit
+def test_queue_mode_leaves_persisted_tasks_for_workers(client, sample_project, monkeypatch):
+    project_id = sample_project['project_id']
+    manager = tm.TaskManager(max_workers=1, queue_tasks=True)
+    ran = []
+
+    def inline_task(task_id):
+        ran.append(task_id)
+
+    with client.application.app_context():
+        queued = _queued_task(project_id)
+        unpersisted = Task(project_id=project_id, task_type='GENERATE_IMAGES', status='PENDING')
+        db.session.add(unpersisted)
+        db.session.commit()
+
+        monkeypatch.setitem(tm.QUEUEABLE_TASK_FUNCS, 'GENERATE_IMAGES', inline_task)
+        manager.submit_task(queued.id, inline_task)
+        manager.submit_task(unpersisted.id, inline_task)
+        manager.shutdown()
+
+        assert ran == [unpersisted.id]
+
+
+@pytest.mark.unit
+def test_workers_claim_each_task_once_in_creation_order(client, sample_project):
+    project_id = sample_project['project_id']
+    with client.application.app_context():
+        newer = _queued_task(project_id, minutes_ago=1)
+        older = _queued_task(project_id, task_type='EXPORT_VIDEO', minutes_ago=5)
+        done = _queued_task(project_id, minutes_ago=10)
+        done.status = 'COMPLETED'
+        db.session.commit()
+
+        assert worker.claim_next_task('host:1:0') == older.id
+        assert worker.claim_next_task('host:2:1') == newer.id
+        assert worker.claim_next_task('host:1:0') is None
+        assert Task.query.get(older.id).worker_id == 'host:1:0'
+
+
+@pytest.mark.unit
+def test_worker_pool_recovery_requeues_claimed_tasks(client, sample_project, monkeypatch):
+    project_id = sample_project['project_id']
+    app = client.application
+    monkeypatch.setattr(
+        tm.task_manager, 'submit_task',
+        lambda *args, **kwargs: pytest.fail('queued tasks are resumed by workers, not submitted'),
+    )
+    with app.app_context():
+        resumable = _queued_task(project_id, worker_id='dead:1:0')
+        resumable.status = 'PROCESSING'
+        video = _queued_task(project_id, task_type='EXPORT_VIDEO', worker_id='dead:1:1')
+        waiting = _queued_task(project_id)
+        db.session.commit()
+        ids = (resumable.id, video.id, waiting.id)
+
+    assert tm.recover_interrupted_tasks(app, queued=True) == {'resumed': 1, 'failed': 1}
+
+    with app.app_context():
+        resumable, video, waiting = (Task.query.get(task_id) for task_id in ids)
+        assert (resumable.status, resumable.worker_id, resumable.resume_count) == ('PENDING', None, 1)
+        assert video.status == 'FAILED'
+        assert (waiting.status, waiting.worker_id) == ('PENDING', None)
+
+
+@pytest.mark.unit
+def test_dead_worker_releases_only_its_own_claimed_tasks(client, sample_project, monkeypatch):
+    project_id = sample_project['project_id']
+    app = client.application
+    monkeypatch.setitem(app.config, 'RESUME_INTERRUPTED_TASKS', True)
+    dead_id = worker.worker_id_for(0, pid=4242)
+    with app.app_context():
+        crashed = _queued_task(project_id, worker_id=dead_id)
+        crashed.status = 'PROCESSING'
+        alive = _queued_task(project_id, worker_id=worker.worker_id_for(1, pid=4343))
+        alive.status = 'PROCESSING'
+        db.session.commit()
+        ids = (crashed.id, alive.id)
+
+    assert worker.release_dead_worker_tasks(app, dead_id) == {'resumed': 1, 'failed': 0}
+    with app.app_context():
+        crashed, alive = (Task.query.get(task_id) for task_id in ids)
+        assert (crashed.status, crashed.worker_id) == ('PENDING', None)
+        assert (alive.status, alive.worker_id) == ('PROCESSING', worker.worker_id_for(1, pid=4343))
+
+        # 关闭自动恢复时，崩溃进程的任务标记为失败而不是一直停留在 PROCESSING
+        alive.status = 'PENDING'
+        db.session.commit()
+    monkeypatch.setitem(app.config, 'RESUME_INTERRUPTED_TASKS', False)
+    assert worker.release_dead_worker_tasks(app, worker.worker_id_for(1, pid=4343)) == {'resumed': 0, 'failed': 1}
+
+
+@pytest.mark.unit
+def test_editable_pptx_export_is_queued_and_rebuilt_by_workers(client, sample_project, monkeypatch):
+    project_id = sample_project['project_id']
+    app = client.application
+    manager = tm.TaskManager(max_workers=1, queue_tasks=True)
+    monkeypatch.setattr(
+        manager.executor, 'submit',
+        lambda *args, **kwargs: pytest.fail('editable export must be left for the worker pool'),
+    )
+    with app.app_context():
+        task = Task(project_id=project_id, task_type='EXPORT_EDITABLE_PPTX', status='PENDING')
+        task.set_params({
+            'filename': 'deck.pptx',
+            'page_ids': None,
+            'max_depth': 2,
+            'max_workers': 4,
+            'export_extractor_method': 'hybrid',
+            'export_inpaint_method': 'generative',
+            'enable_icon_subject_extraction': False,
+        })
+        db.session.add(task)
+        db.session.commit()
+
+        manager.submit_task(task.id, tm.export_editable_pptx_with_recursive_analysis_task)
+        func, kwargs = tm.build_task_call(task, app)
+
+    assert func is tm.export_editable_pptx_with_recursive_analysis_task
+    assert kwargs['project_id'] == project_id and kwargs['app'] is app
+    assert (kwargs['max_depth'], kwargs['export_inpaint_method']) == (2, 'generative')
+    assert kwargs['enable_icon_subject_extraction'] is False
+    assert kwargs['file_service'] is not None
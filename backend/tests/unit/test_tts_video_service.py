@@ -40,6 +40,16 @@ _tts_mod = _load_module_directly(
     os.path.join(_services_dir, 'tts_video_service.py'),
 )
 
+_cache_mod = _load_module_directly(
+    'services.tts_audio_cache',
+    os.path.join(_services_dir, 'tts_audio_cache.py'),
+)
+
+_clip_cache_mod = _load_module_directly(
+    'services.video_clip_cache',
+    os.path.join(_services_dir, 'video_clip_cache.py'),
+)
+
 _prompts_mod = _load_module_directly(
     'services.prompts',
     os.path.join(_services_dir, 'prompts.py'),
@@ -299,6 +309,70 @@ class TestKenBurnsEffects:
         assert mock_run_ffmpeg.call_args.kwargs['idle_timeout'] == 600.0
 
 
+class TestKenBurnsFrameEngine:
+    """测试预计算仿射矩阵的帧生成与 FFmpeg zoompan 后端"""
+
+    @pytest.mark.parametrize('effect_type', KEN_BURNS_EFFECTS)
+    def test_warp_schedule_matches_legacy_crop_and_resize(self, effect_type):
+        cv2 = pytest.importorskip('cv2')
+        np = pytest.importorskip('numpy')
+        width, height, frames = 320, 180, 9
+        canvas_w, canvas_h = int(width * 1.08), int(height * 1.08)
+        canvas = np.random.default_rng(0).integers(0, 255, (canvas_h, canvas_w, 3), dtype=np.uint8)
+        canvas = cv2.GaussianBlur(canvas, (9, 9), 0)
+        motion = _tts_mod._ken_burns_motion(effect_type, width, height, canvas_w, canvas_h, 20, 280, 1.08)
+        schedule = _tts_mod.ken_burns_schedule(motion, frames, width, height, canvas_w, canvas_h)
+
+        for i, frame in enumerate(_tts_mod.iter_ken_burns_frames(canvas, schedule, width, height)):
+            t = i / (frames - 1)
+            z = motion[0] + (motion[1] - motion[0]) * t
+            cx = motion[2] + (motion[3] - motion[2]) * t
+            patch = cv2.getRectSubPix(canvas, (int(width / z + 0.5), int(height / z + 0.5)), (cx, motion[4]))
+            legacy = cv2.resize(patch, (width, height), interpolation=cv2.INTER_LINEAR)
+            assert np.abs(frame.astype(int) - legacy.astype(int))[2:-2, 2:-2].mean() < 1.5
+
+    def test_opencv_backend_pipes_reused_buffer_without_copies(self, tmp_path):
+        pytest.importorskip('cv2')
+        pil_image = pytest.importorskip('PIL.Image')
+        image_path = str(tmp_path / 'slide.png')
+        pil_image.new('RGB', (160, 90), 'white').save(image_path)
+        writes = []
+        proc = MagicMock()
+        proc.stdin.write.side_effect = lambda data: writes.append(data)
+
+        with patch.object(_tts_mod.subprocess, 'Popen', return_value=proc) as mock_popen, \
+                patch.object(_tts_mod, '_wait_for_process_with_idle_watchdog'):
+            create_ken_burns_clip(image_path, str(tmp_path / 'out.mp4'), 0.5, width=160, height=90, fps=10)
+
+        cmd = mock_popen.call_args.args[0]
+        assert cmd[cmd.index('-pix_fmt') + 1] == 'bgra'
+        assert len(writes) == 5
+        assert all(isinstance(data, memoryview) and data.nbytes == 160 * 90 * 4 for data in writes)
+        assert writes[0] is writes[-1]
+
+    @patch.object(_tts_mod, '_run_ffmpeg_command')
+    def test_ffmpeg_backend_generates_motion_with_zoompan(self, mock_run_ffmpeg, tmp_path):
+        pytest.importorskip('cv2')
+        pil_image = pytest.importorskip('PIL.Image')
+        image_path = str(tmp_path / 'slide.png')
+        pil_image.new('RGB', (160, 90), 'white').save(image_path)
+        output_path = str(tmp_path / 'out.mp4')
+
+        create_ken_burns_clip(
+            image_path, output_path, 2.0, width=160, height=90, fps=10,
+            effect_type='pan_left', backend='ffmpeg', subtitle_path='/tmp/page.ass',
+        )
+
+        cmd = mock_run_ffmpeg.call_args.args[0]
+        assert cmd[cmd.index('-i') + 1] == output_path + '.canvas.png'
+        vf = cmd[cmd.index('-vf') + 1]
+        assert vf.startswith('zoompan=') and ':d=20:s=160x90:fps=10' in vf
+        assert vf.endswith(",ass=filename='/tmp/page.ass'")
+        assert not os.path.exists(output_path + '.canvas.png')
+        with pytest.raises(ValueError):
+            create_ken_burns_clip(image_path, output_path, 1.0, backend='gpu')
+
+
 class TestCompositeVideoConcatFile:
     """测试 concat 列表生成"""
 
@@ -545,6 +619,242 @@ class TestGenerateNarrationVideoPrerequisites:
             )
 
 
+class TestParallelClipRendering:
+    """测试 Phase B 各页片段并行渲染、按页序拼接"""
+
+    def test_render_workers_bounded_by_cpu_pages_and_memory(self):
+        assert _tts_mod.resolve_render_workers(40, 1920, 1080, max_workers=32, memory_budget_mb=100000) == 32
+        assert _tts_mod.resolve_render_workers(3, 1920, 1080, max_workers=32, memory_budget_mb=100000) == 3
+        per_clip = _tts_mod.estimate_clip_memory_mb(1920, 1080)
+        assert _tts_mod.resolve_render_workers(40, 1920, 1080, max_workers=32, memory_budget_mb=per_clip * 4) == 4
+        assert _tts_mod.resolve_render_workers(40, 1920, 1080, max_workers=32, memory_budget_mb=1) == 1
+
+    @patch.object(_tts_mod, 'check_ffmpeg_available', return_value=True)
+    def test_clips_render_in_parallel_and_concat_in_page_order(self, mock_ffmpeg, tmp_path):
+        lock = threading.Lock()
+        active = {'now': 0, 'peak': 0}
+        concat_inputs = []
+        progress = []
+
+        def fake_silent_clip(image_path, output_path, **kwargs):
+            with lock:
+                active['now'] += 1
+                active['peak'] = max(active['peak'], active['now'])
+            # 前面的页面渲染更慢，完成顺序与页序相反
+            time.sleep(0.05 * (6 - int(image_path.rsplit('_', 1)[-1])))
+            with lock:
+                active['now'] -= 1
+
+        def fake_composite(clip_paths, output_path, **kwargs):
+            concat_inputs.extend(clip_paths)
+            open(output_path, 'wb').close()
+
+        pages = [
+            {'image_path': f'/fake/slide_{i}', 'narration_text': None, 'page_index': i}
+            for i in range(6)
+        ]
+        with patch.object(_tts_mod, 'create_silent_clip', side_effect=fake_silent_clip), \
+                patch.object(_tts_mod, 'composite_video', side_effect=fake_composite):
+            _tts_mod.generate_narration_video(
+                pages_data=pages,
+                output_path=str(tmp_path / 'out.mp4'),
+                progress_callback=lambda step, message, pct: progress.append((step, pct)),
+                render_workers=3,
+            )
+
+        assert active['peak'] == 3
+        assert [os.path.basename(path) for path in concat_inputs] == [f'silent_{i:03d}.mp4' for i in range(6)]
+        video_progress = [pct for step, pct in progress if step == '视频']
+        assert video_progress == sorted(video_progress) and video_progress[-1] == 80
+        assert len(video_progress) == 6
+
+
+class TestPerClipSubtitles:
+    """测试字幕随片段一次编码烧录，最终流复制拼接"""
+
+    @patch.object(_tts_mod, '_run_ffmpeg_command')
+    @patch.object(_tts_mod, '_detect_cjk_font_dir', return_value=None)
+    def test_static_clip_burns_subtitles_in_same_encode(self, mock_fonts_dir, mock_run_ffmpeg):
+        _tts_mod.create_static_clip('/fake/slide.png', '/fake/clip.mp4', 4.0, subtitle_path='/tmp/page.ass')
+
+        cmd = mock_run_ffmpeg.call_args.args[0]
+        assert cmd[cmd.index('-vf') + 1].endswith(",ass=filename='/tmp/page.ass'")
+
+    @patch.object(_tts_mod, '_run_ffmpeg_command')
+    def test_stream_copy_concat_does_not_reencode(self, mock_run_ffmpeg):
+        composite_video(['/fake/clip1.mp4', '/fake/clip2.mp4'], '/tmp/test_concat_copy.mp4', stream_copy=True)
+
+        cmd = mock_run_ffmpeg.call_args.args[0]
+        assert cmd[cmd.index('-c') + 1] == 'copy'
+        assert 'libx264' not in cmd
+
+    @patch.object(_tts_mod, 'check_ffmpeg_ass_filter_available', return_value=True)
+    @patch.object(_tts_mod, 'check_ffmpeg_available', return_value=True)
+    def test_each_page_gets_its_own_subtitles_and_no_final_burn(self, mock_ffmpeg, mock_ass, tmp_path):
+        rendered = {}
+
+        def fake_render(index, subtitle_path=None, tmp_dir=None, **kwargs):
+            rendered[index] = subtitle_path and open(subtitle_path, encoding='utf-8').read()
+            return os.path.join(tmp_dir, f'muxed_{index:03d}.mp4')
+
+        pages = [
+            {'image_path': f'/fake/slide_{i}', 'narration_text': f'第{i}页的旁白。', 'page_index': i}
+            for i in range(2)
+        ]
+        with patch.object(_tts_mod, 'generate_tts_batch_sync',
+                          side_effect=lambda jobs, **kwargs: [(5.0, None)] * len(jobs)), \
+                patch.object(_tts_mod, '_render_page_clip', side_effect=fake_render), \
+                patch.object(_tts_mod, 'composite_video') as mock_composite, \
+                patch.object(_tts_mod, 'burn_subtitles') as mock_burn:
+            _tts_mod.generate_narration_video(pages_data=pages, output_path=str(tmp_path / 'out.mp4'))
+
+        mock_burn.assert_not_called()
+        assert mock_composite.call_args.kwargs['stream_copy'] is True
+        assert '第0页的旁白' in rendered[0] and '第1页' not in rendered[0]
+        # 第二页的字幕从本页片段起点计时，而不是整片时间轴上的 5.8 秒
+        assert 'Dialogue: 0,0:00:00.00' in rendered[1]
+
+
+class TestConcurrentTTSAndAudioCache:
+    """测试 TTS 并发合成、进程内 MP3 时长解析和页面音频缓存"""
+
+    def test_mp3_duration_is_read_from_frame_headers(self, tmp_path):
+        # MPEG-2 Layer III, 48kbps, 24kHz 单声道：每帧 144 字节、576 采样 = 0.024 秒
+        frame = bytes([0xFF, 0xF3, 0x64, 0xC4]) + bytes(140)
+        path = tmp_path / 'speech.mp3'
+        path.write_bytes(b'ID3\x03\x00\x00\x00\x00\x00\x0a' + bytes(10) + frame * 250)
+
+        assert _tts_mod._mp3_duration(str(path)) == pytest.approx(6.0)
+        assert _tts_mod._mp3_duration(str(tmp_path / 'missing.mp3')) is None
+
+    def test_batch_runs_requests_concurrently_up_to_cap(self, tmp_path):
+        active = {'now': 0, 'peak': 0}
+
+        async def fake_tts(text, output_path, voice, rate):
+            active['now'] += 1
+            active['peak'] = max(active['peak'], active['now'])
+            await _tts_mod.asyncio.sleep(0.01)
+            active['now'] -= 1
+            if text == 'bad':
+                raise RuntimeError('edge-tts 503')
+
+        jobs = [(t, str(tmp_path / f'{i}.mp3')) for i, t in enumerate(['a', 'b', 'bad', 'c', 'd'])]
+        done = []
+        with patch.object(_tts_mod, '_generate_tts_async', side_effect=fake_tts), \
+                patch.object(_tts_mod, 'get_audio_duration', return_value=2.5):
+            results = _tts_mod.generate_tts_batch_sync(
+                jobs, concurrency=3, on_done=lambda index, error: done.append(index),
+            )
+
+        assert active['peak'] == 3
+        assert sorted(done) == [0, 1, 2, 3, 4]
+        assert [duration for duration, _ in results] == [2.5, 2.5, None, 2.5, 2.5]
+        assert 'edge-tts 503' in str(results[2][1])
+
+    @patch.object(_tts_mod, 'check_ffmpeg_ass_filter_available', return_value=True)
+    @patch.object(_tts_mod, 'check_ffmpeg_available', return_value=True)
+    def test_reexport_reuses_cached_page_audio(self, mock_ffmpeg, mock_ass, tmp_path):
+        cache = _cache_mod.TTSAudioCache(tmp_path / 'tts_cache')
+        synthesized = []
+
+        def fake_batch(jobs, **kwargs):
+            for text, output_path in jobs:
+                synthesized.append(text)
+                with open(output_path, 'wb') as f:
+                    f.write(text.encode('utf-8'))
+            return [(3.0, None)] * len(jobs)
+
+        def export(texts, run):
+            pages = [
+                {'image_path': f'/fake/slide_{i}', 'narration_text': text, 'page_index': i}
+                for i, text in enumerate(texts)
+            ]
+            with patch.object(_tts_mod, 'generate_tts_batch_sync', side_effect=fake_batch), \
+                    patch.object(_tts_mod, '_render_page_clip',
+                                 side_effect=lambda index, tmp_dir=None, **kw: os.path.join(tmp_dir, 'c.mp4')), \
+                    patch.object(_tts_mod, 'composite_video'):
+                _tts_mod.generate_narration_video(
+                    pages_data=pages, output_path=str(tmp_path / f'out_{run}.mp4'), audio_cache=cache,
+                )
+
+        export(['第一页', '第二页', '第三页'], 1)
+        export(['第一页', '第二页（已修改）', '第三页'], 2)
+
+        # 第二次导出只重新合成改过的那一页
+        assert synthesized == ['第一页', '第二页', '第三页', '第二页（已修改）']
+        assert cache.stats() == {'hits': 2, 'misses': 4}
+
+    def test_cache_evicts_least_recently_used_entries(self, tmp_path):
+        src = tmp_path / 'page.mp3'
+        src.write_bytes(bytes(400))
+        cache = _cache_mod.TTSAudioCache(tmp_path / 'cache', max_bytes=1000)
+        keys = [cache.key_for(f'page {i}', 'voice', '+0%', 1.0, 'edge-tts') for i in range(3)]
+        cache.put(keys[0], src, 1.0)
+        cache.put(keys[1], src, 1.0)
+        os.utime(cache.cache_dir / f'{keys[1]}.json', (1, 1))  # 较久未使用
+        cache.put(keys[2], src, 1.0)
+
+        assert cache.get(keys[1], tmp_path / 'out.mp3') is None
+        assert cache.get(keys[0], tmp_path / 'out.mp3') == (1.0, None)
+
+
+class TestIncrementalVideoExport:
+    """测试增量导出：未变化的页面复用上次导出的片段"""
+
+    @patch.object(_tts_mod, 'check_ffmpeg_ass_filter_available', return_value=True)
+    @patch.object(_tts_mod, 'check_ffmpeg_available', return_value=True)
+    def test_reexport_only_renders_changed_pages(self, mock_ffmpeg, mock_ass, tmp_path):
+        clip_cache = _clip_cache_mod.VideoClipCache(tmp_path / 'video_cache')
+        slides = []
+        for i in range(3):
+            slide = tmp_path / f'slide_{i}.png'
+            slide.write_bytes(f'slide {i}'.encode())
+            slides.append(str(slide))
+        rendered = []
+
+        def fake_render(index, tmp_dir=None, **kwargs):
+            rendered.append(index)
+            path = os.path.join(tmp_dir, f'muxed_{index:03d}.mp4')
+            with open(path, 'wb') as f:
+                f.write(b'clip')
+            return path
+
+        def export(texts, run):
+            pages = [
+                {'image_path': slides[i], 'narration_text': text, 'page_index': i}
+                for i, text in enumerate(texts)
+            ]
+            with patch.object(_tts_mod, 'generate_tts_batch_sync',
+                              side_effect=lambda jobs, **kwargs: [(4.0, None)] * len(jobs)), \
+                    patch.object(_tts_mod, '_render_page_clip', side_effect=fake_render), \
+                    patch.object(_tts_mod, 'composite_video') as mock_composite:
+                _tts_mod.generate_narration_video(
+                    pages_data=pages, output_path=str(tmp_path / f'out_{run}.mp4'), clip_cache=clip_cache,
+                )
+            return mock_composite.call_args.args[0]
+
+        first = export(['第一页。', '第二页。', '第三页。'], 1)
+        rendered.clear()
+        with open(slides[2], 'wb') as f:
+            f.write(b'slide 2 edited')
+        second = export(['第一页。', '第二页改了。', '第三页。'], 2)
+
+        assert sorted(rendered) == [1, 2]
+        assert second[0] == first[0] and all(os.path.exists(path) for path in second)
+        assert second[1] != first[1] and second[2] != first[2]
+        assert clip_cache.stats() == {'hits': 1, 'misses': 5}
+
+    def test_retain_drops_clips_the_deck_no_longer_uses(self, tmp_path):
+        clip_cache = _clip_cache_mod.VideoClipCache(tmp_path)
+        for key in ('old', 'recent', 'current'):
+            (tmp_path / f'{key}.mp4').write_bytes(b'clip')
+        os.utime(tmp_path / 'old.mp4', (1, 1))
+        os.utime(tmp_path / 'current.mp4', (1, 1))
+
+        assert clip_cache.retain(['current']) == 1
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['current.mp4', 'recent.mp4']
+
+
 class TestNarrationPrompt:
     """测试旁白 prompt 构建"""
 
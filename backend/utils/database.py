@@ -0,0 +1,63 @@
+"""
+Database engine configuration
+
+SQLite (the default, and what the desktop app uses) needs ``check_same_thread``
+off and a busy timeout; server databases such as PostgreSQL
+(``DATABASE_URL=postgresql://...``) need none of that but a connection pool
+large enough for every generation worker thread to hold a connection.
+"""
+import os
+from typing import Any, Dict
+
+from sqlalchemy.engine import make_url
+
+# Connections kept on top of the worker threads for request handlers and task loops
+_REQUEST_CONNECTIONS = 5
+
+
+def normalize_database_url(url: str) -> str:
+    """Accept the ``postgres://`` scheme some hosting platforms still hand out."""
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def display_database_url(url: str) -> str:
+    """Database URL safe for logs (password masked)."""
+    return make_url(url).render_as_string(hide_password=True)
+
+
+def is_sqlite_url(url: str) -> bool:
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def build_engine_options(database_url: str, worker_threads: int) -> Dict[str, Any]:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for ``database_url``
+
+    Args:
+        database_url: SQLAlchemy database URL
+        worker_threads: Threads that may write concurrently
+            (MAX_IMAGE_WORKERS + MAX_DESCRIPTION_WORKERS); sizes the pool of
+            server databases. DB_POOL_SIZE / DB_MAX_OVERFLOW override it.
+    """
+    if is_sqlite_url(database_url):
+        return {
+            'connect_args': {
+                'check_same_thread': False,  # 允许跨线程使用（仅SQLite）
+                'timeout': 30,  # 数据库锁定超时（秒）
+            },
+            'pool_pre_ping': True,
+            'pool_recycle': 3600,
+        }
+
+    pool_size = int(os.getenv('DB_POOL_SIZE') or max(worker_threads, 1) + _REQUEST_CONNECTIONS)
+    max_overflow = int(os.getenv('DB_MAX_OVERFLOW') or max(pool_size // 2, 10))
+    return {
+        'connect_args': {},
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT') or 30),
+    }
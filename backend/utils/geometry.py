@@ -0,0 +1,209 @@
+"""
+Bounding box geometry - vectorized overlap tests and near-linear merging
+
+Boxes are ``(x0, y0, x1, y1)``. Dense slides and tables yield hundreds of
+boxes per image, and the pairwise Python loops that used to compare them
+dominated export profiles. This module provides:
+
+- pairwise intersection / IoU / containment matrices computed with NumPy
+  broadcasting;
+- ``candidate_pairs``: a sort-and-sweep over the axis along which boxes are
+  thinnest, so only boxes whose projections overlap are ever compared;
+- ``merge_boxes``: union-find over the sweep candidates, repeated until no two
+  merged boxes touch, which is the fixpoint the old all-pairs loop reached.
+
+Missing or malformed boxes become NaN rows, and NaN never satisfies a
+threshold, so they neither contain nor intersect anything.
+"""
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Box = Tuple[float, float, float, float]
+
+# Rows per block when a full pairwise matrix would be too large
+_PAIRWISE_CHUNK = 1024
+
+
+def as_array(bboxes: Iterable[Optional[Sequence[float]]]) -> np.ndarray:
+    """(n, 4) float64 array; empty or malformed boxes become NaN rows."""
+    rows = []
+    for bbox in bboxes:
+        if bbox is not None and len(bbox) == 4:
+            rows.append([float(v) for v in bbox])
+        else:
+            rows.append([np.nan] * 4)
+    return np.asarray(rows, dtype=np.float64).reshape(-1, 4)
+
+
+def areas(boxes: np.ndarray) -> np.ndarray:
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+
+def intersection_areas(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(len(a), len(b)) matrix of intersection areas (0 where disjoint, NaN for invalid rows)."""
+    inter_w = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    inter_h = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    return np.where((inter_w > 0) & (inter_h > 0), inter_w * inter_h, np.where(np.isnan(inter_w + inter_h), np.nan, 0.0))
+
+
+def _ratio(inter: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = inter / denominator
+    # 没有交集或分母非正时比例记为 NaN，任何阈值比较都为 False
+    return np.where((inter > 0) & (denominator > 0), ratio, np.nan)
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    inter = intersection_areas(a, b)
+    return _ratio(inter, areas(a)[:, None] + areas(b)[None, :] - inter)
+
+
+def containment_matrix(inner: np.ndarray, outer: np.ndarray) -> np.ndarray:
+    """Share of each inner box's area that lies inside each outer box."""
+    return _ratio(intersection_areas(inner, outer), areas(inner)[:, None])
+
+
+def overlap_min_area_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Intersection area relative to the smaller of the two boxes."""
+    return _ratio(intersection_areas(a, b), np.minimum(areas(a)[:, None], areas(b)[None, :]))
+
+
+def intersection_ratios(a: Sequence[float], b: Sequence[float]) -> Tuple[float, float]:
+    """(intersection / area(a), intersection / area(b)) for one pair of boxes."""
+    boxes_a, boxes_b = as_array([a]), as_array([b])
+    inter = intersection_areas(boxes_a, boxes_b)
+    ratio_a = _ratio(inter, areas(boxes_a)[:, None])[0, 0]
+    ratio_b = _ratio(inter, areas(boxes_b)[None, :])[0, 0]
+    return (0.0 if np.isnan(ratio_a) else float(ratio_a), 0.0 if np.isnan(ratio_b) else float(ratio_b))
+
+
+def candidate_pairs(boxes: np.ndarray, margin: float = 0.0) -> np.ndarray:
+    """
+    Index pairs (i < j) of boxes that overlap or are at most ``margin`` apart on both axes.
+
+    Sort-and-sweep along the axis where boxes are thinnest relative to the
+    spread of the layout (y for stacked text lines, x for columns); a pair is
+    only examined when the sweep-axis intervals overlap, so typical layouts
+    cost O(n log n + k) instead of O(n^2).
+    """
+    valid = np.flatnonzero(~np.isnan(boxes).any(axis=1))
+    if len(valid) < 2:
+        return np.empty((0, 2), dtype=np.intp)
+    sub = boxes[valid]
+
+    extent = np.ptp(sub[:, [0, 1]], axis=0) + 1.0
+    thickness = np.mean(sub[:, [2, 3]] - sub[:, [0, 1]], axis=0) + margin
+    axis = int(np.argmin(thickness / extent))
+    other = 1 - axis
+
+    order = np.argsort(sub[:, axis], kind='stable')
+    starts = sub[order, axis]
+    # 排序后第 i 个框只需与起点不超过 end_i + margin 的后续框比较
+    ends = np.searchsorted(starts, sub[order, axis + 2] + margin, side='right')
+
+    # 展开成 (i, j) 候选对后一次性检查另一轴，不再逐框循环
+    counts = np.maximum(ends - np.arange(len(order)) - 1, 0)
+    firsts = np.repeat(np.arange(len(order)), counts)
+    seconds = firsts + 1 + np.arange(len(firsts)) - np.repeat(np.cumsum(counts) - counts, counts)
+    a, b = order[firsts], order[seconds]
+    touch = (sub[a, other] <= sub[b, other + 2] + margin) & (sub[b, other] <= sub[a, other + 2] + margin)
+    pairs = valid[np.stack([a[touch], b[touch]], axis=1)]
+    return np.sort(pairs, axis=1)
+
+
+class UnionFind:
+    """Disjoint sets with path halving and union by size."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> bool:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        return True
+
+
+def merge_boxes(bboxes: Sequence[Box], margin: float = 0.0) -> List[Box]:
+    """
+    Merge boxes that overlap or are at most ``margin`` apart into their union boxes.
+
+    Groups are found with union-find over ``candidate_pairs``; as a merged box
+    can reach boxes none of its members touched, passes repeat until nothing
+    merges. The result is the same fixpoint a repeated all-pairs merge
+    reaches, in the order of each group's first input box and with the
+    input's number type.
+    """
+    if len(bboxes) <= 1:
+        return [tuple(b) for b in bboxes]
+
+    boxes = as_array(bboxes)
+    first_index = np.arange(len(boxes))
+    while True:
+        pairs = candidate_pairs(boxes, margin)
+        if len(pairs) == 0:
+            break
+        groups = UnionFind(len(boxes))
+        for a, b in pairs.tolist():
+            groups.union(a, b)
+        roots = np.array([groups.find(i) for i in range(len(boxes))])
+        _, labels = np.unique(roots, return_inverse=True)
+        count = labels.max() + 1
+        merged = np.empty((count, 4))
+        merged[:, :2] = np.inf
+        merged[:, 2:] = -np.inf
+        np.minimum.at(merged[:, 0], labels, boxes[:, 0])
+        np.minimum.at(merged[:, 1], labels, boxes[:, 1])
+        np.maximum.at(merged[:, 2], labels, boxes[:, 2])
+        np.maximum.at(merged[:, 3], labels, boxes[:, 3])
+        firsts = np.full(count, len(bboxes))
+        np.minimum.at(firsts, labels, first_index)
+        order = np.argsort(firsts, kind='stable')
+        boxes, first_index = merged[order], firsts[order]
+
+    cast = int if all(isinstance(v, (int, np.integer)) for b in bboxes for v in b) else float
+    return [tuple(cast(v) for v in box) for box in boxes.tolist()]
+
+
+def min_pairwise_gap(boxes: np.ndarray) -> float:
+    """
+    Smallest gap between any two boxes that face each other along x or y.
+
+    Pairs overlapping on both axes count as a negative gap (minus the smaller
+    overlap); diagonal pairs, which overlap on neither axis, are ignored.
+    Computed in row blocks so memory stays bounded for large tables.
+    """
+    n = len(boxes)
+    if n <= 1:
+        return float('inf')
+    best = np.inf
+    for start in range(0, n, _PAIRWISE_CHUNK):
+        a = boxes[start:start + _PAIRWISE_CHUNK]
+        x0a, y0a, x1a, y1a = (a[:, k, None] for k in range(4))
+        x0b, y0b, x1b, y1b = (boxes[None, :, k] for k in range(4))
+        x_overlap = ~((x1a <= x0b) | (x1b <= x0a))
+        y_overlap = ~((y1a <= y0b) | (y1b <= y0a))
+        overlap_x = np.minimum(x1a, x1b) - np.maximum(x0a, x0b)
+        overlap_y = np.minimum(y1a, y1b) - np.maximum(y0a, y0b)
+        gap = np.where(
+            x_overlap & y_overlap, -np.minimum(overlap_x, overlap_y),
+            np.where(x_overlap, -overlap_y, np.where(y_overlap, -overlap_x, np.inf)),
+        )
+        # 只统计 i < j 的组合
+        rows = np.arange(start, start + len(a))[:, None]
+        gap = np.where(rows < np.arange(n)[None, :], gap, np.inf)
+        best = min(best, float(gap.min()))
+    return best
@@ -0,0 +1,281 @@
+"""
+Streaming PDF writer for image-only documents
+
+Writes one page per image straight to a file object, so memory use is bounded
+by a single image instead of the whole document:
+
+- JPEG files are embedded as-is (DCTDecode) and copied in chunks.
+- 8-bit, non-interlaced gray/RGB PNG files are embedded without decoding: their
+  IDAT data is already a zlib stream with PNG predictors (FlateDecode +
+  Predictor 15), which is what img2pdf does too.
+- Anything else is decoded with Pillow, converted to RGB and deflated row block
+  by row block.
+
+Document info and XMP metadata are written as part of the same pass, so no
+post-processing copy of the finished PDF is needed.
+"""
+import hashlib
+import struct
+import uuid
+import zlib
+from datetime import datetime, timezone
+from textwrap import dedent
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_JPEG_COLOR_SPACES = {'L': ('/DeviceGray', 1), 'RGB': ('/DeviceRGB', 3), 'CMYK': ('/DeviceCMYK', 4)}
+_PNG_COLOR_SPACES = {0: ('/DeviceGray', 1), 2: ('/DeviceRGB', 3)}
+
+
+def build_xmp_metadata(creator: str, created_at: datetime, document_id: str) -> str:
+    """XMP packet with creator/producer fields (Windows Explorer reads these instead of /Info)."""
+    iso_time = created_at.isoformat()
+    return dedent(f'''\
+        <?xpacket begin="" id="W5M0MpCehiHzreSzNTczkc9d"?>
+        <x:xmpmeta xmlns:x="adobe:ns:meta/">
+          <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+            <rdf:Description rdf:about="" xmlns:dc="http://purl.org/dc/elements/1.1/">
+              <dc:creator><rdf:Seq><rdf:li>{creator}</rdf:li></rdf:Seq></dc:creator>
+            </rdf:Description>
+            <rdf:Description rdf:about="" xmlns:pdf="http://ns.adobe.com/pdf/1.3/">
+              <pdf:Producer>{creator}</pdf:Producer>
+            </rdf:Description>
+            <rdf:Description rdf:about="" xmlns:xmp="http://ns.adobe.com/xap/1.0/">
+              <xmp:CreatorTool>{creator}</xmp:CreatorTool>
+              <xmp:CreateDate>{iso_time}</xmp:CreateDate>
+              <xmp:MetadataDate>{iso_time}</xmp:MetadataDate>
+            </rdf:Description>
+            <rdf:Description rdf:about="" xmlns:xmpMM="http://ns.adobe.com/xap/1.0/mm/">
+              <xmpMM:DocumentID>uuid:{document_id}</xmpMM:DocumentID>
+            </rdf:Description>
+          </rdf:RDF>
+        </x:xmpmeta>
+        <?xpacket end="w"?>''')
+
+
+def _pdf_string(value: str) -> str:
+    escaped = value.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return f'({escaped})'
+
+
+def _read_png_header(path: str) -> Optional[Tuple[int, int, int, int, int]]:
+    """Return (width, height, bit_depth, color_type, interlace) of a PNG file, or None."""
+    with open(path, 'rb') as f:
+        if f.read(8) != _PNG_SIGNATURE:
+            return None
+        length, chunk_type = struct.unpack('>I4s', f.read(8))
+        if chunk_type != b'IHDR' or length != 13:
+            return None
+        width, height, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', f.read(13))
+        return width, height, bit_depth, color_type, interlace
+
+
+def _iter_png_idat(path: str):
+    """Yield the raw IDAT payloads of a PNG file in chunks."""
+    with open(path, 'rb') as f:
+        f.seek(8)
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return
+            length, chunk_type = struct.unpack('>I4s', header)
+            if chunk_type == b'IDAT':
+                remaining = length
+                while remaining:
+                    data = f.read(min(remaining, _COPY_CHUNK_SIZE))
+                    if not data:
+                        raise ValueError(f"Truncated PNG data: {path}")
+                    remaining -= len(data)
+                    yield data
+                f.seek(4, 1)  # CRC
+            elif chunk_type == b'IEND':
+                return
+            else:
+                f.seek(length + 4, 1)
+
+
+def _iter_file(path: str):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_COPY_CHUNK_SIZE), b''):
+            yield chunk
+
+
+class StreamingPDFWriter:
+    """
+    Append-only PDF writer: one full-bleed image per page.
+
+    Example:
+        >>> with open('out.pdf', 'wb') as f:
+        ...     writer = StreamingPDFWriter(f, page_size=(720, 405))
+        ...     for path in image_paths:
+        ...         writer.add_image_page(path)
+        ...     writer.close()
+    """
+
+    # Fixed object numbers; pages and images are allocated after these
+    _CATALOG, _PAGES, _INFO, _METADATA = 1, 2, 3, 4
+
+    def __init__(self, stream: BinaryIO, page_size: Tuple[float, float], creator: str = 'banana-slides'):
+        """
+        Args:
+            stream: Writable binary file object (does not need to be seekable)
+            page_size: Page (width, height) in PDF points
+            creator: Author/producer/creator recorded in the document metadata
+        """
+        self._stream = stream
+        self._page_size = page_size
+        self._creator = creator
+        self._position = 0
+        self._offsets: Dict[int, int] = {}
+        self._next_object = self._METADATA + 1
+        self._page_objects: List[int] = []
+        self._id_hash = hashlib.md5(uuid.uuid4().bytes)
+        self._write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_objects)
+
+    def _write(self, data: bytes) -> None:
+        self._stream.write(data)
+        self._position += len(data)
+
+    def _allocate(self) -> int:
+        number = self._next_object
+        self._next_object += 1
+        return number
+
+    def _begin_object(self, number: int) -> None:
+        self._offsets[number] = self._position
+        self._write(f'{number} 0 obj\n'.encode('ascii'))
+
+    def _write_object(self, number: int, body: str) -> None:
+        self._begin_object(number)
+        self._write(body.encode('latin-1') + b'\nendobj\n')
+
+    def _write_stream_object(self, number: int, dictionary: str, chunks) -> None:
+        """Write a stream object whose length is only known afterwards (indirect /Length)."""
+        length_number = self._allocate()
+        self._begin_object(number)
+        self._write(f'<< {dictionary} /Length {length_number} 0 R >>\nstream\n'.encode('latin-1'))
+        length = 0
+        for chunk in chunks:
+            if chunk:
+                self._write(chunk)
+                length += len(chunk)
+        self._write(b'\nendstream\nendobj\n')
+        self._write_object(length_number, str(length))
+
+    def _image_source(self, path: str):
+        """Return (dictionary entries, data chunks, width, height) for an image XObject."""
+        with Image.open(path) as img:
+            image_format = img.format
+            mode = img.mode
+            width, height = img.size
+            orientation = img.getexif().get(0x0112, 1) if image_format == 'JPEG' else 1
+
+        if image_format == 'JPEG' and mode in _JPEG_COLOR_SPACES and orientation == 1:
+            color_space, _ = _JPEG_COLOR_SPACES[mode]
+            decode = ' /Decode [1 0 1 0 1 0 1 0]' if mode == 'CMYK' else ''
+            entries = f'/ColorSpace {color_space} /BitsPerComponent 8 /Filter /DCTDecode{decode}'
+            return entries, _iter_file(path), width, height
+
+        if image_format == 'PNG':
+            header = _read_png_header(path)
+            if header and header[2] == 8 and header[3] in _PNG_COLOR_SPACES and header[4] == 0:
+                color_space, colors = _PNG_COLOR_SPACES[header[3]]
+                entries = (
+                    f'/ColorSpace {color_space} /BitsPerComponent 8 /Filter /FlateDecode '
+                    f'/DecodeParms << /Predictor 15 /Colors {colors} /BitsPerComponent 8 /Columns {width} >>'
+                )
+                return entries, _iter_png_idat(path), width, height
+
+        return self._decoded_image_source(path)
+
+    @staticmethod
+    def _decoded_image_source(path: str):
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            width, height = img.size
+            raw = img.tobytes()
+
+        def deflate():
+            compressor = zlib.compressobj(6)
+            row_bytes = width * 3
+            block = row_bytes * 256
+            for start in range(0, len(raw), block):
+                yield compressor.compress(raw[start:start + block])
+            yield compressor.flush()
+
+        entries = '/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode'
+        return entries, deflate(), width, height
+
+    def add_image_page(self, path: str) -> None:
+        """Append a page showing ``path`` scaled to fill the page (centered, aspect preserved)."""
+        entries, chunks, width, height = self._image_source(path)
+        self._id_hash.update(f'{path}:{width}x{height}'.encode('utf-8'))
+
+        image_number = self._allocate()
+        self._write_stream_object(
+            image_number,
+            f'/Type /XObject /Subtype /Image /Width {width} /Height {height} {entries}',
+            chunks,
+        )
+
+        page_w, page_h = self._page_size
+        scale = max(page_w / width, page_h / height)
+        draw_w, draw_h = width * scale, height * scale
+        x, y = (page_w - draw_w) / 2, (page_h - draw_h) / 2
+        content = f'q {draw_w:.4f} 0 0 {draw_h:.4f} {x:.4f} {y:.4f} cm /Im0 Do Q'.encode('ascii')
+        content_number = self._allocate()
+        self._write_stream_object(content_number, '', [content])
+
+        page_number = self._allocate()
+        self._write_object(
+            page_number,
+            f'<< /Type /Page /Parent {self._PAGES} 0 R /MediaBox [0 0 {page_w:.4f} {page_h:.4f}] '
+            f'/Resources << /XObject << /Im0 {image_number} 0 R >> >> /Contents {content_number} 0 R >>',
+        )
+        self._page_objects.append(page_number)
+
+    def close(self) -> None:
+        """Write the page tree, metadata, cross-reference table and trailer."""
+        if not self._page_objects:
+            raise ValueError("PDF has no pages")
+
+        now = datetime.now(timezone.utc)
+        document_id = self._id_hash.hexdigest()
+        pdf_date = now.strftime("D:%Y%m%d%H%M%SZ")
+
+        kids = ' '.join(f'{number} 0 R' for number in self._page_objects)
+        self._write_object(self._PAGES, f'<< /Type /Pages /Kids [{kids}] /Count {len(self._page_objects)} >>')
+        self._write_object(
+            self._CATALOG,
+            f'<< /Type /Catalog /Pages {self._PAGES} 0 R /Metadata {self._METADATA} 0 R >>',
+        )
+        creator = _pdf_string(self._creator)
+        self._write_object(
+            self._INFO,
+            f'<< /Author {creator} /Producer {creator} /Creator {creator} '
+            f'/CreationDate ({pdf_date}) /ModDate ({pdf_date}) >>',
+        )
+        xmp = build_xmp_metadata(self._creator, now, document_id).encode('utf-8')
+        self._begin_object(self._METADATA)
+        self._write(f'<< /Type /Metadata /Subtype /XML /Length {len(xmp)} >>\nstream\n'.encode('ascii'))
+        self._write(xmp + b'\nendstream\nendobj\n')
+
+        xref_offset = self._position
+        size = self._next_object
+        lines = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        for number in range(1, size):
+            lines.append(f'{self._offsets[number]:010d} 00000 n \n')
+        self._write(''.join(lines).encode('ascii'))
+        self._write(
+            f'trailer\n<< /Size {size} /Root {self._CATALOG} 0 R /Info {self._INFO} 0 R '
+            f'/ID [<{document_id}> <{document_id}>] >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode('ascii')
+        )
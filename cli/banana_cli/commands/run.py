@@ -6,11 +6,12 @@ import json
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import typer
 
 from ..errors import InputError
+from ..jobs.concurrency import parse_stage_limits
 from ..jobs.loader import load_jobs
 from ..jobs.runner import run_jobs
 from ..output import cli_command, emit_run_output
@@ -30,8 +31,15 @@ def run_jobs_cmd(
     state_file: Optional[str] = typer.Option(None, help="Output run state JSON path"),
     done_marker_file: Optional[str] = typer.Option(None, help="JSON file to track completed jobs"),
     progress_interval_sec: int = typer.Option(60, help="Throttle terminal progress prints"),
+    parallel: int = typer.Option(1, min=1, help="Number of jobs to run concurrently"),
+    stage_limit: Optional[List[str]] = typer.Option(
+        None,
+        "--stage-limit",
+        help="Cap jobs inside a stage at once, STAGE=N (outline, descriptions, images, export); repeatable",
+    ),
 ) -> None:
     """Run jobs from JSONL/CSV."""
+    stage_limits = parse_stage_limits(stage_limit)
     jobs = load_jobs(file)
     report_result = run_jobs(
         state.api,
@@ -42,6 +50,8 @@ def run_jobs_cmd(
         state_file=state_file,
         done_marker_file=done_marker_file,
         progress_interval_sec=progress_interval_sec,
+        parallel=parallel,
+        stage_limits=stage_limits,
     )
     out = write_report(report_result, report)
 
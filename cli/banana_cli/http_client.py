@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
+import json
 import time
 from dataclasses import asdict
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 from urllib.parse import urljoin
 
 import httpx
@@ -153,6 +154,51 @@ class APIClient:
     def delete(self, path_or_url: str, **kwargs: Any) -> Any:
         return self.request("DELETE", path_or_url, **kwargs)
 
+    def stream_events(self, path_or_url: str, *, timeout: int | None = None) -> Iterator[tuple[str | None, Any]]:
+        """Yield ``(event, data)`` pairs from a Server-Sent Events endpoint.
+
+        ``data`` is JSON-decoded when possible. Comment lines (server keep-alives)
+        are yielded as ``(None, None)`` so callers can check their own deadlines.
+        """
+        url = self._build_url(path_or_url)
+        req_headers = self._headers(path_or_url, {"Accept": "text/event-stream"})
+        timeout_sec = timeout or self.config.request_timeout
+
+        try:
+            with httpx.Client(timeout=timeout_sec) as client:
+                with client.stream("GET", url, headers=req_headers) as response:
+                    if not response.is_success:
+                        response.read()
+                        payload = None
+                        try:
+                            payload = response.json()
+                        except Exception:  # noqa: BLE001
+                            payload = None
+                        raise self._http_error(response, url, payload)
+
+                    event: str | None = None
+                    data_lines: list[str] = []
+                    for line in response.iter_lines():
+                        if line.startswith(":"):
+                            yield None, None
+                        elif line.startswith("event:"):
+                            event = line[len("event:"):].strip()
+                        elif line.startswith("data:"):
+                            data_lines.append(line[len("data:"):].lstrip())
+                        elif not line and (event or data_lines):
+                            raw_data = "\n".join(data_lines)
+                            try:
+                                data: Any = json.loads(raw_data)
+                            except ValueError:
+                                data = raw_data
+                            yield event or "message", data
+                            event, data_lines = None, []
+        except httpx.TransportError as exc:
+            raise HTTPError(
+                f"Network error streaming {url}: {exc}",
+                details={"url": url},
+            ) from exc
+
     def download(self, path_or_url: str, output_path: str | Path) -> dict[str, Any]:
         """Download a binary response to local file."""
         output = Path(output_path)
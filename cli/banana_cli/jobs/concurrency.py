@@ -0,0 +1,59 @@
+"""Concurrency limits for parallel batch runs."""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Sequence
+
+from ..errors import InputError
+
+# Stages a per-stage cap can target (``--stage-limit export=2``).
+STAGES = ("outline", "descriptions", "images", "export")
+
+
+def parse_stage_limits(values: Sequence[str] | None) -> dict[str, int]:
+    """Parse ``STAGE=N`` options into a limit mapping."""
+    limits: dict[str, int] = {}
+    for raw in values or []:
+        stage, sep, count = raw.partition("=")
+        stage = stage.strip().lower()
+        if not sep or stage not in STAGES:
+            raise InputError(
+                f"Invalid --stage-limit: {raw}",
+                details={"expected": "STAGE=N", "stages": list(STAGES)},
+            )
+        try:
+            value = int(count)
+        except ValueError:
+            value = 0
+        if value <= 0:
+            raise InputError(f"Invalid --stage-limit: {raw}", details="N must be a positive integer")
+        limits[stage] = value
+    return limits
+
+
+class StageLimiter:
+    """Caps how many jobs may be inside a given stage at the same time."""
+
+    def __init__(self, limits: dict[str, int]):
+        self.limits = dict(limits)
+        self._semaphores = {stage: threading.BoundedSemaphore(n) for stage, n in self.limits.items()}
+
+    @contextmanager
+    def slot(self, stage: str) -> Iterator[None]:
+        semaphore = self._semaphores.get(stage)
+        if semaphore is None:
+            yield
+            return
+        with semaphore:
+            yield
+
+
+@contextmanager
+def stage_slot(limiter: StageLimiter | None, stage: str) -> Iterator[None]:
+    if limiter is None:
+        yield
+        return
+    with limiter.slot(stage):
+        yield
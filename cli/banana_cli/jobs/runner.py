@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 import json
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -14,6 +16,7 @@ from ..errors import CLIError, IOErrorCLI
 from ..http_client import APIClient
 from ..models import ArtifactRecord, JobError, JobReport, JobSpec, RunReport, normalize_job_id
 from ..reporter import finalize_report
+from .concurrency import StageLimiter
 from .workflow import execute_export_only, execute_full_generation
 
 
@@ -119,16 +122,34 @@ def run_jobs(
     state_file: str | None = None,
     done_marker_file: str | None = None,
     progress_interval_sec: int = 60,
+    parallel: int = 1,
+    stage_limits: dict[str, int] | None = None,
 ) -> RunReport:
+    """Run jobs, up to ``parallel`` at a time.
+
+    With ``parallel > 1`` jobs run on a bounded thread pool (each job mostly
+    waits on its backend tasks). State file, done markers and the report are
+    updated under one lock, and the report lists jobs in input order. On a
+    failure without continue-on-error no new jobs are started; jobs already
+    running finish. ``stage_limits`` caps how many jobs may be inside a stage
+    at once (see ``concurrency.STAGES``), e.g. ``{"export": 2}``.
+    """
     report = RunReport(base_url=config.base_url)
     global_continue = config.continue_on_error if default_continue_on_error is None else default_continue_on_error
     global_timeout = 1800 if default_timeout_sec is None else default_timeout_sec
     progress_interval_sec = max(1, int(progress_interval_sec))
+    parallel = max(1, int(parallel))
+    stage_limiter = StageLimiter(stage_limits) if stage_limits else None
+    # Only pass the limiter when configured, keeping the executor call signature unchanged otherwise
+    execute_kwargs: dict[str, Any] = {"stage_limiter": stage_limiter} if stage_limiter else {}
 
     state_path = Path(state_file).expanduser() if state_file else None
     marker_path = Path(done_marker_file).expanduser() if done_marker_file else None
     run_state: dict[str, Any] | None = None
     done_markers: dict[str, Any] | None = None
+    lock = threading.RLock()
+    running_job_ids: list[str] = []
+    finished: list[tuple[int, JobReport]] = []
 
     if state_path is not None:
         run_state = {
@@ -139,6 +160,7 @@ def run_jobs(
             "updated_at": report.started_at,
             "finished_at": None,
             "status": "RUNNING",
+            "parallel": parallel,
             "summary": {
                 "total": len(jobs),
                 "completed": 0,
@@ -146,6 +168,7 @@ def run_jobs(
                 "failed": 0,
             },
             "current_job_id": None,
+            "running_job_ids": [],
             "jobs": [],
         }
         _write_state_file(state_path, run_state)
@@ -156,119 +179,137 @@ def run_jobs(
     def persist_state() -> None:
         if run_state is None or state_path is None:
             return
-        run_state["updated_at"] = _utc_now_iso()
-        _write_state_file(state_path, run_state)
+        with lock:
+            run_state["updated_at"] = _utc_now_iso()
+            run_state["running_job_ids"] = list(running_job_ids)
+            run_state["current_job_id"] = running_job_ids[-1] if running_job_ids else None
+            _write_state_file(state_path, run_state)
 
     def persist_markers() -> None:
         if done_markers is None or marker_path is None:
             return
-        done_markers["updated_at"] = _utc_now_iso()
-        _write_done_marker_file(marker_path, done_markers)
+        with lock:
+            done_markers["updated_at"] = _utc_now_iso()
+            _write_done_marker_file(marker_path, done_markers)
+
+    def record(idx: int, job_id: str, job_report: JobReport, job_state: dict[str, Any] | None,
+               **state_updates: Any) -> None:
+        with lock:
+            finished.append((idx, job_report))
+            if job_id in running_job_ids:
+                running_job_ids.remove(job_id)
+            if run_state is not None and job_state is not None:
+                job_state.update(state_updates)
+                job_state["duration_sec"] = job_report.duration_sec
+                job_state["completed_at"] = _utc_now_iso()
+                summary = run_state["summary"]
+                summary["completed"] += 1
+                summary["success" if job_report.status == "SUCCESS" else "failed"] += 1
+                persist_state()
 
-    for idx, job in enumerate(jobs, start=1):
+    def run_one(idx: int, job: JobSpec) -> bool:
+        """Run a single job; returns False when the run should stop starting new jobs."""
         job_id = normalize_job_id(job, idx)
         job_continue = job.policy.continue_on_error if job.policy else global_continue
         timeout_sec = job.policy.timeout_sec if job.policy and job.policy.timeout_sec else global_timeout
         last_printed_at = 0.0
 
         job_state: dict[str, Any] | None = None
-        if run_state is not None:
-            job_state = {
-                "index": idx,
-                "job_id": job_id,
-                "status": "RUNNING",
-                "stage": "STARTING",
-                "project_id": job.project_id,
-                "started_at": _utc_now_iso(),
-                "completed_at": None,
-                "current_task_id": None,
-                "tasks": {},
-                "artifacts": [],
-                "last_progress": {},
-                "error": None,
-            }
-            run_state["jobs"].append(job_state)
-            run_state["current_job_id"] = job_id
-            persist_state()
+        with lock:
+            running_job_ids.append(job_id)
+            if run_state is not None:
+                job_state = {
+                    "index": idx,
+                    "job_id": job_id,
+                    "status": "RUNNING",
+                    "stage": "STARTING",
+                    "project_id": job.project_id,
+                    "started_at": _utc_now_iso(),
+                    "completed_at": None,
+                    "current_task_id": None,
+                    "tasks": {},
+                    "artifacts": [],
+                    "last_progress": {},
+                    "error": None,
+                }
+                run_state["jobs"].append(job_state)
+                persist_state()
 
-        marker_job = None
-        if done_markers is not None:
-            marker_jobs = done_markers.get("jobs") or {}
-            if isinstance(marker_jobs, dict):
-                marker_job = marker_jobs.get(job_id)
+            marker_job = None
+            if done_markers is not None:
+                marker_jobs = done_markers.get("jobs") or {}
+                if isinstance(marker_jobs, dict):
+                    marker_job = marker_jobs.get(job_id)
 
         marker_status = str((marker_job or {}).get("status") or "").upper() if isinstance(marker_job, dict) else ""
         if isinstance(marker_job, dict) and marker_status in {"", "SUCCESS"}:
             artifacts = _marker_artifacts(marker_job)
             project_id = marker_job.get("project_id")
-            report.jobs.append(
+            skipped_error = {
+                "code": "SKIPPED_DONE_MARKER",
+                "message": "Skipped because this job_id is already marked done",
+            }
+            print(f"[{job_id}] SKIPPED (DONE_MARKER)")
+            state_updates: dict[str, Any] = {
+                "status": "SUCCESS",
+                "stage": "SKIPPED_DONE_MARKER",
+                "project_id": project_id,
+                "error": skipped_error,
+            }
+            if artifacts:
+                state_updates["artifacts"] = [a.model_dump() for a in artifacts]
+            record(
+                idx,
+                job_id,
                 JobReport(
                     job_id=job_id,
                     status="SUCCESS",
                     project_id=project_id,
                     tasks=[],
                     artifacts=artifacts,
-                    error=JobError(
-                        code="SKIPPED_DONE_MARKER",
-                        message="Skipped because this job_id is already marked done",
-                    ),
+                    error=JobError(**skipped_error),
                     duration_sec=0,
-                )
+                ),
+                job_state,
+                **state_updates,
             )
-            print(f"[{job_id}] SKIPPED (DONE_MARKER)")
-            if run_state is not None and job_state is not None:
-                job_state["status"] = "SUCCESS"
-                job_state["stage"] = "SKIPPED_DONE_MARKER"
-                job_state["project_id"] = project_id
-                job_state["duration_sec"] = 0
-                job_state["completed_at"] = _utc_now_iso()
-                job_state["error"] = {
-                    "code": "SKIPPED_DONE_MARKER",
-                    "message": "Skipped because this job_id is already marked done",
-                }
-                if artifacts:
-                    job_state["artifacts"] = [a.model_dump() for a in artifacts]
-                summary = run_state["summary"]
-                summary["completed"] += 1
-                summary["success"] += 1
-                run_state["current_job_id"] = None
-                persist_state()
-            continue
+            return True
 
         started = time.monotonic()
 
         def on_progress(event: dict[str, Any]) -> None:
             nonlocal last_printed_at
             if job_state is not None:
-                project_id = event.get("project_id")
-                if project_id:
-                    job_state["project_id"] = project_id
-
-                stage = event.get("stage") or event.get("task_type")
-                if stage:
-                    job_state["stage"] = stage
-
-                task_id = event.get("task_id")
-                if task_id:
-                    task_item = job_state["tasks"].setdefault(task_id, {})
-                    task_item["task_type"] = event.get("task_type")
-                    task_item["status"] = event.get("status")
-                    task_item["updated_at"] = _utc_now_iso()
-                    progress = event.get("progress")
-                    if isinstance(progress, dict):
-                        task_item["progress"] = progress
-                        job_state["last_progress"] = progress
-                    job_state["current_task_id"] = task_id
-
-                if event.get("event") == "artifact_ready":
-                    job_state["artifacts"].append(
-                        {
-                            "format": event.get("format"),
-                            "download_url": event.get("download_url"),
-                        }
-                    )
-
-                persist_state()
+                with lock:
+                    project_id = event.get("project_id")
+                    if project_id:
+                        job_state["project_id"] = project_id
+
+                    stage = event.get("stage") or event.get("task_type")
+                    if stage:
+                        job_state["stage"] = stage
+
+                    task_id = event.get("task_id")
+                    if task_id:
+                        task_item = job_state["tasks"].setdefault(task_id, {})
+                        task_item["task_type"] = event.get("task_type")
+                        task_item["status"] = event.get("status")
+                        task_item["updated_at"] = _utc_now_iso()
+                        progress = event.get("progress")
+                        if isinstance(progress, dict):
+                            task_item["progress"] = progress
+                            job_state["last_progress"] = progress
+                        job_state["current_task_id"] = task_id
+
+                    if event.get("event") == "artifact_ready":
+                        job_state["artifacts"].append(
+                            {
+                                "format": event.get("format"),
+                                "download_url": event.get("download_url"),
+                            }
+                        )
+
+                    persist_state()
 
             now = time.monotonic()
             must_print = event.get("event") in {
@@ -286,46 +327,55 @@ def run_jobs(
             last_printed_at = now
 
         try:
-            if job.job_type == "full_generation":
-                outcome = execute_full_generation(
-                    api,
-                    job,
-                    timeout_sec=timeout_sec,
-                    poll_interval=config.poll_interval,
-                    progress_callback=on_progress,
-                )
+            execute = execute_full_generation if job.job_type == "full_generation" else execute_export_only
+            outcome = execute(
+                api,
+                job,
+                timeout_sec=timeout_sec,
+                poll_interval=config.poll_interval,
+                progress_callback=on_progress,
+                **execute_kwargs,
+            )
+        except Exception as exc:  # noqa: BLE001
+            if isinstance(exc, CLIError):
+                code, message = exc.code, exc.message
+                print(f"[{job_id}] FAILED ({code}): {message}")
             else:
-                outcome = execute_export_only(
-                    api,
-                    job,
-                    timeout_sec=timeout_sec,
-                    poll_interval=config.poll_interval,
-                    progress_callback=on_progress,
-                )
-
-            duration = int(time.monotonic() - started)
-            job_report = JobReport(
-                job_id=job_id,
-                status="SUCCESS",
-                project_id=outcome.get("project_id"),
-                tasks=outcome.get("tasks", []),
-                artifacts=outcome.get("artifacts", []),
-                error=JobError(code=None, message=None),
-                duration_sec=duration,
+                code, message = "UNEXPECTED_ERROR", str(exc)
+                print(f"[{job_id}] FAILED (UNEXPECTED_ERROR): {exc}")
+            record(
+                idx,
+                job_id,
+                JobReport(
+                    job_id=job_id,
+                    status="FAILED",
+                    project_id=job.project_id,
+                    tasks=[],
+                    artifacts=[],
+                    error=JobError(code=code, message=message),
+                    duration_sec=int(time.monotonic() - started),
+                ),
+                job_state,
+                status="FAILED",
+                error={"code": code, "message": message},
             )
-            report.jobs.append(job_report)
-            print(f"[{job_id}] SUCCESS in {duration}s")
-            if run_state is not None and job_state is not None:
-                job_state["status"] = "SUCCESS"
-                job_state["duration_sec"] = duration
-                job_state["completed_at"] = _utc_now_iso()
-                summary = run_state["summary"]
-                summary["completed"] += 1
-                summary["success"] += 1
-                run_state["current_job_id"] = None
-                persist_state()
+            return job_continue
+
+        duration = int(time.monotonic() - started)
+        job_report = JobReport(
+            job_id=job_id,
+            status="SUCCESS",
+            project_id=outcome.get("project_id"),
+            tasks=outcome.get("tasks", []),
+            artifacts=outcome.get("artifacts", []),
+            error=JobError(code=None, message=None),
+            duration_sec=duration,
+        )
+        print(f"[{job_id}] SUCCESS in {duration}s")
+        record(idx, job_id, job_report, job_state, status="SUCCESS")
 
-            if done_markers is not None:
+        if done_markers is not None:
+            with lock:
                 marker_jobs = done_markers.setdefault("jobs", {})
                 if isinstance(marker_jobs, dict):
                     marker_jobs[job_id] = {
@@ -337,63 +387,35 @@ def run_jobs(
                         "marked_at": _utc_now_iso(),
                     }
                     persist_markers()
-        except CLIError as exc:
-            duration = int(time.monotonic() - started)
-            report.jobs.append(
-                JobReport(
-                    job_id=job_id,
-                    status="FAILED",
-                    project_id=job.project_id,
-                    tasks=[],
-                    artifacts=[],
-                    error=JobError(code=exc.code, message=exc.message),
-                    duration_sec=duration,
-                )
-            )
-            print(f"[{job_id}] FAILED ({exc.code}): {exc.message}")
-            if run_state is not None and job_state is not None:
-                job_state["status"] = "FAILED"
-                job_state["duration_sec"] = duration
-                job_state["completed_at"] = _utc_now_iso()
-                job_state["error"] = {"code": exc.code, "message": exc.message}
-                summary = run_state["summary"]
-                summary["completed"] += 1
-                summary["failed"] += 1
-                run_state["current_job_id"] = None
-                persist_state()
-            if not job_continue:
+        return True
+
+    if parallel == 1:
+        for idx, job in enumerate(jobs, start=1):
+            if not run_one(idx, job):
                 break
-        except Exception as exc:  # noqa: BLE001
-            duration = int(time.monotonic() - started)
-            report.jobs.append(
-                JobReport(
-                    job_id=job_id,
-                    status="FAILED",
-                    project_id=job.project_id,
-                    tasks=[],
-                    artifacts=[],
-                    error=JobError(code="UNEXPECTED_ERROR", message=str(exc)),
-                    duration_sec=duration,
+    else:
+        with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="banana-job") as pool:
+            in_flight: set[Future] = set()
+            for idx, job in enumerate(jobs, start=1):
+                # Block only when the pool is full, but always collect finished jobs first
+                done, pending = wait(
+                    in_flight,
+                    timeout=None if len(in_flight) >= parallel else 0,
+                    return_when=FIRST_COMPLETED,
                 )
-            )
-            print(f"[{job_id}] FAILED (UNEXPECTED_ERROR): {exc}")
-            if run_state is not None and job_state is not None:
-                job_state["status"] = "FAILED"
-                job_state["duration_sec"] = duration
-                job_state["completed_at"] = _utc_now_iso()
-                job_state["error"] = {"code": "UNEXPECTED_ERROR", "message": str(exc)}
-                summary = run_state["summary"]
-                summary["completed"] += 1
-                summary["failed"] += 1
-                run_state["current_job_id"] = None
-                persist_state()
-            if not job_continue:
-                break
+                in_flight = set(pending)
+                if not all(f.result() for f in done):
+                    break
+                in_flight.add(pool.submit(run_one, idx, job))
+            for future in in_flight:
+                future.result()
+
+    report.jobs = [job_report for _, job_report in sorted(finished, key=lambda item: item[0])]
 
     if run_state is not None:
-        run_state["finished_at"] = _utc_now_iso()
-        run_state["status"] = "COMPLETED_WITH_FAILURES" if run_state["summary"]["failed"] > 0 else "COMPLETED"
-        run_state["current_job_id"] = None
-        persist_state()
+        with lock:
+            run_state["finished_at"] = _utc_now_iso()
+            run_state["status"] = "COMPLETED_WITH_FAILURES" if run_state["summary"]["failed"] > 0 else "COMPLETED"
+            persist_state()
 
     return finalize_report(report)
@@ -8,9 +8,10 @@ from pathlib import Path
 from typing import Any, Callable
 from urllib.parse import urljoin
 
-from ..errors import TaskError, TimeoutError
+from ..errors import HTTPError, TaskError, TimeoutError
 from ..http_client import APIClient
 from ..models import ArtifactRecord, JobSpec, TaskRecord
+from .concurrency import StageLimiter, stage_slot
 
 
 def _emit_progress(
@@ -64,76 +65,141 @@ def make_stderr_progress_cb() -> Callable[[dict[str, Any]], None]:
     return _cb
 
 
-def wait_task(
-    api: APIClient,
+def _check_task_state(
     project_id: str,
     task_id: str,
-    *,
-    timeout_sec: int,
-    poll_interval: int,
-    progress_callback: Callable[[dict[str, Any]], None] | None = None,
-) -> dict[str, Any]:
-    start = time.monotonic()
-    while True:
-        payload = api.get(f"/api/projects/{project_id}/tasks/{task_id}")
-        data = payload.get("data", {})
-        status = data.get("status")
-        progress = data.get("progress") or {}
+    data: dict[str, Any],
+    progress_callback: Callable[[dict[str, Any]], None] | None,
+) -> bool:
+    """Report one observed task state; True once completed, TaskError if failed."""
+    status = data.get("status")
+    progress = data.get("progress") or {}
+
+    _emit_progress(
+        progress_callback,
+        {
+            "event": "task_polled",
+            "project_id": project_id,
+            "task_id": task_id,
+            "task_type": data.get("task_type"),
+            "status": status,
+            "progress": progress,
+        },
+    )
 
+    if status == "COMPLETED":
+        _emit_progress(
+            progress_callback,
+            {
+                "event": "task_completed",
+                "project_id": project_id,
+                "task_id": task_id,
+                "task_type": data.get("task_type"),
+                "status": status,
+                "progress": progress,
+            },
+        )
+        return True
+    if status == "FAILED":
         _emit_progress(
             progress_callback,
             {
-                "event": "task_polled",
+                "event": "task_failed",
                 "project_id": project_id,
                 "task_id": task_id,
                 "task_type": data.get("task_type"),
                 "status": status,
                 "progress": progress,
+                "error_message": data.get("error_message"),
             },
         )
+        raise TaskError(
+            f"Task {task_id} failed",
+            details={
+                "project_id": project_id,
+                "task_id": task_id,
+                "error_message": data.get("error_message"),
+                "progress": data.get("progress"),
+            },
+        )
+    return False
 
-        if status == "COMPLETED":
-            _emit_progress(
-                progress_callback,
-                {
-                    "event": "task_completed",
-                    "project_id": project_id,
-                    "task_id": task_id,
-                    "task_type": data.get("task_type"),
-                    "status": status,
-                    "progress": progress,
-                },
-            )
+
+def _raise_task_timeout(project_id: str, task_id: str, timeout_sec: int, status: Any) -> None:
+    raise TimeoutError(
+        f"Task timeout after {timeout_sec}s",
+        details={"project_id": project_id, "task_id": task_id, "last_status": status},
+    )
+
+
+def _stream_task(
+    api: APIClient,
+    project_id: str,
+    task_id: str,
+    *,
+    start: float,
+    timeout_sec: int,
+    progress_callback: Callable[[dict[str, Any]], None] | None,
+) -> dict[str, Any] | None:
+    """Follow the task's SSE progress stream. Returns None if the stream ended early."""
+    data: dict[str, Any] = {}
+    for event, payload in api.stream_events(f"/api/projects/{project_id}/tasks/{task_id}/stream"):
+        if event in ("snapshot", "done") and isinstance(payload, dict):
+            data = payload
+        elif event == "progress" and isinstance(payload, dict):
+            delta = dict(payload)
+            progress_delta = delta.pop("progress", None) or {}
+            data = {**data, **delta, "progress": {**(data.get("progress") or {}), **progress_delta}}
+        elif event == "error":
+            return None
+
+        if event is not None and _check_task_state(project_id, task_id, data, progress_callback):
             return data
-        if status == "FAILED":
-            _emit_progress(
-                progress_callback,
-                {
-                    "event": "task_failed",
-                    "project_id": project_id,
-                    "task_id": task_id,
-                    "task_type": data.get("task_type"),
-                    "status": status,
-                    "progress": progress,
-                    "error_message": data.get("error_message"),
-                },
-            )
-            raise TaskError(
-                f"Task {task_id} failed",
-                details={
-                    "project_id": project_id,
-                    "task_id": task_id,
-                    "error_message": data.get("error_message"),
-                    "progress": data.get("progress"),
-                },
+        if time.monotonic() - start >= timeout_sec:
+            _raise_task_timeout(project_id, task_id, timeout_sec, data.get("status"))
+    return None
+
+
+def wait_task(
+    api: APIClient,
+    project_id: str,
+    task_id: str,
+    *,
+    timeout_sec: int,
+    poll_interval: int,
+    progress_callback: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    """Wait for a task to finish, following its progress stream when the backend offers one.
+
+    Falls back to polling ``GET .../tasks/{task_id}`` every ``poll_interval``
+    seconds when the stream is unavailable (older backend, proxy without SSE)
+    or drops before the task finishes.
+    """
+    start = time.monotonic()
+    if hasattr(api, "stream_events"):
+        try:
+            data = _stream_task(
+                api,
+                project_id,
+                task_id,
+                start=start,
+                timeout_sec=timeout_sec,
+                progress_callback=progress_callback,
             )
+            if data is not None:
+                return data
+        except HTTPError:
+            pass
+
+    while True:
+        payload = api.get(f"/api/projects/{project_id}/tasks/{task_id}")
+        data = payload.get("data", {})
+        if _check_task_state(project_id, task_id, data, progress_callback):
+            return data
 
         elapsed = time.monotonic() - start
         if elapsed >= timeout_sec:
-            raise TimeoutError(
-                f"Task timeout after {timeout_sec}s",
-                details={"project_id": project_id, "task_id": task_id, "last_status": status},
-            )
+            _raise_task_timeout(project_id, task_id, timeout_sec, data.get("status"))
 
         time.sleep(poll_interval)
 
@@ -186,6 +252,7 @@ def execute_full_generation(
     timeout_sec: int,
     poll_interval: int,
     progress_callback: Callable[[dict[str, Any]], None] | None = None,
+    stage_limiter: StageLimiter | None = None,
 ) -> dict[str, Any]:
     if job.creation_type is None:
         raise ValueError("creation_type is required for full_generation")
@@ -272,7 +339,8 @@ def execute_full_generation(
                 "stage": "GENERATE_FROM_DESCRIPTION",
             },
         )
-        api.post(f"/api/projects/{project_id}/generate/from-description", json_data=from_desc_body)
+        with stage_slot(stage_limiter, "outline"):
+            api.post(f"/api/projects/{project_id}/generate/from-description", json_data=from_desc_body)
     else:
         _emit_progress(
             progress_callback,
@@ -285,63 +353,66 @@ def execute_full_generation(
         outline_body: dict[str, Any] = {}
         if job.language:
             outline_body["language"] = job.language
-        api.post(f"/api/projects/{project_id}/generate/outline", json_data=outline_body)
+        with stage_slot(stage_limiter, "outline"):
+            api.post(f"/api/projects/{project_id}/generate/outline", json_data=outline_body)
 
         desc_body: dict[str, Any] = dict(language_payload)
         if job.max_description_workers is not None:
             desc_body["max_workers"] = job.max_description_workers
 
-        desc_resp = api.post(f"/api/projects/{project_id}/generate/descriptions", json_data=desc_body)
-        desc_task_id = desc_resp.get("data", {}).get("task_id")
-        if not desc_task_id:
-            raise TaskError("Generate descriptions response missing task_id", details=desc_resp)
+        with stage_slot(stage_limiter, "descriptions"):
+            desc_resp = api.post(f"/api/projects/{project_id}/generate/descriptions", json_data=desc_body)
+            desc_task_id = desc_resp.get("data", {}).get("task_id")
+            if not desc_task_id:
+                raise TaskError("Generate descriptions response missing task_id", details=desc_resp)
+            _emit_progress(
+                progress_callback,
+                {
+                    "event": "task_started",
+                    "project_id": project_id,
+                    "task_id": desc_task_id,
+                    "task_type": "GENERATE_DESCRIPTIONS",
+                    "stage": "GENERATE_DESCRIPTIONS",
+                },
+            )
+            wait_task(
+                api,
+                project_id,
+                desc_task_id,
+                timeout_sec=timeout_sec,
+                poll_interval=poll_interval,
+                progress_callback=progress_callback,
+            )
+        tasks.append(TaskRecord(task_id=desc_task_id, type="GENERATE_DESCRIPTIONS", status="COMPLETED"))
+
+    image_body: dict[str, Any] = dict(language_payload)
+    image_body["use_template"] = job.use_template
+    if job.max_image_workers is not None:
+        image_body["max_workers"] = job.max_image_workers
+
+    with stage_slot(stage_limiter, "images"):
+        image_resp = api.post(f"/api/projects/{project_id}/generate/images", json_data=image_body)
+        image_task_id = image_resp.get("data", {}).get("task_id")
+        if not image_task_id:
+            raise TaskError("Generate images response missing task_id", details=image_resp)
         _emit_progress(
             progress_callback,
             {
                 "event": "task_started",
                 "project_id": project_id,
-                "task_id": desc_task_id,
-                "task_type": "GENERATE_DESCRIPTIONS",
-                "stage": "GENERATE_DESCRIPTIONS",
+                "task_id": image_task_id,
+                "task_type": "GENERATE_IMAGES",
+                "stage": "GENERATE_IMAGES",
             },
         )
         wait_task(
             api,
             project_id,
-            desc_task_id,
+            image_task_id,
             timeout_sec=timeout_sec,
             poll_interval=poll_interval,
             progress_callback=progress_callback,
         )
-        tasks.append(TaskRecord(task_id=desc_task_id, type="GENERATE_DESCRIPTIONS", status="COMPLETED"))
-
-    image_body: dict[str, Any] = dict(language_payload)
-    image_body["use_template"] = job.use_template
-    if job.max_image_workers is not None:
-        image_body["max_workers"] = job.max_image_workers
-
-    image_resp = api.post(f"/api/projects/{project_id}/generate/images", json_data=image_body)
-    image_task_id = image_resp.get("data", {}).get("task_id")
-    if not image_task_id:
-        raise TaskError("Generate images response missing task_id", details=image_resp)
-    _emit_progress(
-        progress_callback,
-        {
-            "event": "task_started",
-            "project_id": project_id,
-            "task_id": image_task_id,
-            "task_type": "GENERATE_IMAGES",
-            "stage": "GENERATE_IMAGES",
-        },
-    )
-    wait_task(
-        api,
-        project_id,
-        image_task_id,
-        timeout_sec=timeout_sec,
-        poll_interval=poll_interval,
-        progress_callback=progress_callback,
-    )
     tasks.append(TaskRecord(task_id=image_task_id, type="GENERATE_IMAGES", status="COMPLETED"))
 
     _emit_progress(
@@ -361,6 +432,7 @@ def execute_full_generation(
             poll_interval=poll_interval,
             tasks=tasks,
             progress_callback=progress_callback,
+            stage_limiter=stage_limiter,
         )
     )
 
@@ -378,6 +450,7 @@ def execute_export_only(
     timeout_sec: int,
     poll_interval: int,
     progress_callback: Callable[[dict[str, Any]], None] | None = None,
+    stage_limiter: StageLimiter | None = None,
 ) -> dict[str, Any]:
     if not job.project_id:
         raise ValueError("project_id required for export_only")
@@ -391,6 +464,7 @@ def execute_export_only(
         poll_interval=poll_interval,
         tasks=tasks,
         progress_callback=progress_callback,
+        stage_limiter=stage_limiter,
     )
 
     return {
@@ -409,6 +483,29 @@ def execute_exports(
     poll_interval: int,
     tasks: list[TaskRecord],
     progress_callback: Callable[[dict[str, Any]], None] | None = None,
+    stage_limiter: StageLimiter | None = None,
+) -> list[ArtifactRecord]:
+    with stage_slot(stage_limiter, "export"):
+        return _execute_exports(
+            api,
+            project_id,
+            job,
+            timeout_sec=timeout_sec,
+            poll_interval=poll_interval,
+            tasks=tasks,
+            progress_callback=progress_callback,
+        )
+
+
+def _execute_exports(
+    api: APIClient,
+    project_id: str,
+    job: JobSpec,
+    *,
+    timeout_sec: int,
+    poll_interval: int,
+    tasks: list[TaskRecord],
+    progress_callback: Callable[[dict[str, Any]], None] | None,
 ) -> list[ArtifactRecord]:
     artifacts: list[ArtifactRecord] = []
     page_ids_param = ",".join(job.export.page_ids) if job.export.page_ids else None
@@ -168,4 +168,13 @@ export const getImageUrl = (path?: string, timestamp?: string | number): string
   return url;
 };
 
+// 缩略图URL：后端按 w 向上取整到 256/640/1280 缩略图档位，format=auto 时按浏览器 Accept 返回 AVIF/WebP
+export const getThumbnailUrl = (path: string | undefined, width: number, timestamp?: string | number): string => {
+  const url = getImageUrl(path, timestamp);
+  if (!url || isClientSideUrl(url) || !url.includes('/files/')) return url;
+  const dpr = typeof window !== 'undefined' ? window.devicePixelRatio || 1 : 1;
+  const sep = url.includes('?') ? '&' : '?';
+  return `${url}${sep}w=${Math.ceil(width * dpr)}&format=auto`;
+};
+
 export default apiClient;
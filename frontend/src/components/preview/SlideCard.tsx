@@ -2,7 +2,7 @@ import React from 'react';
 import { Edit2, Trash2, Image as ImageIcon } from 'lucide-react';
 import { useT } from '@/hooks/useT';
 import { StatusBadge, Skeleton, useConfirm } from '@/components/shared';
-import { getImageUrl } from '@/api/client';
+import { getThumbnailUrl } from '@/api/client';
 import type { Page } from '@/types';
 
 // SlideCard 组件自包含翻译
@@ -51,7 +51,7 @@ export const SlideCard: React.FC<SlideCardProps> = ({
   const t = useT(slideCardI18n);
   const { confirm, ConfirmDialog } = useConfirm();
   const imageUrl = page.generated_image_path
-    ? getImageUrl(page.generated_image_path, page.updated_at)
+    ? getThumbnailUrl(page.generated_image_path, 320, page.updated_at)
     : '';
   
   const generating = isGenerating || page.status === 'QUEUED' || page.status === 'GENERATING';
@@ -321,7 +321,7 @@ import { SlideCard } from '@/components/preview/SlideCard';
 import { PagePropertiesDrawer, clampWidth, readStoredDrawerWidth } from '@/components/preview/PagePropertiesDrawer';
 import { useProjectStore } from '@/store/useProjectStore';
 import { useExportTasksStore, type ExportTaskType } from '@/store/useExportTasksStore';
-import { getImageUrl } from '@/api/client';
+import { getImageUrl, getThumbnailUrl } from '@/api/client';
 import { getPageImageVersions, setCurrentImageVersion, updateProject, uploadTemplate, exportPPTX as apiExportPPTX, exportPDF as apiExportPDF, exportImages as apiExportImages, exportEditablePPTX as apiExportEditablePPTX, exportVideo as apiExportVideo, getSettings, getElevenLabsVoices, updateSettings } from '@/api/endpoints';
 import type { ImageVersion, DescriptionContent, ExportExtractorMethod, ExportInpaintMethod, Page, NarrationConfig } from '@/types';
 import { normalizeErrorMessage } from '@/utils';
@@ -2829,7 +2829,7 @@ export const SlidePreview: React.FC = () => {
                     >
                       {page.generated_image_path ? (
                         <img
-                          src={getImageUrl(page.generated_image_path, page.updated_at)}
+                          src={getThumbnailUrl(page.generated_image_path, 80, page.updated_at)}
                           alt={`Slide ${index + 1}`}
                           className="w-full h-full object-cover rounded"
                         />
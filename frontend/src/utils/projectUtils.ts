@@ -1,4 +1,4 @@
-import { getImageUrl } from '@/api/client';
+import { getThumbnailUrl } from '@/api/client';
 import type { Project, Page, DescriptionContent } from '@/types';
 import { downloadFile } from './index';
 import { getT } from './i18nHelper';
@@ -90,7 +90,7 @@ export const getFirstPageImage = (project: Project): string | null => {
   // 找到第一页有图片的页面，优先使用 generated_image_url（已包含缩略图逻辑）
   const firstPageWithImage = project.pages.find(p => p.generated_image_url);
   if (firstPageWithImage?.generated_image_url) {
-    return getImageUrl(firstPageWithImage.generated_image_url, firstPageWithImage.updated_at);
+    return getThumbnailUrl(firstPageWithImage.generated_image_url, 256, firstPageWithImage.updated_at);
   }
 
   return null;
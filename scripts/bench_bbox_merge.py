@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+边界框合并 / 包含判断基准测试
+
+对比旧的两两循环与 utils.geometry 的实现：
+    merge     merge_overlapping_bboxes：多轮 O(n²) 迭代合并 vs 扫描线 + 并查集
+    contain   百度OCR框 × MinerU图片框的包含判断：双层循环 vs 向量化比例矩阵
+    min_gap   表格单元格最小间距：双层循环 vs 分块向量化
+
+旧实现是 O(n²)（合并还要多轮），框数超过 --legacy-max 时跳过旧实现。
+
+使用方法:
+    # 默认 1k 与 10k 个框
+    python scripts/bench_bbox_merge.py
+
+    # 指定框数，并强制 10k 也跑旧实现（很慢）
+    python scripts/bench_bbox_merge.py --sizes 1000 10000 --legacy-max 10000
+
+输出格式（每个操作 × 框数一行，时间单位毫秒）:
+    op        boxes   legacy_ms    new_ms  speedup
+    merge      1000       ...         ...      ...
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def make_text_lines(count: int, seed: int = 0):
+    """模拟 OCR 输出：按行排布的文字框，行内有少量重叠与间隙"""
+    rng = random.Random(seed)
+    per_row = 8
+    boxes = []
+    for i in range(count):
+        row, col = divmod(i, per_row)
+        x0 = col * 240 + rng.randrange(-15, 15)
+        y0 = row * 48 + rng.randrange(-4, 4)
+        boxes.append((x0, y0, x0 + rng.randrange(120, 260), y0 + rng.randrange(18, 30)))
+    return boxes
+
+
+def legacy_merge(boxes, threshold):
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        new_boxes, used = [], set()
+        for i, current in enumerate(boxes):
+            if i in used:
+                continue
+            for j, other in enumerate(boxes):
+                if j <= i or j in used:
+                    continue
+                if (current[0] - threshold <= other[2] and other[0] <= current[2] + threshold and
+                        current[1] - threshold <= other[3] and other[1] <= current[3] + threshold):
+                    current = (min(current[0], other[0]), min(current[1], other[1]),
+                               max(current[2], other[2]), max(current[3], other[3]))
+                    used.add(j)
+                    merged = True
+            new_boxes.append(current)
+            used.add(i)
+        boxes = new_boxes
+    return boxes
+
+
+def legacy_contain(inner_boxes, outer_boxes, threshold=0.8):
+    hits = set()
+    for outer in outer_boxes:
+        for idx, inner in enumerate(inner_boxes):
+            iw = min(inner[2], outer[2]) - max(inner[0], outer[0])
+            ih = min(inner[3], outer[3]) - max(inner[1], outer[1])
+            area = (inner[2] - inner[0]) * (inner[3] - inner[1])
+            if iw > 0 and ih > 0 and area > 0 and iw * ih / area >= threshold:
+                hits.add(idx)
+    return hits
+
+
+def vectorized_contain(inner_boxes, outer_boxes, threshold=0.8):
+    from utils import geometry
+
+    ratios = geometry.containment_matrix(geometry.as_array(inner_boxes), geometry.as_array(outer_boxes))
+    return set(np.flatnonzero((ratios >= threshold).any(axis=1)).tolist())
+
+
+def legacy_min_gap(boxes):
+    min_gap = float('inf')
+    for i, (ax0, ay0, ax1, ay1) in enumerate(boxes):
+        for j, (bx0, by0, bx1, by1) in enumerate(boxes):
+            if i >= j:
+                continue
+            x_overlap = not (ax1 <= bx0 or bx1 <= ax0)
+            y_overlap = not (ay1 <= by0 or by1 <= ay0)
+            if x_overlap and y_overlap:
+                min_gap = min(min_gap, -min(min(ax1, bx1) - max(ax0, bx0), min(ay1, by1) - max(ay0, by0)))
+            elif x_overlap:
+                min_gap = min(min_gap, by0 - ay1 if ay1 <= by0 else ay0 - by1)
+            elif y_overlap:
+                min_gap = min(min_gap, bx0 - ax1 if ax1 <= bx0 else ax0 - bx1)
+    return min_gap
+
+
+def timed(func, *args):
+    began = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - began) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bounding box merge / containment benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='框数')
+    parser.add_argument('--threshold', type=int, default=10, help='合并阈值（像素）')
+    parser.add_argument('--legacy-max', type=int, default=2000, help='超过该框数时跳过旧实现')
+    args = parser.parse_args()
+
+    from utils import geometry
+    from utils.mask_utils import merge_overlapping_bboxes
+
+    print(f"{'op':<9} {'boxes':>6} {'legacy_ms':>11} {'new_ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        boxes = make_text_lines(size)
+        images = make_text_lines(max(size // 20, 1), seed=1)
+        images = [(x0, y0, x1 + 400, y1 + 300) for x0, y0, x1, y1 in images]
+        run_legacy = size <= args.legacy_max
+
+        cases = [
+            ('merge', lambda: merge_overlapping_bboxes(boxes, args.threshold),
+             lambda: legacy_merge(boxes, args.threshold)),
+            ('contain', lambda: vectorized_contain(boxes, images), lambda: legacy_contain(boxes, images)),
+            ('min_gap', lambda: geometry.min_pairwise_gap(geometry.as_array(boxes)),
+             lambda: legacy_min_gap(boxes)),
+        ]
+        for name, new, legacy in cases:
+            new_result, new_ms = timed(new)
+            if run_legacy:
+                legacy_result, legacy_ms = timed(legacy)
+                if legacy_result != new_result:
+                    raise SystemExit(f"{name} @ {size}: results differ")
+                print(f"{name:<9} {size:>6} {legacy_ms:>11.1f} {new_ms:>9.1f} {legacy_ms / new_ms:>7.1f}x")
+            else:
+                print(f"{name:<9} {size:>6} {'skipped':>11} {new_ms:>9.1f} {'-':>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Ken Burns 帧生成基准测试
+
+对比三种帧生成方式的每秒帧数（fps）：
+    legacy  旧实现：逐帧计算缩放/平移 → getRectSubPix → resize → tobytes() 写管道
+    warp    预计算仿射矩阵 → 单次 warpAffine（BGRA）写入复用缓冲区 → memoryview 零拷贝写管道
+    ffmpeg  由 FFmpeg zoompan 滤镜生成运动并编码（端到端，需要本机安装 FFmpeg，--encode 时才测）
+
+legacy / warp 默认写入 /dev/null，只测帧生成与管道写入开销；加 --encode 时三者都走完整的 libx264 编码。
+
+使用方法:
+    # 默认 1080p、25fps、每段 20 秒，zoom_in
+    python scripts/bench_ken_burns.py
+
+    # 指定分辨率、时长与动效
+    python scripts/bench_ken_burns.py --width 1280 --height 720 --seconds 10 --effect pan_left
+
+    # 端到端编码对比（含 ffmpeg zoompan 后端）
+    python scripts/bench_ken_burns.py --encode --seconds 5
+
+输出格式（每种方式一行）:
+    engine   frames  seconds      fps
+    legacy      500      ...      ...
+    warp        500      ...      ...
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def make_slide(path: str, width: int, height: int):
+    """生成一张带细节的测试幻灯片"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', (width, height), color=(30, 60, 120))
+    draw = ImageDraw.Draw(image)
+    for i in range(0, width, 40):
+        draw.line([(i, 0), (width - i, height)], fill=(200, 200, 255), width=2)
+    draw.rectangle([width // 10, height // 10, width * 9 // 10, height * 9 // 10], outline='white', width=8)
+    image.save(path)
+
+
+def prepare(image_path: str, args):
+    import cv2
+    from services import tts_video_service as tvs
+
+    canvas_w = int(args.width * max(tvs.KEN_BURNS_MAX_ZOOM, tvs.KEN_BURNS_PAN_CANVAS_SCALE))
+    canvas_h = int(args.height * max(tvs.KEN_BURNS_MAX_ZOOM, tvs.KEN_BURNS_PAN_CANVAS_SCALE))
+    img, (slide_x, _, slide_w, _) = tvs._prepare_canvas(
+        cv2.imread(image_path),
+        int(args.width / tvs.KEN_BURNS_MAX_ZOOM), int(args.height / tvs.KEN_BURNS_MAX_ZOOM),
+        canvas_w, canvas_h,
+    )
+    motion = tvs._ken_burns_motion(
+        args.effect, args.width, args.height, canvas_w, canvas_h, slide_x, slide_w, tvs.KEN_BURNS_MAX_ZOOM,
+    )
+    return img, motion
+
+
+def run_legacy(img, motion, total_frames: int, args, sink) -> None:
+    import cv2
+
+    z_start, z_end, cx_start, cx_end, cy = motion
+    ih, iw = img.shape[:2]
+    for i in range(total_frames):
+        t = i / max(total_frames - 1, 1)
+        z = z_start + (z_end - z_start) * t
+        crop_w, crop_h = args.width / z, args.height / z
+        cx = max(crop_w / 2.0, min(cx_start + (cx_end - cx_start) * t, iw - crop_w / 2.0))
+        y = max(crop_h / 2.0, min(cy, ih - crop_h / 2.0))
+        patch = cv2.getRectSubPix(img, (int(crop_w + 0.5), int(crop_h + 0.5)), (cx, y))
+        frame = cv2.resize(patch, (args.width, args.height), interpolation=cv2.INTER_LINEAR)
+        sink.write(frame.tobytes())
+
+
+def run_warp(img, motion, total_frames: int, args, sink) -> None:
+    import cv2
+    from services import tts_video_service as tvs
+
+    ih, iw = img.shape[:2]
+    schedule = tvs.ken_burns_schedule(motion, total_frames, args.width, args.height, iw, ih)
+    canvas = cv2.cvtColor(img, cv2.COLOR_BGR2BGRA)
+    view = None
+    for frame in tvs.iter_ken_burns_frames(canvas, schedule, args.width, args.height):
+        if view is None:
+            view = memoryview(frame).cast('B')
+        sink.write(view)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ken Burns frame generation benchmark')
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--seconds', type=float, default=20.0, help='片段时长（秒）')
+    parser.add_argument('--effect', default='zoom_in', choices=['zoom_in', 'zoom_out', 'pan_left', 'pan_right'])
+    parser.add_argument('--encode', action='store_true', help='端到端编码对比（需要 FFmpeg）')
+    parser.add_argument('--ffmpeg', default=os.getenv('FFMPEG_PATH', 'ffmpeg'))
+    args = parser.parse_args()
+
+    from services.tts_video_service import create_ken_burns_clip
+
+    total_frames = max(int(args.seconds * args.fps), 1)
+    work_dir = tempfile.mkdtemp(prefix='banana-kenburns-bench-')
+    try:
+        image_path = os.path.join(work_dir, 'slide.png')
+        make_slide(image_path, args.width, args.height)
+        results = []
+
+        if args.encode:
+            for backend in ('opencv', 'ffmpeg'):
+                began = time.perf_counter()
+                create_ken_burns_clip(
+                    image_path, os.path.join(work_dir, f'{backend}.mp4'), args.seconds,
+                    width=args.width, height=args.height, fps=args.fps,
+                    effect_type=args.effect, ffmpeg_path=args.ffmpeg, backend=backend,
+                )
+                results.append((backend, time.perf_counter() - began))
+        else:
+            img, motion = prepare(image_path, args)
+            for name, runner in (('legacy', run_legacy), ('warp', run_warp)):
+                with open(os.devnull, 'wb') as sink:
+                    began = time.perf_counter()
+                    runner(img, motion, total_frames, args, sink)
+                    results.append((name, time.perf_counter() - began))
+
+        print(f"{'engine':<8} {'frames':>6} {'seconds':>8} {'fps':>8}")
+        for name, elapsed in results:
+            print(f"{name:<8} {total_frames:>6} {elapsed:>8.2f} {total_frames / elapsed:>8.1f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
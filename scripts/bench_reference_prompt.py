@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+单页描述 prompt 大小基准测试
+
+模拟从两份长文档生成一份多页 PPT：对比每页都附带参考文件全文
+（REFERENCE_CONTEXT_TOKEN_BUDGET=0）与按页 BM25 检索片段时的 prompt 大小，
+并给出建索引与每页检索的耗时。
+
+使用方法:
+    # 默认：40 页 PPT，两份各 100 页的文档
+    python scripts/bench_reference_prompt.py
+
+    # 自定义规模与预算
+    python scripts/bench_reference_prompt.py --pages 60 --doc-pages 200 --budget 4000 --top-k 6
+
+输出格式:
+    mode        avg_tokens/page   total_tokens   prompt_ms/page
+    full                    ...            ...              ...
+    retrieval               ...            ...              ...
+    index build: ... ms (... chunks)
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+TOPICS = [
+    'revenue', 'churn', 'pricing', 'hiring', 'latency', 'security', 'compliance', 'roadmap',
+    'marketing', 'partners', 'inventory', 'logistics', 'support', 'research', 'patents', 'energy',
+    '供应链', '数据中心', '用户增长', '海外市场',
+]
+FILLER = ('analysis', 'quarter', 'team', 'metric', 'trend', 'customer', 'region', 'forecast',
+          'budget', 'risk', 'initiative', 'baseline', '指标', '同比', '团队', '计划')
+
+
+def make_document(name: str, pages: int, rng: random.Random) -> str:
+    """每页一个二级标题，约 2500 字符正文"""
+    parts = [f'# {name}']
+    for page in range(pages):
+        topic = TOPICS[page % len(TOPICS)]
+        parts.append(f'## {page + 1}. {topic} {rng.choice(FILLER)}')
+        for _ in range(5):
+            words = [rng.choice(FILLER) for _ in range(60)] + [topic] * 4
+            rng.shuffle(words)
+            parts.append(' '.join(words) + '.')
+    return '\n\n'.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-page reference prompt size benchmark')
+    parser.add_argument('--pages', type=int, default=40, help='PPT 页数')
+    parser.add_argument('--doc-pages', type=int, default=100, help='每份参考文档的页数')
+    parser.add_argument('--budget', type=int, default=6000, help='REFERENCE_CONTEXT_TOKEN_BUDGET')
+    parser.add_argument('--top-k', type=int, default=8, help='REFERENCE_RETRIEVAL_TOP_K')
+    args = parser.parse_args()
+
+    import os
+    from services import reference_index
+    from services.ai_service import ProjectContext
+    from services.prompts import get_page_description_prompt
+
+    rng = random.Random(0)
+    files = [{'filename': f'doc{i}.md', 'content': make_document(f'Document {i}', args.doc_pages, rng)}
+             for i in range(2)]
+    context = ProjectContext({'idea_prompt': 'Annual business review', 'creation_type': 'idea'}, files)
+    outline = [{'title': f'{TOPICS[i % len(TOPICS)]} {rng.choice(FILLER)}',
+                'points': [f'{TOPICS[i % len(TOPICS)]} {rng.choice(FILLER)}' for _ in range(3)]}
+               for i in range(args.pages)]
+
+    began = time.perf_counter()
+    chunk_count = sum(len(reference_index.get_index(f['content']).chunks) for f in files)
+    build_ms = (time.perf_counter() - began) * 1000
+
+    print(f"{'mode':<10} {'avg_tokens/page':>16} {'total_tokens':>13} {'prompt_ms/page':>15}")
+    for mode, budget in (('full', 0), ('retrieval', args.budget)):
+        os.environ['REFERENCE_CONTEXT_TOKEN_BUDGET'] = str(budget)
+        os.environ['REFERENCE_RETRIEVAL_TOP_K'] = str(args.top_k)
+        total = 0
+        began = time.perf_counter()
+        for index, page in enumerate(outline, start=1):
+            prompt = get_page_description_prompt(context, outline, page, index)
+            total += reference_index.estimate_tokens(prompt)
+        per_page_ms = (time.perf_counter() - began) * 1000 / len(outline)
+        print(f"{mode:<10} {total // len(outline):>16} {total:>13} {per_page_ms:>15.2f}")
+    print(f"index build: {build_ms:.1f} ms ({chunk_count} chunks)")
+
+
+if __name__ == '__main__':
+    main()
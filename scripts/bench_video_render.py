@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+播报视频片段渲染基准测试
+
+生成 N 张合成幻灯片，按无旁白页面（静音片段）走完整的 generate_narration_video 流水线，
+对比串行渲染（--workers 1）与并行渲染的墙钟时间，观察耗时随页数的变化。需要本机安装 FFmpeg。
+
+使用方法:
+    # 默认测 5 / 10 / 20 / 40 页，串行 vs 按 CPU 核数并行
+    python scripts/bench_video_render.py
+
+    # 指定页数、并行数，开启 Ken Burns（OpenCV 逐帧渲染，更吃 CPU）
+    python scripts/bench_video_render.py --pages 10 40 --workers 8 --ken-burns
+
+    # 缩短每页时长、降低分辨率，快速冒烟
+    python scripts/bench_video_render.py --pages 4 --seconds 1 --width 640 --height 360
+
+输出格式（每个页数一行）:
+    pages  serial_s  parallel_s  speedup  workers
+       10      ...         ...      ...x        8
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def make_slides(directory: str, count: int, width: int, height: int):
+    """生成带页码的纯色幻灯片图片"""
+    from PIL import Image, ImageDraw
+
+    paths = []
+    for i in range(count):
+        image = Image.new('RGB', (width, height), color=(40 + i * 5 % 200, 90, 160))
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([width // 10, height // 10, width * 9 // 10, height * 9 // 10], outline='white', width=6)
+        draw.text((width // 2, height // 2), f'Slide {i + 1}', fill='white')
+        path = os.path.join(directory, f'slide_{i:03d}.png')
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def render(slides, output_path: str, args, workers: int) -> float:
+    from services.tts_video_service import generate_narration_video
+
+    pages = [
+        {'image_path': path, 'narration_text': None, 'page_index': i}
+        for i, path in enumerate(slides)
+    ]
+    began = time.perf_counter()
+    generate_narration_video(
+        pages_data=pages,
+        output_path=output_path,
+        width=args.width,
+        height=args.height,
+        fps=args.fps,
+        enable_ken_burns=args.ken_burns,
+        ffmpeg_path=args.ffmpeg,
+        silent_duration=args.seconds,
+        render_workers=workers,
+    )
+    return time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Narration video clip rendering benchmark')
+    parser.add_argument('--pages', type=int, nargs='+', default=[5, 10, 20, 40])
+    parser.add_argument('--workers', type=int, default=0, help='并行渲染数（默认按 CPU 核数）')
+    parser.add_argument('--seconds', type=float, default=3.0, help='每页时长（秒）')
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--ken-burns', action='store_true')
+    parser.add_argument('--ffmpeg', default=os.getenv('FFMPEG_PATH', 'ffmpeg'))
+    args = parser.parse_args()
+
+    from services.tts_video_service import resolve_render_workers
+
+    work_dir = tempfile.mkdtemp(prefix='banana-video-bench-')
+    try:
+        slides = make_slides(work_dir, max(args.pages), args.width, args.height)
+        print(f"{'pages':>5}  {'serial_s':>8}  {'parallel_s':>10}  {'speedup':>7}  {'workers':>7}")
+        for count in args.pages:
+            workers = resolve_render_workers(count, args.width, args.height, max_workers=args.workers)
+            serial = render(slides[:count], os.path.join(work_dir, f'serial_{count}.mp4'), args, 1)
+            parallel = render(slides[:count], os.path.join(work_dir, f'parallel_{count}.mp4'), args, workers)
+            print(f"{count:>5}  {serial:>8.1f}  {parallel:>10.1f}  {serial / parallel:>6.1f}x  {workers:>7}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()